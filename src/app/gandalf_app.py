@@ -4,13 +4,20 @@ import os
 import json
 import logging
 from operator import itemgetter
-from flask import (Flask, render_template, request,
+from flask import (Flask, render_template, request, send_file,
                    redirect, Response, session, url_for, jsonify)
 from flask_login import (LoginManager, UserMixin,
                          current_user, login_required, logout_user, login_user)
 from gandalf_app_utils import (get_dashboard_json, get_summaries,
-                            get_vehicle_config, get_portal_map_dash)
+                            get_vehicle_config, get_portal_map_dash,
+                            get_positions, get_positions_cursor)
 from gandalf_mongo import (load_user, auth_user)
+from gandalf_events import poll_events
+from gandalf_tiles import (get_tile, get_geojson_source, get_portal_source,
+                           get_source_bounds, valid_tile, mapbox_vector_tile)
+from gandalf_series import (get_series, parse_time, DEFAULT_POINTS,
+                            MAX_POINTS, METHODS, SENSOR_NAME)
+from gandalf_plots import request_plot, RETRY_SECONDS
 
 class ConfigClass(object):
     """
@@ -125,8 +132,18 @@ def create_app():
         dashboard_json = get_portal_map_dash(vehicle, dash_date)
         file_name = ("/data/gandalf/%s/%s/%s/%s/processed_data/%s.json" %
                      (org, vehicle, year, date, vehicle))
+        # 2026-10-19 Draw the track from vector tiles when we can
+        tile_url = None
+        tile_bounds = None
+        source, data_file = get_portal_source(org, vehicle, year, date)
+        if mapbox_vector_tile is not None and source is not None:
+            tile_bounds = get_source_bounds(source, data_file)
+            if tile_bounds is not None:
+                tile_url = ('/tiles/portal/%s/%s/%s/%s/{z}/{x}/{y}.mvt' %
+                            (org, vehicle, year, date))
         return render_template('portalMap.html',vehicle_type=vehicle_type,
-                               json_file=file_name,
+                               json_file=file_name, tile_url=tile_url,
+                               tile_bounds=tile_bounds,
                                dashboard_json=dashboard_json)
 
     @app.route('/team')
@@ -141,7 +158,180 @@ def create_app():
     @app.route('/')
     def deployed():
         dashboard_json = get_dashboard_json()
-        return render_template('gandalf.html', vehicles = dashboard_json)
+        # 2026-10-19 The map draws from /tiles/ when we can encode them
+        tile_root = '/tiles' if mapbox_vector_tile is not None else None
+        return render_template('gandalf.html', vehicles = dashboard_json,
+                               positions_since = get_positions_cursor(),
+                               tile_root = tile_root)
+
+    @app.route('/api/positions')
+    def positions():
+        """
+        2026-10-19: New track points and last_pos records since ?since=
+        (the 'now' of the previous reply), optionally for one ?vehicle=.
+        positions.js polls this to extend tracks in place.
+        """
+        try:
+            since = float(request.args.get('since', 0))
+        except ValueError:
+            return jsonify({'error': 'since must be an epoch'}), 400
+        vehicle = request.args.get('vehicle')
+        if vehicle is not None and (not vehicle or
+                                    vehicle != os.path.basename(vehicle)):
+            return jsonify({'error': 'bad vehicle'}), 400
+        return jsonify(get_positions(since, vehicle))
+
+    @app.route('/api/events')
+    def events():
+        """
+        2026-10-19: Long-poll for the events after last_id, one per MCP
+        publish that changed a vehicle. positions.js fetches
+        /api/positions when one arrives. No last_id answers at once with
+        the cursor to start from.
+        """
+        last_id = request.args.get('last_id')
+        try:
+            last_id = int(last_id) if last_id else None
+        except ValueError:
+            return jsonify({'error': 'last_id must be an event id'}), 400
+        response = jsonify(poll_events(last_id))
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    def tile_response(source, z, x, y, data_file=None):
+        """
+        2026-10-19: One MVT tile. The URL has no version in it, so the
+        ETag is the data version and browsers revalidate each time.
+        """
+        if mapbox_vector_tile is None:
+            return jsonify({'error': 'vector tiles not available'}), 501
+        if not valid_tile(z, x, y):
+            return jsonify({'error': 'no such tile'}), 404
+        tile, version = get_tile(source, z, x, y, data_file)
+        if tile is None:
+            return jsonify({'error': 'no data for %s' % source}), 404
+        response = Response(tile,
+                            mimetype='application/vnd.mapbox-vector-tile',
+                            headers={'Cache-Control': 'no-cache'})
+        response.set_etag(version)
+        return response.make_conditional(request)
+
+    @app.route('/tiles/fleet/<int:z>/<int:x>/<int:y>.mvt')
+    def fleet_tile(z, x, y):
+        """
+        2026-10-19: Deployed vehicle tracks and positions from the
+        position index
+        """
+        return tile_response('fleet', z, x, y)
+
+    @app.route('/tiles/<name>/<int:z>/<int:x>/<int:y>.mvt')
+    def geojson_tile(name, z, x, y):
+        """
+        2026-10-19: Tiles of one of the map's GeoJSON files, argo etc.
+        """
+        data_file = get_geojson_source(name)
+        if data_file is None:
+            return jsonify({'error': 'no such tile source'}), 404
+        return tile_response(name, z, x, y, data_file)
+
+    @app.route('/tiles/portal/<org>/<vehicle>/<year>/<date>/'
+               '<int:z>/<int:x>/<int:y>.mvt')
+    def portal_tile(org, vehicle, year, date, z, x, y):
+        """
+        2026-10-19: Tiles of an archived deployment for the portal map
+        """
+        source, data_file = get_portal_source(org, vehicle, year, date)
+        if source is None:
+            return jsonify({'error': 'bad deployment'}), 400
+        return tile_response(source, z, x, y, data_file)
+
+    @app.route('/api/vehicle/<vehicle>/series/<sensor>')
+    def series(vehicle, sensor):
+        """
+        2026-10-19: time/depth/value of one sensor, downsampled to
+        ?points= (default DEFAULT_POINTS) by ?method=lttb|minmax, between
+        ?start= and ?end= (epoch or ISO)
+        """
+        if vehicle != os.path.basename(vehicle):
+            return jsonify({'error': 'bad vehicle'}), 400
+        if not SENSOR_NAME.match(sensor):
+            return jsonify({'error': 'bad sensor'}), 400
+        method = request.args.get('method', 'lttb')
+        if method not in METHODS:
+            return jsonify({'error': 'method must be lttb or minmax'}), 400
+        try:
+            points = int(request.args.get('points', DEFAULT_POINTS))
+            start = parse_time(request.args.get('start'))
+            end = parse_time(request.args.get('end'))
+        except ValueError:
+            return jsonify({'error': 'bad points, start or end'}), 400
+        if not 3 <= points <= MAX_POINTS:
+            return jsonify({'error': 'points must be 3 to %d' %
+                            MAX_POINTS}), 400
+        body, etag = get_series(vehicle, sensor, start, end, points, method)
+        if body is None:
+            return jsonify({'error': 'no %s data for %s' %
+                            (sensor, vehicle)}), 404
+        response = Response(body, mimetype='application/json',
+                            headers={'Cache-Control': 'no-cache'})
+        response.set_etag(etag)
+        return response.make_conditional(request)
+
+    @app.route('/plots/<vehicle>/<sensor>.png')
+    def plot(vehicle, sensor):
+        """
+        2026-10-19: Sensor plot for ?start=&end= (epoch or ISO) and
+        ?max_depth= (m), rendered by gandalf_plot_service. A plot that
+        isn't cached yet gets 202 with Retry-After while the service
+        renders it; we never wait on a render. The service only does
+        Slocum sensors, so depth_avg_curr and other vehicles' plots go to
+        the ones the MCP prerendered.
+        """
+        if (vehicle != os.path.basename(vehicle) or
+                not SENSOR_NAME.match(sensor)):
+            return jsonify({'error': 'bad vehicle or sensor'}), 400
+        try:
+            start = parse_time(request.args.get('start'))
+            end = parse_time(request.args.get('end'))
+            max_depth = request.args.get('max_depth')
+            max_depth = float(max_depth) if max_depth else None
+        except ValueError:
+            return jsonify({'error': 'bad start, end or max_depth'}), 400
+        if max_depth is not None and max_depth <= 0:
+            return jsonify({'error': 'max_depth must be positive'}), 400
+        try:
+            config = get_vehicle_config(vehicle)['gandalf']
+            slocum = config['vehicle_type'].lower().startswith('slocum')
+            if config['status'] == 'deployed':
+                plot_dir = config['plots']['deployed_plot_dir']
+            else:
+                plot_dir = config['plots']['postprocess_plot_dir']
+        except (OSError, ValueError, KeyError) as error:
+            logging.warning('plot(%s): %s', vehicle, error)
+            return jsonify({'error': 'no vehicle %s' % vehicle}), 404
+        if sensor == 'depth_avg_curr' or not slocum:
+            return redirect('%s/%s.png' % (plot_dir, sensor))
+        status, detail = request_plot(vehicle, sensor, start, end, max_depth)
+        if status == 'ok':
+            return send_file(detail, mimetype='image/png', conditional=True,
+                             max_age=0)
+        if status == 'pending':
+            response = jsonify({'status': 'rendering',
+                                'retry': RETRY_SECONDS})
+            response.status_code = 202
+            response.headers['Retry-After'] = str(RETRY_SECONDS)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        if status == 'missing':
+            return jsonify({'error': detail}), 404
+        return jsonify({'error': detail}), 503
+
+    @app.route('/charts/<vehicle>/<sensor>')
+    def charts(vehicle, sensor):
+        """
+        2026-10-19: Interactive chart of one sensor from the series API
+        """
+        return render_template('charts.html', vehicle=vehicle, sensor=sensor)
 
     @app.route('/3d')
     def plotly():
@@ -4,6 +4,8 @@ import json
 import sys
 import datetime
 import logging
+import threading
+from bisect import bisect_right
 from datetime import timezone
 """
 Name: gandalf_utils
@@ -17,19 +19,190 @@ extract what's needed and put into a dict called vjson. This eliminates a lot
 of the extraneous crap.
 """
 
+_FLEET_REGISTRY_CACHE = {}
+# Same override as the tools' gandalf_config_registry
+VEHICLE_CONFIG_ROOT = os.environ.get('GANDALF_VEHICLE_CONFIGS',
+                                     '/data/gandalf/gandalf_configs/vehicles')
+GEOJSON_DIR = '/data/gandalf/deployments/geojson'
+# Written by the tools' gandalf_positions
+POSITIONS_DIR = '/data/gandalf/deployments/positions'
+_POSITIONS_CACHE = {}
+_POSITIONS_LOCK = threading.Lock()
+
+
 def get_vehicle_config(vehicle):
     """
     Sorta evident...
+    2026-10-19: Root from VEHICLE_CONFIG_ROOT
     """
     logging.debug("get_vehicle_config(%s)" % vehicle)
     # get config debug for each vehicle
-    data_file = ("/data/gandalf/gandalf_configs/vehicles/%s/ngdac/deployment.json"
-                 % vehicle)
+    data_file = ("%s/%s/ngdac/deployment.json" % (VEHICLE_CONFIG_ROOT,
+                                                  vehicle))
     config = open(data_file,'r').read();
     config = json.loads(config)
     return config
 
 
+def get_fleet_registry():
+    """
+    Name:           get_fleet_registry
+    Date:           2026-10-19
+    Modified:       2026-10-19
+    Notes:          Reads the fleet index maintained by the tools container
+                    (gandalf_fleet_registry.py). Returns the vehicles dict or
+                    an empty dict if the index isn't there yet. We hold on
+                    to the parsed copy until the file's mtime changes.
+    """
+    data_file = "/data/gandalf/gandalf_configs/fleet_registry.json"
+    try:
+        mtime = os.stat(data_file).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    cached = _FLEET_REGISTRY_CACHE.get(data_file)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        fleet = json.loads(open(data_file, 'r').read())['vehicles']
+    except (ValueError, KeyError) as error:
+        logging.warning('get_fleet_registry(): %s', error)
+        return {}
+    _FLEET_REGISTRY_CACHE[data_file] = (mtime, fleet)
+    return fleet
+
+
+def read_position_index(vehicle, positions_dir=POSITIONS_DIR):
+    """
+    Name:           read_position_index
+    Date:           2026-10-19
+    Modified:       2026-10-19
+    Notes:          A vehicle's position index as {'entries', 'times',
+                    'reset_at'}: the lines oldest first, their t values and
+                    where the last reset line is. We keep the parsed lines
+                    and the byte offset we got to, so a poll only reads what
+                    the MCP appended since. A replaced file (new inode, or
+                    shorter) is read from the top. A partial last line is
+                    left for next time.
+    """
+    index_file = '%s/%s.jsonl' % (positions_dir, vehicle)
+    try:
+        stat = os.stat(index_file)
+    except FileNotFoundError:
+        return {'entries': [], 'times': [], 'reset_at': 0}
+    with _POSITIONS_LOCK:
+        cached = _POSITIONS_CACHE.get(index_file)
+        if (cached is None or cached['inode'] != stat.st_ino or
+                stat.st_size < cached['offset']):
+            cached = {'inode': stat.st_ino, 'offset': 0, 'entries': [],
+                      'times': [], 'reset_at': 0}
+        if stat.st_size > cached['offset']:
+            with open(index_file, 'rb') as index:
+                index.seek(cached['offset'])
+                data = index.read()
+            complete = data.rfind(b'\n') + 1
+            for line in data[:complete].splitlines():
+                if line.strip():
+                    entry = json.loads(line)
+                    if entry.get('reset'):
+                        cached['reset_at'] = len(cached['entries'])
+                    cached['entries'].append(entry)
+                    cached['times'].append(entry['t'])
+            cached['offset'] += complete
+        _POSITIONS_CACHE[index_file] = cached
+        return cached
+
+
+def get_indexed_vehicles(positions_dir=POSITIONS_DIR):
+    """Vehicles with a position index"""
+    try:
+        return sorted(fname[:-6] for fname in os.listdir(positions_dir)
+                      if fname.endswith('.jsonl'))
+    except FileNotFoundError:
+        return []
+
+
+def get_vehicle_positions(vehicle, since, positions_dir=POSITIONS_DIR,
+                          until=None):
+    """
+    Name:           get_vehicle_positions
+    Date:           2026-10-19
+    Modified:       2026-10-19
+    Notes:          What a client that has everything up to since is missing:
+                    {'t', 'reset', 'points', 'last_pos'} or None if nothing.
+                    A client from before the last reset gets the whole
+                    current track with reset set and replaces its own.
+                    2026-10-19: Only lines with t <= until, if given
+    """
+    index = read_position_index(vehicle, positions_dir)
+    entries, times = index['entries'], index['times']
+    end = len(entries) if until is None else bisect_right(times, until)
+    start = bisect_right(times, since)
+    if start >= end:
+        return None
+    reset_at = index['reset_at']
+    if reset_at >= end:
+        # The reset came after until; the client gets it next time
+        return None
+    reset = start <= reset_at
+    if reset:
+        start = reset_at
+    update = {'t': times[end - 1], 'reset': reset, 'points': [],
+              'last_pos': None}
+    for entry in entries[start:end]:
+        update['points'].extend(entry.get('points', []))
+        if 'last_pos' in entry:
+            update['last_pos'] = entry['last_pos']
+    return update
+
+
+def get_positions(since=0, vehicle=None, positions_dir=POSITIONS_DIR):
+    """
+    Name:           get_positions
+    Date:           2026-10-19
+    Modified:       2026-10-19
+    Notes:          Body of /api/positions. 'now' is the cursor to send as
+                    since= next time. It comes from the index, not our
+                    clock, so the tools and web containers needn't agree
+                    on the time.
+                    2026-10-19: 'now' is taken before we read any vehicle
+                    and we only send lines up to it. Taking the max as we
+                    went lost a line appended to a vehicle we'd already
+                    read: it was older than the cursor we handed out.
+    """
+    if vehicle is not None:
+        vehicles = [vehicle]
+    else:
+        vehicles = get_indexed_vehicles(positions_dir)
+    now = max(since, get_positions_cursor(positions_dir, vehicles))
+    positions = {'since': since, 'now': now, 'vehicles': {}}
+    for name in vehicles:
+        update = get_vehicle_positions(name, since, positions_dir, now)
+        if update is None:
+            continue
+        del update['t']
+        positions['vehicles'][name] = update
+    return positions
+
+
+def get_positions_cursor(positions_dir=POSITIONS_DIR, vehicles=None):
+    """
+    Name:           get_positions_cursor
+    Date:           2026-10-19
+    Modified:       2026-10-19
+    Notes:          Newest t in the index (or just vehicles'). The map page
+                    starts polling from here, as the GeoJSON it loads
+                    already has the rest.
+    """
+    cursor = 0
+    if vehicles is None:
+        vehicles = get_indexed_vehicles(positions_dir)
+    for name in vehicles:
+        times = read_position_index(name, positions_dir)['times']
+        if times:
+            cursor = max(cursor, times[-1])
+    return cursor
+
+
 def get_summaries():
     """
     Gets archived deployment data
@@ -73,12 +246,12 @@ def get_waveglider_dash():
     return
 
 
-def get_dashboard_json():
+def get_dashboard_json(data_path=GEOJSON_DIR):
     """
     Name:           get_dashboard_json
     Author:         bob.currier@gcoos.org
     Date:           2019-01-10
-    Modified:       2022-06-07
+    Modified:       2026-10-19
     Notes:          We need to iterate over all three vehicle type files:
                     slocal, erddap and seaglider. We pull vehicle info from
                     these files and then build JSON document w/format matching
@@ -86,12 +259,15 @@ def get_dashboard_json():
                     appended to dashboard_json[]. We return dashboard_json
                     and deployment.html can interate over using Jinja
                     '{% for vehicle in vehicles %}'
+                    2026-10-19: Per-vehicle config info now comes from the
+                    fleet registry index vs opening each deployment.json.
+                    data_path is there for gandalf_benchmark.
 
     """
     dashboard_json = []
+    fleet = get_fleet_registry()
     #vehicle_types = ['local', 'erddap', 'seagliders','gdac']
     vehicle_types = ['seagliders', 'local', 'gdac', 'erddap']
-    data_path = '/data/gandalf/deployments/geojson'
 
     # Loop over all vehicle types (local, erddap, navocean)
     for v_type in vehicle_types:
@@ -117,7 +293,11 @@ def get_dashboard_json():
 
                     days_wet = (feature['properties']['days_wet'])
                     vehicle = (feature['properties']['vehicle'])
-                    vehicle_config = get_vehicle_config(vehicle)
+                    # 2026-10-19 Use the fleet index if we can
+                    if vehicle in fleet:
+                        vehicle_config = {'gandalf': fleet[vehicle]}
+                    else:
+                        vehicle_config = get_vehicle_config(vehicle)
 
                     # create the dict
                     vjson = {}
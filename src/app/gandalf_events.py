@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Name:       gandalf_events.py
+Created:    2026-10-19
+Modified:   2026-10-19
+Notes:      Long-poll for /api/events. The MCP's publish step
+            (tools gandalf_positions.notify_changes) appends one line per
+            run to events.ndjson next to the position index, saying which
+            vehicles changed. The web container shares /data/gandalf with
+            tools, so that file is our pipe.
+
+            One watcher thread per Apache process stats the file every
+            WATCH_SECONDS and wakes every waiting request when a new event
+            lands, so a hundred open maps cost one stat a second, not a
+            hundred polls. A request returns at the first event after its
+            last_id, or empty after POLL_SECONDS, and positions.js asks
+            again POLL_PAUSE_MS later. Anything it missed in between is
+            replayed from the last EVENTS_KEPT events.
+
+            Thread budget: a waiting request holds a mod_wsgi thread, so
+            each open map uses one for up to POLL_SECONDS out of every
+            POLL_SECONDS + POLL_PAUSE_MS (25s in 55s). With the web
+            container pinned to one CPU, size the mod_wsgi threads at
+            about half the open maps plus what the pages and tiles need.
+            We used to hold an SSE stream for five minutes, which pinned
+            a thread per tab the whole time.
+"""
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from gandalf_app_utils import POSITIONS_DIR
+
+EVENTS_FILE = '%s/events.ndjson' % POSITIONS_DIR
+EVENTS_KEPT = 200
+WATCH_SECONDS = 1
+# Longest we hold a request waiting for an event
+POLL_SECONDS = 25
+# positions.js waits this long between polls; it gets it from the reply
+POLL_PAUSE_MS = 30000
+
+
+class EventWatcher(object):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Tails events_file in a daemon thread, started by the first
+                request that needs it. Keeps the last EVENTS_KEPT events.
+    """
+    def __init__(self, events_file=EVENTS_FILE):
+        self.events_file = events_file
+        self.events = deque(maxlen=EVENTS_KEPT)
+        self.changed = threading.Condition()
+        self.inode = None
+        self.offset = 0
+        self.thread = None
+
+    def start(self):
+        with self.changed:
+            if self.thread is None:
+                self.read_new()
+                self.thread = threading.Thread(target=self.watch,
+                                               name='gandalf_events',
+                                               daemon=True)
+                self.thread.start()
+
+    def read_new(self):
+        """New complete lines since last time. True if there were any."""
+        try:
+            stat = os.stat(self.events_file)
+        except FileNotFoundError:
+            return False
+        # Replaced when the tools trim it: start over, skipping ids we have
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            self.inode = stat.st_ino
+            self.offset = 0
+        if stat.st_size == self.offset:
+            return False
+        with open(self.events_file, 'rb') as events:
+            events.seek(self.offset)
+            data = events.read()
+        complete = data.rfind(b'\n') + 1
+        self.offset += complete
+        added = False
+        for line in data[:complete].splitlines():
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if event['id'] > self.last_id():
+                self.events.append(event)
+                added = True
+        return added
+
+    def watch(self):
+        while True:
+            time.sleep(WATCH_SECONDS)
+            try:
+                with self.changed:
+                    if self.read_new():
+                        self.changed.notify_all()
+            except (OSError, KeyError) as error:
+                logging.warning('EventWatcher.watch(): %s', error)
+
+    def last_id(self):
+        return self.events[-1]['id'] if self.events else 0
+
+    def wait(self, last_id, timeout):
+        """Events after last_id, waiting up to timeout for one"""
+        with self.changed:
+            self.changed.wait_for(lambda: self.last_id() > last_id, timeout)
+            return [event for event in self.events if event['id'] > last_id]
+
+
+WATCHER = EventWatcher()
+
+
+def poll_events(last_id=None):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      {'last_id', 'events', 'pause_ms'} for one poll. Without a
+                last_id we answer at once with the newest id as the
+                client's cursor; the page it loaded is already that fresh.
+                Otherwise we wait up to POLL_SECONDS for events after
+                last_id. Each event is
+
+                    {"id": 42, "t": ..., "vehicles": {...}}
+    """
+    WATCHER.start()
+    if last_id is None:
+        events = []
+    else:
+        events = WATCHER.wait(last_id, POLL_SECONDS)
+    if events:
+        last_id = events[-1]['id']
+    elif last_id is None or last_id > WATCHER.last_id():
+        # New client, or the tools started the file over
+        last_id = WATCHER.last_id()
+    return {'last_id': last_id, 'events': events, 'pause_ms': POLL_PAUSE_MS}
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Name:       gandalf_plots.py
+Created:    2026-10-19
+Modified:   2026-10-19
+Notes:      Client for the tools' gandalf_plot_service, behind
+            /plots/<vehicle>/<sensor>.png. The service renders with the
+            Slocum plot code and keeps the PNGs in its own LRU cache under
+            /data/gandalf/plots, which we share, so all we do is ask for a
+            file and send it.
+
+            We never wait for a render: the request says "wait": false,
+            and a plot that isn't cached yet comes back "pending" while
+            the service renders it, so a cold render doesn't tie up a
+            mod_wsgi thread.
+
+            One JSON request line, one reply line:
+                ok {"file": .., "cached": bool}
+                pending <plot file>
+                missing <why>
+                error <why>
+"""
+import os
+import json
+import socket
+import logging
+
+# Same default and override as the tools' gandalf_plot_service
+PLOT_SOCKET = os.environ.get('GANDALF_PLOT_SOCKET',
+                             '/data/gandalf/plots/render.sock')
+# The service answers without rendering, so this is only for a wedged one
+REQUEST_TIMEOUT = 10
+# What we tell the browser to wait before asking again for a pending plot
+RETRY_SECONDS = 5
+
+
+def request_plot(vehicle, sensor, start=None, end=None, max_depth=None,
+                 socket_path=PLOT_SOCKET, timeout=REQUEST_TIMEOUT):
+    """
+    Name:       request_plot
+    Date:       2026-10-19
+    Modified:   2026-10-19
+    Notes:      (status, detail): ('ok', plot file), ('pending', plot
+                file), ('missing', why), ('error', why), or ('down', why)
+                if the service isn't reachable
+    """
+    request = {'command': 'render', 'vehicle': vehicle, 'sensor': sensor,
+               'start': start, 'end': end, 'max_depth': max_depth,
+               'wait': False}
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    try:
+        client.connect(socket_path)
+        client.sendall(('%s\n' % json.dumps(request)).encode())
+        with client.makefile('rb') as rfile:
+            line = rfile.readline().decode().rstrip('\n')
+    except OSError as error:
+        logging.warning('request_plot(%s, %s): %s', vehicle, sensor, error)
+        return 'down', str(error)
+    finally:
+        client.close()
+    status, _, detail = line.partition(' ')
+    if status == 'ok':
+        return 'ok', json.loads(detail)['file']
+    if status in ('pending', 'missing', 'error'):
+        return status, detail
+    return 'error', line or 'no reply'
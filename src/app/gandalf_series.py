@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Name:       gandalf_series.py
+Created:    2026-10-19
+Modified:   2026-10-19
+Notes:      Downsampled sensor time series for /api/vehicle/<v>/series/<s>.
+            Reads the vehicle's sensors.csv (the same file the plot tools
+            use), keeps rows in [start, end] and cuts them down to a point
+            budget so a chart gets a few thousand points, not the whole
+            deployment. Zoom in and the narrower window comes back at full
+            resolution once it fits the budget.
+
+            Two ways to downsample:
+                lttb    Largest-Triangle-Three-Buckets on (time, value).
+                        Keeps the shape of the line; the default.
+                minmax  The min and max of each bucket. Keeps every spike,
+                        at two points per bucket.
+
+            The parsed columns are held per process keyed by the csv's
+            mtime and size, and so are finished replies, so repeat requests
+            and other users' requests for the same window cost nothing until
+            the MCP writes a new sensors.csv.
+"""
+import os
+import re
+import json
+import math
+import logging
+import hashlib
+import threading
+from datetime import datetime, timezone
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from gandalf_app_utils import get_vehicle_config
+
+DEFAULT_POINTS = 2000
+MAX_POINTS = 20000
+METHODS = ('lttb', 'minmax')
+# (time, depth, depth scale) in the order we look for them. Slocum
+# sensors.csv has pressure in bar, the GDAC/ERDDAP builders depth in m.
+SERIES_COLUMNS = (('sci_m_present_time', 'sci_water_pressure', 10),
+                  ('m_present_time', 'm_depth', 1),
+                  ('epoch', 'depth', 1))
+SENSOR_NAME = re.compile(r'^[A-Za-z0-9_]+$')
+_COLUMN_CACHE = OrderedDict()
+_COLUMN_CACHE_SIZE = 8
+_REPLY_CACHE = OrderedDict()
+_REPLY_CACHE_SIZE = 64
+_CACHE_LOCK = threading.Lock()
+
+
+def cache_put(cache, size, key, value):
+    with _CACHE_LOCK:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > size:
+            cache.popitem(last=False)
+
+
+def cache_get(cache, key):
+    with _CACHE_LOCK:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def get_sensors_file(vehicle):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      The vehicle's sensors.csv: deployed or post-processed,
+                going by its status, as gandalf_3d_plotly picks it
+    """
+    try:
+        config = get_vehicle_config(vehicle)['gandalf']
+    except (OSError, ValueError, KeyError) as error:
+        logging.warning('get_sensors_file(%s): %s', vehicle, error)
+        return None
+    if config.get('status') == 'deployed':
+        return config.get('deployed_sensors_csv')
+    return config.get('post_sensors_csv')
+
+
+def get_data_version(data_file):
+    """mtime and size of data_file, None if it isn't there"""
+    try:
+        stat = os.stat(data_file)
+    except (FileNotFoundError, TypeError):
+        return None
+    return '%d_%d' % (stat.st_mtime_ns, stat.st_size)
+
+
+def parse_time(value):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Epoch seconds or an ISO date/time (UTC if no zone) to
+                epoch seconds. None stays None, anything else is a
+                ValueError, including nan and inf, which would end up as
+                NaN in the JSON.
+    """
+    if value is None or value == '':
+        return None
+    try:
+        epoch = float(value)
+    except ValueError:
+        epoch = None
+    if epoch is not None:
+        if not math.isfinite(epoch):
+            raise ValueError('%s is not a time' % value)
+        return epoch
+    when = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return when.timestamp()
+
+
+def load_columns(data_file, version, sensor):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      (time, depth, value) arrays for sensor, sorted by time with
+                the rows that have no value or time dropped. Depth is
+                padded forward as plot_sensor does since the CTD doesn't
+                report every row. None if the csv has no such sensor or
+                no time column we know.
+    """
+    key = (data_file, version, sensor)
+    columns = cache_get(_COLUMN_CACHE, key)
+    if columns is not None:
+        return columns
+    header = pd.read_csv(data_file, nrows=0).columns
+    if sensor not in header:
+        logging.warning('load_columns(%s): no %s', data_file, sensor)
+        return None
+    for time_column, depth_column, depth_scale in SERIES_COLUMNS:
+        if time_column in header:
+            break
+    else:
+        logging.warning('load_columns(%s): no time column', data_file)
+        return None
+    usecols = [time_column, sensor]
+    if depth_column in header and depth_column not in usecols:
+        usecols.append(depth_column)
+    data_frame = pd.read_csv(data_file, usecols=usecols)
+    if depth_column in data_frame:
+        depth = data_frame[depth_column].ffill() * depth_scale
+    else:
+        depth = pd.Series(np.nan, index=data_frame.index)
+    data_frame = pd.DataFrame({'time': data_frame[time_column],
+                               'depth': depth,
+                               'value': data_frame[sensor]})
+    data_frame = data_frame.dropna(subset=['time', 'value'])
+    data_frame = data_frame.sort_values('time', kind='stable')
+    columns = (data_frame['time'].to_numpy(dtype=float),
+               data_frame['depth'].to_numpy(dtype=float),
+               data_frame['value'].to_numpy(dtype=float))
+    cache_put(_COLUMN_CACHE, _COLUMN_CACHE_SIZE, key, columns)
+    logging.info('load_columns(%s): %d rows of %s', data_file,
+                 len(columns[0]), sensor)
+    return columns
+
+
+def lttb(x, y, threshold):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Largest-Triangle-Three-Buckets (Steinarsson 2013). Indices
+                of the threshold points to keep, first and last included.
+                From each bucket we keep the point making the biggest
+                triangle with the last kept point and the next bucket's
+                average.
+    """
+    count = len(x)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+    every = (count - 2) / float(threshold - 2)
+    indices = np.zeros(threshold, dtype=np.int64)
+    kept = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, count)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[kept] - avg_x) * (y[start:end] - y[kept]) -
+                      (x[kept] - x[start:end]) * (avg_y - y[kept]))
+        kept = start + int(np.argmax(area))
+        indices[bucket + 1] = kept
+    indices[-1] = count - 1
+    return indices
+
+
+def min_max(y, threshold):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Indices of the min and max of threshold // 2 equal buckets,
+                in time order
+    """
+    count = len(y)
+    buckets = max(threshold // 2, 1)
+    if threshold >= count:
+        return np.arange(count)
+    edges = np.linspace(0, count, buckets + 1).astype(np.int64)[:-1]
+    order = np.arange(count)
+    # Index of each bucket's min/max: reduce on the value, then find it
+    lows = np.minimum.reduceat(y, edges)
+    highs = np.maximum.reduceat(y, edges)
+    bucket_of = np.repeat(np.arange(buckets), np.diff(np.append(edges,
+                                                                count)))
+    is_low = y == lows[bucket_of]
+    is_high = y == highs[bucket_of]
+    first_low = np.full(buckets, count)
+    first_high = np.full(buckets, count)
+    np.minimum.at(first_low, bucket_of[is_low], order[is_low])
+    np.minimum.at(first_high, bucket_of[is_high], order[is_high])
+    return np.unique(np.concatenate((first_low, first_high)))
+
+
+def get_series(vehicle, sensor, start=None, end=None,
+               points=DEFAULT_POINTS, method='lttb'):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      (reply bytes, etag) for one series request, or (None, None)
+                if there's no such data. start and end are epoch seconds
+                or None; the caller checks sensor, points and method.
+
+                The reply is {vehicle, sensor, start, end, total, method,
+                points, time, depth, value}; total is how many rows the
+                window had before downsampling and method is 'full' when
+                it needed none.
+    """
+    data_file = get_sensors_file(vehicle)
+    version = get_data_version(data_file)
+    if version is None:
+        return None, None
+    key = (vehicle, sensor, version, start, end, points, method)
+    cached = cache_get(_REPLY_CACHE, key)
+    if cached is not None:
+        return cached
+
+    columns = load_columns(data_file, version, sensor)
+    if columns is None:
+        return None, None
+    times, depths, values = columns
+    first = 0 if start is None else np.searchsorted(times, start, 'left')
+    last = len(times) if end is None else np.searchsorted(times, end,
+                                                          'right')
+    times = times[first:last]
+    depths = depths[first:last]
+    values = values[first:last]
+    total = len(times)
+    used = method
+    if total <= points:
+        used = 'full'
+        keep = np.arange(total)
+    elif method == 'lttb':
+        keep = lttb(times, values, points)
+    else:
+        keep = min_max(values, points)
+
+    depth = np.round(depths[keep], 2)
+    reply = {'vehicle': vehicle, 'sensor': sensor,
+             'start': float(times[0]) if total else start,
+             'end': float(times[-1]) if total else end,
+             'total': total, 'method': used, 'points': len(keep),
+             'time': np.round(times[keep], 3).tolist(),
+             'depth': [None if np.isnan(d) else d for d in depth.tolist()],
+             'value': np.round(values[keep], 4).tolist()}
+    body = json.dumps(reply, separators=(',', ':')).encode('utf-8')
+    etag = hashlib.md5(repr(key).encode('utf-8')).hexdigest()
+    cache_put(_REPLY_CACHE, _REPLY_CACHE_SIZE, key, (body, etag))
+    return body, etag
@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+Name:       gandalf_tiles.py
+Created:    2026-10-19
+Modified:   2026-10-19
+Notes:      Mapbox Vector Tiles of vehicle tracks and positions for
+            /tiles/<source>/<z>/<x>/<y>.mvt. A tile is the same few KB
+            however long the deployment or however many floats are in the
+            bbox, which Leaflet on a phone handles far better than the full
+            GeoJSON.
+
+            Sources:
+                fleet       deployed vehicles, from the position index
+                argo etc.   any of TILE_GEOJSON under deployments/geojson
+                portal      an archived deployment's processed_data json
+
+            Each tile has two layers, 'tracks' (lines) and 'positions'
+            (points). Lines are Douglas-Peucker simplified to
+            SIMPLIFY_UNITS at the tile's zoom, so detail follows the zoom,
+            then clipped to the tile plus TILE_BUFFER.
+
+            Tiles are cached on disk under TILE_CACHE_DIR/<source>/<version>
+            where version is the position index cursor or the source file's
+            mtime and size. New data means a new version directory; the old
+            one is removed when the first tile of the new one is written.
+
+            mapbox_vector_tile does the protobuf encoding. Without it the
+            endpoint answers 501 and the map sticks to GeoJSON.
+"""
+import os
+import math
+import json
+import shutil
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+try:
+    import mapbox_vector_tile
+except ImportError:
+    mapbox_vector_tile = None
+from gandalf_app_utils import (GEOJSON_DIR, get_indexed_vehicles,
+                               get_vehicle_positions, get_positions_cursor)
+
+TILE_CACHE_DIR = '/data/gandalf/tiles'
+PORTAL_DATA_FILE = '/data/gandalf/%s/%s/%s/%s/processed_data/%s.json'
+TILE_EXTENT = 4096
+# A 4096 extent tile is shown 256px wide: 16 units is one screen pixel
+SIMPLIFY_UNITS = 16
+TILE_BUFFER = 64
+MAX_ZOOM = 18
+# GeoJSON files we'll serve as tiles, by data_source name
+TILE_GEOJSON = ('local', 'seagliders', 'gdac', 'erddap', 'argo', 'seatrec',
+                'ugos')
+# Property values we copy into tiles: enough to draw, and everything the
+# infobox.js templates read, so a click on a tile gets the same infobox
+# as the GeoJSON marker
+TILE_PROPERTIES = ('vehicle', 'public_name', 'infobox', 'platform',
+                   'last_surfaced', 'surf_time', 'because_why', 'mission_name',
+                   'last_date', 'float_type', 'pi', 'data_source',
+                   'infobox_image', 'operator', 'vehicle_model', 'project',
+                   'heading', 'speed', 'waypoint_range', 'waypoint_bearing',
+                   'data_source_url', 'mod_comp_path', 'latitude',
+                   'longitude', 'currPosIcon')
+# MVT values are scalars, so these go in as JSON strings and tiles.js
+# parses them back
+TILE_JSON_PROPERTIES = ('science', 'last_plots', 'series_plots', 'iconSize')
+STYLE_PROPERTIES = ('color', 'weight', 'opacity')
+# Projected sources and simplified lines kept in memory, per process
+_SOURCE_CACHE = OrderedDict()
+_SIMPLIFIED_CACHE = OrderedDict()
+_CACHE_SIZE = 16
+_CACHE_LOCK = threading.Lock()
+
+
+def project(coords):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      lon/lat array to Web Mercator in [0, 1], y down
+    """
+    coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+    lat = np.clip(coords[:, 1], -85.0511, 85.0511)
+    x = (coords[:, 0] + 180.0) / 360.0
+    y = (1.0 - np.log(np.tan(np.radians(lat)) +
+                      1.0 / np.cos(np.radians(lat))) / math.pi) / 2.0
+    return np.column_stack((x, y))
+
+
+def simplify(points, tolerance):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Douglas-Peucker, iterative so a long track can't recurse
+                too deep
+    """
+    count = len(points)
+    if count < 3:
+        return points
+    keep = np.zeros(count, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, count - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end <= start + 1:
+            continue
+        first = points[start]
+        chord = points[end] - first
+        between = points[start + 1:end] - first
+        length = math.hypot(chord[0], chord[1])
+        if length == 0:
+            dist = np.hypot(between[:, 0], between[:, 1])
+        else:
+            dist = np.abs(chord[0] * between[:, 1] -
+                          chord[1] * between[:, 0]) / length
+        farthest = int(np.argmax(dist))
+        if dist[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return points[keep]
+
+
+def clip_segment(p0, p1, low, high):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Liang-Barsky. The part of p0-p1 inside the square
+                [low, high], or None.
+    """
+    t0, t1 = 0.0, 1.0
+    dx, dy = p1[0] - p0[0], p1[1] - p0[1]
+    for p, q in ((-dx, p0[0] - low), (dx, high - p0[0]),
+                 (-dy, p0[1] - low), (dy, high - p0[1])):
+        if p == 0:
+            if q < 0:
+                return None
+            continue
+        ratio = q / p
+        if p < 0:
+            t0 = max(t0, ratio)
+        else:
+            t1 = min(t1, ratio)
+        if t0 > t1:
+            return None
+    return ((p0[0] + t0 * dx, p0[1] + t0 * dy),
+            (p0[0] + t1 * dx, p0[1] + t1 * dy))
+
+
+def clip_line(points, low, high):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Parts of a tile-space line inside [low, high], as integer
+                coordinate lists. Segments wholly off one side are dropped
+                up front with numpy, the rest go through clip_segment.
+    """
+    first, second = points[:-1], points[1:]
+    off = (((first[:, 0] < low) & (second[:, 0] < low)) |
+           ((first[:, 0] > high) & (second[:, 0] > high)) |
+           ((first[:, 1] < low) & (second[:, 1] < low)) |
+           ((first[:, 1] > high) & (second[:, 1] > high)))
+    parts = []
+    part = []
+    for index in range(len(first)):
+        clipped = None
+        if not off[index]:
+            clipped = clip_segment(first[index], second[index], low, high)
+        if clipped is None:
+            if part:
+                parts.append(part)
+            part = []
+            continue
+        start = (int(round(clipped[0][0])), int(round(clipped[0][1])))
+        end = (int(round(clipped[1][0])), int(round(clipped[1][1])))
+        if not part:
+            part = [start]
+        elif part[-1] != start:
+            parts.append(part)
+            part = [start]
+        if end != part[-1]:
+            part.append(end)
+    if part:
+        parts.append(part)
+    return [part for part in parts if len(part) > 1]
+
+
+def iter_features(data):
+    """Features from a FeatureCollection, a Feature or lists of them"""
+    if isinstance(data, list):
+        for item in data:
+            yield from iter_features(item)
+    elif isinstance(data, dict):
+        if data.get('type') == 'FeatureCollection' or 'features' in data:
+            yield from iter_features(data.get('features', []))
+        elif data.get('geometry') is not None:
+            yield data
+
+
+def get_tile_properties(properties):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      The scalar properties a tile carries, style flattened in
+                2026-10-19: Plus TILE_JSON_PROPERTIES as JSON strings
+    """
+    tile_properties = {}
+    for key in TILE_PROPERTIES:
+        value = properties.get(key)
+        if isinstance(value, (str, int, float, bool)):
+            tile_properties[key] = value
+    for key in TILE_JSON_PROPERTIES:
+        if isinstance(properties.get(key), (dict, list)):
+            tile_properties[key] = json.dumps(properties[key],
+                                              separators=(',', ':'))
+    style = properties.get('style')
+    if isinstance(style, dict):
+        for key in STYLE_PROPERTIES:
+            if isinstance(style.get(key), (str, int, float)):
+                tile_properties[key] = style[key]
+    return tile_properties
+
+
+def load_features(features):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      {'tracks', 'positions'} of projected geometries with tile
+                properties and a bounding box for quick rejection, and
+                'bounds', [[south, west], [north, east]] of everything
+    """
+    source = {'tracks': [], 'positions': [], 'bounds': None}
+    lonlats = []
+    for feature in features:
+        geometry = feature['geometry']
+        properties = get_tile_properties(feature.get('properties') or {})
+        if geometry['type'] == 'LineString' and len(geometry['coordinates']):
+            lines = [geometry['coordinates']]
+        elif geometry['type'] == 'MultiLineString':
+            lines = geometry['coordinates']
+        elif geometry['type'] == 'Point':
+            lonlats.append(geometry['coordinates'][:2])
+            points = project(lonlats[-1:])
+            source['positions'].append((points[0], properties))
+            continue
+        else:
+            continue
+        for line in lines:
+            if len(line) < 2:
+                continue
+            lonlats.extend(coord[:2] for coord in line)
+            points = project([coord[:2] for coord in line])
+            source['tracks'].append((points, points.min(axis=0),
+                                     points.max(axis=0), properties))
+    if lonlats:
+        lonlats = np.asarray(lonlats, dtype=float)
+        west, south = lonlats.min(axis=0).tolist()
+        east, north = lonlats.max(axis=0).tolist()
+        source['bounds'] = [[south, west], [north, east]]
+    return source
+
+
+def get_fleet_features():
+    """Track and last_pos features of every vehicle in the position index"""
+    features = []
+    for vehicle in get_indexed_vehicles():
+        update = get_vehicle_positions(vehicle, 0)
+        if update is None:
+            continue
+        last_pos = update['last_pos'] or {}
+        properties = dict(last_pos.get('properties') or {}, vehicle=vehicle)
+        features.append({'geometry': {'type': 'LineString',
+                                      'coordinates': update['points']},
+                         'properties': properties})
+        if last_pos.get('geometry'):
+            features.append({'geometry': last_pos['geometry'],
+                             'properties': properties})
+    return features
+
+
+def get_source_version(source, data_file=None):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      The data version a source's tiles are cached under, or None
+                if the source has no data
+    """
+    if source == 'fleet':
+        cursor = get_positions_cursor()
+        return 'p%d' % int(cursor * 1000) if cursor else None
+    try:
+        stat = os.stat(data_file)
+    except FileNotFoundError:
+        return None
+    return 'f%d_%d' % (stat.st_mtime_ns, stat.st_size)
+
+
+def get_source(source, version, data_file=None):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Projected features of a source at a version, loaded once
+                per process per version
+    """
+    key = (source, version)
+    with _CACHE_LOCK:
+        if key in _SOURCE_CACHE:
+            _SOURCE_CACHE.move_to_end(key)
+            return _SOURCE_CACHE[key]
+    if source == 'fleet':
+        features = get_fleet_features()
+    else:
+        with open(data_file) as geojson_file:
+            features = list(iter_features(json.load(geojson_file)))
+    loaded = load_features(features)
+    with _CACHE_LOCK:
+        _SOURCE_CACHE[key] = loaded
+        while len(_SOURCE_CACHE) > _CACHE_SIZE:
+            _SOURCE_CACHE.popitem(last=False)
+    return loaded
+
+
+def get_simplified(source, version, zoom, tracks):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Every track simplified for one zoom, shared by all of that
+                zoom's tiles
+    """
+    key = (source, version, zoom)
+    with _CACHE_LOCK:
+        if key in _SIMPLIFIED_CACHE:
+            _SIMPLIFIED_CACHE.move_to_end(key)
+            return _SIMPLIFIED_CACHE[key]
+    tolerance = SIMPLIFY_UNITS / float(TILE_EXTENT * 2 ** zoom)
+    simplified = [simplify(points, tolerance) for points, _, _, _ in tracks]
+    with _CACHE_LOCK:
+        _SIMPLIFIED_CACHE[key] = simplified
+        while len(_SIMPLIFIED_CACHE) > _CACHE_SIZE:
+            _SIMPLIFIED_CACHE.popitem(last=False)
+    return simplified
+
+
+def to_wkt(kind, coords):
+    """Tile coordinates to WKT, y flipped to the encoder's y-up"""
+    def pair(point):
+        return '%d %d' % (point[0], TILE_EXTENT - point[1])
+    if kind == 'point':
+        return 'POINT (%s)' % pair(coords)
+    return 'MULTILINESTRING (%s)' % ', '.join(
+        '(%s)' % ', '.join(pair(point) for point in part) for part in coords)
+
+
+def build_tile(source, version, zoom, x, y, data_file=None):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Encoded tile bytes. Empty bytes for a tile with nothing in
+                it, which is still a valid tile.
+    """
+    loaded = get_source(source, version, data_file)
+    scale = 2 ** zoom
+    # Tile bounds plus buffer in projected [0, 1] units
+    margin = TILE_BUFFER / float(TILE_EXTENT)
+    low = np.array([x - margin, y - margin]) / scale
+    high = np.array([x + 1 + margin, y + 1 + margin]) / scale
+    origin = np.array([x, y], dtype=float)
+
+    tracks = []
+    simplified = get_simplified(source, version, zoom, loaded['tracks'])
+    for (_, track_min, track_max, properties), points in zip(
+            loaded['tracks'], simplified):
+        if (track_max < low).any() or (track_min > high).any():
+            continue
+        tile_points = (points * scale - origin) * TILE_EXTENT
+        parts = clip_line(tile_points, -TILE_BUFFER,
+                          TILE_EXTENT + TILE_BUFFER)
+        if parts:
+            tracks.append({'geometry': to_wkt('line', parts),
+                           'properties': properties})
+    positions = []
+    for point, properties in loaded['positions']:
+        if (point < low).any() or (point > high).any():
+            continue
+        tile_point = (point * scale - origin) * TILE_EXTENT
+        positions.append({'geometry': to_wkt('point', (
+            int(round(tile_point[0])), int(round(tile_point[1])))),
+                          'properties': properties})
+    layers = [{'name': name, 'features': features} for name, features in
+              (('tracks', tracks), ('positions', positions)) if features]
+    if not layers:
+        return b''
+    return mapbox_vector_tile.encode(layers)
+
+
+def get_tile(source, zoom, x, y, data_file=None, cache_dir=TILE_CACHE_DIR):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      (tile bytes, version) from the disk cache or freshly built,
+                or (None, None) if the source has no data
+    """
+    version = get_source_version(source, data_file)
+    if version is None:
+        return None, None
+    source_dir = '%s/%s' % (cache_dir, source)
+    tile_file = '%s/%s/%d/%d/%d.mvt' % (source_dir, version, zoom, x, y)
+    try:
+        with open(tile_file, 'rb') as cached:
+            return cached.read(), version
+    except FileNotFoundError:
+        pass
+    tile = build_tile(source, version, zoom, x, y, data_file)
+    version_dir = '%s/%s' % (source_dir, version)
+    if not os.path.isdir(version_dir):
+        # First tile of a new version: the old versions are dead
+        if os.path.isdir(source_dir):
+            for old in os.listdir(source_dir):
+                if old != version:
+                    shutil.rmtree('%s/%s' % (source_dir, old),
+                                  ignore_errors=True)
+    os.makedirs(os.path.dirname(tile_file), exist_ok=True)
+    tmp_file = '%s.%d.%d.tmp' % (tile_file, os.getpid(),
+                                 threading.get_ident())
+    with open(tmp_file, 'wb') as outf:
+        outf.write(tile)
+    os.replace(tmp_file, tile_file)
+    logging.debug('get_tile(%s): built %d/%d/%d at %s, %d bytes', source,
+                  zoom, x, y, version, len(tile))
+    return tile, version
+
+
+def get_source_bounds(source, data_file=None):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      [[south, west], [north, east]] of a source for fitBounds,
+                since a map drawn from tiles has no GeoJSON to fit to
+    """
+    version = get_source_version(source, data_file)
+    if version is None:
+        return None
+    return get_source(source, version, data_file)['bounds']
+
+
+def get_portal_source(org, vehicle, year, date):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      (source, data file) of an archived deployment's track, or
+                (None, None) if any part would leave its directory
+    """
+    parts = (org, vehicle, year, date)
+    if not all(part and part == os.path.basename(part) and
+               not part.startswith('.') for part in parts):
+        return None, None
+    data_file = (PORTAL_DATA_FILE % (org, vehicle, year, date, vehicle))
+    return 'portal_%s' % '_'.join(parts), data_file
+
+
+def get_geojson_source(name):
+    """data file for a TILE_GEOJSON name, or None"""
+    if name not in TILE_GEOJSON:
+        return None
+    return '%s/%s.json' % (GEOJSON_DIR, name)
+
+
+def valid_tile(zoom, x, y):
+    """z/x/y inside the tile pyramid"""
+    return 0 <= zoom <= MAX_ZOOM and 0 <= x < 2 ** zoom and 0 <= y < 2 ** zoom
@@ -14,7 +14,7 @@ function showLastPos(feature, map) {
   lat = feature.geometry.coordinates[1];
   bearing = 0;
   lastPos = L.marker([lat, lon], {icon: currPosIcon, rotationAngle: bearing});
-  lastPos.bindPopup(feature.properties.html)
+  bindInfoBox(lastPos, feature);
   lastPos.bindTooltip(feature.properties.public_name.toUpperCase());
   lastPos.addTo(map)
 }
@@ -40,7 +40,7 @@ function makeSurfMarker(feature) {
     weight: feature.properties.weight,
     opacity: feature.properties.fillOpacity
   });
-  circle.bindPopup(feature.properties.html);
+  bindInfoBox(circle, feature);
   return(circle)
 }
 
@@ -1,4 +1,4 @@
-function initPortalMap(vehicle_type, json_file) {
+function initPortalMap(vehicle_type, json_file, tile_url, tile_bounds) {
   /*
    * We initialize a map strictly for the data portal.
    * No layers or Windy stuff. We do this as a separate
@@ -34,7 +34,11 @@ function initPortalMap(vehicle_type, json_file) {
   }).addTo(portalMap);
 
   // Each vehicle type has its own method for getting dropped on map
-  if(vehicle_type == 'slocum') {
+  // 2026-10-19 Vector tiles when the server and browser both have them
+  if(vehicle_type == 'slocum' && tile_url &&
+     addVectorTiles(portalMap, tile_url)) {
+    portalMap.fitBounds(tile_bounds);
+  } else if(vehicle_type == 'slocum') {
     showLocalVehicles(portalMap, json_file);
   }
   if(vehicle_type == 'navocean') {
@@ -147,7 +151,7 @@ function initGANDALF(map_center, map_zoom) {
 
   // local gliders
   var data_file = '/data/gandalf/deployments/geojson/local.json'
-  showLocalVehicles(gandalfMap, data_file);
+  showLocalVehicles(gandalfMap, data_file, tileUrl('local'));
 
   // seagliders
   var data_file = '/data/gandalf/deployments/geojson/seagliders.json'
@@ -161,6 +165,12 @@ function initGANDALF(map_center, map_zoom) {
   var data_file = '/data/gandalf/deployments/geojson/gdac.json'
   showErddapVehicles(gandalfMap, data_file);
 
+  // 2026-10-19 From here on just the new surfacings, as /api/events
+  // tells us about them
+  if (typeof positions_since !== 'undefined') {
+    followPositions(gandalfMap, positions_since);
+  }
+
   // LR WaveGlider
   var random = Math.random()
   var data_file = '/data/gandalf/deployments/geojson/wg.json?random=' + random
@@ -168,7 +178,7 @@ function initGANDALF(map_center, map_zoom) {
   showWaveGliders(gandalfMap, data_file);
   // ARGO floats
   var data_file = '/data/gandalf/deployments/geojson/argo.json'
-  showArgoFloats(gandalfMap, data_file)
+  showArgoFloats(gandalfMap, data_file, tileUrl('argo'))
   // Seatrec floats
   var data_file = '/data/gandalf/deployments/geojson/seatrec.json'
   showSeatrecFloats(gandalfMap, data_file)
@@ -217,7 +227,7 @@ function makeWgSurfMarker(feature) {
     opacity: feature.properties.fillOpacity,
     zIndexOffset: zindex
   });
-  circle.bindPopup(feature.properties.html);
+  bindInfoBox(circle, feature);
   return(circle)
 }
 
@@ -364,8 +374,24 @@ function sstLegend() {
   $('#wmsLegend').show();
 }
 
-function showLocalVehicles(map, data_file) {
+function tileUrl(source) {
+  // 2026-10-19 /tiles/ URL for a geojson file's data source, null when the
+  // server can't make tiles (tile_root is set in gandalf.html)
+  if (typeof tile_root === 'undefined' || !tile_root) {
+    return null;
+  }
+  return tile_root + '/' + source + '/{z}/{x}/{y}.mvt';
+}
+
+function showLocalVehicles(map, data_file, tile_url) {
   console.log('showLocalVehicles()');
+  // 2026-10-19 The tracks come from vector tiles when the server and
+  // browser both have them. Last positions and waypoints are still drawn
+  // from local.json by showLastPos, for the icons, tooltips and popups.
+  var tiled = addVectorTiles(map, tile_url, {
+    tracks: vectorTileStyles.tracks,
+    positions: []
+  }, 'local');
   var localGliders = []
   var fC = $.getJSON(data_file, function() {
   })
@@ -373,8 +399,9 @@ function showLocalVehicles(map, data_file) {
     L.geoJson(fC.responseJSON, {
         onEachFeature: function(feature, layer) {
           // add track with styling
-          if (feature.id == 'track') {
-            L.geoJson(feature, {style: feature.properties.style}).addTo(map);
+          if (feature.id == 'track' && !tiled) {
+            registerTrack(feature, L.geoJson(feature,
+              {style: feature.properties.style}).addTo(map));
           }
           // add last position with styling
           if (feature.id == 'last_pos') {
@@ -392,7 +419,7 @@ function showLocalVehicles(map, data_file) {
               weight: .5,
               opacity: 1,
             });
-            circle.bindPopup(feature.properties.html);
+            bindInfoBox(circle, feature);
             localGliders.push(circle);
           }
         }
@@ -412,7 +439,8 @@ function showErddapVehicles(map, data_file) {
         onEachFeature: function(feature, layer) {
           if (feature.id == 'track') {
             // add track with styling
-            L.geoJson(feature, {style: feature.properties.style}).addTo(map);
+            registerTrack(feature, L.geoJson(feature,
+              {style: feature.properties.style}).addTo(map));
           }
 	    // add last position with styling
           if (feature.id == 'last_pos') {
@@ -433,7 +461,8 @@ function showSeaGliders(map, data_file) {
         onEachFeature: function(feature, layer) {
           if (feature.id == 'track') {
             // add track with styling
-            L.geoJson(feature, {style: feature.properties.style}).addTo(map);
+            registerTrack(feature, L.geoJson(feature,
+              {style: feature.properties.style}).addTo(map));
           }
 	    // add last position with styling
           if (feature.id == 'last_pos') {
@@ -445,8 +474,27 @@ function showSeaGliders(map, data_file) {
 }
 
 
-function showArgoFloats(map, data_file) {
+// ARGO floats drawn from tiles look like the GeoJSON markers. We never
+// drew their tracks, so the tiles' tracks layer is hidden.
+var argoTileStyles = {
+  tracks: [],
+  positions: {
+    radius: 5,
+    color: 'black',
+    fill: true,
+    fillColor: 'blue',
+    fillOpacity: 1,
+    weight: 0.8,
+    opacity: 1
+  }
+};
+
+function showArgoFloats(map, data_file, tile_url) {
   console.log('showArgoFloats()');
+  // 2026-10-19 Vector tiles when the server and browser both have them
+  if (addVectorTiles(map, tile_url, argoTileStyles, 'argo')) {
+    return;
+  }
   var argoMarkers = []
   var argoTrack = []
   var fC = $.getJSON(data_file, function() {
@@ -467,7 +515,7 @@ function showArgoFloats(map, data_file) {
                opacity: 1
              });
              platformID = feature.properties.platform.toString();
-             marker.bindPopup(feature.properties.html);
+             bindInfoBox(marker, feature);
              marker.bindTooltip('ARGO Float ' + platformID);
              argoMarkers.push(marker);
           }
@@ -510,7 +558,7 @@ function showSeatrecFloats(map, data_file) {
                opacity: 1
              });
              platformID = feature.properties.platform.toString();
-             marker.bindPopup(feature.properties.html);
+             bindInfoBox(marker, feature);
              marker.bindTooltip('Seatrec Float ' + platformID);
              argoMarkers.push(marker);
           }
@@ -551,7 +599,7 @@ function showUgosFloats(map, data_file) {
                opacity: 1
              });
              platformID = feature.properties.platform.toString();
-             marker.bindPopup(feature.properties.html);
+             bindInfoBox(marker, feature);
              marker.bindTooltip('UGOS Float ' + platformID);
              ugosMarkers.push(marker);
           }
@@ -604,7 +652,7 @@ function showLastPos(feature, map) {
   lat = feature.geometry.coordinates[1];
   bearing = feature.properties.bearing;
   lastPos = L.marker([lat, lon], {icon: currPosIcon, rotationAngle: bearing});
-  lastPos.bindPopup(feature.properties.html)
+  bindInfoBox(lastPos, feature);
   lastPos.bindTooltip(feature.properties.public_name.toUpperCase());
   lastPos.getPopup().on('add', function() {
     $('#new-dash').hide();
@@ -615,13 +663,18 @@ function showLastPos(feature, map) {
   lastPos.addTo(map)
 
   // waypoints smoke 'em if ya got 'em
+  var wayPoint = null;
   if (feature.properties.waypoint_point) {
       wpLon = feature.properties.waypoint_point.coordinates[0];
       wpLat = feature.properties.waypoint_point.coordinates[1];
       wayPoint = L.marker([wpLat, wpLon], {icon: wpIcon}).addTo(map);
-      wayPoint.bindPopup(feature.properties.waypoint_html)
+      wayPoint.bindPopup(function() {
+        return feature.properties.waypoint_html || waypointInfoBox(feature);
+      });
       wayPoint.bindTooltip(feature.properties.public_name + " waypoint");
   }
+  // 2026-10-19 So positions.js can move them
+  registerLastPos(feature, lastPos, wayPoint);
 }
 
 function layerOpacity(layer, opacity) {
@@ -712,16 +765,38 @@ function ucwords (str) {
     })
 }
 
+// 2026-10-19 /plots/ renders a plot when it's asked for. One that isn't
+// ready yet is a 202 with Retry-After, so we ask again then and only set
+// the img once it's there.
+function loadPlot(img, url) {
+  $.ajax({url: url, method: 'HEAD', cache: false})
+    .done(function(data, status, xhr) {
+      if (xhr.status == 202) {
+        var retry = parseInt(xhr.getResponseHeader('Retry-After'), 10) || 5;
+        setTimeout(function() {
+          if (document.body.contains(img)) {
+            loadPlot(img, url);
+          }
+        }, retry * 1000);
+        return;
+      }
+      img.src = url;
+    })
+    .fail(function(xhr) {
+      console.log('loadPlot(): ' + url + ' ' + xhr.status);
+      $(img).remove();
+    });
+}
+
 function deployPlots(vehicle) {
   console.log('deployPlots() for ' + vehicle);
+  var plot_url = '/plots/' + encodeURIComponent(vehicle);
   config_file = '/data/gandalf/gandalf_configs/vehicles/' + vehicle +'/ngdac/deployment.json';
   config = $.getJSON(config_file, function() {
        })
     .done(function() {
       var vehicle = config.responseJSON.gandalf.public_name.toLowerCase();
       var images = config.responseJSON.gandalf.plots.plot_sensor_list;
-      var deployed_plot_dir = config.responseJSON.gandalf.plots.deployed_plot_dir;
-      console.log(deployed_plot_dir);
       // Hide away hide away jiggity jig
       // show the pretty pictures
       $("#new-dash").hide();
@@ -732,9 +807,8 @@ function deployPlots(vehicle) {
       images.forEach(function(element) {
         console.log(element);
         var img = document.createElement("IMG");
-        img.src = deployed_plot_dir + "/" + element + ".png?epoch=" + Date.now();
-        console.log(img.src);
         $("#plotWrapper").append(img);
+        loadPlot(img, plot_url + "/" + element + ".png");
       })
       $("#plotWrapper").show();
     })
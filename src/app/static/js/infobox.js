@@ -0,0 +1,219 @@
+// 2026-10-19 InfoBox templates. The GeoJSON used to carry a pre-rendered
+// html string for every marker, which was most of the bytes in local.json
+// and the cworker files. Builders now send the structured properties and
+// set properties.infobox to the name of one of the templates below. We
+// render when the popup opens, not when the layer loads.
+//
+// Features from builders that haven't been converted still carry
+// properties.html and we use that as is.
+
+var infoBoxTemplates = {
+  'vehicle': vehicleInfoBox,
+  'waypoint': waypointInfoBox,
+  'surf_report': surfReportInfoBox,
+  'float': floatInfoBox
+};
+
+function escapeHtml(value) {
+  if (value === undefined || value === null) {
+    return '';
+  }
+  return String(value).replace(/&/g, '&amp;').replace(/</g, '&lt;')
+    .replace(/>/g, '&gt;').replace(/"/g, '&quot;').replace(/'/g, '&#39;');
+}
+
+function fixed(value, places) {
+  // Python wrote NaN as null
+  if (value === undefined || value === null || value === '') {
+    return 'NaN';
+  }
+  return Number(value).toFixed(places);
+}
+
+function featurePosition(feature) {
+  var props = feature.properties;
+  if (props.longitude !== undefined && props.latitude !== undefined) {
+    return [props.longitude, props.latitude];
+  }
+  return feature.geometry.coordinates;
+}
+
+function infoBoxRow(label, value, dataClass) {
+  if (dataClass) {
+    return "<tr><td class='td_infoBoxSensor'>" + label + ":</td>" +
+      "<td class='" + dataClass + "'>" + value + "</td></tr>";
+  }
+  return "<tr><td class='td_infoBoxSensor'>" + label + ":</td>" +
+    "<td>" + value + "</td></tr>";
+}
+
+function scienceTable(science, header) {
+  // science is {sensor: value} in plot_sensor_list order
+  if (!science) {
+    return '';
+  }
+  var html = header + "<table class='infoBoxTable'>";
+  Object.keys(science).forEach(function(sensor) {
+    html += infoBoxRow(escapeHtml(sensor), fixed(science[sensor], 2));
+  });
+  return html + '</table>';
+}
+
+function plotLinks(plots, divClass, imageClass) {
+  var html = "<div class = '" + divClass + "'>";
+  plots.forEach(function(plot) {
+    plot = escapeHtml(plot);
+    html += "<a href='" + plot + "' target='_blank'>" +
+      "<img class = '" + imageClass + "' src = '" + plot + "'></img></a>";
+  });
+  return html + '</div>';
+}
+
+function vehicleInfoBox(feature) {
+  // Last position of a glider or SeaWorker
+  var props = feature.properties;
+  var td = 'td_infoBoxData';
+  var pos = featurePosition(feature);
+  var html = "<div class='infoBoxTitle'><span class='infoBoxTitle'>" +
+    escapeHtml(props.public_name) + "</span></div>" +
+    "<center><img src='" + escapeHtml(props.infobox_image) +
+    "'></img></center><hr>" +
+    "<div class='infoBoxHeading'><span class='infoBoxHeading'>Status" +
+    "</span></div><table class='infoBoxTable'>";
+  html += infoBoxRow('Last Report', escapeHtml(props.last_surfaced), td);
+  if (props.because_why !== undefined) {
+    html += infoBoxRow('Because Why', escapeHtml(props.because_why), td);
+  }
+  if (props.mission_name !== undefined) {
+    html += infoBoxRow('Mission', escapeHtml(props.mission_name), td);
+  }
+  if (props.operator !== undefined) {
+    html += infoBoxRow('Operator', escapeHtml(props.operator), td);
+  }
+  if (props.vehicle_model !== undefined) {
+    html += infoBoxRow('Vehicle Type', escapeHtml(props.vehicle_model), td);
+  }
+  if (props.project !== undefined) {
+    html += infoBoxRow('Project', escapeHtml(props.project), td);
+  }
+  html += infoBoxRow('Last Position', fixed(pos[0], 4) + 'W ' +
+    fixed(pos[1], 4) + 'N', td);
+  if (props.waypoint_range !== undefined) {
+    html += infoBoxRow('Waypoint', fixed(props.waypoint_range, 2) +
+      'km at ' + escapeHtml(props.waypoint_bearing) + ' degrees', td);
+  }
+  if (props.heading !== undefined) {
+    html += infoBoxRow('Bearing', escapeHtml(props.heading) + ' degrees', td);
+  }
+  var source = escapeHtml(props.data_source);
+  if (props.data_source_url) {
+    source = "<a href='" + escapeHtml(props.data_source_url) + "'>" +
+      source + "</a>";
+  }
+  html += infoBoxRow('Data Source', source, td) + '</table>';
+  html += "<div class = 'infoBoxBreakBar'>Science Plots</div>" +
+    "<div class = 'infoBoxPlotDiv'><img class = 'infoBoxPlotImage' " +
+    "src = '/static/images/infoBox2DPlot.png' " +
+    "onclick=\"deployPlots('" + escapeHtml(props.vehicle) + "')\"></img></div>";
+  if (props.mod_comp_path) {
+    var modComp = escapeHtml(props.mod_comp_path);
+    html += "<div class = 'infoBoxBreakBar'>Model Comparisons</div>" +
+      "<div class = 'infoBoxPlotDiv'><img class = 'infoBoxPlotImage' " +
+      "src = '" + modComp + "' onclick=\"modComps('" + modComp + "')\">" +
+      "</img></div>";
+  }
+  html += scienceTable(props.science,
+    "<div class = 'infoBoxBreakBar'>Science Data</div>");
+  return html;
+}
+
+function waypointInfoBox(feature) {
+  var props = feature.properties;
+  var wp = props.waypoint_point.coordinates;
+  return "<h5><center><span class='infoBoxHeading'>" +
+    escapeHtml(props.public_name) + " waypoint</span></center></h5>" +
+    "<table class='infoBoxTable'>" +
+    infoBoxRow('Position', fixed(wp[0], 4) + 'W/' + fixed(wp[1], 4) + 'N') +
+    '</table>';
+}
+
+function surfReportInfoBox(feature) {
+  // One surfacing: Slocum surf markers, SeaWorker sensor markers
+  var props = feature.properties;
+  var pos = featurePosition(feature);
+  var html = '';
+  if (props.infobox_image) {
+    html += "<center><img src='" + escapeHtml(props.infobox_image) +
+      "'></img></center><hr>";
+  }
+  html += "<h5><center><span class='infoBoxHeading'>Status</span></center>" +
+    "</h5><table class='infoBoxTable'>";
+  html += infoBoxRow('Vehicle', escapeHtml(props.public_name));
+  html += infoBoxRow('Date/Time', escapeHtml(props.surf_time));
+  if (props.because_why !== undefined) {
+    html += infoBoxRow('Because Why', escapeHtml(props.because_why));
+  }
+  if (props.mission_name !== undefined) {
+    html += infoBoxRow('Mission', escapeHtml(props.mission_name));
+  }
+  html += infoBoxRow('Position', fixed(pos[0], 4) + 'W/' +
+    fixed(pos[1], 4) + 'N');
+  if (props.waypoint_range !== undefined) {
+    html += infoBoxRow('WP Range', fixed(props.waypoint_range, 2) +
+      ' meters');
+    html += infoBoxRow('WP Bearing', escapeHtml(props.waypoint_bearing) +
+      ' degrees');
+  }
+  if (props.heading !== undefined) {
+    html += infoBoxRow('Heading', fixed(props.heading, 2));
+  }
+  if (props.speed !== undefined) {
+    html += infoBoxRow('Speed', fixed(props.speed, 2) + ' knots');
+  }
+  html += '</table>';
+  if (props.science) {
+    html += '<hr>' + scienceTable(props.science,
+      "<h5><center><span class='infoBoxHeading'>Science</span></center></h5>");
+  }
+  return html;
+}
+
+function floatInfoBox(feature) {
+  // ARGO, Seatrec and UGOS profiling floats
+  var props = feature.properties;
+  var pos = featurePosition(feature);
+  var html = "<h5><center><span class='infoBoxHeading'>" +
+    escapeHtml(props.float_type) + " Float Status</span></center></h5>" +
+    "<table class='infoBoxTable'>" +
+    infoBoxRow('Platform', escapeHtml(props.platform)) +
+    infoBoxRow('PI', escapeHtml(props.pi)) +
+    infoBoxRow('Date/Time', escapeHtml(props.last_date)) +
+    infoBoxRow('Position', fixed(pos[0], 4) + 'W/' + fixed(pos[1], 4) + 'N') +
+    '</table>';
+  if (props.last_plots) {
+    html += "<div class = 'infoBoxBreakBar'>Most Recent Cycle</div>" +
+      plotLinks(props.last_plots, 'infoBoxLastPlotDiv',
+                'infoBoxLastPlotImage');
+  }
+  if (props.series_plots) {
+    html += "<div class = 'infoBoxBreakBar'>2D Time Series Plots</div>" +
+      plotLinks(props.series_plots, 'infoBoxPlotDiv', 'infoBoxPlotImage');
+  }
+  return html;
+}
+
+function renderInfoBox(feature) {
+  var template = infoBoxTemplates[feature.properties.infobox];
+  if (template) {
+    return template(feature);
+  }
+  return feature.properties.html;
+}
+
+function bindInfoBox(layer, feature) {
+  // Leaflet calls the function each time the popup opens
+  layer.bindPopup(function() {
+    return renderInfoBox(feature);
+  });
+  return layer;
+}
@@ -0,0 +1,178 @@
+// 2026-10-19 Incremental position updates. The map loads the full GeoJSON
+// once, then asks /api/positions?since=<cursor> for new track points and
+// changed last_pos features, and extends what's already drawn. The page
+// gets its starting cursor from the server (positions_since in
+// gandalf.html) and each reply's 'now' is the next one.
+//
+// We ask when /api/events says an MCP run changed something. That's a
+// long-poll: it answers at the first event or after 25s empty, and we ask
+// again pause_ms (from the reply) later so an open map doesn't hold a
+// server thread all the time.
+//
+// Tracks drawn from vector tiles (tiles.js) have no layer here; we
+// redraw their tile layer instead. Last positions are always ours.
+
+var EVENTS_RETRY_MS = 60 * 1000;
+var vehicleLayers = {};
+var positionsState = {since: 0, busy: false, again: false};
+
+function getVehicleLayers(vehicle) {
+  if (!vehicleLayers[vehicle]) {
+    vehicleLayers[vehicle] = {};
+  }
+  return vehicleLayers[vehicle];
+}
+
+function registerTrack(feature, layer) {
+  // layer is the L.geoJson wrapper around a single polyline
+  if (feature.properties.vehicle) {
+    getVehicleLayers(feature.properties.vehicle).track = layer.getLayers()[0];
+  }
+  return layer;
+}
+
+function registerLastPos(feature, marker, waypoint) {
+  if (feature.properties.vehicle) {
+    var layers = getVehicleLayers(feature.properties.vehicle);
+    layers.lastPos = marker;
+    layers.wayPoint = waypoint;
+    layers.dataSource = feature.properties.data_source;
+  }
+}
+
+function newTrackPoints(track, latlngs) {
+  // The GeoJSON the page loaded can be newer than its cursor, so drop the
+  // points the track already ends with
+  var current = track.getLatLngs();
+  var overlap = Math.min(current.length, latlngs.length);
+  for (; overlap > 0; overlap--) {
+    var matched = true;
+    for (var i = 0; i < overlap && matched; i++) {
+      matched = current[current.length - overlap + i].equals(latlngs[i]);
+    }
+    if (matched) {
+      break;
+    }
+  }
+  return latlngs.slice(overlap);
+}
+
+function updateTrack(map, vehicle, update) {
+  var layers = getVehicleLayers(vehicle);
+  var latlngs = update.points.map(function(point) {
+    return L.latLng(point[1], point[0]);
+  });
+  if (!layers.track) {
+    // Vehicle that wasn't on the map when the page loaded
+    if (latlngs.length) {
+      var style = update.last_pos ? update.last_pos.properties.style : {};
+      layers.track = L.polyline(latlngs, style).addTo(map);
+    }
+    return;
+  }
+  if (update.reset) {
+    layers.track.setLatLngs(latlngs);
+    return;
+  }
+  newTrackPoints(layers.track, latlngs).forEach(function(latlng) {
+    layers.track.addLatLng(latlng);
+  });
+}
+
+function updateLastPos(map, vehicle, feature) {
+  var layers = getVehicleLayers(vehicle);
+  if (layers.lastPos) {
+    map.removeLayer(layers.lastPos);
+  }
+  if (layers.wayPoint) {
+    map.removeLayer(layers.wayPoint);
+  }
+  showLastPos(feature, map);
+}
+
+function getTileLayers(vehicle, update) {
+  // The vector tile layers (tiles.js) drawing a vehicle's track when we
+  // have no Leaflet track for it. Without a source from its last_pos we
+  // can't tell which, so all of them.
+  var layers = getVehicleLayers(vehicle);
+  if (layers.track) {
+    return [];
+  }
+  var source = update.last_pos ? update.last_pos.properties.data_source :
+    layers.dataSource;
+  if (source) {
+    return tileLayers[source] ? [tileLayers[source]] : [];
+  }
+  return Object.keys(tileLayers).map(function(name) {
+    return tileLayers[name];
+  });
+}
+
+function followPositions(map, since) {
+  positionsState.since = since;
+  pollEvents(map, null);
+}
+
+function pollEvents(map, lastId) {
+  var params = lastId === null ? {} : {last_id: lastId};
+  $.getJSON('/api/events', params)
+    .done(function(reply) {
+      reply.events.forEach(function(event) {
+        console.log('fleet event ' + event.id + ': ' +
+                    Object.keys(event.vehicles).join(' '));
+      });
+      if (reply.events.length) {
+        fetchPositions(map);
+      }
+      // The first poll only gets us the cursor, so go straight on
+      setTimeout(function() {
+        pollEvents(map, reply.last_id);
+      }, lastId === null ? 0 : reply.pause_ms);
+    })
+    .fail(function() {
+      setTimeout(function() {
+        pollEvents(map, lastId);
+      }, EVENTS_RETRY_MS);
+    });
+}
+
+function fetchPositions(map) {
+  // One request at a time; an event during one gets a second pass after
+  if (positionsState.busy) {
+    positionsState.again = true;
+    return;
+  }
+  positionsState.busy = true;
+  $.getJSON('/api/positions', {since: positionsState.since})
+    .done(function(positions) {
+      var redraw = [];
+      Object.keys(positions.vehicles).forEach(function(vehicle) {
+        var update = positions.vehicles[vehicle];
+        console.log('fetchPositions(): ' + vehicle + ' +' +
+                    update.points.length + ' points');
+        // Track drawn from tiles: the server already has the new version
+        var tiled = getTileLayers(vehicle, update);
+        if (tiled.length) {
+          redraw = redraw.concat(tiled);
+        } else {
+          updateTrack(map, vehicle, update);
+        }
+        if (update.last_pos) {
+          updateLastPos(map, vehicle, update.last_pos);
+        }
+      });
+      redraw.filter(function(layer, index) {
+        return redraw.indexOf(layer) == index;
+      }).forEach(function(layer) {
+        layer.redraw();
+      });
+      positionsState.since = positions.now;
+    })
+    .always(function() {
+      positionsState.busy = false;
+      if (positionsState.again) {
+        positionsState.again = false;
+        fetchPositions(map);
+      }
+    });
+}
@@ -0,0 +1,64 @@
+// 2026-10-19 Interactive sensor chart from /api/vehicle/<v>/series/<s>.
+// The first draw gets the whole deployment downsampled to SERIES_POINTS.
+// Zooming asks for just the visible window, which comes back at full
+// resolution once it's small enough.
+//
+// Times go to Plotly as UTC date strings without a zone, which it shows
+// as they are. A Date would be shown in the browser's local time. The
+// axis ranges Plotly hands back are then UTC too, and go to the server
+// as they are; parse_time reads a zoneless ISO time as UTC.
+
+var SERIES_POINTS = 2000;
+
+function seriesUrl(vehicle, sensor) {
+  return '/api/vehicle/' + encodeURIComponent(vehicle) + '/series/' +
+    encodeURIComponent(sensor);
+}
+
+function seriesTrace(series) {
+  return {
+    x: series.time.map(function(epoch) {
+      return new Date(epoch * 1000).toISOString().replace('T', ' ')
+        .replace('Z', '');
+    }),
+    y: series.value,
+    customdata: series.depth,
+    hovertemplate: '%{x}<br>%{y}<br>%{customdata} m<extra></extra>',
+    mode: 'lines',
+    line: {width: 1}
+  };
+}
+
+function seriesTitle(vehicle, sensor, series) {
+  return vehicle + ' ' + sensor + ' (' + series.points + ' of ' +
+    series.total + ' points, ' + series.method + ')';
+}
+
+function drawSeries(div, vehicle, sensor) {
+  console.log('drawSeries(' + vehicle + ', ' + sensor + ')');
+  var url = seriesUrl(vehicle, sensor);
+  $.getJSON(url, {points: SERIES_POINTS}).done(function(series) {
+    Plotly.newPlot(div, [seriesTrace(series)], {
+      title: seriesTitle(vehicle, sensor, series),
+      xaxis: {type: 'date'},
+      margin: {t: 40}
+    });
+    document.getElementById(div).on('plotly_relayout', function(event) {
+      var params = {points: SERIES_POINTS};
+      if (event['xaxis.range[0]']) {
+        params.start = event['xaxis.range[0]'];
+        params.end = event['xaxis.range[1]'];
+      } else if (!event['xaxis.autorange']) {
+        return;
+      }
+      $.getJSON(url, params).done(function(zoomed) {
+        Plotly.react(div, [seriesTrace(zoomed)], {
+          title: seriesTitle(vehicle, sensor, zoomed),
+          xaxis: {type: 'date', range: event['xaxis.autorange'] ? undefined :
+            [event['xaxis.range[0]'], event['xaxis.range[1]']]},
+          margin: {t: 40}
+        });
+      });
+    });
+  });
+}
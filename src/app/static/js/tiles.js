@@ -0,0 +1,84 @@
+// 2026-10-19 Vector tile layers from /tiles/<source>/{z}/{x}/{y}.mvt.
+// Each tile has a 'tracks' layer of lines carrying the track's style
+// color/weight/opacity and a 'positions' layer of points carrying enough
+// properties for renderInfoBox. Needs Leaflet.VectorGrid (see
+// dependencies.html); without it addVectorTiles returns null and the
+// caller falls back to the GeoJSON.
+//
+// Layers added with a data source name are kept in tileLayers so
+// positions.js can redraw them when that source changes.
+
+// Sent as JSON strings, see TILE_JSON_PROPERTIES in gandalf_tiles.py
+var TILE_JSON_PROPERTIES = ['science', 'last_plots', 'series_plots',
+                            'iconSize'];
+var tileLayers = {};
+
+function tileProperties(properties) {
+  var parsed = $.extend({}, properties);
+  TILE_JSON_PROPERTIES.forEach(function(key) {
+    if (typeof parsed[key] === 'string') {
+      try {
+        parsed[key] = JSON.parse(parsed[key]);
+      } catch (error) {
+        delete parsed[key];
+      }
+    }
+  });
+  return parsed;
+}
+
+var vectorTileStyles = {
+  tracks: function(properties) {
+    return {
+      color: properties.color || 'yellow',
+      weight: properties.weight || 2,
+      opacity: properties.opacity || 1
+    };
+  },
+  positions: function(properties) {
+    // A vehicle's last position gets its icon, as showLastPos draws it
+    if (properties.currPosIcon) {
+      return {icon: L.icon({
+        iconUrl: properties.currPosIcon,
+        iconSize: tileProperties(properties).iconSize
+      })};
+    }
+    return {
+      radius: 3,
+      color: 'yellow',
+      fill: true,
+      fillColor: 'yellow',
+      fillOpacity: 1,
+      weight: 0.5
+    };
+  }
+};
+
+function addVectorTiles(map, url, styles, source) {
+  // styles defaults to vectorTileStyles; source names the layer in
+  // tileLayers
+  if (!L.vectorGrid || !url) {
+    return null;
+  }
+  var layer = L.vectorGrid.protobuf(url, {
+    vectorTileLayerStyles: styles || vectorTileStyles,
+    interactive: true,
+    maxNativeZoom: 18
+  });
+  layer.on('click', function(event) {
+    if (!event.layer.properties || !event.layer.properties.infobox) {
+      return;
+    }
+    var properties = tileProperties(event.layer.properties);
+    var feature = {
+      properties: properties,
+      geometry: {coordinates: [event.latlng.lng, event.latlng.lat]}
+    };
+    L.popup().setLatLng(event.latlng).setContent(renderInfoBox(feature))
+      .openOn(map);
+  });
+  if (source) {
+    tileLayers[source] = layer;
+  }
+  return layer.addTo(map);
+}
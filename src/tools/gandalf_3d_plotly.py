@@ -22,6 +22,11 @@ from decimal import getcontext, Decimal
 from gandalf_utils import get_vehicle_config, get_sensor_config
 from gandalf_utils import flight_status
 from gandalf_slocum_plots_v2 import register_cmocean
+from gandalf_erddap_decoder import DEFAULT_FORMAT, erddap_table_file
+from gandalf_erddap_decoder import read_erddap_table
+
+ERDDAP_3D_COLUMNS = ['time', 'longitude', 'latitude', 'depth', 'temperature',
+                     'salinity', 'pressure', 'density']
 
 
 def cmocean_to_plotly(cmap, pl_entries):
@@ -48,21 +53,22 @@ def get_erddap_data(vehicle):
 
     Author:     bob.currier@gcoos.org
     Created:    2020-07-30
-    Modified:   2020-10-21
+    Modified:   2026-10-19
     Inputs:     vehicle_config
-    Outputs:    erddap json data
+    Outputs:    erddap table as a pandas df
     Notes:      We were fetching ERDDAP 3 times (track, plots, 3D) so we
-    moved to one pull and write as text file for all further access
+    moved to one pull and write as text file for all further access.
+    2026-10-19: Reads the downloaded table with the chunked decoder and
+    only the columns we plot.
     """
     logging.info("get_erddap_data(%s)" % vehicle)
     config = get_vehicle_config(vehicle)
-    #config = json.loads(open(vehicle_config,'r').read())
     json_dir = config["gandalf"]["gdac_json_dir"]
-    json_file_name = ('%s/%s_gdac.json') % (json_dir, vehicle)
+    gdac_format = config["gandalf"].get("gdac_format", DEFAULT_FORMAT)
+    json_file_name = erddap_table_file(json_dir, vehicle, 'gdac', gdac_format)
     # Need to check if file exists and bail if not
     logging.info('get_erddap_data(%s): Opening %s' % (vehicle, json_file_name))
-    json_data = json.loads(open(json_file_name, 'r').read())
-    return(json_data)
+    return read_erddap_table(json_file_name, columns=ERDDAP_3D_COLUMNS)
 
 
 def dinkum_convert(dinkum_num):
@@ -82,59 +88,40 @@ def dinkum_convert(dinkum_num):
     return float(dddd)
 
 
-def create_df_erddap(vehicle, json_data):
+def create_df_erddap(vehicle, erddap_df):
     """Make DF from erddap data.
 
     Author:     bob.currier@gcoos.org
     Created:    2020-07-30
-    Modified:   2030-07-30
+    Modified:   2026-10-19
     Outputs:    pandas df
     Notes: Borrowed from slocum erddap plots. Need to add gps columns for 3D
+    2026-10-19: Whole columns at a time instead of a loop over features.
     """
     logging.info("create_df_erddap(%s)" % vehicle)
     v_config = get_vehicle_config(vehicle)
-    sensor_vals = []
-    # for headers
-    for feature in json_data['features']:
-        time = (feature['properties']['time'])
-        temp = (feature['properties']['temperature'])
-        sal = (feature['properties']['salinity'])
-        press = (feature['properties']['pressure'])
-        density = (feature['properties']['density'])
-        # Initially set sigma == density don't calc here as might be NaN
-        sigma = density
-        depth = (feature['properties']['depth'])
-        # We do the calc here so need to ensure no blanks
-        if (temp and sal and press is not None):
-            svel = sw.svel(temp, sal, press)
-        else:
-            svel = None
-        # We display sigma-t and density. Most erddap vehicles report density
-        # so we must calc sigma-t.  Navy ng glider already report sigma-t so
-        # thus this hack to convert back to density
-        if density is not None:
-            if density < 1000:
-                # Navy reporting Sigma vs Density
-                sigma = density
-                density = (density+1000)
-            else:
-                sigma = (density - 1000)
-
-        depth = (feature['properties']['depth'])
-        lat = (feature['geometry']['coordinates'][1])
-        lon = (feature['geometry']['coordinates'][0])
-        # We do the calc here so need to ensure no blanks
-        if (temp and sal and press is not None):
-            svel = sw.svel(temp, sal, press)
-        else:
-            svel = None
-        sensor_vals.append([time, lon, lat, depth, temp, sal, density, sigma,
-                            svel])
+    temp = erddap_df['temperature'].to_numpy()
+    sal = erddap_df['salinity'].to_numpy()
+    press = erddap_df['pressure'].to_numpy()
+    density = erddap_df['density'].to_numpy()
+    # NaN in any input gives NaN svel, same as the old None
+    svel = sw.svel(temp, sal, press)
+    # We display sigma-t and density. Most erddap vehicles report density
+    # so we must calc sigma-t.  Navy ng glider already report sigma-t so
+    # thus this hack to convert back to density
+    navy = density < 1000
+    sigma = np.where(navy, density, density - 1000)
+    density = np.where(navy, density + 1000, density)
     # Create dataframe  -- calc_density will be changed to calc_sigma
-    df = pd.DataFrame(sensor_vals, columns=["m_present_time",
-                      "m_gps_lon", "m_gps_lat", "m_depth", "sci_water_temp",
-                                            "calc_salinity", "calc_density",
-                                            "calc_sigma", "calc_soundvel"])
+    df = pd.DataFrame({"m_present_time": erddap_df['time'].to_numpy(),
+                       "m_gps_lon": erddap_df['longitude'].to_numpy(),
+                       "m_gps_lat": erddap_df['latitude'].to_numpy(),
+                       "m_depth": erddap_df['depth'].to_numpy(),
+                       "sci_water_temp": temp,
+                       "calc_salinity": sal,
+                       "calc_density": density,
+                       "calc_sigma": sigma,
+                       "calc_soundvel": svel})
     # Check for max_depth
     use_max_depth = v_config['gandalf']['plots']['use_max_plot_depth']
     max_depth = v_config['gandalf']['plots']['max_plot_depth']
@@ -366,8 +353,8 @@ def make_3D_plots(vehicle):
     if 'IOOS GDAC' in d_type:
         logging.debug('make_3D_plots(): Vehicle is type %s' % v_type)
         logging.debug('make_3D_plots(): Data for %s is %s' % (vehicle, d_type))
-        json_data = get_erddap_data(vehicle)
-        df = create_df_erddap(vehicle, json_data)
+        erddap_df = get_erddap_data(vehicle)
+        df = create_df_erddap(vehicle, erddap_df)
         plotly_scatter(vehicle, df)
 
 
@@ -2,7 +2,7 @@
 """
 Name:       gandalf_mcp.py
 Created:    2016-09-05
-Modified:   2022-06-01
+Modified:   2026-10-19
 Author:     bob.currier@gcoos.org
 Inputs:     Dinkum binary files, ascii log files
 Outputs:    GeoJSON Feature Collections, plots
@@ -10,159 +10,359 @@ Notes:      Master Control Program for GANDALF
 pylint score: 10.0 out of 10.0 on 2018-06-05
 Updated to use logging.info vs print() statements
 """
-import json
 import logging
 import time
 import sys
-import multiprocessing as mp
-from datetime import datetime
+import argparse
+import importlib
 from geojson import FeatureCollection
-from gandalf_process_gdac import gandalf_process_gdac
-from gandalf_process_erddap import gandalf_process_erddap
-from gandalf_slocum_local import get_slocum_surfreps
-from gandalf_slocum_local import slocum_process_local, slocum_kmz
-from gandalf_gdac_plots import gandalf_gdac_plots
-from gandalf_ftp_gdac import make_to_send_list
-from gandalf_slocum_plots_v2 import make_plots, register_cmocean
 from gandalf_utils import get_vehicle_config
 from gandalf_utils import get_deployed_slocum
 from gandalf_utils import get_deployed_gdac
 from gandalf_utils import get_deployed_seagliders
 from gandalf_utils import get_deployed_saildrones
 from gandalf_utils import get_deployment_status_all, flight_status
-
-# New seaglider import
-from gandalf_sg2gdac_DIM import gandalf_sg2gdac_DIM
-from gandalf_sg_tracks_DIM import gandalf_sg_track
-from gandalf_sg_PIM import gandalf_sg_plots
+from gandalf_metrics import reset_run, write_run_report
+from gandalf_publish import publish_geojson
+from gandalf_positions import index_results
+from gandalf_jobs import open_queue, make_job, run_tick, get_results
+from gandalf_workers import BROKER_URL, get_broker, run_tick_distributed
+#
+# 2026-10-19: Stage imports now live in the functions that use them, so a
+# tick only loads matplotlib, netCDF4, pymongo et al. for the vehicle types
+# that are actually deployed. warm_up() imports the lot up front for the
+# long-running gandalf_mcp_daemon, which is where the startup cost goes.
 #
 # Old seaglider imports -- Need to use this as new code doesn't yet write GEOJSON
 #from gandalf_sg_DIM import gandalf_sg_dim
 #
-# Saildrone
-from gandalf_sd_plots import gandalf_sd_plots
-from gandalf_process_waveglider import gandalf_process_waveglider
+# Waveglider: gandalf_process_waveglider
+STAGE_MODULES = ['gandalf_sg2gdac_DIM', 'gandalf_sg_tracks_DIM',
+                 'gandalf_sg_PIM', 'gandalf_slocum_local',
+                 'gandalf_slocum_plots_v2', 'gandalf_process_gdac',
+                 'gandalf_gdac_plots', 'gandalf_process_erddap',
+                 'gandalf_sd_plots', 'gandalf_ftp_gdac', 'gandalf_mongo',
+                 'gandalf_calc_sensors', 'gandalf_slocum_binaries_v2']
+# Per vehicle type: (task, stage, stages it depends on) in TASKS
+PIPELINES = {
+    'slocum': [('slocum_decode', 'decode', ()),
+               ('slocum_calc', 'calc', ('decode',)),
+               ('slocum_kmz', 'kmz', ()),
+               ('slocum_geojson', 'geojson', ()),
+               ('slocum_plots', 'plots', ('calc',)),
+               ('ftp_gdac', 'ftp', ('decode',))],
+    'seaglider': [('sg_decode', 'decode', ()),
+                  ('sg_geojson', 'geojson', ('decode',)),
+                  ('sg_plots', 'plots', ('decode',)),
+                  ('ftp_gdac', 'ftp', ('decode',))],
+    'gdac': [('gdac_geojson', 'geojson', ()),
+             ('gdac_plots', 'plots', ('geojson',))],
+    'erddap': [('erddap_geojson', 'geojson', ()),
+               ('sd_plots', 'plots', ('geojson',))],
+}
+# GeoJSON file -> publish task. Publish runs after every geojson stage and
+# before the slow plots, so the map updates first.
+PUBLISH_TASKS = [('seagliders', 'publish_seagliders'),
+                 ('local', 'publish_local'), ('gdac', 'publish_gdac'),
+                 ('erddap', 'publish_erddap')]
+# Run on the coordinator in multi-node mode: one writer per GeoJSON file
+LOCAL_TASKS = set(task for _, task in PUBLISH_TASKS)
+STAGE_RANK = {'decode': 0, 'calc': 1, 'kmz': 2, 'geojson': 3, 'publish': 4,
+              'plots': 5, 'ftp': 6}
+
+
+def slocum_decode(job):
+    """
+    Name:       slocum_decode
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Binaries to sensors.csv. Was the first half of
+                slocum_process_local, which still does the lot for one-offs.
+    """
+    from gandalf_slocum_local import SKIP_LIST
+    from gandalf_slocum_binaries_v2 import process_binaries
+    vehicle = job['vehicle']
+    if vehicle in SKIP_LIST:
+        return
+    process_binaries(get_vehicle_config(vehicle), vehicle)
+
+
+def slocum_calc(job):
+    """
+    Name:       slocum_calc
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Derived sensors into sensors.csv
+    """
+    from gandalf_slocum_local import SKIP_LIST
+    from gandalf_calc_sensors import calc_salinity, calc_density
+    from gandalf_calc_sensors import calc_soundvel
+    vehicle = job['vehicle']
+    if vehicle in SKIP_LIST:
+        return
+    config = get_vehicle_config(vehicle)
+    calc_salinity(config, vehicle)
+    calc_density(config, vehicle)
+    calc_soundvel(config, vehicle)
+
+
+def slocum_kmz(job):
+    """
+    Name:       slocum_kmz
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Track KMZ from the surfacing logs
+    """
+    from gandalf_slocum_local import SKIP_LIST, slocum_kmz as make_kmz
+    if job['vehicle'] not in SKIP_LIST:
+        make_kmz(job['vehicle'])
 
 
-def process_data_seaglider(vehicle_list):
+def slocum_geojson(job):
+    """
+    Name:       slocum_geojson
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Surfacing features for one Slocum, kept for publish_local
     """
-    Name:       process_data_seaglider
+    from gandalf_slocum_local import get_slocum_surfreps
+    return get_slocum_surfreps([job['vehicle']])
+
+
+def slocum_plots(job):
+    """
+    Name:       slocum_plots
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Sensor plots are rendered by gandalf_plot_service when
+                someone asks for them at /plots/, so we don't render them
+                every run. We only do depth_avg_curr, which it doesn't
+                render, plus the config's plots.prerender_sensors, if any.
+    """
+    from gandalf_slocum_plots_v2 import make_plots, register_cmocean
+    plots = get_vehicle_config(job['vehicle'])['gandalf']['plots']
+    sensors = [sensor for sensor in plots['plot_sensor_list']
+               if sensor == 'depth_avg_curr' or
+               sensor in plots.get('prerender_sensors', [])]
+    if not sensors:
+        return
+    register_cmocean()
+    make_plots(job['vehicle'], sensors)
+
+
+def sg_decode(job):
+    """
+    Name:       sg_decode
     Author:     robertdcurrier@gmail.com
     Created:    2022-05-19
-    Modified:   2023-02-14
+    Modified:   2026-10-19
     Notes:      Uses gandalf_sg2csv to process SeaGlider data from BaseStations
                 for which we have access privileges. Generates standard
                 GANDALF sensors.csv file for use in plotting.
+                2026-10-19: Was the per-vehicle half of
+                process_data_seaglider
     """
-    fColl = []
+    from gandalf_sg2gdac_DIM import gandalf_sg2gdac_DIM
+    gandalf_sg2gdac_DIM(job['vehicle'])
 
-    logging.warning('process_data_seaglider(%s)' % vehicle_list)
-    if len(vehicle_list) == 0:
-        logging.info('No deployed seagliders')
-        write_geojson_file('seagliders', fColl)
-        return
 
-    for vehicle in vehicle_list:
-        # We moved plots here from 'Plots' section
-        gandalf_sg2gdac_DIM(vehicle)
-        sg_features = gandalf_sg_track(vehicle)
-        if sg_features:
-            fc = FeatureCollection(sg_features)
-            fColl.append(fc)
-            logging.info('(process_data_seaglider(): Writing Seaglider FeatureCollection')
-            write_geojson_file('seagliders', fColl)
-        else:
-            logging.info("process_data_seaglider(): Empty Seaglider feature list.")
-            fColl = []
-            write_geojson_file('seagliders', fColl)
+def sg_geojson(job):
+    """
+    Name:       sg_geojson
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Track and last position from MongoDB, kept for
+                publish_seagliders
+    """
+    from gandalf_sg_tracks_DIM import gandalf_sg_track
+    return gandalf_sg_track(job['vehicle'])
 
 
-def process_local_gliders(vehicle_list):
+def sg_plots(job):
     """
-    Name:       process_local_gliders
-    Author:     robertdcurrier@gmail.com
-    Created:    2016-09-05
-    Modified:   2020-06-01
-    Notes:      Process vehicles for which we have access to sbd/tbd/log files
-    2022-05-19: Need to check for new field in gandalf.cfg to determine
-    vehicle type. If slocum, use slocum_process_local, if seaglider, we
-    need new seaglider_process_local() function to handle.
-    """
-    # Process binaries and make kmz
-    slocum_process_local(vehicle_list)
-    # Surfacings and FC
-    gandalf_local = get_slocum_surfreps(vehicle_list)
-    return gandalf_local
-
-
-def process_data_slocum(slocum_gliders):
-    """
-    processes binaries and surfreps
-    """
-    # Process data for all deployed local vehicles
-    logging.warning("process_data_slocum(): %s" % slocum_gliders)
-    local_features = process_local_gliders(slocum_gliders)
-    if local_features:
-        local_fc = json.dumps(local_features)
-        write_geojson_file('local', local_fc)
-    else:
-        logging.info("process_data_slocum(): Empty LOCAL feature list.")
-        local_fc = []
-        write_geojson_file('local', local_fc)
+    Name:       sg_plots
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Sensor plots from MongoDB
+    """
+    from gandalf_sg_PIM import gandalf_sg_plots
+    gandalf_sg_plots(job['vehicle'])
 
 
-def process_data_gdac(gdac_gliders):
+def gdac_geojson(job):
     """
-    Name:       process_data_gdac
-    Author:     robertdcurrier@gmail.com
-    Created:    2020-05-05
-    Modified:   2022-06-14
-    Notes:      Gets JSON from gdac and makes fc
+    Name:       gdac_geojson
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Gets JSON from gdac and makes features, kept for
+                publish_gdac
     """
-    features = []
-    fColl = []
+    from gandalf_process_gdac import gandalf_process_gdac
+    return gandalf_process_gdac(job['vehicle'])
 
-    for vehicle in gdac_gliders:
-        logging.warning('process_data_gdac(%s)' % vehicle)
-        gdac_features = gandalf_process_gdac(vehicle)
-        for feature in gdac_features:
-            features.append(feature)
-    if features:
-        fc = FeatureCollection(features)
-        fColl.append(fc)
-        logging.info('process_data_gdac(): Writing ERDDAP FeatureCollection')
-        write_geojson_file('gdac', fColl)
-    else:
-        logging.info("process_data_gdac(): Empty ERDDAP feature list.")
-        fColl = []
-        write_geojson_file('gdac', fColl)
 
+def gdac_plots(job):
+    """
+    Name:       gdac_plots
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Sensor plots from the gdac data
+    """
+    from gandalf_gdac_plots import gandalf_gdac_plots
+    gandalf_gdac_plots(job['vehicle'])
 
-def process_data_erddap(erddap_vehicles):
+
+def erddap_geojson(job):
     """
-    Name:       process_data_erddap
-    Author:     robertdcurrier@gmail.com
-    Created:    2020-05-05
-    Modified:   2022-08-22
-    Notes:      Gets JSON from ERDDAP server and makes fc
+    Name:       erddap_geojson
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Gets JSON from ERDDAP server and makes features, kept for
+                publish_erddap
     """
+    from gandalf_process_erddap import gandalf_process_erddap
+    return gandalf_process_erddap(job['vehicle'])
+
+
+def sd_plots(job):
+    """
+    Name:       sd_plots
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Saildrone sensor plots
+    """
+    from gandalf_sd_plots import gandalf_sd_plots
+    gandalf_sd_plots(job['vehicle'])
+
+
+def ftp_gdac(job):
+    """
+    Name:       ftp_gdac
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Note: we can make this an 'all deployed' feature once we
+                rewrite gandalf_ftp_gdac to use all config file settings vs
+                hardwired.
+    """
+    vehicle = job['vehicle']
+    logging.warning('ftp_gdac(): FTP to GDAC for %s' % vehicle)
+    config = get_vehicle_config(vehicle)
+    if not bool(config["gandalf"]["ftp_send"]):
+        logging.info("ftp_gdac(%s): Not sending to Glider DAC" % vehicle)
+        return
+    from gandalf_ftp_gdac import make_to_send_list
+    make_to_send_list(vehicle)
+
+
+def publish_seagliders(job):
+    """
+    Name:       publish_seagliders
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      One FeatureCollection per Seaglider, as
+                process_data_seaglider wrote them
+                2026-10-19: Then the position index for /api/positions
+    """
+    results = get_results(job['queue'], 'sg_geojson')
+    fColl = [FeatureCollection(features) for _, features in results
+             if features]
+    write_geojson_file('seagliders', fColl)
+    index_results(results)
+
+
+def publish_local(job):
+    """
+    Name:       publish_local
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      All Slocum features in one list, as process_data_slocum
+                wrote them
+                2026-10-19: Then the position index for /api/positions
+    """
+    results = get_results(job['queue'], 'slocum_geojson')
+    local_features = []
+    for _, features in results:
+        if features:
+            local_features.extend(features)
+    if not local_features:
+        logging.info("publish_local(): Empty LOCAL feature list.")
+    write_geojson_file('local', local_features)
+    index_results(results)
+
+
+def publish_collection(data_source, task, queue):
+    """
+    Name:       publish_collection
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Every vehicle's features in a single FeatureCollection
+                2026-10-19: Then the position index for /api/positions
+    """
+    results = get_results(queue, task)
     features = []
+    for _, vehicle_features in results:
+        if vehicle_features:
+            features.extend(vehicle_features)
     fColl = []
-
-    for vehicle in erddap_vehicles:
-        logging.warning('process_data_erddap(%s)' % vehicle)
-        erddap_features = gandalf_process_erddap(vehicle)
-        for feature in erddap_features:
-            features.append(feature)
     if features:
-        fc = FeatureCollection(features)
-        fColl.append(fc)
-        logging.info('process_data_erddap(): Writing ERDDAP FeatureCollection')
-        write_geojson_file('erddap', fColl)
+        fColl.append(FeatureCollection(features))
     else:
-        logging.info("process_data_erddap(): Empty ERDDAP feature list.")
-        fColl = []
-        write_geojson_file('erddap', fColl)
+        logging.info("publish_collection(%s): Empty feature list." %
+                     data_source)
+    write_geojson_file(data_source, fColl)
+    index_results(results)
+
+
+def publish_gdac(job):
+    """gdac.json"""
+    publish_collection('gdac', 'gdac_geojson', job['queue'])
+
+
+def publish_erddap(job):
+    """erddap.json"""
+    publish_collection('erddap', 'erddap_geojson', job['queue'])
+
+
+TASKS = {
+    'slocum_decode': slocum_decode,
+    'slocum_calc': slocum_calc,
+    'slocum_kmz': slocum_kmz,
+    'slocum_geojson': slocum_geojson,
+    'slocum_plots': slocum_plots,
+    'sg_decode': sg_decode,
+    'sg_geojson': sg_geojson,
+    'sg_plots': sg_plots,
+    'gdac_geojson': gdac_geojson,
+    'gdac_plots': gdac_plots,
+    'erddap_geojson': erddap_geojson,
+    'sd_plots': sd_plots,
+    'ftp_gdac': ftp_gdac,
+    'publish_seagliders': publish_seagliders,
+    'publish_local': publish_local,
+    'publish_gdac': publish_gdac,
+    'publish_erddap': publish_erddap,
+}
+
+
+def build_jobs(fleet):
+    """
+    Name:       build_jobs
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Job definitions for this tick. fleet is {vehicle type:
+                [vehicles]}. Publish jobs always exist so empty files still
+                get written when nothing of that type is deployed.
+    """
+    jobs = []
+    for vehicle_type, vehicles in fleet.items():
+        for vehicle in vehicles:
+            for task, stage_name, deps in PIPELINES[vehicle_type]:
+                jobs.append(make_job(vehicle, stage_name, task, deps,
+                                     STAGE_RANK[stage_name]))
+    for data_source, task in PUBLISH_TASKS:
+        jobs.append(make_job(data_source, 'publish', task, (),
+                             STAGE_RANK['publish']))
+    return jobs
 
 
 def get_cli_args():
@@ -171,12 +371,14 @@ def get_cli_args():
     Name:       get_cli_args
     Author:     robertdcurrier@gmail.com
     Created:    2018-11-06
-    Modified:   2021-05-16
+    Modified:   2026-10-19
+    2026-10-19: Was never called and wanted a vehicle the MCP doesn't use.
+    Now just --local, to skip the daemon and run in this process.
     """
     logging.info('get_cli_args()')
     arg_p = argparse.ArgumentParser()
-    arg_p.add_argument("-v", "--vehicle", help="vehicle name",
-                       nargs="?", required='True')
+    arg_p.add_argument("--local", help="run here, not in the MCP daemon",
+                       action="store_true")
     args = vars(arg_p.parse_args())
     return args
 
@@ -184,15 +386,13 @@ def get_cli_args():
 def write_geojson_file(data_source, data):
     """
     Name:       write_geojson_file
-    Modified:   2020-05-26
+    Modified:   2026-10-19
     Notes:      Writes out geojson file for Jquery AJAX loading
+                2026-10-19: Compact, atomic and pre-compressed via
+                gandalf_publish
     """
     logging.warning("write_geojson_file(%s)" % data_source)
-    fname = '/data/gandalf/deployments/geojson/%s.json' % data_source
-    outf = open(fname, 'w')
-    print(data, file=outf)
-    outf.flush()
-    outf.close()
+    publish_geojson(data_source, data)
 
 
 def gandalf_mcp():
@@ -200,12 +400,18 @@ def gandalf_mcp():
     Name:       gandalf_mcp
     Author:     robertdcurrier@gmail.com
     Created:    2022-06-01
-    Modified:   2023-02-14
+    Modified:   2026-10-19
     Notes:      Called by cron as external Docker exec
                 2022-06-22: Working towards having only one set of config files
                 and not using gandalf.cfg.   Status info is now in
                 deployment.json for each vehicle, along with vehicle type.
                 2023-02-14: Now using MongoDB for SG tracks, last_pos and plots
+                2026-10-19: Runs as a tick of the gandalf_jobs queue. A
+                stage that fails only skips that vehicle's later stages,
+                and a tick that was killed resumes where it stopped.
+                Returns {status: job count}.
+                2026-10-19: With GANDALF_BROKER set we coordinate and the
+                stages run on gandalf_workers nodes.
     """
 
     # DEPLOYMENT STATUS
@@ -221,45 +427,78 @@ def gandalf_mcp():
     logging.info("gdac: %s" %  gdac_gliders)
     logging.info("saildrones: %s" % saildrones)
     #logging.info("wavegliders: %s" % wavegliders)
-    # PROCESS
-    process_data_seaglider(seagliders)
-    process_data_slocum(slocum_gliders)
-    process_data_gdac(gdac_gliders)
-    process_data_erddap(saildrones)
     #gandalf_process_waveglider(wavegliders)
-    # PLOTS
-    register_cmocean()
-    for vehicle in seagliders:
-        gandalf_sg_plots(vehicle)
-    for vehicle in saildrones:
-        gandalf_sd_plots(vehicle)
-    for vehicle in slocum_gliders:
-        make_plots(vehicle)
-    for vehicle in gdac_gliders:
-        gandalf_gdac_plots(vehicle)
-    # Note: we can make this an 'all deployed' feature once we rewrite
-    # gandalf_ftp_gdac to use all config file settings vs hardwired.
-    # FTP Slocums
-    for vehicle in slocum_gliders:
-        logging.warning('gandalf_mcp(): Slocum FTP to GDAC for %s' % vehicle)
-        config = get_vehicle_config(vehicle)
-        if bool(config["gandalf"]["ftp_send"]):
-            make_to_send_list(vehicle)
+    fleet = {'seaglider': seagliders, 'slocum': slocum_gliders,
+             'gdac': gdac_gliders, 'erddap': saildrones}
+    queue = open_queue()
+    try:
+        if BROKER_URL:
+            summary = run_tick_distributed(queue, build_jobs(fleet), TASKS,
+                                           get_broker(BROKER_URL),
+                                           LOCAL_TASKS)
         else:
-            logging.info("gandalf_mcp(%s): Not sending to Glider DAC" % vehicle)
-    # FTP Seagliders
-    for vehicle in seagliders:
-        logging.warning('gandalf_mcp(): Seaglider FTP to GDAC for %s' % vehicle)
-        config = get_vehicle_config(vehicle)
-        if bool(config["gandalf"]["ftp_send"]):
-            make_to_send_list(vehicle)
-        else:
-            logging.info("gandalf_mcp(%s): Not sending to Glider DAC" % vehicle)
+            summary = run_tick(queue, build_jobs(fleet), TASKS)
+    finally:
+        queue.close()
+    return summary
+
+
+def warm_up():
+    """
+    Name:       warm_up
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Imports every stage module and registers the cmocean maps
+                so the daemon's first run doesn't pay for them. A module
+                that won't import here is logged; the stage that needs it
+                will fail the same way it always did.
+    """
+    for module_name in STAGE_MODULES:
+        try:
+            importlib.import_module(module_name)
+        except ImportError as error:
+            logging.warning('warm_up(): %s: %s' % (module_name, error))
+    try:
+        from gandalf_slocum_plots_v2 import register_cmocean
+        register_cmocean()
+    except ImportError:
+        pass
+    try:
+        from gandalf_mongo import connect_mongo
+        connect_mongo()
+    except ImportError:
+        pass
+
+
+def run_mcp():
+    """
+    Name:       run_mcp
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      One MCP run with a fresh metrics run around it. Returns the
+                run report. Used by __main__ and by gandalf_mcp_daemon.
+    """
+    reset_run()
+    try:
+        gandalf_mcp()
+    finally:
+        # Per-stage timings, even when a stage sys.exit()s on us
+        report = write_run_report('gandalf_mcp')
+    return report
+
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
+    args = get_cli_args()
     start_time = time.time()
-    gandalf_mcp()
+    # 2026-10-19: Hand the run to the warm daemon if it's up, otherwise
+    # run here as before
+    report = None
+    if not args['local']:
+        from gandalf_mcp_daemon import request_run
+        report = request_run()
+    if report is None:
+        run_mcp()
     end_time = time.time()
     minutes = ((end_time - start_time) / 60)
     logging.warning('Duration: %0.2f minutes' % minutes)
@@ -194,7 +194,8 @@ def chunk_it(vehicle):
         client = connect_mongo()
     except:
         logging.warning('chunk_it(): Failed to connect to MongoDB')
-        sys.exit()
+        # 2026-10-19: raise, not sys.exit(), so only this vehicle fails
+        raise
 
     db = client.gandalf
     numdocs = db[vehicle].count_documents({})
@@ -226,7 +227,7 @@ def gandalf_alseamar_plots(vehicle, db):
     except:
         logging.warning('gandalf_alseamar_plots(%s): MongoDB connect fail',
         				vehicle)
-        sys.exit()
+        raise
 
     db = client.gandalf
     logging.info('gandalf_alseamar_plots(%s): Creating DF from MongoDB collection',
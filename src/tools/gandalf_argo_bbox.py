@@ -6,6 +6,7 @@ Modified:   2023-09-08
 Notes:      Code for bbox and mp by xiao2022@gwmail.gwu.edu (Xiao Qi)
 """
 import json
+import os
 import random
 import sys
 import requests
@@ -29,6 +30,7 @@ from calendar import timegm
 from geojson import LineString, FeatureCollection, Feature, Point
 from pandas.plotting import register_matplotlib_converters
 from argovisHelpers import helpers as avh
+from gandalf_publish import publish_geojson, GEOJSON_DIR
 
 # THESE SETTINGS NEED TO COME FROM CONFIG FILE EVENTUALLY
 ROOT_DIR = ''
@@ -38,6 +40,7 @@ using_multiprocess = True
 dataDays = 30
 numProcesses = 8
 date_cutoff = 21
+CACHE_DIR = ROOT_DIR + '/data/gandalf/argo/cache'
 # END GLOBALS
 
 
@@ -113,29 +116,120 @@ def get_platform_profiles(platform_number):
 def profiles_to_df(profiles):
     """
     Created: 2020-06-04
-    Modified: 2021-09-01
+    Modified: 2026-10-19
     Author: robertdcurrier@gmail.com
     Notes: Convert profiles in JSON to pandas df. Pretty much word for word
     from the Argovis API doco. Update: We added the return of profileDF
     so we have easy access to the last profile
     Added PI_NAME on 2021-09-01.
+    2026-10-19: Was growing the frame with pd.concat per profile, which is
+    quadratic. We now flatten all measurements and repeat the per-profile
+    columns with numpy, so the table is built in one shot.
     """
     logging.info('profiles_to_df()...')
     pi_name = (profiles[0]['PI_NAME'])
-    keys = profiles[0]['measurements'][0].keys()
-    data_frame = pd.DataFrame(columns=keys)
+    measurements = []
+    counts = []
     for profile in profiles:
-        profileDf = pd.DataFrame(profile['measurements'])
-        profileDf['pi'] = pi_name
-        profileDf['cycle_number'] = profile['cycle_number']
-        profileDf['profile_id'] = profile['_id']
-        profileDf['lat'] = profile['lat']
-        profileDf['lon'] = profile['lon']
-        profileDf['date'] = profile['date']
-        data_frame = pd.concat([data_frame, profileDf], sort=False)
+        measurements.extend(profile['measurements'])
+        counts.append(len(profile['measurements']))
+    data_frame = pd.DataFrame(measurements)
+    data_frame['pi'] = pi_name
+    for column, key in [('cycle_number', 'cycle_number'),
+                        ('profile_id', '_id'), ('lat', 'lat'),
+                        ('lon', 'lon'), ('date', 'date')]:
+        values = [profile[key] for profile in profiles]
+        data_frame[column] = np.repeat(np.asarray(values, dtype=object),
+                                       counts)
+    data_frame = data_frame.infer_objects()
     return data_frame
 
 
+def cycle_from_id(profile_id):
+    """
+    Created: 2026-10-19
+    Modified: 2026-10-19
+    Notes: Argovis ids are platform_cycle with an optional D suffix for
+    descending profiles. Returns the cycle number or None.
+    """
+    try:
+        cycle = str(profile_id).split('_')[1]
+    except IndexError:
+        return None
+    cycle = ''.join(char for char in cycle if char.isdigit())
+    if cycle:
+        return int(cycle)
+    return None
+
+
+def load_profile_cache(platform):
+    """
+    Created: 2026-10-19
+    Modified: 2026-10-19
+    Notes: Cached profiles for a platform as {_id: profile}
+    """
+    cache_file = '%s/%s.json' % (CACHE_DIR, platform)
+    try:
+        with open(cache_file) as cfile:
+            return json.load(cfile)
+    except (OSError, ValueError) as error:
+        logging.info('load_profile_cache(%s): %s', platform, error)
+        return {}
+
+
+def save_profile_cache(platform, cache):
+    """
+    Created: 2026-10-19
+    Modified: 2026-10-19
+    Notes: Temp file and rename so a killed worker can't leave junk
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    cache_file = '%s/%s.json' % (CACHE_DIR, platform)
+    tmp_file = '%s.%d.tmp' % (cache_file, os.getpid())
+    with open(tmp_file, 'w') as outf:
+        json.dump(cache, outf)
+    os.replace(tmp_file, cache_file)
+
+
+def get_cached_profiles(platform, latest_cycle=None):
+    """
+    Created: 2026-10-19
+    Modified: 2026-10-19
+    Notes: Returns profiles newest first, same as get_platform_profiles.
+    We only go to Argovis if the bbox query shows a cycle newer than the
+    max cycle_number we have stored, and only merge the newer cycles into
+    the cache. The catalog endpoint has no 'since' option so a refetch is
+    still the full history, but it now happens once per new cycle rather
+    than on every run.
+    """
+    cache = load_profile_cache(platform)
+    stored_max = None
+    if cache:
+        stored_max = max(profile['cycle_number'] for profile in
+                         cache.values())
+    if (stored_max is None or latest_cycle is None or
+            latest_cycle > stored_max):
+        logging.info('get_cached_profiles(%s): stored max %s, latest %s',
+                     platform, stored_max, latest_cycle)
+        platform_profiles = get_platform_profiles(platform)
+        if platform_profiles:
+            added = 0
+            for profile in platform_profiles:
+                if (stored_max is None or
+                        profile['cycle_number'] > stored_max):
+                    cache[profile['_id']] = profile
+                    added += 1
+            logging.info('get_cached_profiles(%s): Cached %d new profiles',
+                         platform, added)
+            save_profile_cache(platform, cache)
+    if not cache:
+        return False
+    profiles = sorted(cache.values(), key=lambda profile:
+                      (profile['cycle_number'], profile['date']),
+                      reverse=True)
+    return profiles
+
+
 def get_cmocean_name(sensor):
     """
     Author: robertdcurrier@gmail.com
@@ -385,12 +479,13 @@ def argo_plot_last_profile(platform, last_profile, sensor):
 def argo_surface_marker(platform, slim_df):
     """
     Created: 2020-06-05
-    Modified: 2020-06-08
+    Modified: 2026-10-19
     Author: robertdcurrier@gmail.com
     Notes: Uses last date/time reported position to generate geoJSON
     feature. Feature is returned and added to features[]. When complete,
     features[] is made into a feature collection.
     TO DO: create argo.cfg and use instead of hardwiring...
+    2026-10-19: Infobox properties instead of html
     """
     logging.info('argo_surface_marker(%s): creating surface marker' % platform)
     coords = []
@@ -429,34 +524,13 @@ def argo_surface_marker(platform, slim_df):
     s_last = ROOT_DIR + '/data/gandalf/argo/plots/%s_psal_last.png' % platform
 
     surf_marker.properties['platform'] = platform
-    surf_marker.properties['html'] = """
-        <h5><center><span class='infoBoxHeading'>ARGO Float Status</span></center></h5>
-        <table class='infoBoxTable'>
-            <tr><td class='td_infoBoxSensor'>Platform:</td><td>%s</td></tr>
-            <tr><td class='td_infoBoxSensor'>PI:</td><td>%s</td></tr>
-            <tr><td class='td_infoBoxSensor'>Date/Time:</td><td>%s</td></tr>
-            <tr><td class='td_infoBoxSensor'>Position:</td><td>%0.4fW/%0.4fN</td></tr>
-        </table>
-        <div class = 'infoBoxBreakBar'>Most Recent Cycle</div>
-        <div class = 'infoBoxLastPlotDiv'>
-            <a href='%s' target="_blank">
-                <img class = 'infoBoxLastPlotImage' src = '%s'></img>
-            </a>
-            <a href='%s' target="_blank">
-                <img class = 'infoBoxLastPlotImage' src = '%s'></img>
-            </a>
-        </div>
-        <div class = 'infoBoxBreakBar'>2D Time Series Plots</div>
-        <div class = 'infoBoxPlotDiv'>
-            <a href='%s' target="_blank">
-                <img class = 'infoBoxPlotImage' src = '%s'></img>
-            </a>
-            <a href='%s' target="_blank">
-                <img class = 'infoBoxPlotImage' src = '%s'></img>
-            </a>
-        </div>
-        """ % (platform, pi, last_date, lon, lat, t_last, t_last,
-               s_last, s_last, t_plot, t_plot, s_plot, s_plot)
+    # 2026-10-19 Infobox properties, infobox.js renders
+    surf_marker.properties['infobox'] = 'float'
+    surf_marker.properties['float_type'] = 'ARGO'
+    surf_marker.properties['pi'] = pi
+    surf_marker.properties['last_date'] = str(last_date)
+    surf_marker.properties['last_plots'] = [t_last, s_last]
+    surf_marker.properties['series_plots'] = [t_plot, s_plot]
     features.append(surf_marker)
     logging.info('argo_surface_marker(%s): Most Recent Date is %s',
                     platform, last_date)
@@ -466,23 +540,23 @@ def argo_surface_marker(platform, slim_df):
 def write_geojson_file(data):
     """
     Created: 2020-06-05
-    Modified: 2020-10-26
+    Modified: 2026-10-19
     Author: robertdcurrier@gmail.com
     Notes: writes out feature collection
+    2026-10-19: Via gandalf_publish (compact, atomic, .gz/.br)
     """
-    fname = (ROOT_DIR + "/data/gandalf/deployments/geojson/argo.json")
-    logging.warning("write_geojson(): Writing %s" % fname)
-    outf = open(fname,'w')
-    outf.write(str(data))
-    outf.close()
+    logging.warning("write_geojson(): Writing argo.json")
+    publish_geojson('argo', data, ROOT_DIR + GEOJSON_DIR)
 
 
-def build_argo_plots(platform):
+def build_argo_plots(platform, latest_cycle=None):
     """
     Created:  2020-06-05
-    Modified: 2022-09-08
+    Modified: 2026-10-19
     Author:   robertdcurrier@gmail.com
     Notes:    writes out feature collection
+              2026-10-19: Profiles now come from the per-platform cache.
+              latest_cycle is the newest cycle seen in the bbox query.
     """
     # because of multiprocessing, check if the value has been registered
     if 'thermal' not in plt.colormaps():
@@ -490,7 +564,7 @@ def build_argo_plots(platform):
 
     argo_sensors = ['temp', 'psal']
     logging.warning('build_argo_plots(): Processing platform %d' % platform)
-    platform_profiles = get_platform_profiles(platform)
+    platform_profiles = get_cached_profiles(platform, latest_cycle)
     # Only do this if we get good data...
     if platform_profiles:
         last_profile = get_last_profile(platform, platform_profiles)
@@ -534,7 +608,8 @@ def argo_process():
     # register helpers
     register_matplotlib_converters()
     # get platform list from v2 api using polygon
-    platform_list = get_bbox_platforms()
+    platform_cycles = get_bbox_platforms()
+    platform_list = list(platform_cycles.items())
     num_platforms = len(platform_list)
     logging.warning('argo_process(): Argovis returned %d platforms', num_platforms)
 
@@ -543,17 +618,17 @@ def argo_process():
 
     if using_multiprocess:
         with mp.Pool(processes=numProcesses) as pool:
-            argo_features = pool.map(build_argo_plots, platform_list)
+            argo_features = pool.starmap(build_argo_plots, platform_list)
 
         # Save only meaningful data and exclude useless data (like return False).
         argo_features = [feature for feature in argo_features if feature]
         logging.info('argo_process(): Argovis processed %d platforms', len(argo_features))
     else:
-        for platform in platform_list:
+        for platform, latest_cycle in platform_list:
             remaining_platforms = num_platforms-platform_count
             logging.warning('argo_process(): %d platforms remaining',
                          remaining_platforms)
-            results = build_argo_plots(platform)
+            results = build_argo_plots(platform, latest_cycle)
             if results:
                 argo_features.append(results)
             else:
@@ -566,9 +641,11 @@ def argo_process():
 def get_bbox_platforms():
     """
     Created:  2023-09-01
-    Modified: 2023-09-07
+    Modified: 2026-10-19
     Author:   xiao2022@gwmail.gwu.edu (Xiao Qi)
     Notes:    Argovis API V2 bbox query
+              2026-10-19: Returns {platform: newest cycle in window} so
+              build_argo_plots can skip platforms with nothing new.
     """
     logging.warning('get_bbox_platforms(): Fetching platform data from argovis API')
     API_ROOT = 'https://argovis-api.colorado.edu/' #<--- TO CONFIG FILE
@@ -586,21 +663,28 @@ def get_bbox_platforms():
 
 
     profiles = avh.query('argo', options=dataQuery, apikey=API_KEY, apiroot=API_ROOT)
-    platform_set = set()
+    platform_cycles = {}
 
     for profile in profiles:
         platform = profile[0].split('_')[0]
 
         if platform.isnumeric():
-            platform_set.add(int(platform))
+            platform = int(platform)
+            cycle = cycle_from_id(profile[0])
+            if platform not in platform_cycles:
+                platform_cycles[platform] = cycle
+            elif cycle is not None and (platform_cycles[platform] is None or
+                                        cycle > platform_cycles[platform]):
+                platform_cycles[platform] = cycle
         else:
             logging.info('get_bbox_platforms(): %s cannot be added.', profile)
 
-    num_platforms = len(platform_set)
+    num_platforms = len(platform_cycles)
     logging.info('get_bbox_platforms(): Found %d platforms', num_platforms)
-    logging.info('get_bbox_platforms(): Platform list is %s', platform_set)
+    logging.info('get_bbox_platforms(): Platform list is %s',
+                 list(platform_cycles))
 
-    return list(platform_set)
+    return platform_cycles
 
 
 if __name__ == '__main__':
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Name:       gandalf_benchmark.py
+Created:    2026-10-19
+Modified:   2026-10-19
+Notes:      Times the hot spots of the pipeline against synthetic missions
+            from gandalf_synth_mission at 1, 30 and 180 day scales (or
+            whatever -d says):
+
+                GANDALF_BENCH_ROOT=/data/gandalf/benchmarks \\
+                    ./gandalf_benchmark.py -d 1 -d 30 -d 180
+
+            Each case runs inside gandalf_metrics.stage(case, '<days>d'), so
+            we get wall, CPU, peak RSS and I/O per case per scale.
+            The run goes out through write_run_report('benchmark') into
+            <root>/results. benchmark_history.jsonl there grows by one line
+            per run, which is what we plot to compare releases.
+
+            Synthetic vehicles get their own config tree under the bench
+            root. GANDALF_VEHICLE_CONFIGS is set before any pipeline module
+            is imported, and the cases import what they time lazily, so the
+            real fleet is never touched. A case that can't run here (missing
+            dependency, no EEZ file, ...) is logged and marked failed, and
+            the rest carry on.
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+BENCH_ROOT = os.environ.get('GANDALF_BENCH_ROOT', '/data/gandalf/benchmarks')
+os.environ['GANDALF_VEHICLE_CONFIGS'] = '%s/configs' % BENCH_ROOT
+from gandalf_metrics import stage, add_rows, write_run_report
+from gandalf_synth_mission import build_mission, waveglider_frames
+from gandalf_synth_mission import DBA_SENSORS, SAMPLE_SECONDS
+
+DEFAULT_SCALES = [1, 30, 180]
+# gandalf_app_utils lives in the web app tree
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                       'app')
+PLOT_SENSOR = 'sci_water_temp'
+
+
+def get_cli_args():
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Scales, sensor count, repeats and which cases to run
+    """
+    logging.debug('get_cli_args()')
+    arg_p = argparse.ArgumentParser()
+    arg_p.add_argument("-d", "--days", help="mission length in days",
+                       type=int, action="append")
+    arg_p.add_argument("-s", "--sensors", help="sensors per DBA",
+                       type=int, default=len(DBA_SENSORS))
+    arg_p.add_argument("-i", "--interval", help="DBA sample seconds",
+                       type=int, default=SAMPLE_SECONDS)
+    arg_p.add_argument("-n", "--repeat", help="runs per case, best kept",
+                       type=int, default=1)
+    arg_p.add_argument("-c", "--case", help="only this case",
+                       action="append")
+    arg_p.add_argument("--reuse", help="keep missions already generated",
+                       action="store_true")
+    args = vars(arg_p.parse_args())
+    return args
+
+
+def slocum_config(mission):
+    """Cached deployment.json for the mission's Slocum"""
+    from gandalf_config_registry import load_vehicle_config
+    return load_vehicle_config(mission['vehicle'])
+
+
+def case_pandas_gen_csv(mission):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Merged DBAs to sensors.csv
+    """
+    from gandalf_slocum_binaries_v2 import pandas_gen_csv
+    config = slocum_config(mission)
+    add_rows(mission['rows'])
+    return lambda: pandas_gen_csv(config, mission['vehicle'])
+
+
+def calc_case(calc_name):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      One of the gandalf_calc_sensors functions on sensors.csv.
+                They build on each other so they run in CASES order.
+    """
+    def case(mission):
+        import gandalf_calc_sensors
+        calc = getattr(gandalf_calc_sensors, calc_name)
+        config = slocum_config(mission)
+        add_rows(mission['rows'])
+        return lambda: calc(config, mission['vehicle'])
+    return case
+
+
+def case_parse_log_files(mission):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Surfacing dialogs to the surfacings DataFrame
+    """
+    from gandalf_slocum_to_kml import parse_log_files
+    config = slocum_config(mission)
+    add_rows(len(mission['log_files']))
+    return lambda: parse_log_files(config, mission['log_files'])
+
+
+def case_make_local_feature(mission):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Surfacings to track/last_pos features. Parsing is setup.
+    """
+    from gandalf_slocum_to_kml import parse_log_files
+    from gandalf_slocum_local import make_local_feature
+    config = slocum_config(mission)
+    surfacings = parse_log_files(config, mission['log_files'])
+    add_rows(len(surfacings))
+    return lambda: make_local_feature(surfacings, config)
+
+
+def case_index_positions(mission):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Position index from a real make_local_feature, wrapped the
+                way slocum_geojson hands it to publish_local. Fails the
+                case if the Slocum isn't indexed.
+    """
+    from gandalf_slocum_to_kml import parse_log_files
+    from gandalf_slocum_local import make_local_feature
+    from gandalf_positions import get_index_file, index_results
+    config = slocum_config(mission)
+    surfacings = parse_log_files(config, mission['log_files'])
+    results = [(mission['vehicle'],
+                [make_local_feature(surfacings, config)])]
+    positions_dir = '%s/positions_%03dd' % (BENCH_ROOT, mission['days'])
+    index_file = get_index_file(mission['vehicle'], positions_dir)
+    add_rows(len(surfacings))
+
+    def run():
+        if os.path.exists(index_file):
+            os.unlink(index_file)
+        if mission['vehicle'] not in index_results(results, positions_dir):
+            raise ValueError('%s not indexed' % mission['vehicle'])
+    return run
+
+
+def case_slocum_kmz(mission):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Logs to the KMZ. The first run writes it; repeats find the
+                surfacing set unchanged and leave it alone.
+    """
+    from gandalf_slocum_to_kml import slocum_kmz
+    add_rows(len(mission['log_files']))
+    return lambda: slocum_kmz(mission['vehicle'])
+
+
+def case_plot_sensor(mission):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      One sensor plot from sensors.csv
+    """
+    from gandalf_slocum_plots_v2 import plot_sensor
+    config = slocum_config(mission)
+    add_rows(mission['rows'])
+    return lambda: plot_sensor(config, mission['vehicle'], PLOT_SENSOR)
+
+
+def case_gen_mashed_df(mission):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Waveglider stream join. gen_mashed_df renames in place so
+                every run gets fresh copies; the copy is part of the time.
+    """
+    from gandalf_process_waveglider import gen_mashed_df
+    frames = waveglider_frames(mission['days'])
+    add_rows(len(frames[0]))
+    return lambda: gen_mashed_df(mission['waveglider'],
+                                 [frame.copy() for frame in frames])
+
+
+def case_create_downcast_nc(mission):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      GDAC downcast NetCDF for every dive. Opening the dive files
+                is setup.
+    """
+    from gandalf_sg2gdac_DIM import read_sg_nc, create_downcast_nc
+    vehicle = mission['seaglider']
+    datasets = [read_sg_nc(vehicle, dive) for dive in mission['dive_files']]
+    add_rows(len(datasets))
+
+    def run():
+        for sg_ds in datasets:
+            create_downcast_nc(vehicle, sg_ds)
+    return run
+
+
+def case_get_dashboard_json(mission):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Dashboard build over the synthetic fleet files. Needs the
+                app tree next to tools, as in the repo.
+    """
+    if APP_DIR not in sys.path:
+        sys.path.append(APP_DIR)
+    from gandalf_app_utils import get_dashboard_json
+    return lambda: get_dashboard_json(mission['geojson_dir'])
+
+
+# In run order
+CASES = [
+    ('pandas_gen_csv', case_pandas_gen_csv),
+    ('calc_salinity', calc_case('calc_salinity')),
+    ('calc_density', calc_case('calc_density')),
+    ('calc_soundvel', calc_case('calc_soundvel')),
+    ('parse_log_files', case_parse_log_files),
+    ('make_local_feature', case_make_local_feature),
+    ('index_positions', case_index_positions),
+    ('slocum_kmz', case_slocum_kmz),
+    ('plot_sensor', case_plot_sensor),
+    ('gen_mashed_df', case_gen_mashed_df),
+    ('create_downcast_nc', case_create_downcast_nc),
+    ('get_dashboard_json', case_get_dashboard_json),
+]
+
+
+def run_case(name, case, mission, repeat):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Setup untimed, then repeat timed runs. Returns the best
+                wall time or None if the case failed.
+    """
+    label = '%dd' % mission['days']
+    try:
+        with stage('setup:%s' % name, label):
+            func = case(mission)
+        best = None
+        for _ in range(repeat):
+            with stage(name, label) as record:
+                func()
+            if best is None or record['wall_seconds'] < best:
+                best = record['wall_seconds']
+    except (Exception, SystemExit) as error:  # pylint: disable=broad-except
+        logging.warning('run_case(%s, %s): %s: %s', name, label,
+                        type(error).__name__, error)
+        return None
+    logging.info('run_case(%s, %s): %0.3fs', name, label, best)
+    return best
+
+
+def run_benchmarks(scales, sensor_count, sample_seconds, repeat=1,
+                   only=None, reuse=False):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Generates (or reuses) each scale's mission and runs the
+                cases against it. Returns {case: {days: seconds}}.
+    """
+    results = {}
+    for days in scales:
+        logging.warning('run_benchmarks(): %d day mission', days)
+        with stage('generate', '%dd' % days):
+            mission = build_mission(BENCH_ROOT, days, sensor_count,
+                                    sample_seconds, reuse=reuse)
+        for name, case in CASES:
+            if only and name not in only:
+                continue
+            results.setdefault(name, {})[days] = run_case(name, case,
+                                                          mission, repeat)
+    return results
+
+
+def log_results(results, scales):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      One line per case with the time at each scale
+    """
+    logging.warning('%-20s %s', 'case', ' '.join('%10dd' % days for
+                                                   days in scales))
+    for name, timings in results.items():
+        cells = []
+        for days in scales:
+            seconds = timings.get(days)
+            cells.append('%11s' % ('failed' if seconds is None else
+                                   '%0.3fs' % seconds))
+        logging.warning('%-20s %s', name, ' '.join(cells))
+
+
+if __name__ == '__main__':
+    """
+    For command line use
+    """
+    logging.basicConfig(level=logging.WARNING)
+    args = get_cli_args()
+    scales = args['days'] or DEFAULT_SCALES
+    start_time = time.time()
+    bench_results = run_benchmarks(scales, args['sensors'], args['interval'],
+                                   args['repeat'], args['case'],
+                                   args['reuse'])
+    log_results(bench_results, scales)
+    write_run_report('benchmark', '%s/results' % BENCH_ROOT)
+    logging.warning('Duration: %0.2f minutes',
+                    (time.time() - start_time) / 60)
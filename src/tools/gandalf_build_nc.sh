@@ -1,6 +1,6 @@
 #!/bin/bash
-cd /opt/gncutils/scripts
-./dba_to_ngdac_profile_nc.py -c \
-/data/gandalf/gandalf_configs/vehicles/$2/ngdac \
-/data/gandalf/deployments/$1/$2/processed_data/dba/merged/*.dba \
--o /data/gandalf/deployments/$1/$2/processed_data/ngdac_files
+# 2026-10-19 Only segments without profiles yet are processed. See
+# gandalf_ngdac_writer.py. $1 (org) is no longer needed but kept so the
+# cron lines don't have to change.
+cd /gandalf/tools
+./gandalf_ngdac_writer.py $2
@@ -11,6 +11,7 @@ from datetime import datetime
 from geojson import Feature, Point, FeatureCollection, LineString
 from gandalf_utils import get_vehicle_config, flight_status, dinkum_convert
 from chloroMap import chloroMap
+from gandalf_publish import publish_geojson
 
 def cmap_chloro(value, min, max):
     """
@@ -106,15 +107,12 @@ def chloro_map(config, vehicle):
 
 def write_geojson_file(data_source, data):
     """
-    Modified: 2020-05-26
+    Modified: 2026-10-19
     Notes: D'oh. Writes out geojson file for Jquery AJAX loading
+    2026-10-19: Via gandalf_publish (compact, atomic, .gz/.br)
     """
     print("write_geojson_file(%s)" % data_source)
-    fname = '/data/gandalf/deployments/geojson/%s.json' % data_source
-    outf = open(fname, 'w')
-    print(data, file=outf)
-    outf.flush()
-    outf.close()
+    publish_geojson(data_source, data)
 
 
 if __name__ == '__main__':
@@ -25,7 +25,6 @@ from matplotlib import pyplot as plt
 from matplotlib import colors as colors
 from matplotlib import cm as cm
 from gandalf_utils import get_vehicle_config, get_sensor_config, flight_status
-from gandalf_slocum_local import dinkum_convert
 from geojson import Feature, Point, FeatureCollection, LineString
 
 
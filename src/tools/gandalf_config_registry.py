@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Name:       gandalf_config_registry.py
+Created:    2026-10-19
+Modified:   2026-10-19
+Notes:      Process-wide cache for the JSON config files that every GANDALF
+            tool reads over and over: deployment.json, sensors.json and
+            sg_gdac.json. Each file is parsed once and re-read only when its
+            mtime or size changes, so edits made while the MCP is running
+            are still picked up. Callers get the shared parsed object back
+            and must treat it as read-only.
+
+            Standard library only as gandalf_sg2gdac_DIM also uses this and
+            is designed to run outside the GANDALF ecosystem.
+"""
+import os
+import sys
+import json
+import logging
+import threading
+
+# This we have to hardwire.  All other settings come from config files.
+# GANDALF_VEHICLE_CONFIGS points benchmarks at a scratch tree so synthetic
+# vehicles never show up in the real fleet.
+VEHICLE_CONFIG_ROOT = os.environ.get('GANDALF_VEHICLE_CONFIGS',
+                                     '/data/gandalf/gandalf_configs/vehicles')
+
+_CONFIG_CACHE = {}
+_SENSOR_LOOKUP_CACHE = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def _file_stamp(data_file):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      (mtime_ns, size) tuple used to validate cache entries.
+                Raises FileNotFoundError just like open() would.
+    """
+    stat = os.stat(data_file)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_json_config(data_file):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Returns parsed JSON for data_file, parsing only when the
+                file is new to us or has changed on disk since last time.
+    """
+    stamp = _file_stamp(data_file)
+    with _CACHE_LOCK:
+        cached = _CONFIG_CACHE.get(data_file)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+    logging.debug('load_json_config(): Parsing %s', data_file)
+    with open(data_file, 'r') as cfile:
+        config = json.load(cfile)
+    with _CACHE_LOCK:
+        _CONFIG_CACHE[data_file] = (stamp, config)
+    return config
+
+
+def clear_config_cache():
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Drops everything. Only needed by long-running processes
+                that want to force a reload.
+    """
+    with _CACHE_LOCK:
+        _CONFIG_CACHE.clear()
+        _SENSOR_LOOKUP_CACHE.clear()
+
+
+def vehicle_config_file(vehicle):
+    """Path to a vehicle's deployment.json"""
+    return '%s/%s/ngdac/deployment.json' % (VEHICLE_CONFIG_ROOT, vehicle)
+
+
+def sensor_config_file(vehicle):
+    """Path to a vehicle's sensors.json"""
+    return '%s/%s/sensors.json' % (VEHICLE_CONFIG_ROOT, vehicle)
+
+
+def sg_config_file(vehicle):
+    """Path to a Seaglider's sg_gdac.json"""
+    return '%s/%s/ngdac/sg_gdac.json' % (VEHICLE_CONFIG_ROOT, vehicle)
+
+
+def load_vehicle_config(vehicle):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Cached deployment.json. Raises FileNotFoundError so callers
+                can decide between soft landings and screaming deaths.
+    """
+    return load_json_config(vehicle_config_file(vehicle))
+
+
+def load_sensor_config(vehicle):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Cached sensors.json as the original list of records
+    """
+    return load_json_config(sensor_config_file(vehicle))
+
+
+def load_sg_config(vehicle):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Cached sg_gdac.json
+    """
+    return load_json_config(sg_config_file(vehicle))
+
+
+def get_sensor_lookup(vehicle, key='sensor'):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Dict of sensors.json records keyed by record[key]. GDAC and
+                ERDDAP plots key on 'gdac_sensor', everybody else 'sensor'.
+                Rebuilt only when sensors.json itself is re-parsed, so
+                plot code no longer has to walk the list per sensor.
+    """
+    sensors = load_sensor_config(vehicle)
+    with _CACHE_LOCK:
+        cached = _SENSOR_LOOKUP_CACHE.get((vehicle, key))
+        if cached is not None and cached[0] is sensors:
+            return cached[1]
+    lookup = {}
+    for record in sensors:
+        if key in record:
+            lookup[record[key]] = record
+    with _CACHE_LOCK:
+        _SENSOR_LOOKUP_CACHE[(vehicle, key)] = (sensors, lookup)
+    return lookup
+
+
+def get_sensor_record(vehicle, sensor, key='sensor'):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Single sensors.json record or None if not configured
+    """
+    return get_sensor_lookup(vehicle, key).get(sensor)
+
+
+def get_gandalf_setting(vehicle, key, default=None):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      config['gandalf'][key] with a default for optional settings
+    """
+    return load_vehicle_config(vehicle)['gandalf'].get(key, default)
+
+
+def get_plot_setting(vehicle, key, default=None):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      config['gandalf']['plots'][key] with a default
+    """
+    plots = load_vehicle_config(vehicle)['gandalf'].get('plots', {})
+    return plots.get(key, default)
+
+
+def get_vehicle_status(vehicle):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      'deployed', 'recovered', etc.
+    """
+    return str(get_gandalf_setting(vehicle, 'status'))
+
+
+def get_vehicle_type(vehicle):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      'slocum', 'seaglider', 'saildrone', etc.
+    """
+    return str(get_gandalf_setting(vehicle, 'vehicle_type'))
+
+
+def get_sensor_plot_limits(vehicle, sensor):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      (sensor_plot_min, sensor_plot_max) as floats, or None
+    """
+    record = get_sensor_record(vehicle, sensor)
+    if record is None:
+        return None
+    return (float(record['sensor_plot_min']),
+            float(record['sensor_plot_max']))
+
+
+if __name__ == '__main__':
+    """
+    For command line use
+    """
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) != 2:
+        logging.warning("Usage: gandalf_config_registry vehicle")
+        sys.exit()
+    vehicle = sys.argv[1]
+    logging.info('%s: %s %s', vehicle, get_vehicle_type(vehicle),
+                 get_vehicle_status(vehicle))
+    for sensor in get_sensor_lookup(vehicle):
+        logging.info('%s: %s', sensor, get_sensor_plot_limits(vehicle, sensor))
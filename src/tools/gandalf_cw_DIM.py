@@ -27,6 +27,7 @@ from natsort import natsorted
 from geojson import Feature, Point, FeatureCollection, LineString
 from gandalf_utils import get_vehicle_config, flight_status
 from gandalf_mongo import connect_mongo, insert_record
+from gandalf_publish import publish_geojson
 
 
 
@@ -190,7 +191,7 @@ def cw_parse_files(vehicle, cw_files):
                 row_js = json.loads(row.to_json())
                 db[vehicle].insert_one(row_js)
     # Add close statement 2023-02-14
-    client.close()
+    # 2026-10-19 Not any more: connect_mongo() hands out a shared client
 
 
 def get_cw_files(vehicle):
@@ -316,13 +317,28 @@ def gandalf_cw_track(vehicle):
     return track
 
 
+def get_science(row, sensors):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      {sensor: value} for the infobox Science table. NaN goes out
+                as None so the browser gets valid JSON.
+    """
+    science = {}
+    for sensor in sensors:
+        value = float(row[sensor])
+        science[sensor] = None if np.isnan(value) else round(value, 4)
+    return science
+
+
 def gen_last_pos(vehicle):
     """
     Name:       gen_last_pos
     Author:     robertdcurrier@gmail.com
     Created:    2022-06-06
-    Modified:   2023-06-16
+    Modified:   2026-10-19
     Notes:      Makes last pos html and icon for SeaWorker
+                2026-10-19: Infobox properties instead of html
     """
     logging.info('gen_last_pos(%s): generating last_pos', vehicle)
 
@@ -368,69 +384,16 @@ def gen_last_pos(vehicle):
     last_pos.properties['style'] = (config['gandalf']['style'])
     last_pos.properties['currPosIcon'] = (config['gandalf']['currPosIcon'])
     last_pos.properties['iconSize'] = (config['gandalf']['iconSize'])
-    # HTML for InfoBox
-    last_pos.properties['html'] = """
-    <div class='infoBoxTitle'><span class='infoBoxTitle'>%s</span></div>
-    <center><img src=%s></img></center>
-    <hr>
-    <div class='infoBoxHeading'><span class='infoBoxHeading'>Status</span></div>
-    <table class='infoBoxTable'>
-    <tr>
-        <td class='td_infoBoxSensor'>Last Report:</td>
-        <td class='td_infoBoxData'>%s</td>
-    </tr>
-    <tr>
-        <td class='td_infoBoxSensor'>Operator:</td>
-        <td class='td_infoBoxData'>%s</td>
-    </tr>
-
-    <tr>
-        <td class='td_infoBoxSensor'>Vehicle Type:</td>
-        <td class='td_infoBoxData'>%s</td>
-    </tr>
-
-    <tr>
-        <td class='td_infoBoxSensor'>Project:</td>
-        <td class='td_infoBoxData'>%s</td>
-    </tr>
-    <tr>
-        <td class='td_infoBoxSensor'>Last Position:</td>
-        <td class='td_infoBoxData'>%sW %sN</td>
-    </tr>
-    <tr>
-        <td class='td_infoBoxSensor'>Bearing:</td>
-        <td class='td_infoBoxData'>%s degrees</td>
-    </tr>
-    <tr>
-        <td class='td_infoBoxSensor'>Data Source:</td>
-        <td class='td_infoBoxData'>%s</a>
-        </td>
-    </tr>
-    </table>
-    <div class = 'infoBoxBreakBar'>Science Plots</div>
-    <div class = 'infoBoxPlotDiv'>
-        <img class = 'infoBoxPlotImage'
-            src = '/static/images/infoBox2DPlot.png'
-            onclick="deployPlots('%s')">
-        </img>
-    </div>
-    """ % (public_name, infobox_image, last_surfaced,
-           operator, vehicle_model, project, last_lon, last_lat, 000,
-           data_source, vehicle)
-
-    # science_sensors
+    # 2026-10-19 InfoBox is rendered in the browser from these. See
+    # static/js/infobox.js
+    last_pos.properties['infobox'] = 'vehicle'
+    last_pos.properties['infobox_image'] = infobox_image
+    last_pos.properties['operator'] = operator
+    last_pos.properties['vehicle_model'] = vehicle_model
+    last_pos.properties['project'] = project
+    last_pos.properties['heading'] = 0
     sensors = config['gandalf']['plots']['plot_sensor_list']
-    last_row = df.iloc[-1]
-
-    science_header = """
-              <div class = 'infoBoxBreakBar'>Science Data</div>
-              <table class='infoBoxTable'>"""
-    last_pos.properties['html'] = last_pos.properties['html'] + science_header
-    for sensor in sensors:
-        science_row = """<tr><td class='td_infoBoxSensor'>%s:
-        </td><td>%0.2f</td></tr>"""  % (sensor, last_row[sensor])
-        last_pos.properties['html'] =  last_pos.properties['html'] + science_row
-    last_pos.properties['html'] = last_pos.properties['html'] + '</table>'
+    last_pos.properties['science'] = get_science(df.iloc[-1], sensors)
     return(last_pos)
 
 
@@ -439,8 +402,10 @@ def cw_surf_markers(vehicle):
     Name:       cw_surf_markers
     Author:     robertdcurrier@gmail.com
     Created:    2020-05-26
-    Modified:   2023-06-16
+    Modified:   2026-10-19
     Notes:      Borrowed from HALO and Navocean
+                2026-10-19: Infobox properties instead of html. The
+                science values are the bulk of it, one dict per surfacing.
                 """
     markers = []
     logging.info('cw_surf_markers(%s)' % vehicle)
@@ -461,6 +426,8 @@ def cw_surf_markers(vehicle):
     markers = []
 
     for index, row in df.iterrows():
+        # Same for every sensor's marker at this surfacing
+        science = get_science(row, sensors)
         for sensor in sensors:
             logging.debug("cw_surf_markers(%s): Making layer for %s" % (vehicle,
                                                                 sensor))
@@ -497,30 +464,15 @@ def cw_surf_markers(vehicle):
             surf_marker.properties['fillOpacity'] = (config['gandalf']["marker_settings"]
                                                  ["fillOpacity"])
 
-            # Vehicle html
-            surf_time = (datetime.datetime.fromtimestamp(row.time).
-                             strftime("%Y-%m-%d %H:%M UTC"))
-            surf_marker.properties['html'] = """
-           <h5><center><span class='infoBoxHeading'>Status</span></center></h5>
-               <table class='infoBoxTable'>
-               <tr><td class='td_infoBoxSensor'>Vehicle:</td><td>%s</td></tr>
-               <tr><td class='td_infoBoxSensor'>Date/Time:</td><td>%s</td></tr>
-               <tr><td class='td_infoBoxSensor'>Position:</td><td>%0.4fW/%0.4fN</td></tr>
-               <tr><td class='td_infoBoxSensor'>Heading:</td><td>%0.2f</td></tr>
-               <tr><td class='td_infoBoxSensor'>Speed:</td><td>%0.2f knots</td></tr>
-               </table>
-               <hr>
-               """ % (row.vehicle, surf_time, row.longitude, row.latitude, 0, 0)
-
-            # science_sensors
-            science_header = """
-                      <h5><center><span class='infoBoxHeading'>Science</span></center></h5>
-                      <table class='infoBoxTable'>"""
-            surf_marker.properties['html'] = surf_marker.properties['html'] + science_header
-            for sensor in sensors:
-                science_row = """<tr><td class='td_infoBoxSensor'>%s:</td><td>%0.2f</td></tr>"""  % (sensor, row[sensor])
-                surf_marker.properties['html'] =  surf_marker.properties['html'] + science_row
-            surf_marker.properties['html'] =  surf_marker.properties['html'] + '</table>'
+            # 2026-10-19 Infobox properties, infobox.js renders
+            surf_marker.properties['infobox'] = 'surf_report'
+            surf_marker.properties['public_name'] = row.vehicle
+            surf_marker.properties['surf_time'] = (datetime.datetime.
+                                                   fromtimestamp(row.time).
+                                                   strftime("%Y-%m-%d %H:%M UTC"))
+            surf_marker.properties['heading'] = 0
+            surf_marker.properties['speed'] = 0
+            surf_marker.properties['science'] = science
             markers.append(surf_marker)
     fC = (FeatureCollection(markers))
     return(fC)
@@ -530,15 +482,12 @@ def write_geojson_file(data_source, data):
     """
     Name:       write_geojson_file
     Author:     robertdcurrier@gmail.com
-    Modified:   2020-05-26
+    Modified:   2026-10-19
     Notes:      Writes out geojson file for Jquery AJAX loading
+                2026-10-19: Via gandalf_publish (compact, atomic, .gz/.br)
     """
     logging.info("write_geojson_file(%s)" % data_source)
-    fname = '/data/gandalf/deployments/geojson/%s.json' % data_source
-    outf = open(fname, 'w')
-    print(data, file=outf)
-    outf.flush()
-    outf.close()
+    publish_geojson(data_source, data)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Name:       gandalf_dba_reader.py
+Created:    2026-10-19
+Modified:   2026-10-19
+Notes:      Typed reader for Dinkum ASCII (DBA) files. We used to hand every
+            merged DBA to pd.read_csv(header=14, skiprows=[15,16]) which
+            threw away the units and bytes rows and let pandas guess, so
+            NaN-heavy sensors often came back as object columns.
+
+            Here we read the header once per file. The bytes row gives the
+            dtype for every sensor, so pandas can skip type inference. The
+            body goes through pyarrow's multithreaded parser when pyarrow is
+            installed, with the C parser as the fallback. Pass columns to
+            load only the sensors you need.
+
+            Dinkum 1 byte sensors are ints, but DBA writes NaN for cycles
+            where they weren't updated. So they come back as float32 and
+            not int8.
+"""
+import os
+import sys
+import logging
+import numpy as np
+import pandas as pd
+from natsort import natsorted
+try:
+    import pyarrow  # noqa: F401 pylint: disable=unused-import
+    DBA_ENGINE = 'pyarrow'
+except ImportError:
+    DBA_ENGINE = 'c'
+
+# Sensor byte width from the DBA bytes row to the dtype we load it as
+DBA_DTYPES = {1: np.float32, 2: np.float32, 4: np.float32, 8: np.float64}
+# Placeholder for the empty field dbd2asc leaves after the trailing space
+TRAILING_FIELD = '_dba_trailing'
+
+
+def read_dba_header(dba_file):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Returns a dict of the ASCII tags plus sensors, units,
+                bytes and data_line (0-based line where the body starts)
+    """
+    header = {}
+    with open(dba_file, 'r') as dfile:
+        num_tags = None
+        line_num = 0
+        while num_tags is None or line_num < num_tags:
+            key, _, value = dfile.readline().partition(':')
+            header[key.strip()] = value.strip()
+            if key.strip() == 'num_ascii_tags':
+                num_tags = int(value)
+            line_num += 1
+            if not key:
+                raise ValueError('%s: truncated DBA header' % dba_file)
+        names_line = dfile.readline()
+        units_line = dfile.readline()
+        bytes_line = dfile.readline()
+    header['sensors'] = names_line.split()
+    header['units'] = units_line.split()
+    header['bytes'] = [int(width) for width in bytes_line.split()]
+    header['trailing'] = names_line.rstrip('\r\n').endswith(' ')
+    header['data_line'] = num_tags + int(header.get('num_label_lines', 3))
+    return header
+
+
+def dba_dtypes(header, columns=None):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      {sensor: dtype} for the columns we're loading
+    """
+    dtypes = {}
+    for sensor, width in zip(header['sensors'], header['bytes']):
+        if columns is None or sensor in columns:
+            dtypes[sensor] = DBA_DTYPES.get(width, np.float64)
+    return dtypes
+
+
+def read_dba(dba_file, columns=None, engine=None):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      One DBA to a typed DataFrame. columns limits the sensors
+                read; names not in this file are ignored, same as
+                dba_sensor_filter.
+    """
+    header = read_dba_header(dba_file)
+    names = list(header['sensors'])
+    if header['trailing']:
+        names.append(TRAILING_FIELD)
+    dtypes = dba_dtypes(header, columns)
+    usecols = [sensor for sensor in header['sensors'] if sensor in dtypes]
+    data_frame = pd.read_csv(dba_file, sep=' ', header=None, names=names,
+                             skiprows=header['data_line'], usecols=usecols,
+                             dtype=dtypes, engine=engine or DBA_ENGINE)
+    return data_frame[usecols]
+
+
+def read_dba_frames(dba_files, columns=None, engine=None):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      [(dba_file, DataFrame)] in natural sort order. Zero length
+                and unreadable files are logged and skipped.
+    """
+    frames = []
+    for dba_file in natsorted(dba_files):
+        if os.path.getsize(dba_file) == 0:
+            logging.debug('read_dba_frames(): Skipping zero length %s',
+                          dba_file)
+            continue
+        try:
+            frames.append((dba_file, read_dba(dba_file, columns, engine)))
+        except (OSError, ValueError) as error:
+            logging.warning('read_dba_frames(%s): %s', dba_file, error)
+    return frames
+
+
+def read_dbas(dba_files, columns=None, engine=None):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Many DBAs to one DataFrame. Headers can differ between
+                segments if an operator changed the sensor list
+                mid-mission, so columns are unioned and sorted like the
+                old concat(sort=True).
+    """
+    frames = [frame for _, frame in read_dba_frames(dba_files, columns,
+                                                    engine)]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, sort=True, ignore_index=True)
+
+
+if __name__ == '__main__':
+    """
+    For command line use
+    """
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) < 2:
+        logging.warning("Usage: gandalf_dba_reader dba_file [sensor ...]")
+        sys.exit()
+    dba = read_dba(sys.argv[1], sys.argv[2:] or None)
+    dba.info(memory_usage='deep')
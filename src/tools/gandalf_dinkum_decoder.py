@@ -0,0 +1,552 @@
+#!/usr/bin/env python3
+"""
+Name:       gandalf_dinkum_decoder.py
+Created:    2026-10-19
+Modified:   2026-10-19
+Notes:      In-process decoder for Dinkum binary data (sbd/tbd/dbd/ebd).
+            Replaces the dbd2asc | dba_sensor_filter | dba_merge pipeline
+            for a segment with one function call that hands back typed numpy
+            columns for just the sensors we asked for.
+
+            File layout:
+                ASCII header      'key: value' lines, num_ascii_tags of them
+                sensor list       'total_num_sensors' lines of
+                                  's: T num index bytes name units', or
+                                  nothing if sensor_list_factored is 1 and
+                                  the list lives in cache/<crc>.cac
+                known bytes       's' 'a' int16 0x1234, float32 123.456,
+                                  float64 123456789.12345 -- byte order
+                data cycles       'd', then 2 bits of state per sensor
+                                  (0 = not updated, 1 = same value,
+                                  2 = new value follows), then the new
+                                  values in sensor order
+                end               'X'
+
+            Cycle lengths depend on their state bits so finding the cycles
+            is one short loop. A per state byte lookup table makes each step
+            a single numpy sum. Pulling values out of the cycles is then
+            fully vectorized.
+
+            2026-10-19: Output matches dbd2asc: the initial data cycle each
+            file opens with is dropped (dbd2asc without -o) and 1 and 2
+            byte sensors are unsigned. check_parity runs dbd2asc on a file
+            and compares, and decode_binaries won't use us on a sensor list
+            until verify_decoder has passed on one of its files:
+
+                gandalf_dinkum_decoder.py --check <dbd2asc> <files>
+"""
+import os
+import sys
+import glob
+import logging
+import argparse
+import subprocess
+import multiprocessing as mp
+import numpy as np
+import pandas as pd
+from natsort import natsorted
+from gandalf_metrics import add_subprocesses
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+FLIGHT_TYPES = {'sbd': 'tbd', 'dbd': 'ebd'}
+SCIENCE_TYPES = {'tbd': 'sbd', 'ebd': 'dbd'}
+FLIGHT_TIME = 'm_present_time'
+SCIENCE_TIME = 'sci_m_present_time'
+# dbd2asc prints 1 and 2 byte sensors unsigned
+VALUE_TYPES = {1: 'u1', 2: 'u2', 4: 'f4', 8: 'f8'}
+CYCLE_TAG = ord('d')
+END_TAG = ord('X')
+KNOWN_BYTES_LEN = 16
+# Cycles per vectorized block, bounds memory on full dbd files
+CYCLE_BLOCK = 4096
+STATE_SHIFTS = np.array([6, 4, 2, 0], dtype=np.uint8)
+# dbd2asc prints 4 byte floats to 6 significant digits and 8 byte to 15,
+# integers exactly
+PRINT_RTOL = {4: 1e-5, 8: 1e-14}
+
+
+def get_cli_args():
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      file or flight/science pair, optional sensors and output csv
+    """
+    logging.debug('get_cli_args()')
+    arg_p = argparse.ArgumentParser()
+    arg_p.add_argument("files", help="sbd/dbd and optional tbd/ebd file",
+                       nargs="+")
+    arg_p.add_argument("-s", "--sensors", help="sensor names", nargs="*")
+    arg_p.add_argument("-c", "--cache", help="sensor list cache dir",
+                       default=CACHE_DIR)
+    arg_p.add_argument("-o", "--out_file", help="write csv here")
+    arg_p.add_argument("--check", help="compare each file with this dbd2asc",
+                       metavar="DBD2ASC")
+    args = vars(arg_p.parse_args())
+    return args
+
+
+def read_dinkum_header(buf):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Returns (header dict, offset of first byte after header)
+    """
+    header = {}
+    offset = 0
+    num_tags = None
+    while num_tags is None or len(header) < num_tags:
+        end = buf.index(b'\n', offset)
+        line = buf[offset:end].decode('ascii', 'replace')
+        offset = end + 1
+        key, _, value = line.partition(':')
+        header[key.strip()] = value.strip()
+        if key.strip() == 'num_ascii_tags':
+            num_tags = int(value)
+    return header, offset
+
+
+def parse_sensor_lines(lines):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      's: T num index bytes name units' lines to a list of
+                (name, units, bytes) in file order. Sensors flagged F
+                aren't in this file so we skip them.
+    """
+    sensors = []
+    for line in lines:
+        fields = line.split()
+        if len(fields) < 7 or fields[0] != 's:' or fields[1] != 'T':
+            continue
+        sensors.append((int(fields[3]), fields[5], fields[6],
+                        int(fields[4])))
+    sensors.sort()
+    return [(name, units, size) for _, name, units, size in sensors]
+
+
+def load_sensor_cache(crc, cache_dir=CACHE_DIR):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Sensor list from cache/<crc>.cac. Dockserver caches are
+                lower case but we've seen both.
+    """
+    for name in (crc.lower(), crc.upper()):
+        cache_file = '%s/%s.cac' % (cache_dir, name)
+        if os.path.exists(cache_file):
+            with open(cache_file, 'r') as cfile:
+                return parse_sensor_lines(cfile.readlines())
+    raise FileNotFoundError('No sensor cache for %s in %s' % (crc, cache_dir))
+
+
+def save_sensor_cache(crc, lines, cache_dir=CACHE_DIR):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Unfactored files carry their own list. Save it so the
+                factored files that follow can be decoded.
+    """
+    cache_file = '%s/%s.cac' % (cache_dir, crc.lower())
+    if os.path.exists(cache_file):
+        return
+    try:
+        with open(cache_file, 'w') as cfile:
+            cfile.write('\n'.join(lines) + '\n')
+    except OSError as error:
+        logging.warning('save_sensor_cache(%s): %s', crc, error)
+
+
+def read_sensor_list(buf, offset, header, cache_dir=CACHE_DIR):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Returns (sensors, offset) from the file or the cache
+    """
+    crc = header.get('sensor_list_crc', '')
+    if header.get('sensor_list_factored', '0') == '1':
+        return load_sensor_cache(crc, cache_dir), offset
+    lines = []
+    for _ in range(int(header['total_num_sensors'])):
+        end = buf.index(b'\n', offset)
+        lines.append(buf[offset:end].decode('ascii', 'replace'))
+        offset = end + 1
+    if crc:
+        save_sensor_cache(crc, lines, cache_dir)
+    return parse_sensor_lines(lines), offset
+
+
+def read_known_bytes(buf, offset):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Returns numpy byte order ('>' or '<') from the known bytes
+    """
+    known = buf[offset:offset + KNOWN_BYTES_LEN]
+    if len(known) < KNOWN_BYTES_LEN or known[0:2] != b'sa':
+        raise ValueError('Bad known bytes cycle')
+    if known[2:4] == b'\x12\x34':
+        return '>'
+    if known[2:4] == b'\x34\x12':
+        return '<'
+    raise ValueError('Bad known bytes cycle')
+
+
+def make_length_table(sizes, num_state):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      (num_state, 256) table of how many value bytes each state
+                byte value contributes at each state byte position
+    """
+    padded = np.zeros(num_state * 4, dtype=np.int64)
+    padded[:len(sizes)] = sizes
+    padded = padded.reshape(num_state, 4)
+    states = (np.arange(256, dtype=np.uint8)[:, np.newaxis] >>
+              STATE_SHIFTS) & 3
+    return ((states == 2)[np.newaxis, :, :] *
+            padded[:, np.newaxis, :]).sum(axis=2)
+
+
+def find_cycles(data, offset, sizes):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Start offsets of every complete data cycle. Stops quietly
+                at the end tag or at a truncated cycle, which is what a
+                partially transferred sbd looks like.
+    """
+    num_state = (len(sizes) + 3) // 4
+    table = make_length_table(sizes, num_state)
+    rows = np.arange(num_state)
+    starts = []
+    size = len(data)
+    while offset < size:
+        tag = data[offset]
+        if tag != CYCLE_TAG:
+            if tag != END_TAG:
+                logging.warning('find_cycles(): Unexpected tag %r at %d',
+                                chr(tag), offset)
+            break
+        state = data[offset + 1:offset + 1 + num_state]
+        if len(state) < num_state:
+            break
+        length = 1 + num_state + int(table[rows, state].sum())
+        if offset + length > size:
+            logging.info('find_cycles(): Truncated cycle at %d', offset)
+            break
+        starts.append(offset)
+        offset += length
+    return np.asarray(starts, dtype=np.int64)
+
+
+def extract_values(data, starts, sizes, wanted, byte_order):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Returns {sensor index: float64 values} for the wanted
+                sensor indices. 'Same value' cycles repeat the last new
+                value, everything else not updated is NaN, as dbd2asc does.
+    """
+    num_sensors = len(sizes)
+    num_state = (num_sensors + 3) // 4
+    num_cycles = len(starts)
+    columns = {}
+    states = {}
+    for index in wanted:
+        columns[index] = np.full(num_cycles, np.nan)
+        states[index] = np.zeros(num_cycles, dtype=np.uint8)
+    state_cols = np.arange(num_state)
+    for first in range(0, num_cycles, CYCLE_BLOCK):
+        block = starts[first:first + CYCLE_BLOCK]
+        state_bytes = data[block[:, np.newaxis] + 1 + state_cols]
+        block_states = ((state_bytes[:, :, np.newaxis] >> STATE_SHIFTS) &
+                        3).reshape(len(block), num_state * 4)[:, :num_sensors]
+        new_bytes = (block_states == 2) * sizes.astype(np.int32)
+        # Offset of each sensor's value within its cycle
+        value_offsets = np.cumsum(new_bytes, axis=1) - new_bytes
+        value_offsets += (block + 1 + num_state)[:, np.newaxis]
+        for index in wanted:
+            sensor_states = block_states[:, index]
+            states[index][first:first + len(block)] = sensor_states
+            hits = np.flatnonzero(sensor_states == 2)
+            if not len(hits):
+                continue
+            size = int(sizes[index])
+            byte_index = (value_offsets[hits, index][:, np.newaxis] +
+                          np.arange(size))
+            raw = np.ascontiguousarray(data[byte_index])
+            dtype = np.dtype(byte_order + VALUE_TYPES[size])
+            columns[index][first + hits] = raw.view(dtype).ravel()
+    for index in wanted:
+        sensor_states = states[index]
+        repeats = sensor_states == 1
+        if not repeats.any():
+            continue
+        last_new = np.where(sensor_states == 2, np.arange(num_cycles), -1)
+        last_new = np.maximum.accumulate(last_new)
+        fill = repeats & (last_new >= 0)
+        columns[index][fill] = columns[index][last_new[fill]]
+    return columns
+
+
+def decode_dinkum_file(data_file, sensors=None, cache_dir=CACHE_DIR,
+                       initial=False):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      One Dinkum binary file to a DataFrame with a float64 column
+                per requested sensor that is actually in the file. sensors
+                of None means everything. The initial data cycle is dropped
+                as dbd2asc does unless initial (dbd2asc -o); it still seeds
+                the 'same value' cycles after it.
+    """
+    logging.debug('decode_dinkum_file(%s)', data_file)
+    with open(data_file, 'rb') as dfile:
+        buf = dfile.read()
+    header, offset = read_dinkum_header(buf)
+    sensor_list, offset = read_sensor_list(buf, offset, header, cache_dir)
+    byte_order = read_known_bytes(buf, offset)
+    offset += KNOWN_BYTES_LEN
+    names = [name for name, _, _ in sensor_list]
+    sizes = np.asarray([size for _, _, size in sensor_list], dtype=np.int64)
+    if sensors is None:
+        wanted = list(range(len(names)))
+    else:
+        positions = dict((name, index) for index, name in enumerate(names))
+        wanted = [positions[name] for name in sensors if name in positions]
+    data = np.frombuffer(buf, dtype=np.uint8)
+    starts = find_cycles(data, offset, sizes)
+    columns = extract_values(data, starts, sizes, wanted, byte_order)
+    first = 0 if initial else 1
+    data_frame = pd.DataFrame(dict((names[index], columns[index][first:])
+                                   for index in wanted))
+    data_frame.attrs['units'] = dict((names[index], sensor_list[index][1])
+                                     for index in wanted)
+    data_frame.attrs['header'] = header
+    return data_frame
+
+
+def read_dbd2asc(data_file, dbd2asc, cache_dir=CACHE_DIR):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      dbd2asc's output for one file as a float64 DataFrame
+    """
+    add_subprocesses()
+    output = subprocess.run([dbd2asc, '-c', cache_dir, data_file],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            check=True).stdout.decode('ascii', 'replace')
+    lines = output.splitlines()
+    header, _ = read_dinkum_header(output.encode('ascii', 'replace'))
+    # Names, units and byte counts follow the ascii tags
+    names = lines[len(header)].split()
+    rows = [line.split() for line in lines[len(header) + 3:] if line]
+    return pd.DataFrame(np.asarray(rows, dtype=np.float64).reshape(
+        len(rows), len(names)), columns=names)
+
+
+def check_parity(data_file, dbd2asc, cache_dir=CACHE_DIR):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Decodes data_file both ways and returns a list of the
+                differences, [] if we match dbd2asc. Floats are compared to
+                dbd2asc's printed precision, integers exactly.
+    """
+    expected = read_dbd2asc(data_file, dbd2asc, cache_dir)
+    decoded = decode_dinkum_file(data_file, cache_dir=cache_dir)
+    problems = []
+    if list(decoded.columns) != list(expected.columns):
+        problems.append('columns %s vs dbd2asc %s' % (list(decoded.columns),
+                                                      list(expected.columns)))
+        return problems
+    if len(decoded) != len(expected):
+        problems.append('%d rows vs dbd2asc %d' % (len(decoded),
+                                                   len(expected)))
+        return problems
+    with open(data_file, 'rb') as dfile:
+        buf = dfile.read()
+    header, offset = read_dinkum_header(buf)
+    sizes = dict((name, size) for name, _, size in
+                 read_sensor_list(buf, offset, header, cache_dir)[0])
+    for name in expected.columns:
+        rtol = PRINT_RTOL.get(sizes.get(name), 0)
+        ours = decoded[name].to_numpy()
+        theirs = expected[name].to_numpy()
+        same = np.isclose(ours, theirs, rtol=rtol, atol=0, equal_nan=True)
+        if not same.all():
+            row = int(np.flatnonzero(~same)[0])
+            problems.append('%s: %d rows differ, first row %d %r vs '
+                            'dbd2asc %r' % (name, int((~same).sum()), row,
+                                            ours[row], theirs[row]))
+    return problems
+
+
+def verify_decoder(data_file, dbd2asc, cache_dir=CACHE_DIR):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      True once check_parity has passed on a file with this
+                sensor list. The pass is remembered as <crc>.parity in
+                cache_dir next to the sensor list, so it's one dbd2asc run
+                per sensor list, not per segment.
+    """
+    try:
+        with open(data_file, 'rb') as dfile:
+            header, _ = read_dinkum_header(dfile.read(4096))
+        crc = header.get('sensor_list_crc', '').lower()
+        marker = '%s/%s.parity' % (cache_dir, crc)
+        if crc and os.path.exists(marker):
+            return True
+        problems = check_parity(data_file, dbd2asc, cache_dir)
+    except (OSError, ValueError, subprocess.CalledProcessError) as error:
+        logging.warning('verify_decoder(%s): %s', data_file, error)
+        return False
+    for problem in problems:
+        logging.error('verify_decoder(%s): %s', data_file, problem)
+    if problems:
+        return False
+    if crc:
+        with open(marker, 'w') as mfile:
+            mfile.write('%s\n' % os.path.basename(data_file))
+    return True
+
+
+def merge_dinkum_frames(flight_df, science_df):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      In-memory dba_merge. Rows are keyed on m_present_time for
+                flight and sci_m_present_time for science; matching times
+                become one row, the rest interleave in time order.
+    """
+    if science_df is None or SCIENCE_TIME not in science_df:
+        return flight_df
+    if flight_df is None or FLIGHT_TIME not in flight_df:
+        return science_df
+    flight_df = flight_df.dropna(subset=[FLIGHT_TIME])
+    science_df = science_df.dropna(subset=[SCIENCE_TIME])
+    science_df = science_df.drop(columns=[column for column in
+                                          science_df.columns if column in
+                                          flight_df.columns and column !=
+                                          FLIGHT_TIME])
+    science_df = science_df.assign(**{FLIGHT_TIME:
+                                      science_df[SCIENCE_TIME].to_numpy()})
+    merged = pd.merge(flight_df, science_df, on=FLIGHT_TIME, how='outer',
+                      sort=True)
+    return merged
+
+
+def decode_segment(flight_file, science_file, flight_sensors=None,
+                   science_sensors=None, cache_dir=CACHE_DIR):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      One flight/science pair to a merged DataFrame. Top level
+                and plain arguments so it can go straight to a Pool.
+                Returns None on a bad file so one corrupt segment doesn't
+                take the whole run down.
+    """
+    frames = []
+    for data_file, sensors in ((flight_file, flight_sensors),
+                               (science_file, science_sensors)):
+        if data_file is None:
+            frames.append(None)
+            continue
+        try:
+            frames.append(decode_dinkum_file(data_file, sensors, cache_dir))
+        except (OSError, ValueError) as error:
+            logging.warning('decode_segment(%s): %s', data_file, error)
+            frames.append(None)
+    if frames[0] is None and frames[1] is None:
+        return None
+    return merge_dinkum_frames(frames[0], frames[1])
+
+
+def pair_segments(flight_files, science_files):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Matches flight and science files on segment name. Files
+                without a partner are reported, not deleted, as the partner
+                may just not have arrived yet.
+    """
+    def stem(data_file):
+        return os.path.splitext(os.path.basename(data_file))[0].lower()
+    science = dict((stem(data_file), data_file) for data_file in
+                   science_files)
+    pairs = []
+    for flight_file in natsorted(flight_files):
+        science_file = science.get(stem(flight_file))
+        if science_file is None:
+            logging.info('pair_segments(): No science for %s', flight_file)
+            continue
+        pairs.append((flight_file, science_file))
+    return pairs
+
+
+def decode_segments(pairs, flight_sensors=None, science_sensors=None,
+                    cache_dir=CACHE_DIR, processes=None):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Decodes pairs in a process pool and returns the frames in
+                segment order, None for any that failed
+    """
+    args = [(flight_file, science_file, flight_sensors, science_sensors,
+             cache_dir) for flight_file, science_file in pairs]
+    if processes == 1 or len(args) < 2:
+        frames = [decode_segment(*arg) for arg in args]
+    else:
+        with mp.Pool(processes=processes) as pool:
+            frames = pool.starmap(decode_segment, args)
+    return frames
+
+
+def decode_binary_dir(flight_glob, science_glob, flight_sensors=None,
+                      science_sensors=None, cache_dir=CACHE_DIR,
+                      processes=None):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Everything in a binary_files tree to one DataFrame, same
+                shape pandas_gen_csv used to build from the merged DBAs
+    """
+    pairs = pair_segments(glob.glob(flight_glob), glob.glob(science_glob))
+    logging.info('decode_binary_dir(): %d segments', len(pairs))
+    frames = decode_segments(pairs, flight_sensors, science_sensors,
+                             cache_dir, processes)
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, sort=True, ignore_index=True)
+
+
+if __name__ == '__main__':
+    """
+    For command line use
+    """
+    logging.basicConfig(level=logging.INFO)
+    args = get_cli_args()
+    files = args['files']
+    if args['check']:
+        failed = False
+        for data_file in files:
+            problems = check_parity(data_file, args['check'], args['cache'])
+            for problem in problems:
+                logging.error('%s: %s', data_file, problem)
+            if not problems:
+                logging.info('%s: matches dbd2asc', data_file)
+            failed = failed or bool(problems)
+        sys.exit(1 if failed else 0)
+    if len(files) == 2:
+        data_frame = decode_segment(files[0], files[1], args['sensors'],
+                                    args['sensors'], args['cache'])
+    else:
+        data_frame = decode_dinkum_file(files[0], args['sensors'],
+                                        args['cache'])
+    if args['out_file']:
+        data_frame.to_csv(args['out_file'], na_rep='NaN', index=False)
+    else:
+        logging.info('%d rows, %d sensors', len(data_frame),
+                     len(data_frame.columns))
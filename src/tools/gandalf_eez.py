@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Name:       gandalf_eez.py
+Created:    2026-10-19
+Modified:   2026-10-19
+Notes:      EEZ proximity checks. The boundary GeoJSON is loaded once per
+            process (and again only if the file changes) and flattened into
+            numpy arrays of segment end points. Distances are true
+            point-to-segment distances, not distances to the nearest vertex,
+            and are computed for any number of positions in one call so we
+            can afford to check every surfacing, not just last_pos.
+
+            Each position gets its own local equirectangular projection
+            (x scaled by cos(lat)), which is plenty accurate at the few
+            hundred nautical mile ranges we care about.
+"""
+import sys
+import logging
+import numpy as np
+from gandalf_config_registry import load_json_config, get_gandalf_setting
+
+EEZ_FILE = '/data/gandalf/deployments/geojson/gom-eez.json'
+# Nautical miles. Can be overridden per vehicle with gandalf.eez_threshold
+EEZ_THRESHOLD = 50
+EARTH_RADIUS_NM = 3440.065
+# Cap on points x segments per chunk so memory stays bounded
+MAX_CHUNK_CELLS = 2000000
+
+_SEGMENT_CACHE = {}
+
+
+def _geometry_paths(geometry):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Yields every vertex path in a GeoJSON geometry regardless
+                of type. Polygon rings are treated as boundary lines.
+    """
+    gtype = geometry['type']
+    coords = geometry['coordinates']
+    if gtype == 'LineString':
+        yield coords
+    elif gtype in ('MultiLineString', 'Polygon'):
+        for path in coords:
+            yield path
+    elif gtype == 'MultiPolygon':
+        for polygon in coords:
+            for path in polygon:
+                yield path
+    elif gtype == 'GeometryCollection':
+        for sub_geometry in geometry['geometries']:
+            for path in _geometry_paths(sub_geometry):
+                yield path
+
+
+def load_eez_segments(eez_file=EEZ_FILE):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Returns (lon1, lat1, lon2, lat2) arrays in radians, one
+                entry per boundary segment. Cached against the parsed
+                GeoJSON so we only rebuild when the file changes.
+    """
+    data = load_json_config(eez_file)
+    cached = _SEGMENT_CACHE.get(eez_file)
+    if cached is not None and cached[0] is data:
+        return cached[1]
+    logging.info('load_eez_segments(): Building segments from %s', eez_file)
+    starts = []
+    ends = []
+    for feature in data['features']:
+        for path in _geometry_paths(feature['geometry']):
+            path = np.asarray(path, dtype=np.float64)[:, :2]
+            if len(path) < 2:
+                continue
+            starts.append(path[:-1])
+            ends.append(path[1:])
+    starts = np.radians(np.concatenate(starts))
+    ends = np.radians(np.concatenate(ends))
+    segments = (starts[:, 0], starts[:, 1], ends[:, 0], ends[:, 1])
+    _SEGMENT_CACHE[eez_file] = (data, segments)
+    return segments
+
+
+def _chunk_distances(lats, lons, segments):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Min point-to-segment distance (nm) for one chunk of points.
+                Shapes are (points, 1) against (segments,) so numpy
+                broadcasts the whole chunk in one shot.
+    """
+    lon1, lat1, lon2, lat2 = segments
+    lats = lats[:, np.newaxis]
+    lons = lons[:, np.newaxis]
+    cos_lat = np.cos(lats)
+    # Segment end points relative to each position, flat-earth at position
+    ax = (lon1 - lons) * cos_lat
+    ay = lat1 - lats
+    bx = (lon2 - lons) * cos_lat
+    by = lat2 - lats
+    dx = bx - ax
+    dy = by - ay
+    seg_len2 = dx * dx + dy * dy
+    with np.errstate(invalid='ignore', divide='ignore'):
+        frac = -(ax * dx + ay * dy) / seg_len2
+    frac = np.clip(np.nan_to_num(frac), 0.0, 1.0)
+    px = ax + frac * dx
+    py = ay + frac * dy
+    dist = np.sqrt(np.min(px * px + py * py, axis=1))
+    return dist * EARTH_RADIUS_NM
+
+
+def eez_distances(lats, lons, eez_file=EEZ_FILE):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Vectorized distance in nautical miles from each lat/lon
+                (decimal degrees) to the nearest EEZ boundary segment.
+    """
+    lats = np.radians(np.atleast_1d(np.asarray(lats, dtype=np.float64)))
+    lons = np.radians(np.atleast_1d(np.asarray(lons, dtype=np.float64)))
+    segments = load_eez_segments(eez_file)
+    chunk = max(1, MAX_CHUNK_CELLS // max(1, len(segments[0])))
+    distances = np.empty(len(lats))
+    for start in range(0, len(lats), chunk):
+        end = start + chunk
+        distances[start:end] = _chunk_distances(lats[start:end],
+                                                lons[start:end], segments)
+    return distances
+
+
+def get_eez_threshold(vehicle):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      gandalf.eez_threshold from deployment.json if set,
+                else EEZ_THRESHOLD
+    """
+    try:
+        threshold = get_gandalf_setting(vehicle, 'eez_threshold',
+                                        EEZ_THRESHOLD)
+    except (OSError, ValueError, KeyError):
+        threshold = EEZ_THRESHOLD
+    return float(threshold)
+
+
+def eez_fleet_check(last_positions, eez_file=EEZ_FILE):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      last_positions is {vehicle: [lat, lon]}. Returns
+                {vehicle: (distance_nm, warning)} for the whole fleet
+                from a single distance call.
+    """
+    vehicles = list(last_positions)
+    if not vehicles:
+        return {}
+    positions = np.asarray([last_positions[v] for v in vehicles],
+                           dtype=np.float64)
+    distances = eez_distances(positions[:, 0], positions[:, 1], eez_file)
+    results = {}
+    for vehicle, dist in zip(vehicles, distances):
+        warning = bool(dist < get_eez_threshold(vehicle))
+        if warning:
+            logging.warning("eez_fleet_check(%s): EEZ WARNING %d", vehicle,
+                            dist)
+        results[vehicle] = (float(dist), warning)
+    return results
+
+
+if __name__ == '__main__':
+    """
+    For command line use: gandalf_eez.py lat lon
+    """
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) != 3:
+        logging.warning("Usage: gandalf_eez lat lon")
+        sys.exit()
+    dist = eez_distances([float(sys.argv[1])], [float(sys.argv[2])])[0]
+    logging.info('%0.2f nautical miles to EEZ', dist)
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Name:       gandalf_erddap_decoder.py
+Created:    2026-10-19
+Modified:   2026-10-19
+Notes:      ERDDAP/GDAC table download and decode. We used to pull the .json
+            table into memory as text, write it out, read the whole document
+            back with pd.read_json and then build a second DataFrame from
+            table.rows, followed by an iterrows loop to add epoch.
+
+            Now we ask ERDDAP for .csv (or .jsonlKVP/.nc), stream the
+            response straight to disk, and parse it in chunks into typed
+            numpy columns with time coerced in bulk. Only one chunk of text
+            is ever in memory next to the finished frame.
+
+            The legacy .json table and GeoJSON formats are still readable so
+            files already on disk keep working.
+"""
+import os
+import sys
+import json
+import logging
+import requests
+import numpy as np
+import pandas as pd
+
+# Extension on disk for each ERDDAP response type we support
+ERDDAP_FORMATS = {'csv': 'csv', 'jsonlKVP': 'jsonl', 'nc': 'nc',
+                  'json': 'json', 'geoJson': 'json'}
+DEFAULT_FORMAT = 'csv'
+CHUNK_ROWS = 50000
+TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+STRING_COLUMNS = ['time', 'trajectory', 'platform', 'wmo_id', 'kind']
+
+
+def erddap_format_url(url, erddap_format):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Swaps the response type of a tabledap URL, e.g.
+                .../tabledap/foo.json?time,... -> .../tabledap/foo.csv?...
+    """
+    if '?' in url:
+        base, query = url.split('?', 1)
+        query = '?' + query
+    else:
+        base = url
+        query = ''
+    root, ext = os.path.splitext(base)
+    if ext and '/' not in ext:
+        base = root
+    return '%s.%s%s' % (base, erddap_format, query)
+
+
+def erddap_table_file(json_dir, vehicle, suffix, erddap_format):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Where the downloaded table lives for this vehicle
+    """
+    ext = ERDDAP_FORMATS.get(erddap_format, 'json')
+    return '%s/%s_%s.%s' % (json_dir, vehicle, suffix, ext)
+
+
+def fetch_erddap_table(url, out_file, erddap_format=DEFAULT_FORMAT,
+                       verify=True):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Streams the ERDDAP response to out_file via a temp file, so
+                a failed download never replaces the last good table.
+                Returns True on success.
+    """
+    url = erddap_format_url(url, erddap_format)
+    logging.info('fetch_erddap_table(): %s', url)
+    tmp_file = '%s.%d.tmp' % (out_file, os.getpid())
+    try:
+        with requests.get(url, stream=True, verify=verify) as resp:
+            resp.raise_for_status()
+            with open(tmp_file, 'wb') as outf:
+                for chunk in resp.iter_content(chunk_size=1 << 20):
+                    outf.write(chunk)
+    except (requests.RequestException, OSError) as error:
+        logging.warning('fetch_erddap_table(): %s', error)
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        return False
+    os.replace(tmp_file, out_file)
+    return True
+
+
+def coerce_columns(data_frame):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Numeric columns become float64 in one vectorized pass per
+                column. Anything that won't convert (ids, file names) is
+                left alone as strings.
+    """
+    for column in data_frame.columns:
+        if column in STRING_COLUMNS:
+            continue
+        try:
+            values = pd.to_numeric(data_frame[column])
+        except (ValueError, TypeError):
+            continue
+        data_frame[column] = values.astype(np.float64)
+    return data_frame
+
+
+def add_epoch_column(data_frame):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      epoch seconds from the ISO time strings, all rows at once.
+                Replaces the iterrows/strptime/timegm loops.
+    """
+    times = pd.to_datetime(data_frame['time'], format=TIME_FORMAT,
+                           utc=True, errors='coerce')
+    epoch = (times - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)
+    data_frame['epoch'] = epoch.astype(np.float64)
+    return data_frame
+
+
+def read_csv_table(table_file, columns=None, chunksize=CHUNK_ROWS):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      ERDDAP .csv: column names, then a units row, then data
+    """
+    frames = []
+    reader = pd.read_csv(table_file, skiprows=[1], usecols=columns,
+                         chunksize=chunksize, dtype={'time': str},
+                         low_memory=False)
+    for chunk in reader:
+        frames.append(coerce_columns(chunk))
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_jsonl_table(table_file, columns=None, chunksize=CHUNK_ROWS):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      ERDDAP .jsonlKVP: one {column: value} object per line
+    """
+    frames = []
+    reader = pd.read_json(table_file, lines=True, chunksize=chunksize,
+                          dtype=False, convert_dates=False)
+    for chunk in reader:
+        if columns is not None:
+            chunk = chunk.reindex(columns=columns)
+        frames.append(coerce_columns(chunk))
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_nc_table(table_file, columns=None):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      ERDDAP .nc tables are one 'row' dimension. Time comes back
+                as epoch seconds so we rebuild the ISO string column the
+                rest of GANDALF expects.
+    """
+    from netCDF4 import Dataset  # pylint: disable=no-name-in-module
+    data = {}
+    dataset = Dataset(table_file)
+    dataset.set_auto_mask(False)
+    for name, variable in dataset.variables.items():
+        if columns is not None and name not in columns:
+            continue
+        if variable.ndim != 1 or variable.dtype.kind not in 'fiu':
+            continue
+        values = np.asarray(variable[:], dtype=np.float64)
+        fill = getattr(variable, '_FillValue', None)
+        if fill is not None:
+            values[values == fill] = np.nan
+        data[name] = values
+    dataset.close()
+    data_frame = pd.DataFrame(data)
+    if 'time' in data_frame:
+        data_frame['epoch'] = data_frame['time']
+        data_frame['time'] = pd.to_datetime(
+            data_frame['time'], unit='s', utc=True).dt.strftime(TIME_FORMAT)
+    return data_frame
+
+
+def read_json_table(table_file, columns=None):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Legacy .json table or GeoJSON files already on disk. Builds
+                the frame straight from the parsed lists, no second copy.
+    """
+    with open(table_file) as jfile:
+        data = json.load(jfile)
+    if 'table' in data:
+        data_frame = pd.DataFrame(data['table']['rows'],
+                                  columns=data['table']['columnNames'])
+    else:
+        features = data['features']
+        data_frame = pd.DataFrame([feature['properties'] for feature in
+                                   features])
+        coords = np.asarray([feature['geometry']['coordinates'][:2] for
+                             feature in features], dtype=np.float64)
+        if len(coords):
+            data_frame['longitude'] = coords[:, 0]
+            data_frame['latitude'] = coords[:, 1]
+    del data
+    if columns is not None:
+        data_frame = data_frame.reindex(columns=columns)
+    return coerce_columns(data_frame)
+
+
+def read_erddap_table(table_file, columns=None, chunksize=CHUNK_ROWS):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Picks the decoder from the file extension and adds epoch
+                if the format didn't give it to us.
+    """
+    logging.info('read_erddap_table(): %s', table_file)
+    ext = os.path.splitext(table_file)[1]
+    if ext == '.csv':
+        data_frame = read_csv_table(table_file, columns, chunksize)
+    elif ext == '.jsonl':
+        data_frame = read_jsonl_table(table_file, columns, chunksize)
+    elif ext == '.nc':
+        data_frame = read_nc_table(table_file, columns)
+    else:
+        data_frame = read_json_table(table_file, columns)
+    if 'time' in data_frame and 'epoch' not in data_frame:
+        data_frame = add_epoch_column(data_frame)
+    return data_frame
+
+
+if __name__ == '__main__':
+    """
+    For command line use
+    """
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) != 2:
+        logging.warning("Usage: gandalf_erddap_decoder table_file")
+        sys.exit()
+    table = read_erddap_table(sys.argv[1])
+    logging.info('%d rows, %d columns', len(table), len(table.columns))
+    table.info(memory_usage='deep')
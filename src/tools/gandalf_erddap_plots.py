@@ -40,7 +40,7 @@ from matplotlib import pyplot as plt
 from matplotlib import colors as colors
 from matplotlib import cm as cm
 from gandalf_utils import get_vehicle_config, get_sensor_config, flight_status
-from gandalf_slocum_local import dinkum_convert
+from gandalf_utils import get_sensor_lookup
 from geojson import Feature, Point, FeatureCollection, LineString
 
 
@@ -48,12 +48,12 @@ def get_sensor_plot_range(vehicle, sensor):
     """
     Gets plot range for each sensor so we don't overshoot."""
     logging.info("get_sensor_plot_range(%s, %s)" % (vehicle, sensor))
-    sensors = get_sensor_config(vehicle)
-    for record in sensors:
-        if record['gdac_sensor'] == sensor:
-            sensor_plot_min = float(record['sensor_plot_min'])
-            sensor_plot_max = float(record['sensor_plot_max'])
-            return (sensor_plot_min, sensor_plot_max)
+    record = get_sensor_lookup(vehicle, 'gdac_sensor').get(sensor)
+    if record is None:
+        return None
+    sensor_plot_min = float(record['sensor_plot_min'])
+    sensor_plot_max = float(record['sensor_plot_max'])
+    return (sensor_plot_min, sensor_plot_max)
 
 
 def register_cmocean():
@@ -132,22 +132,17 @@ def gdac_plot_sensor(config, vehicle, sensor):
     fig = config_date_axis(config, vehicle)
     status = flight_status(vehicle)
 
-    # Get config settings
-    sensors = get_sensor_config(vehicle)
+    # Get config settings -- 2026-10-19 single lookup vs walking sensors
+    record = get_sensor_lookup(vehicle, 'gdac_sensor')[sensor]
     alt_colormap = config['gandalf']['plots']['alt_colormap']
     if alt_colormap:
-        for index, value in enumerate(sensors):
-            if value["gdac_sensor"] == sensor:
-                cmap = value["alt_colormap"]
+        cmap = record["alt_colormap"]
     else:
         cmap = 'jet'
 
     logging.info("plot_sensor(): using %s colormap for %s" % (cmap, sensor))
-    for index, value in enumerate(sensors):
-            if value["gdac_sensor"] == sensor:
-                log_scale = bool(value["log_scale"])
-                logging.debug("plot_sensor(%s): Log scale is %s" % (sensor,
-                                                                    log_scale))
+    log_scale = bool(record["log_scale"])
+    logging.debug("plot_sensor(%s): Log scale is %s" % (sensor, log_scale))
     if status == 'deployed':
         data_dir = config['gandalf']['deployed_data_dir']
     if status == 'recovered':
@@ -178,11 +173,8 @@ def gdac_plot_sensor(config, vehicle, sensor):
     logging.info("plot_sensor(): start_date %s" % start_date)
     logging.info("plot_sensor(): end_date %s" % end_date)
     # Title and subtitle
-    for record in sensors:
-        if (record['gdac_sensor'] == sensor):
-            subtitle_string = "%s %s" % (record['sensor_name'],
-                                         record['unit_string'])
-            break
+    subtitle_string = "%s %s" % (record['sensor_name'],
+                                 record['unit_string'])
 
     title_string = "%s %s to %s\n %s" % (config['gandalf']['public_name'],
                                          start_date, end_date, subtitle_string)
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Name:       gandalf_fleet_registry.py
+Created:    2026-10-19
+Modified:   2026-10-19
+Notes:      Compact fleet index so we don't have to open every deployment.json
+            ever configured just to find the handful of deployed vehicles.
+            The index is a single JSON document keyed by vehicle that lives
+            next to the vehicle configs so the web container can read it too.
+
+            The index is rebuilt from scratch when it is missing, when a
+            vehicle directory is added or removed, or when it is older than
+            MAX_INDEX_AGE. Otherwise we stat the deployed vehicles'
+            deployment.json files and re-parse only the ones that changed.
+            The rest (recovered and archived vehicles, and vehicle
+            directories that had no config yet, as gandalf_build_dirs
+            makes the directory first) are only stat'ed every
+            ARCHIVE_RESCAN_SECONDS, so a load costs a handful of stats
+            however many deployments have been archived. A recovered
+            vehicle set back to deployed is picked up within that, or at
+            once with -v <vehicle>.
+
+            gandalf_fleet_registry.py -v <vehicle> re-reads one entry and
+            --rebuild everything.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from gandalf_config_registry import VEHICLE_CONFIG_ROOT, load_json_config
+
+FLEET_REGISTRY_FILE = '/data/gandalf/gandalf_configs/fleet_registry.json'
+# Full rescan at least once a day so nothing stays stale for long
+MAX_INDEX_AGE = 86400
+# How often we stat the configs of vehicles that aren't deployed
+ARCHIVE_RESCAN_SECONDS = 3600
+# Dashboard fields copied from config['gandalf'] so the web app can skip
+# opening deployment.json for each vehicle
+DASH_KEYS = ['public_name', 'deployment_date', 'dash_status', 'PI',
+             'operator', 'project', 'kmz_url']
+
+
+def get_cli_args():
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      -v vehicle to refresh one entry, --rebuild for everything
+    """
+    logging.debug('get_cli_args()')
+    arg_p = argparse.ArgumentParser()
+    arg_p.add_argument("-v", "--vehicle", help="vehicle name", nargs="?")
+    arg_p.add_argument("--rebuild", help="rescan all vehicle configs",
+                       action="store_true")
+    args = vars(arg_p.parse_args())
+    return args
+
+
+def make_fleet_record(config_file):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Pulls what the MCP and dashboard need out of deployment.json
+    """
+    gandalf_config = load_json_config(config_file)['gandalf']
+    record = {}
+    record['vehicle'] = gandalf_config['vehicle']
+    record['vehicle_type'] = gandalf_config['vehicle_type']
+    record['vehicle_data'] = gandalf_config['vehicle_data']
+    record['data_source'] = gandalf_config['data_source']
+    record['status'] = gandalf_config['status']
+    record['config_file'] = config_file
+    record['config_mtime'] = os.stat(config_file).st_mtime_ns
+    for key in DASH_KEYS:
+        record[key] = gandalf_config.get(key)
+    return record
+
+
+def get_config_file(directory):
+    """deployment.json for a vehicle directory under VEHICLE_CONFIG_ROOT"""
+    return '%s/%s/ngdac/deployment.json' % (VEHICLE_CONFIG_ROOT, directory)
+
+
+def get_config_mtime(config_file):
+    """st_mtime_ns, None if it isn't there"""
+    try:
+        return os.stat(config_file).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def write_fleet_registry(registry):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Temp file plus rename so readers never see half an index
+    """
+    tmp_file = '%s.%d.tmp' % (FLEET_REGISTRY_FILE, os.getpid())
+    with open(tmp_file, 'w') as outf:
+        json.dump(registry, outf, indent=1, sort_keys=True)
+    os.replace(tmp_file, FLEET_REGISTRY_FILE)
+
+
+def rebuild_fleet_registry():
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      The one place we still walk every vehicle directory
+    """
+    logging.info('rebuild_fleet_registry()')
+    vehicles = {}
+    unindexed = {}
+    for entry in os.scandir(VEHICLE_CONFIG_ROOT):
+        if not entry.is_dir():
+            continue
+        config_file = get_config_file(entry.name)
+        try:
+            record = make_fleet_record(config_file)
+        except (OSError, ValueError, KeyError) as error:
+            logging.warning('rebuild_fleet_registry(%s): %s', entry.name,
+                            error)
+            unindexed[entry.name] = get_config_mtime(config_file)
+            continue
+        vehicles[record['vehicle']] = record
+    registry = {}
+    registry['built'] = time.time()
+    registry['archive_checked'] = registry['built']
+    registry['root_mtime'] = os.stat(VEHICLE_CONFIG_ROOT).st_mtime_ns
+    registry['vehicles'] = vehicles
+    # Directories without a usable deployment.json, with its mtime (None
+    # if there isn't one) so we only retry it when it changes
+    registry['unindexed'] = unindexed
+    write_fleet_registry(registry)
+    return registry
+
+
+def update_fleet_registry(vehicle):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Re-reads a single vehicle's deployment.json into the index.
+                Call this whenever a config is edited.
+    """
+    logging.info('update_fleet_registry(%s)', vehicle)
+    registry = load_fleet_registry()
+    record = make_fleet_record(get_config_file(vehicle))
+    registry['vehicles'][record['vehicle']] = record
+    registry.setdefault('unindexed', {}).pop(vehicle, None)
+    write_fleet_registry(registry)
+    return registry
+
+
+def refresh_fleet_registry(registry):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Stats every indexed config and every unindexed vehicle
+                directory's config, re-parsing the ones that changed.
+                Returns True if anything changed and the index needs
+                writing.
+
+                2026-10-19: Was refresh_deployed and only looked at the
+                deployed vehicles, so a status change or a late
+                deployment.json waited for the daily rebuild.
+                2026-10-19: Only the deployed ones each time again, and
+                everything else every ARCHIVE_RESCAN_SECONDS, which we
+                keep in the index as archive_checked.
+    """
+    changed = False
+    unindexed = registry['unindexed']
+    now = time.time()
+    rescan = now - registry.get('archive_checked', 0) > ARCHIVE_RESCAN_SECONDS
+    if rescan:
+        registry['archive_checked'] = now
+        changed = True
+    for vehicle, record in list(registry['vehicles'].items()):
+        if not rescan and record['status'] != 'deployed':
+            continue
+        config_file = record['config_file']
+        mtime = get_config_mtime(config_file)
+        if mtime == record['config_mtime']:
+            continue
+        logging.info('refresh_fleet_registry(%s): config changed', vehicle)
+        del registry['vehicles'][vehicle]
+        changed = True
+        try:
+            record = make_fleet_record(config_file)
+        except (OSError, ValueError, KeyError) as error:
+            logging.warning('refresh_fleet_registry(%s): %s', vehicle, error)
+            # ngdac/deployment.json -> the vehicle directory's name
+            directory = os.path.basename(os.path.dirname(
+                os.path.dirname(config_file)))
+            unindexed[directory] = mtime
+            continue
+        registry['vehicles'][record['vehicle']] = record
+    if not rescan:
+        return changed
+    for directory, old_mtime in list(unindexed.items()):
+        config_file = get_config_file(directory)
+        mtime = get_config_mtime(config_file)
+        if mtime == old_mtime:
+            continue
+        changed = True
+        unindexed[directory] = mtime
+        if mtime is None:
+            continue
+        try:
+            record = make_fleet_record(config_file)
+        except (OSError, ValueError, KeyError) as error:
+            logging.warning('refresh_fleet_registry(%s): %s', directory,
+                            error)
+            continue
+        logging.info('refresh_fleet_registry(%s): new config', directory)
+        del unindexed[directory]
+        registry['vehicles'][record['vehicle']] = record
+    return changed
+
+
+def load_fleet_registry():
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Returns the index, rebuilding or refreshing as needed
+    """
+    try:
+        registry = load_json_config(FLEET_REGISTRY_FILE)
+    except (OSError, ValueError) as error:
+        logging.info('load_fleet_registry(): %s', error)
+        return rebuild_fleet_registry()
+    root_mtime = os.stat(VEHICLE_CONFIG_ROOT).st_mtime_ns
+    if (registry.get('root_mtime') != root_mtime or
+            'unindexed' not in registry or
+            time.time() - registry.get('built', 0) > MAX_INDEX_AGE):
+        return rebuild_fleet_registry()
+    # Don't mutate the cached copy
+    registry = dict(registry, vehicles=dict(registry['vehicles']),
+                    unindexed=dict(registry['unindexed']))
+    if refresh_fleet_registry(registry):
+        write_fleet_registry(registry)
+    return registry
+
+
+def get_fleet(status=None):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      List of fleet records, optionally filtered by status
+    """
+    registry = load_fleet_registry()
+    fleet = []
+    for vehicle in sorted(registry['vehicles']):
+        record = registry['vehicles'][vehicle]
+        if status is None or record['status'] == status:
+            fleet.append(record)
+    return fleet
+
+
+if __name__ == '__main__':
+    """
+    For command line use
+    """
+    logging.basicConfig(level=logging.INFO)
+    args = get_cli_args()
+    if args['rebuild']:
+        rebuild_fleet_registry()
+    elif args['vehicle']:
+        update_fleet_registry(args['vehicle'])
+    for record in get_fleet('deployed'):
+        logging.info('%s: %s %s %s', record['vehicle'], record['vehicle_type'],
+                     record['vehicle_data'], record['data_source'])
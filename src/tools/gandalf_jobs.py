@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Name:       gandalf_jobs.py
+Created:    2026-10-19
+Modified:   2026-10-19
+Notes:      Persistent SQLite job queue for the MCP. One job per vehicle
+            stage (unit_307:decode, unit_307:plots, ...) plus one publish
+            job per GeoJSON file. Each job names its task, which the caller
+            maps to a function, and the stages of the same vehicle it
+            depends on.
+
+            Every MCP run is a tick. At the start of a tick, done and
+            skipped jobs go back to pending. A failed job stays failed until
+            its backoff runs out: BACKOFF_BASE seconds after the first
+            failure, doubling each time up to BACKOFF_MAX. While it is
+            failed, its dependents are skipped for that tick. Nothing else
+            is affected, so one bad vehicle no longer takes the fleet down
+            with it.
+
+            A tick that never finished (killed container, OOM) is resumed
+            rather than restarted. Done jobs stay done and we carry on from
+            the first stage that hadn't completed. A long task can also keep
+            its own checkpoint with save_checkpoint(); the checkpoint is
+            cleared once the job completes.
+
+            A task's return value is kept as JSON in the job's result,
+            replaced only on success. Publish jobs build their files from
+            get_results(), so a vehicle whose stage failed this tick stays on
+            the map with its last good features.
+
+            The queue lives in JOBS_DB. Standard library only.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import sqlite3
+import traceback
+from gandalf_metrics import stage
+
+JOBS_DB = os.environ.get('GANDALF_JOBS_DB', '/data/gandalf/jobs/jobs.db')
+BACKOFF_BASE = 60
+BACKOFF_MAX = 6 * 60 * 60
+JOBS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ticks (
+    tick INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    finished REAL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    vehicle TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    task TEXT NOT NULL,
+    deps TEXT NOT NULL DEFAULT '[]',
+    rank INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    tick INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_at REAL NOT NULL DEFAULT 0,
+    checkpoint TEXT,
+    result TEXT,
+    error TEXT,
+    started REAL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, rank);
+"""
+
+
+def get_job_id(vehicle, stage_name):
+    """vehicle:stage"""
+    return '%s:%s' % (vehicle, stage_name)
+
+
+def make_job(vehicle, stage_name, task, deps=(), rank=0):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Job definition. deps are stage names of the same vehicle.
+                Lower rank runs first.
+    """
+    return {'job_id': get_job_id(vehicle, stage_name), 'vehicle': vehicle,
+            'stage': stage_name, 'task': task,
+            'deps': [get_job_id(vehicle, dep) for dep in deps],
+            'rank': rank}
+
+
+def open_queue(db_file=JOBS_DB):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Connection to the queue, created on first use. WAL so the
+                status CLI can read during a run.
+    """
+    os.makedirs(os.path.dirname(db_file), exist_ok=True)
+    conn = sqlite3.connect(db_file, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.executescript(JOBS_SCHEMA)
+    return conn
+
+
+def get_backoff(attempts):
+    """Seconds to wait after the attempts'th failure in a row"""
+    return min(BACKOFF_BASE * 2 ** max(attempts - 1, 0), BACKOFF_MAX)
+
+
+def start_tick(conn, jobs):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Resumes the last tick if it never finished, else starts a
+                new one. Job definitions are upserted either way. On a new
+                tick, jobs we no longer define (vehicle recovered) are
+                dropped. Returns the tick number.
+    """
+    now = time.time()
+    last = conn.execute('SELECT tick, finished FROM ticks ORDER BY tick DESC '
+                        'LIMIT 1').fetchone()
+    if last is not None and last['finished'] is None:
+        tick = last['tick']
+        logging.warning('start_tick(): Resuming unfinished tick %d', tick)
+        conn.execute("UPDATE jobs SET status = 'pending' WHERE "
+                     "status = 'running'")
+    else:
+        tick = conn.execute('INSERT INTO ticks (started) VALUES (?)',
+                            (now,)).lastrowid
+        job_ids = [job['job_id'] for job in jobs]
+        conn.execute('DELETE FROM jobs WHERE job_id NOT IN (%s)' %
+                     ','.join('?' * len(job_ids)), job_ids)
+        conn.execute("UPDATE jobs SET status = 'pending' WHERE status IN "
+                     "('done', 'skipped', 'running') OR (status = 'failed' "
+                     "AND next_at <= ?)", (now,))
+    conn.executemany('INSERT INTO jobs (job_id, vehicle, stage, task, deps, '
+                     'rank) VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(job_id) DO '
+                     'UPDATE SET task = excluded.task, deps = excluded.deps, '
+                     'rank = excluded.rank',
+                     [(job['job_id'], job['vehicle'], job['stage'],
+                       job['task'], json.dumps(job['deps']), job['rank'])
+                      for job in jobs])
+    conn.commit()
+    return tick
+
+
+def next_job(conn):
+    """Next pending job in rank order, or None"""
+    return conn.execute("SELECT * FROM jobs WHERE status = 'pending' "
+                        "ORDER BY rank, job_id LIMIT 1").fetchone()
+
+
+def get_blockers(conn, row):
+    """Dependencies that failed or were skipped this tick"""
+    deps = json.loads(row['deps'])
+    if not deps:
+        return []
+    return [dep['job_id'] for dep in conn.execute(
+        "SELECT job_id FROM jobs WHERE status IN ('failed', 'skipped') AND "
+        "job_id IN (%s)" % ','.join('?' * len(deps)), deps)]
+
+
+def save_checkpoint(job, value):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Lets a task record how far it got. Saved straight away, to
+                the queue or (on a worker node) the broker, so a resumed
+                job gets it back in job['checkpoint'].
+    """
+    job['checkpoint'] = value
+    job['on_checkpoint'](value)
+
+
+def skip_job(conn, tick, job_id, blockers):
+    """Marks a job skipped because its dependencies didn't complete"""
+    logging.warning('skip_job(%s): Skipping, %s did not complete', job_id,
+                    ', '.join(blockers))
+    conn.execute("UPDATE jobs SET status = 'skipped', tick = ?, error = ? "
+                 "WHERE job_id = ?",
+                 (tick, 'blocked by %s' % ', '.join(blockers), job_id))
+    conn.commit()
+
+
+def mark_running(conn, job_id):
+    """Job handed to a task, here or on a worker"""
+    conn.execute("UPDATE jobs SET status = 'running', started = ? WHERE "
+                 "job_id = ?", (time.time(), job_id))
+    conn.commit()
+
+
+def get_job_message(row):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      The JSON-able part of a job row that a task gets
+    """
+    job = dict((key, row[key]) for key in ('job_id', 'vehicle', 'stage',
+                                           'task', 'rank', 'attempts'))
+    job['checkpoint'] = (None if row['checkpoint'] is None else
+                         json.loads(row['checkpoint']))
+    return job
+
+
+def execute_job(job, tasks):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Runs a job's task inside a metrics stage. sys.exit() from
+                deep inside a stage counts as a failure like any exception.
+                Returns the outcome: status, result, error and the last
+                checkpoint.
+    """
+    outcome = {'job_id': job['job_id'], 'status': 'done', 'result': None,
+               'error': None}
+    try:
+        with stage(job['stage'], job['vehicle']):
+            outcome['result'] = tasks[job['task']](job)
+    except (Exception, SystemExit) as error:  # pylint: disable=broad-except
+        logging.warning('execute_job(%s): %s: %s', job['job_id'],
+                        type(error).__name__, error)
+        outcome['status'] = 'failed'
+        outcome['error'] = traceback.format_exc(limit=5)
+    outcome['checkpoint'] = job.get('checkpoint')
+    return outcome
+
+
+def record_outcome(conn, tick, job_id, outcome):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Done clears attempts and checkpoint and keeps the result.
+                Failed backs off and keeps the checkpoint for the retry.
+                Returns the new status.
+    """
+    now = time.time()
+    if outcome['status'] != 'done':
+        attempts = conn.execute('SELECT attempts FROM jobs WHERE job_id = ?',
+                                (job_id,)).fetchone()['attempts'] + 1
+        backoff = get_backoff(attempts)
+        logging.warning('record_outcome(%s): attempt %d failed, retry in %ds',
+                        job_id, attempts, backoff)
+        checkpoint = outcome.get('checkpoint')
+        conn.execute("UPDATE jobs SET status = 'failed', tick = ?, "
+                     "attempts = ?, next_at = ?, error = ?, checkpoint = ?, "
+                     "finished = ? WHERE job_id = ?",
+                     (tick, attempts, now + backoff, outcome['error'],
+                      None if checkpoint is None else json.dumps(checkpoint),
+                      now, job_id))
+        conn.commit()
+        return 'failed'
+    if outcome['result'] is None:
+        conn.execute("UPDATE jobs SET status = 'done', tick = ?, attempts = 0, "
+                     "next_at = 0, error = NULL, checkpoint = NULL, "
+                     "finished = ? WHERE job_id = ?", (tick, now, job_id))
+    else:
+        conn.execute("UPDATE jobs SET status = 'done', tick = ?, attempts = 0, "
+                     "next_at = 0, error = NULL, checkpoint = NULL, "
+                     "result = ?, finished = ? WHERE job_id = ?",
+                     (tick, json.dumps(outcome['result']), now, job_id))
+    conn.commit()
+    return 'done'
+
+
+def run_job(conn, tick, row, tasks):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Runs one job in this process and records how it went.
+                Returns the new status.
+    """
+    job_id = row['job_id']
+    blockers = get_blockers(conn, row)
+    if blockers:
+        skip_job(conn, tick, job_id, blockers)
+        return 'skipped'
+    mark_running(conn, job_id)
+    job = get_job_message(row)
+    job['queue'] = conn
+
+    def on_checkpoint(value):
+        conn.execute('UPDATE jobs SET checkpoint = ? WHERE job_id = ?',
+                     (json.dumps(value), job_id))
+        conn.commit()
+    job['on_checkpoint'] = on_checkpoint
+    return record_outcome(conn, tick, job_id, execute_job(job, tasks))
+
+
+def finish_tick(conn, tick, summary):
+    """Closes the tick so the next run starts a new one"""
+    conn.execute('UPDATE ticks SET finished = ? WHERE tick = ?',
+                 (time.time(), tick))
+    conn.commit()
+    logging.warning('finish_tick(%d): %s', tick, summary)
+
+
+def run_tick(conn, jobs, tasks):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Runs every pending job in rank order and closes the tick.
+                Returns {status: count}.
+    """
+    tick = start_tick(conn, jobs)
+    summary = {}
+    while True:
+        row = next_job(conn)
+        if row is None:
+            break
+        status = run_job(conn, tick, row, tasks)
+        summary[status] = summary.get(status, 0) + 1
+    finish_tick(conn, tick, summary)
+    return summary
+
+
+def get_results(conn, task):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      [(vehicle, result)] of the last good run of each job for
+                this task, in vehicle order
+    """
+    return [(row['vehicle'], json.loads(row['result'])) for row in
+            conn.execute('SELECT vehicle, result FROM jobs WHERE task = ? '
+                         'AND result IS NOT NULL ORDER BY vehicle', (task,))]
+
+
+def retry_now(conn, vehicle):
+    """Clears the backoff on a vehicle's failed jobs"""
+    conn.execute("UPDATE jobs SET next_at = 0 WHERE vehicle = ? AND "
+                 "status = 'failed'", (vehicle,))
+    conn.commit()
+
+
+if __name__ == '__main__':
+    """
+    For command line use: job status, or -r vehicle to retry it next tick
+    """
+    logging.basicConfig(level=logging.INFO)
+    queue = open_queue()
+    if len(sys.argv) == 3 and sys.argv[1] == '-r':
+        retry_now(queue, sys.argv[2])
+        sys.exit()
+    for job_row in queue.execute('SELECT * FROM jobs ORDER BY vehicle, rank'):
+        wait = max(job_row['next_at'] - time.time(), 0)
+        logging.info('%-30s %-8s tick %-6d attempts %d%s', job_row['job_id'],
+                     job_row['status'], job_row['tick'], job_row['attempts'],
+                     ' retry in %ds' % wait if wait else '')
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Name:       gandalf_kmz.py
+Created:    2026-10-19
+Modified:   2026-10-19
+Notes:      Incremental KML/KMZ writer for the Slocum track files
+            (gandalf_slocum_to_kml.slocum_kmz and
+            gandalf_slocum_post_process.slocum_post_kmz). Replaces building
+            a simplekml tree with a Style per point on every run.
+
+            Each output file has a placemark store next to it,
+
+                <kml_file>.placemarks.jsonl
+
+            one JSON line per placemark. When the new set starts with what
+            the store has, we only append the new placemarks. When it
+            doesn't (new deployment, logs replaced) we start the store over.
+            If nothing changed and the output is there, we don't touch it.
+            The store is only updated once the new file is in place, so a
+            failed write is retried on the next run instead of looking
+            like nothing changed.
+
+            When we do write, the XML is streamed straight into the file one
+            placemark at a time, zipped as doc.kml if the name ends in .kmz.
+            Points share a handful of styles and carry their balloon HTML
+            in <description>, so the file stays small however long the
+            mission runs. Written to a temp file and renamed, so Google
+            Earth never picks up half a file.
+
+            A placemark is {"name": .., "coords": [lon, lat],
+            "description": html}. The store may also hold an explicit
+            track's points, see update_kmz.
+
+            What this doesn't save: the callers still parse every log and
+            hand us every placemark each run, we still hold them all in
+            memory to compare with the store, and when anything changed
+            the whole KMZ is rewritten (a zip can't be appended to in
+            place). The store only tells us whether there is anything to
+            do, which on most runs there isn't. Reading placemarks back
+            from the store so a run only parses new logs is the next step
+            if those costs start to matter.
+"""
+import os
+import io
+import json
+import logging
+import zipfile
+from xml.sax.saxutils import escape
+
+STORE_SUFFIX = '.placemarks.jsonl'
+ICON_ROOT = 'https://gandalf.gcoos.org/static/images'
+# KML colours are aabbggrr
+YELLOW = 'ff00ffff'
+RED = 'ff0000ff'
+KML_HEAD = """<?xml version="1.0" encoding="UTF-8"?>
+<kml xmlns="http://www.opengis.net/kml/2.2">
+<Document>
+<name>%(name)s</name>
+<Style id="surfacing">
+<IconStyle><scale>0.25</scale><Icon><href>%(icons)s/circle-yellow.png</href></Icon></IconStyle>
+<LabelStyle><color>%(red)s</color><scale>0</scale></LabelStyle>
+<BalloonStyle><text>$[description]</text></BalloonStyle>
+</Style>
+<Style id="track">
+<LineStyle><color>%(yellow)s</color><width>1</width></LineStyle>
+</Style>
+<Style id="start">
+<IconStyle><scale>0.5</scale><Icon><href>%(icons)s/green-icon.png</href></Icon></IconStyle>
+</Style>
+<Style id="end">
+<IconStyle><scale>1</scale><Icon><href>%(icons)s/slocum_stop.png</href></Icon></IconStyle>
+<BalloonStyle><text>$[description]</text></BalloonStyle>
+</Style>
+"""
+KML_TAIL = """</Document>
+</kml>
+"""
+# Coordinates per line in the track's LineString
+TRACK_CHUNK = 500
+
+
+def get_store_file(kml_file):
+    """Placemark store for kml_file"""
+    return kml_file + STORE_SUFFIX
+
+
+def read_store(store_file):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      The stored entries as their JSON lines, [] if there's no
+                store. A torn last line (killed mid-append) has no newline,
+                so it matches nothing and the store gets rewritten.
+    """
+    try:
+        with open(store_file) as store:
+            return store.readlines()
+    except FileNotFoundError:
+        return []
+
+
+def plan_store(store_file, entries):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      What it takes to bring the store up to entries: ('a', new
+                lines) when the store is a prefix of them, ('w', all lines)
+                otherwise, or None if it already matches. Compares JSON
+                lines, so an unchanged store is never parsed.
+    """
+    lines = [json.dumps(entry, separators=(',', ':')) + '\n'
+             for entry in entries]
+    stored = read_store(store_file)
+    if stored == lines:
+        return None
+    if stored and lines[:len(stored)] == stored:
+        return 'a', lines[len(stored):]
+    return 'w', lines
+
+
+def write_store(store_file, plan):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Applies a plan_store plan
+    """
+    mode, lines = plan
+    with open(store_file, mode) as store:
+        store.writelines(lines)
+    logging.debug('write_store(%s): %s %d entries', store_file,
+                  'appended' if mode == 'a' else 'wrote', len(lines))
+
+
+def cdata(html):
+    """html as a CDATA section"""
+    return '<![CDATA[%s]]>' % html.replace(']]>', ']]]]><![CDATA[>')
+
+
+def point_xml(style, coords, name=None, description=None):
+    """One point Placemark"""
+    parts = ['<Placemark>']
+    if name is not None:
+        parts.append('<name>%s</name>' % escape(str(name)))
+    parts.append('<styleUrl>#%s</styleUrl>' % style)
+    if description is not None:
+        parts.append('<description>%s</description>' % cdata(description))
+    parts.append('<Point><coordinates>%r,%r,0</coordinates></Point>'
+                 '</Placemark>\n' % (float(coords[0]), float(coords[1])))
+    return ''.join(parts)
+
+
+def stream_kml(out, name, placemarks, track, end_description):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Writes the KML document to the text stream out: the
+                placemarks, the track, then start and end markers on the
+                track's first and last points
+    """
+    out.write(KML_HEAD % {'name': escape(name), 'icons': ICON_ROOT,
+                          'red': RED, 'yellow': YELLOW})
+    for placemark in placemarks:
+        out.write(point_xml('surfacing', placemark['coords'],
+                            placemark.get('name'),
+                            placemark.get('description')))
+    out.write('<Placemark><name>%s</name><styleUrl>#track</styleUrl>'
+              '<LineString><coordinates>\n' % escape(name))
+    for index in range(0, len(track), TRACK_CHUNK):
+        out.write(' '.join('%r,%r,0' % (float(lon), float(lat)) for lon, lat
+                           in track[index:index + TRACK_CHUNK]) + '\n')
+    out.write('</coordinates></LineString></Placemark>\n')
+    out.write(point_xml('start', track[0]))
+    out.write(point_xml('end', track[-1], description=end_description))
+    out.write(KML_TAIL)
+
+
+def write_kml(kml_file, name, placemarks, track, end_description):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      stream_kml into kml_file, as a KMZ if it ends in .kmz
+    """
+    tmp_file = '%s.%d.tmp' % (kml_file, os.getpid())
+    try:
+        if kml_file.lower().endswith('.kmz'):
+            with zipfile.ZipFile(tmp_file, 'w', zipfile.ZIP_DEFLATED) as kmz:
+                with kmz.open('doc.kml', 'w') as raw:
+                    with io.TextIOWrapper(raw, encoding='utf-8') as out:
+                        stream_kml(out, name, placemarks, track,
+                                   end_description)
+        else:
+            with open(tmp_file, 'w', encoding='utf-8') as out:
+                stream_kml(out, name, placemarks, track, end_description)
+        os.replace(tmp_file, kml_file)
+    finally:
+        if os.path.exists(tmp_file):
+            os.unlink(tmp_file)
+
+
+def update_kmz(kml_file, name, placemarks, track=None, end_description=None,
+               force=False):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      The entry point. Rewrites kml_file only if the store
+                says something changed (or force), then updates the store.
+                Returns True if the file was written.
+
+                track defaults to the placemarks' coordinates. A caller
+                with a track of its own (post-processing) passes it, and
+                then its points and the end balloon are stored after the
+                placemarks and compared too.
+    """
+    entries = list(placemarks)
+    if track is None:
+        track = [placemark['coords'] for placemark in placemarks]
+    else:
+        entries += [list(point) for point in track]
+        entries.append({'end': end_description})
+    if not track:
+        logging.warning('update_kmz(%s): nothing to write', kml_file)
+        return False
+    store_file = get_store_file(kml_file)
+    plan = plan_store(store_file, entries)
+    if plan is None and not force and os.path.exists(kml_file):
+        logging.debug('update_kmz(%s): unchanged', kml_file)
+        return False
+    write_kml(kml_file, name, placemarks, track, end_description)
+    # Only now: if the write failed, the next run still sees the change
+    if plan is not None:
+        write_store(store_file, plan)
+    logging.info('update_kmz(%s): wrote %d placemarks, %d track points',
+                 kml_file, len(placemarks), len(track))
+    return True
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Name:       gandalf_mcp_daemon.py
+Created:    2026-10-19
+Modified:   2026-10-19
+Notes:      Long-running MCP worker for the tools container. Started as the
+            container command, it imports every stage module once (see
+            gandalf_MP_mcp.warm_up), then waits on a unix socket for run
+            requests. Cron still does
+
+                docker exec tools /gandalf/tools/gandalf_MP_mcp.py
+
+            and gandalf_MP_mcp hands the run to us via request_run(). If
+            the daemon isn't up, gandalf_MP_mcp runs the MCP itself as
+            before, so nothing depends on us being there.
+
+            Between runs we keep the interpreter, imports, cmocean maps,
+            the Mongo client pool and the config cache (which revalidates
+            on mtime) warm.
+
+            Protocol is one JSON line per request:
+                {"command": "run"}  -> "log ..." lines, then "result {json}"
+                {"command": "ping"} -> "ok {json}"
+                {"command": "shutdown"}
+            Only one run at a time. A run request during a run gets "busy"
+            rather than queueing behind it, same as overlapping cron ticks
+            would if each had waited.
+
+            Requests are answered on socketserver threads, but the run
+            itself is handed to the main thread, which does nothing else.
+            The argo, decoder and NGDAC stages fork mp.Pool workers, and
+            we'd rather they fork from a thread that isn't in the middle
+            of handling a request.
+
+            The process recycles (exits; restart: always in docker-compose
+            brings it back fresh) after --max-runs runs, and after any run
+            that finds a .py in the tools directory newer than when we
+            started, so edits to the bind-mounted ./src/tools take effect
+            on the next tick rather than whenever the container restarts.
+"""
+import os
+import sys
+import gc
+import glob
+import json
+import time
+import queue
+import socket
+import logging
+import argparse
+import threading
+import socketserver
+
+DAEMON_SOCKET = os.environ.get('GANDALF_MCP_SOCKET', '/tmp/gandalf_mcp.sock')
+# A long run is fine, a wedged daemon is not. Client gives up after this.
+CLIENT_TIMEOUT = 4 * 60 * 60
+# Recycle after this many runs even if no source changed
+MAX_RUNS = 48
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+RUN_LOCK = threading.Lock()
+# Run requests for the main thread; None asks it to stop
+RUN_QUEUE = queue.Queue()
+_STATE = {'started': time.time(), 'runs': 0, 'last_run': None,
+          'max_runs': MAX_RUNS}
+
+
+def get_cli_args():
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Socket path and recycle count
+    """
+    logging.debug('get_cli_args()')
+    arg_p = argparse.ArgumentParser()
+    arg_p.add_argument("-s", "--socket", help="unix socket path",
+                       default=DAEMON_SOCKET)
+    arg_p.add_argument("-m", "--max-runs", help="exit after this many runs "
+                       "(0 only recycles on source changes)", type=int,
+                       default=MAX_RUNS)
+    arg_p.add_argument("--ping", help="ask a running daemon for status",
+                       action="store_true")
+    arg_p.add_argument("--shutdown", help="stop a running daemon",
+                       action="store_true")
+    args = vars(arg_p.parse_args())
+    return args
+
+
+class StreamLogHandler(logging.Handler):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Copies log records to the requesting client as "log ..."
+                lines so cron's output still shows the run. A client that
+                went away just stops getting them.
+    """
+    def __init__(self, wfile):
+        logging.Handler.__init__(self)
+        self.wfile = wfile
+        self.setFormatter(logging.Formatter('%(levelname)s:%(name)s:'
+                                            '%(message)s'))
+
+    def emit(self, record):
+        if self.wfile is None:
+            return
+        try:
+            line = 'log %s\n' % self.format(record).replace('\n', ' ')
+            self.wfile.write(line.encode())
+            self.wfile.flush()
+        except (OSError, ValueError):
+            self.wfile = None
+
+
+def run_once(wfile):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      One MCP run in this process with logging copied to wfile.
+                Stages that sys.exit() or blow up end the run, not the
+                daemon. Returns the run report.
+    """
+    from gandalf_MP_mcp import run_mcp
+    handler = StreamLogHandler(wfile)
+    logging.getLogger().addHandler(handler)
+    start_time = time.time()
+    try:
+        report = run_mcp()
+        report['status'] = 'ok'
+    except BaseException as error:  # pylint: disable=broad-except
+        logging.exception('run_once(): %s: %s', type(error).__name__, error)
+        from gandalf_metrics import get_run_report
+        report = get_run_report('gandalf_mcp')
+        report['status'] = 'failed'
+        report['error'] = '%s: %s' % (type(error).__name__, error)
+    finally:
+        logging.getLogger().removeHandler(handler)
+        gc.collect()
+    _STATE['runs'] += 1
+    _STATE['last_run'] = {'finished': time.time(),
+                          'wall_seconds': round(time.time() - start_time, 3),
+                          'status': report['status']}
+    logging.warning('run_once(): run %d %s in %0.2f minutes', _STATE['runs'],
+                    report['status'], (time.time() - start_time) / 60)
+    return report
+
+
+def get_source_mtime(tools_dir=TOOLS_DIR):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Newest mtime of the tools' .py files, so we can tell when
+                the code under us has changed
+    """
+    mtimes = [0]
+    for source_file in glob.glob('%s/*.py' % tools_dir):
+        try:
+            mtimes.append(os.stat(source_file).st_mtime)
+        except FileNotFoundError:
+            continue
+    return max(mtimes)
+
+
+def should_recycle(source_mtime):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      True once we've done max_runs runs or the code changed
+    """
+    if _STATE['max_runs'] and _STATE['runs'] >= _STATE['max_runs']:
+        logging.warning('should_recycle(): %d runs, recycling',
+                        _STATE['runs'])
+        return True
+    if get_source_mtime() > source_mtime:
+        logging.warning('should_recycle(): tools source changed, recycling')
+        return True
+    return False
+
+
+class MCPRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      One JSON request line per connection
+    """
+    def reply(self, line):
+        try:
+            self.wfile.write(('%s\n' % line).encode())
+            self.wfile.flush()
+        except OSError:
+            pass
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline().decode() or '{}')
+        except ValueError:
+            self.reply('error bad request')
+            return
+        command = request.get('command')
+        if command == 'ping':
+            status = dict(_STATE, pid=os.getpid(), busy=RUN_LOCK.locked())
+            self.reply('ok %s' % json.dumps(status))
+        elif command == 'shutdown':
+            self.reply('ok')
+            RUN_QUEUE.put(None)
+        elif command == 'run':
+            if not RUN_LOCK.acquire(blocking=False):
+                self.reply('busy')
+                return
+            # The main thread runs it and writes the result line; we just
+            # hold the connection open until it's done
+            job = {'wfile': self.wfile, 'done': threading.Event()}
+            try:
+                RUN_QUEUE.put(job)
+                job['done'].wait()
+            finally:
+                RUN_LOCK.release()
+        else:
+            self.reply('error unknown command %s' % command)
+
+
+def send_command(command, socket_path=DAEMON_SOCKET, timeout=CLIENT_TIMEOUT):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Sends one command and yields the reply lines. Raises
+                OSError if nobody is listening.
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    try:
+        client.connect(socket_path)
+        client.sendall(('%s\n' % json.dumps({'command': command})).encode())
+        with client.makefile('rb') as rfile:
+            for line in rfile:
+                yield line.decode().rstrip('\n')
+    finally:
+        client.close()
+
+
+def request_run(socket_path=DAEMON_SOCKET):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Asks the daemon for a run and relays its log lines. Returns
+                the run report, {} if a run was already in progress, or
+                None if the daemon isn't reachable (caller runs locally).
+    """
+    if not os.path.exists(socket_path):
+        return None
+    try:
+        for line in send_command('run', socket_path):
+            kind, _, rest = line.partition(' ')
+            if kind == 'log':
+                print(rest, flush=True)
+            elif kind == 'result':
+                return json.loads(rest)
+            elif kind == 'busy':
+                logging.warning('request_run(): MCP already running, '
+                                'skipping this tick')
+                return {}
+            else:
+                logging.warning('request_run(): %s', line)
+                return {}
+    except (ConnectionRefusedError, FileNotFoundError) as error:
+        logging.info('request_run(): daemon not running: %s', error)
+        return None
+    except OSError as error:
+        # Connected but lost it mid-run: the run may well have happened,
+        # so don't start a second one here
+        logging.warning('request_run(): %s', error)
+        return {}
+    logging.warning('request_run(): daemon closed without a result')
+    return {}
+
+
+def run_jobs(source_mtime):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Main thread loop: runs what the handlers queue until asked
+                to stop or it's time to recycle
+    """
+    while True:
+        job = RUN_QUEUE.get()
+        if job is None:
+            return
+        try:
+            report = run_once(job['wfile'])
+            try:
+                job['wfile'].write(('result %s\n' %
+                                    json.dumps(report)).encode())
+                job['wfile'].flush()
+            except (OSError, ValueError):
+                pass
+        finally:
+            job['done'].set()
+        if should_recycle(source_mtime):
+            return
+
+
+def serve(socket_path=DAEMON_SOCKET, max_runs=MAX_RUNS):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Warm up, then serve until shutdown or recycle. The socket
+                server gets its own thread; runs happen here.
+    """
+    from gandalf_MP_mcp import warm_up
+    _STATE['max_runs'] = max_runs
+    source_mtime = get_source_mtime()
+    start_time = time.time()
+    warm_up()
+    logging.warning('serve(): warmed up in %0.2fs', time.time() - start_time)
+    # Stale socket from a previous container run
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = socketserver.ThreadingUnixStreamServer(socket_path,
+                                                    MCPRequestHandler)
+    server.daemon_threads = True
+    logging.warning('serve(): listening on %s', socket_path)
+    server_thread = threading.Thread(target=server.serve_forever,
+                                     daemon=True)
+    server_thread.start()
+    try:
+        run_jobs(source_mtime)
+    finally:
+        server.shutdown()
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+if __name__ == '__main__':
+    """
+    For command line use
+    """
+    logging.basicConfig(level=logging.INFO)
+    args = get_cli_args()
+    if args['ping'] or args['shutdown']:
+        try:
+            for reply in send_command('ping' if args['ping'] else 'shutdown',
+                                      args['socket'], 10):
+                print(reply)
+        except OSError as error:
+            logging.warning('gandalf_mcp_daemon: not running: %s', error)
+            sys.exit(1)
+        sys.exit()
+    serve(args['socket'], args['max_runs'])
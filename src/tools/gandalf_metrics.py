@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Name:       gandalf_metrics.py
+Created:    2026-10-19
+Modified:   2026-10-19
+Notes:      Per-stage, per-vehicle instrumentation for MCP runs. Wrap work in
+
+                with stage('decode', vehicle):
+                    process_binaries(config, vehicle)
+
+            and each stage records wall time, CPU time (ours plus any
+            children that finished), peak RSS, bytes read and written,
+            subprocesses started (add_subprocesses() where they're
+            launched) and rows processed (add_rows() from inside the
+            stage). write_run_report() writes the run as JSON, appends
+            it to a JSON lines history, and writes a Prometheus textfile for
+            node_exporter's textfile collector, all under METRICS_DIR.
+
+            Bytes come from /proc/self/io so they count this process only.
+            ru_maxrss is a process-wide high-water mark, so a stage gets
+            rss_growth_bytes, how far it pushed that mark up (0 if an
+            earlier stage had already been bigger), and
+            process_peak_rss_bytes, the mark itself when it ended.
+
+            Standard library only so every container can use it.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import resource
+import threading
+from contextlib import contextmanager
+
+METRICS_DIR = '/data/gandalf/metrics'
+METRIC_PREFIX = 'gandalf_stage'
+# JSON field -> (Prometheus metric suffix, help text)
+PROM_FIELDS = [
+    ('wall_seconds', 'wall_seconds', 'Stage wall clock time'),
+    ('cpu_seconds', 'cpu_seconds', 'Stage CPU time incl. reaped children'),
+    ('rss_growth_bytes', 'rss_growth_bytes',
+     'Growth of the process peak RSS during the stage'),
+    ('process_peak_rss_bytes', 'process_peak_rss_bytes',
+     'Process peak RSS so far, at stage end'),
+    ('rows', 'rows', 'Rows processed'),
+    ('read_bytes', 'read_bytes', 'Bytes read'),
+    ('write_bytes', 'write_bytes', 'Bytes written'),
+    ('subprocesses', 'subprocesses', 'Subprocesses started'),
+    ('failed', 'failed', '1 if the stage raised'),
+]
+
+_RUN = {'started': time.time(), 'stages': []}
+_LOCAL = threading.local()
+
+
+def _io_counters():
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      (rchar, wchar) from /proc/self/io, zeros where unavailable
+    """
+    counters = {}
+    try:
+        with open('/proc/self/io') as iofile:
+            for line in iofile:
+                key, _, value = line.partition(':')
+                counters[key] = int(value)
+    except OSError:
+        pass
+    return counters.get('rchar', 0), counters.get('wchar', 0)
+
+
+def _snapshot():
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Everything we diff across a stage
+    """
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    kids = resource.getrusage(resource.RUSAGE_CHILDREN)
+    read_bytes, write_bytes = _io_counters()
+    return {'wall': time.perf_counter(),
+            'cpu': own.ru_utime + own.ru_stime + kids.ru_utime +
+            kids.ru_stime,
+            'maxrss': max(own.ru_maxrss, kids.ru_maxrss),
+            'read': read_bytes, 'write': write_bytes}
+
+
+def _stage_stack():
+    """Per-thread stack of open stages so add_rows finds the innermost"""
+    if not hasattr(_LOCAL, 'stack'):
+        _LOCAL.stack = []
+    return _LOCAL.stack
+
+
+def add_rows(rows):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Adds to the row count of the innermost open stage. A no-op
+                outside a stage, so library code can call it freely.
+    """
+    stack = _stage_stack()
+    if stack:
+        stack[-1]['rows'] += int(rows)
+
+
+def add_subprocesses(count=1):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Counts processes we launch (dbd2asc, dba_merge) against
+                every open stage, so an outer stage includes its inner
+                ones. Called where the stages start them; a no-op outside
+                a stage.
+    """
+    for record in _stage_stack():
+        record['subprocesses'] += int(count)
+
+
+@contextmanager
+def stage(name, vehicle=None):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Records one stage. Exceptions (and sys.exit) are marked as
+                failed and re-raised.
+    """
+    record = {'stage': name, 'vehicle': vehicle or '', 'rows': 0,
+              'subprocesses': 0, 'failed': 0, 'started': time.time()}
+    _stage_stack().append(record)
+    before = _snapshot()
+    try:
+        yield record
+    except BaseException:
+        record['failed'] = 1
+        raise
+    finally:
+        after = _snapshot()
+        _stage_stack().pop()
+        record['wall_seconds'] = round(after['wall'] - before['wall'], 3)
+        record['cpu_seconds'] = round(after['cpu'] - before['cpu'], 3)
+        # ru_maxrss is KB on Linux
+        record['rss_growth_bytes'] = (after['maxrss'] -
+                                      before['maxrss']) * 1024
+        record['process_peak_rss_bytes'] = after['maxrss'] * 1024
+        record['read_bytes'] = after['read'] - before['read']
+        record['write_bytes'] = after['write'] - before['write']
+        _RUN['stages'].append(record)
+        logging.info('stage(%s, %s): %0.2fs wall %0.2fs cpu', name,
+                     record['vehicle'], record['wall_seconds'],
+                     record['cpu_seconds'])
+
+
+def reset_run():
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Starts a new run in this process. A long-lived process
+                (gandalf_mcp_daemon) calls this per run so reports don't
+                pile up stages from earlier runs.
+    """
+    _RUN['started'] = time.time()
+    _RUN['stages'] = []
+
+
+def get_run_report(run_name):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      The run so far as a dict
+    """
+    report = {'run': run_name, 'host': os.uname()[1],
+              'started': _RUN['started'], 'finished': time.time()}
+    report['wall_seconds'] = round(report['finished'] - report['started'], 3)
+    report['stages'] = list(_RUN['stages'])
+    return report
+
+
+def _prom_escape(value):
+    """Label value escaping per the text exposition format"""
+    return (str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def prometheus_text(report):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Report as Prometheus text exposition. Stages that ran more
+                than once for a vehicle (e.g. one per sensor) are summed.
+    """
+    totals = {}
+    for record in report['stages']:
+        key = (record['stage'], record['vehicle'])
+        total = totals.setdefault(key, dict((field, 0) for field, _, _ in
+                                            PROM_FIELDS))
+        for field, _, _ in PROM_FIELDS:
+            if field == 'process_peak_rss_bytes':
+                total[field] = max(total[field], record[field])
+            else:
+                total[field] += record[field]
+    run = _prom_escape(report['run'])
+    lines = []
+    for field, suffix, help_text in PROM_FIELDS:
+        metric = '%s_%s' % (METRIC_PREFIX, suffix)
+        lines.append('# HELP %s %s' % (metric, help_text))
+        lines.append('# TYPE %s gauge' % metric)
+        for (stage_name, vehicle), total in sorted(totals.items()):
+            lines.append('%s{run="%s",stage="%s",vehicle="%s"} %s' %
+                         (metric, run, _prom_escape(stage_name),
+                          _prom_escape(vehicle), total[field]))
+    lines.append('# HELP gandalf_run_wall_seconds Whole run wall time')
+    lines.append('# TYPE gandalf_run_wall_seconds gauge')
+    lines.append('gandalf_run_wall_seconds{run="%s"} %s' %
+                 (run, report['wall_seconds']))
+    lines.append('# HELP gandalf_run_finished_seconds Run end, unix time')
+    lines.append('# TYPE gandalf_run_finished_seconds gauge')
+    lines.append('gandalf_run_finished_seconds{run="%s"} %d' %
+                 (run, report['finished']))
+    return '\n'.join(lines) + '\n'
+
+
+def _write_atomic(file_name, text):
+    """Temp file plus rename so collectors never see half a file"""
+    tmp_file = '%s.%d.tmp' % (file_name, os.getpid())
+    with open(tmp_file, 'w') as outf:
+        outf.write(text)
+    os.replace(tmp_file, file_name)
+
+
+def write_run_report(run_name, metrics_dir=METRICS_DIR):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      <run>.json (latest run), <run>_history.jsonl (every run)
+                and <run>.prom (textfile collector)
+    """
+    report = get_run_report(run_name)
+    try:
+        os.makedirs(metrics_dir, exist_ok=True)
+        _write_atomic('%s/%s.json' % (metrics_dir, run_name),
+                      json.dumps(report, indent=1))
+        with open('%s/%s_history.jsonl' % (metrics_dir, run_name), 'a') as hf:
+            hf.write(json.dumps(report) + '\n')
+        _write_atomic('%s/%s.prom' % (metrics_dir, run_name),
+                      prometheus_text(report))
+    except OSError as error:
+        logging.warning('write_run_report(%s): %s', run_name, error)
+    return report
+
+
+if __name__ == '__main__':
+    """
+    For command line use: summarize a run report by stage
+    """
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) != 2:
+        logging.warning("Usage: gandalf_metrics run_report.json")
+        sys.exit()
+    with open(sys.argv[1]) as rfile:
+        run_report = json.load(rfile)
+    for stage_record in sorted(run_report['stages'],
+                               key=lambda r: -r['wall_seconds']):
+        logging.info('%-10s %-20s %8.2fs wall %8.2fs cpu %6d rows',
+                     stage_record['stage'], stage_record['vehicle'],
+                     stage_record['wall_seconds'],
+                     stage_record['cpu_seconds'], stage_record['rows'])
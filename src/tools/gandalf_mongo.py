@@ -17,7 +17,8 @@ import collections
 from datetime import datetime
 import pymongo as pymongo
 from pymongo import MongoClient
-from flask_login import current_user
+
+_MONGO_CLIENTS = {}
 
 
 def load_user(email):
@@ -50,8 +51,14 @@ def auth_user(id, pw):
 def connect_mongo():
     """
     DOCSTRING
+    2026-10-19: One client per process. MongoClient pools its own
+    connections, so the MCP daemon keeps them warm between runs. Keyed on
+    pid as clients must not cross a fork.
     """
-    client = MongoClient('mongo:27017')
+    client = _MONGO_CLIENTS.get(os.getpid())
+    if client is None:
+        client = MongoClient('mongo:27017')
+        _MONGO_CLIENTS[os.getpid()] = client
     return client
 
 
@@ -2,25 +2,41 @@
 """
 Author:     xiao.qi@tamu.edu
 Created:    2024-07-05
-Modified:   2024-07-09
+Modified:   2026-10-19
 Notes:      This module sets up latitude and longitude range and horizontal
             resolution using command-line arguments, retrieves the latest daily
             average or latest single time current velocity HYCOM GLBv0.08 data
             for the specified area from the HYCOM netCDF dataset, converts it
             for Leaflet-velocity usage, and saves it to a JSON file.
 
+            2026-10-19: The subsetted grid is cached locally as NetCDF keyed
+            by model run and forecast time, so reruns for the same
+            forecast skip OPeNDAP and a new run fetches again. Superseded
+            and old cache files are deleted.
+            One fetch at step_size now feeds any number of coarser
+            resolutions (-r), and each resolution also gets a compact
+            binary grid (Int16 quantized or Float32) plus a small JSON
+            header next to the Leaflet-velocity JSON. -f reads a local
+            NetCDF file (HYCOM layout or one of our cache files) instead
+            of the HYCOM server, which is handy for offline testing.
+
 Example:
 $ python hycom_streamlines.py -la0 1900 -la1 3100 -lo0 2900 -lo1 4200 -s 3 -m F
 $ python hycom_streamlines.py -la0 2200 -la1 3001 -lo0 3200 -lo1 4000 -s 5 -m T
+$ python hycom_streamlines.py -s 2 -r 2,4,8 -b int16
+$ python hycom_streamlines.py -f /tmp/hycom_subset.nc -r 1,2
 
 References: HYCOM (https://www.hycom.org/dataserver/gofs-3pt1/analysis)
             Leaflet-velocity (https://github.com/onaci/leaflet-velocity)
 """
 import argparse
+import glob
+import hashlib
 from datetime import datetime
 from datetime import timedelta
 import json
 import logging
+import os
 import time
 from netCDF4 import Dataset  # pylint: disable=no-name-in-module
 from netCDF4 import num2date  # pylint: disable=no-name-in-module
@@ -50,6 +66,23 @@ IS_MEAN = True
 
 ROOT_URL = 'https://tds.hycom.org/thredds/dodsC/GLBy0.08/latest'
 
+# 2024-07-11 rdc added template and streamlines file defs
+TEMPLATE_FILE = '/data/gandalf/templates/wind-global.sample.json'
+STREAMLINES_FILE = '/data/gandalf/hycom/hycom_surface_current_v2.json'
+CACHE_DIR = '/data/gandalf/hycom/cache'
+# Cache files for other subsets are deleted after this many seconds
+CACHE_MAX_AGE = 3 * 86400
+
+# Resolutions to write, as multiples of step_size. 1 is the file gandalf.js
+# loads; the others get an _s<step> suffix.
+RESOLUTIONS = '1'
+
+# Binary grid format: int16 (quantized by INT16_SCALE m/s) or float32
+BINARY_FORMAT = 'int16'
+INT16_SCALE = 0.001
+# Decimal places kept in the Leaflet-velocity JSON (mm/s is plenty)
+JSON_DECIMALS = 3
+
 
 def str2bool(val):
     """
@@ -81,6 +114,11 @@ def get_hycom_args():
     parser.add_argument('-lo1', '--lon_end', type=int, default=LON_END)
     parser.add_argument('-s', '--step_size', type=int, default=STEP_SIZE)
     parser.add_argument('-m', '--is_mean', type=str2bool, default=IS_MEAN)
+    parser.add_argument('-r', '--resolutions', type=str, default=RESOLUTIONS)
+    parser.add_argument('-b', '--binary', type=str, default=BINARY_FORMAT,
+                        choices=['int16', 'float32', 'none'])
+    parser.add_argument('-f', '--nc_file', type=str, default=None)
+    parser.add_argument('-o', '--out_file', type=str, default=STREAMLINES_FILE)
 
     args = vars(parser.parse_args())
     return args
@@ -118,14 +156,36 @@ def convert_hycom_time(time_lst, time_unit, is_mean):
     return ref_time, time_range
 
 
+def get_model_run(time_lst):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Which HYCOM run 'latest' is serving. HYCOM puts the
+                analysis time in tau's time_origin attribute; if we can't
+                get it we fingerprint the time axis, which moves when a
+                new run comes in.
+    """
+    try:
+        dataset = Dataset(f'{ROOT_URL}?tau[0:1:0]')
+        time_origin = dataset.variables['tau'].time_origin
+        dataset.close()
+        return (time_origin.replace('-', '').replace(':', '').
+                replace(' ', 'T'))
+    except (OSError, RuntimeError, KeyError, AttributeError) as error:
+        logging.warning(f'No tau.time_origin ({error}), using the time axis')
+    axis = np.ascontiguousarray(time_lst, dtype=np.float64).tobytes()
+    return 't' + hashlib.sha1(axis).hexdigest()[:12]
+
+
 def get_coords_time(lat_range, lon_range, is_mean):
     """
     Author:     xiao.qi@tamu.edu
     Created:    2024-07-05
-    Modified:   2024-07-09
+    Modified:   2026-10-19
     Notes:      Gets hycom lat and lon list from the input range.
                 Gets today's hycom time range info and converts it
                 to a human-readable format.
+                2026-10-19: Also returns the model run for the cache key.
     """
     fid = f'{ROOT_URL}?lat[{lat_range}],lon[{lon_range}],time[0:1:100]'
     dataset = Dataset(fid)
@@ -142,97 +202,349 @@ def get_coords_time(lat_range, lon_range, is_mean):
     logging.info(f'longitude: {lons.min():.1f} to {lons.max():.1f}\n')
 
     ref_time, time_range = convert_hycom_time(time_lst, time_unit, is_mean)
+    model_run = get_model_run(time_lst)
+    logging.info(f'Model run {model_run}')
 
-    return lats, lons, ref_time, time_range
+    return lats, lons, ref_time, time_range, model_run
 
 
 def get_velocity(direction, time_range, lat_range, lon_range, is_mean):
     """
     Author:     xiao.qi@tamu.edu
     Created:    2024-07-05
-    Modified:   2024-07-09
+    Modified:   2026-10-19
     Notes:      Retrieves hycom velocity data and converts it for
                 Leaflet-velocity usage.
+                2026-10-19: Returns the 2D float32 grid (south row first)
+                and leaves list conversion to write_to_file.
     """
     fid = f'{ROOT_URL}?{direction}[{time_range}][0][{lat_range}][{lon_range}]'
     dataset = Dataset(fid)
     velocity = dataset.variables[direction][:]
     dataset.close()
 
-    if is_mean:
-        # Get the daily average by taking the mean along the time axis
-        velocity = np.nanmean(velocity, axis=0)
+    return reduce_velocity(velocity, is_mean)
+
+
+def reduce_velocity(velocity, is_mean):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Daily mean or last time step down to a 2D lat/lon grid
+                with NaNs and fill values zeroed.
+    """
+    velocity = np.ma.filled(np.ma.asarray(velocity, dtype=np.float32),
+                            np.nan)
+    if velocity.ndim > 2:
+        if is_mean:
+            # Get the daily average by taking the mean along the time axis
+            velocity = np.nanmean(velocity, axis=0)
+        else:
+            velocity = velocity[-1]
     velocity = np.squeeze(velocity)  # Remove singleton depth and time dimension
     velocity[np.isnan(velocity)] = 0
-    velocity = velocity[::-1]
-    velocity = velocity.flatten().tolist()
-    return velocity
+    return velocity.astype(np.float32)
 
 
-def write_to_file(coords_change_per_step, lats, lons, ref_time, data_lst):
+def get_cache_file(args, ref_time, model_run):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Cache file name is the subset request, then model run and
+                forecast time. The subset comes first so prune_grid_cache
+                can find the other runs of the same request.
+    """
+    stamp = ref_time.replace('-', '').replace(':', '').replace(' ', 'T')
+    kind = 'mean' if args['is_mean'] else 'single'
+    return (f'{CACHE_DIR}/hycom_{kind}_{args["lat_start"]}-'
+            f'{args["lat_end"]}_{args["lon_start"]}-{args["lon_end"]}_'
+            f's{args["step_size"]}_{model_run}_{stamp}.nc')
+
+
+def prune_grid_cache(cache_file):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Deletes every other cache file for the same subset (older
+                runs and forecast days nobody will ask for again) and
+                anything else, leftover temp files included, older than
+                CACHE_MAX_AGE.
+    """
+    subset = os.path.basename(cache_file).rsplit('_', 2)[0]
+    now = time.time()
+    for old_file in glob.glob(f'{CACHE_DIR}/hycom_*'):
+        if old_file == cache_file:
+            continue
+        try:
+            stale = (os.path.basename(old_file).startswith(subset + '_') or
+                     now - os.path.getmtime(old_file) > CACHE_MAX_AGE)
+            if stale:
+                os.unlink(old_file)
+                logging.info(f'Removed {old_file}')
+        except FileNotFoundError:
+            continue
+
+
+def write_grid_cache(cache_file, grid):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Saves the reduced grid as a small NetCDF file in the same
+                lat/lon/water_u/water_v layout read_local_grid expects.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_file = f'{cache_file}.{os.getpid()}.tmp'
+    dataset = Dataset(tmp_file, 'w')
+    dataset.createDimension('lat', len(grid['lats']))
+    dataset.createDimension('lon', len(grid['lons']))
+    dataset.createVariable('lat', 'f8', ('lat',))[:] = grid['lats']
+    dataset.createVariable('lon', 'f8', ('lon',))[:] = grid['lons']
+    for direction in ['water_u', 'water_v']:
+        var = dataset.createVariable(direction, 'f4', ('lat', 'lon'),
+                                     zlib=True)
+        var[:] = grid[direction]
+    dataset.ref_time = grid['ref_time']
+    dataset.close()
+    os.replace(tmp_file, cache_file)
+    logging.info(f'Cached grid in {cache_file}')
+
+
+def read_local_grid(nc_file, is_mean):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Reads a local NetCDF file, either one of our cache files or
+                a HYCOM subset with (time, depth, lat, lon) velocities.
+                ref_time comes from the ref_time attribute, the time
+                variable, or the file mtime, in that order.
+    """
+    dataset = Dataset(nc_file)
+    lats = np.asarray(dataset.variables['lat'][:], dtype=np.float64)
+    lons = np.asarray(dataset.variables['lon'][:], dtype=np.float64)
+    grid = {}
+    for direction in ['water_u', 'water_v']:
+        grid[direction] = reduce_velocity(dataset.variables[direction][:],
+                                          is_mean)
+    if 'ref_time' in dataset.ncattrs():
+        ref_time = dataset.ref_time
+    elif 'time' in dataset.variables:
+        time_var = dataset.variables['time']
+        time_lst = np.asarray(time_var[:])
+        ref_num = np.mean(time_lst) if is_mean else time_lst[-1]
+        ref_time = num2date(ref_num, time_var.units).strftime(
+            '%Y-%m-%d %H:%M:%S')
+    else:
+        ref_time = datetime.utcfromtimestamp(
+            os.path.getmtime(nc_file)).strftime('%Y-%m-%d %H:%M:%S')
+    dataset.close()
+
+    # Convert longitudes from 0 to 360 degree range to -180 to 180 degree range.
+    lons[lons > 180] = lons[lons > 180] - 360
+    grid['lats'] = lats
+    grid['lons'] = lons
+    grid['ref_time'] = ref_time
+    return grid
+
+
+def fetch_hycom_grid(args):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      The only part that talks to HYCOM. Coordinates and time are
+                cheap so we get those first; if we already cached this model
+                time and subset we skip the velocity download entirely.
+    """
+    step_size = args['step_size']
+    is_mean = args['is_mean']
+    lat_range = f'{args["lat_start"]}:{step_size}:{args["lat_end"]}'
+    lon_range = f'{args["lon_start"]}:{step_size}:{args["lon_end"]}'
+
+    lats, lons, ref_time, time_range, model_run = get_coords_time(
+        lat_range, lon_range, is_mean)
+    cache_file = get_cache_file(args, ref_time, model_run)
+    if os.path.isfile(cache_file):
+        logging.info(f'Using cached grid {cache_file}')
+        return read_local_grid(cache_file, is_mean)
+
+    grid = {'lats': np.asarray(lats, dtype=np.float64),
+            'lons': np.asarray(lons, dtype=np.float64),
+            'ref_time': ref_time}
+    for direction in ['water_u', 'water_v']:
+        logging.info(f'harvesting and calculating velocity for {direction}')
+        grid[direction] = get_velocity(direction, time_range, lat_range,
+                                       lon_range, is_mean)
+    write_grid_cache(cache_file, grid)
+    prune_grid_cache(cache_file)
+    return grid
+
+
+def subsample_grid(grid, factor):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Every factor-th point, same as a bigger OPeNDAP stride
+    """
+    sub_grid = dict(grid)
+    sub_grid['lats'] = grid['lats'][::factor]
+    sub_grid['lons'] = grid['lons'][::factor]
+    for direction in ['water_u', 'water_v']:
+        sub_grid[direction] = grid[direction][::factor, ::factor]
+    return sub_grid
+
+
+def get_coords_change(grid, step_size):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Grid spacing from the data, falling back on GLBy0.08
+                nominal spacing for single row/column grids.
+    """
+    coords_change_per_step = {
+        'lat': 0.04 * step_size,
+        'lon': 0.08 * step_size,
+    }
+    if len(grid['lats']) > 1:
+        coords_change_per_step['lat'] = round(
+            float(abs(grid['lats'][1] - grid['lats'][0])), 6)
+    if len(grid['lons']) > 1:
+        coords_change_per_step['lon'] = round(
+            float(abs(grid['lons'][1] - grid['lons'][0])), 6)
+    return coords_change_per_step
+
+
+def get_header(coords_change_per_step, lats, lons, ref_time):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Leaflet-velocity header fields shared by JSON and binary
+    """
+    header = {}
+    header['dx'] = coords_change_per_step['lon']
+    header['dy'] = coords_change_per_step['lat']
+    header['la1'] = float(lats[-1])
+    header['la2'] = float(lats[0])
+    header['lo1'] = float(lons[0])
+    header['lo2'] = float(lons[-1])
+    header['nx'] = len(lons)
+    header['ny'] = len(lats)
+    header['refTime'] = ref_time
+    return header
+
+
+def write_to_file(coords_change_per_step, lats, lons, ref_time, data_lst,
+                  streamlines_file=STREAMLINES_FILE):
     """
     Author:     xiao.qi@tamu.edu
     Created:    2024-07-05
-    Modified:   2024-07-11
+    Modified:   2026-10-19
     Notes:      Uses a template file to format and write data to a JSON file.
+                2026-10-19: data_lst is now the two 2D grids. We flip them
+                north row first, round to JSON_DECIMALS and write to a temp
+                file that is renamed into place.
     """
-    # 2024-07-11 rdc added template and streamlines file defs
-    template_file = '/data/gandalf/templates/wind-global.sample.json'
-    streamlines_file = '/data/gandalf/hycom/hycom_surface_current_v2.json'
-
-    with open(template_file, 'r', encoding='utf-8') as template_file:
+    with open(TEMPLATE_FILE, 'r', encoding='utf-8') as template_file:
         json_template = json.loads(template_file.read())
 
+    header = get_header(coords_change_per_step, lats, lons, ref_time)
     # i = 0, eastward-current; i = 1, northward-current
     for i in range(2):
-        json_template[i]['header']['dx'] = coords_change_per_step['lon']
-        json_template[i]['header']['dy'] = coords_change_per_step['lat']
-        json_template[i]['header']['la1'] = lats[-1]
-        json_template[i]['header']['la2'] = lats[0]
-        json_template[i]['header']['lo1'] = lons[0]
-        json_template[i]['header']['lo2'] = lons[-1]
-        json_template[i]['header']['nx'] = len(lons)
-        json_template[i]['header']['ny'] = len(lats)
-        json_template[i]['header']['refTime'] = ref_time
-        json_template[i]['data'] = data_lst[i]
+        json_template[i]['header'].update(header)
+        data = np.round(data_lst[i][::-1].astype(np.float64), JSON_DECIMALS)
+        json_template[i]['data'] = data.flatten().tolist()
+
+    tmp_file = f'{streamlines_file}.{os.getpid()}.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f_out:
+        json.dump(json_template, f_out, separators=(',', ':'))
+    os.replace(tmp_file, streamlines_file)
+    logging.info(f'Wrote {streamlines_file}')
+
 
-    with open(streamlines_file, 'w', encoding='utf-8') as f_out:
-        json.dump(json_template, f_out)
+def write_binary_grid(coords_change_per_step, lats, lons, ref_time, data_lst,
+                      bin_file, binary_format=BINARY_FORMAT):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Writes u then v as little-endian int16 or float32, north row
+                first like the JSON, plus bin_file.json with the header,
+                dtype and scale. For int16, value = raw * scale. Either one
+                loads straight into a JS typed array.
+    """
+    if binary_format == 'int16':
+        dtype = '<i2'
+        scale = INT16_SCALE
+    else:
+        dtype = '<f4'
+        scale = 1.0
+    header = get_header(coords_change_per_step, lats, lons, ref_time)
+    header['dtype'] = dtype
+    header['scale'] = scale
+    header['order'] = ['water_u', 'water_v']
+
+    tmp_file = f'{bin_file}.{os.getpid()}.tmp'
+    with open(tmp_file, 'wb') as f_out:
+        for data in data_lst:
+            data = data[::-1]
+            if binary_format == 'int16':
+                data = np.clip(np.round(data / scale), -32767, 32767)
+            f_out.write(np.ascontiguousarray(data, dtype=dtype).tobytes())
+    os.replace(tmp_file, bin_file)
+    tmp_file = f'{bin_file}.json.{os.getpid()}.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f_out:
+        json.dump(header, f_out)
+    os.replace(tmp_file, f'{bin_file}.json')
+    logging.info(f'Wrote {bin_file}')
+
+
+def get_out_file(out_file, factor, step_size):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Base resolution keeps the name gandalf.js expects
+    """
+    if factor == 1:
+        return out_file
+    root, ext = os.path.splitext(out_file)
+    return f'{root}_s{step_size * factor}{ext}'
 
 
 def hycom_streamlines():
     """
     Author:     xiao.qi@tamu.edu
     Created:    2024-07-05
-    Modified:   2024-07-09
+    Modified:   2026-10-19
     Notes:      Main entry point. Sets up lat and long range and horizontal
                 resolution, retrieves the current velocity HYCOM data for this
                 area, converts it for Leaflet-velocity usage, and saves it to
                 a JSON file.
+                2026-10-19: One fetch (or cached/local grid) feeds every
+                resolution in -r, each written as JSON and binary.
     """
     args = get_hycom_args()
 
     step_size = args['step_size']
-    is_mean = args['is_mean']
-
-    coords_change_per_step = {
-        'lat': 0.04 * step_size,
-        'lon': 0.08 * step_size,
-    }
-
-    lat_range = f'{args["lat_start"]}:{step_size}:{args["lat_end"]}'
-    lon_range = f'{args["lon_start"]}:{step_size}:{args["lon_end"]}'
-
-    lats, lons, ref_time, time_range = get_coords_time(lat_range, lon_range, is_mean)
-
-    data_lst = []
-    for direction in ['water_u', 'water_v']:
-        logging.info(f'harvesting and calculating velocity for {direction}')
-
-        data = get_velocity(direction, time_range, lat_range, lon_range, is_mean)
-        data_lst.append(data)
-
-    write_to_file(coords_change_per_step, lats, lons, ref_time, data_lst)
+    if args['nc_file']:
+        logging.info(f'Reading local grid {args["nc_file"]}')
+        grid = read_local_grid(args['nc_file'], args['is_mean'])
+        step_size = 1
+    else:
+        grid = fetch_hycom_grid(args)
+
+    factors = sorted(set(int(factor) for factor in
+                         args['resolutions'].split(',')))
+    for factor in factors:
+        sub_grid = subsample_grid(grid, factor)
+        coords_change_per_step = get_coords_change(sub_grid,
+                                                   step_size * factor)
+        data_lst = [sub_grid['water_u'], sub_grid['water_v']]
+        out_file = get_out_file(args['out_file'], factor, step_size)
+        write_to_file(coords_change_per_step, sub_grid['lats'],
+                      sub_grid['lons'], sub_grid['ref_time'], data_lst,
+                      out_file)
+        if args['binary'] != 'none':
+            bin_file = f'{os.path.splitext(out_file)[0]}.bin'
+            write_binary_grid(coords_change_per_step, sub_grid['lats'],
+                              sub_grid['lons'], sub_grid['ref_time'],
+                              data_lst, bin_file, args['binary'])
 
 
 if __name__ == "__main__":
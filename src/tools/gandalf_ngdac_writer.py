@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Name:       gandalf_ngdac_writer.py
+Created:    2026-10-19
+Modified:   2026-10-19
+Notes:      Incremental NGDAC profile NetCDF generation for Slocums. Runs
+            in the gncutils container in place of gandalf_build_nc.sh:
+
+                gandalf_ngdac_writer.py vehicle
+
+            gandalf_build_nc.sh used to hand every merged DBA since
+            deployment to dba_to_ngdac_profile_nc.py on every tick. Now the
+            segment manifest tells us which segments already have profiles,
+            and only new segments, or segments whose sbd grew since we last
+            wrote them, are processed.
+
+            gncutils does the profile work itself. Each worker in a process
+            pool runs dba_to_ngdac_profile_nc.py in-process via runpy, so
+            gncutils is imported once per worker, not once per segment.
+            Each segment writes to its own staging directory. That way we
+            know which profiles came from which segment before they are
+            moved into ngdac_files, where gandalf_ftp_gdac picks them up as
+            before. ngdac_profiles in the manifest keeps that mapping, so
+            when a segment is rewritten the profiles it no longer produces
+            are deleted from ngdac_files instead of being synced as stale
+            data.
+
+            Vehicles on the numpy binary_decoder have no merged DBAs and are
+            skipped.
+"""
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import runpy
+import multiprocessing as mp
+from gandalf_config_registry import VEHICLE_CONFIG_ROOT
+from gandalf_config_registry import load_vehicle_config, get_vehicle_status
+from gandalf_segment_manifest import get_manifest, get_data_root
+from gandalf_metrics import stage, write_run_report
+
+NGDAC_SCRIPT = '/opt/gncutils/scripts/dba_to_ngdac_profile_nc.py'
+STAGING_DIR = '.staging'
+
+
+def get_cli_args():
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      vehicle, plus --all to rewrite every segment
+    """
+    logging.debug('get_cli_args()')
+    arg_p = argparse.ArgumentParser()
+    arg_p.add_argument("vehicle", help="vehicle name")
+    arg_p.add_argument("--all", help="rewrite profiles for every segment",
+                       action="store_true")
+    arg_p.add_argument("-p", "--processes", help="worker processes",
+                       type=int)
+    args = vars(arg_p.parse_args())
+    return args
+
+
+def get_pending_segments(conn, flight_type, rewrite=False):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      [(segment, merged_dba, size, mtime)] for segments with a
+                merged DBA that have no profiles yet, or whose flight file
+                changed since we wrote them
+    """
+    query = ('SELECT f.segment, f.dba_file, f.size, f.mtime FROM segments f '
+             'LEFT JOIN ngdac_segments n ON n.segment = f.segment '
+             'WHERE f.file_type = ? AND f.dba_file IS NOT NULL')
+    if not rewrite:
+        query += (' AND (n.segment IS NULL OR n.size != f.size OR '
+                  'n.mtime != f.mtime)')
+    return conn.execute(query, (flight_type,)).fetchall()
+
+
+def write_segment_profiles(ngdac_config_dir, segment, merged_dba, out_dir,
+                           script=NGDAC_SCRIPT):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      One merged DBA to profile NetCDFs. Runs the gncutils script
+                in this process with its own argv, into a per-segment
+                staging directory. Moves the results into out_dir and returns
+                (segment, [nc file names]), or (segment, None) on failure.
+                Top level so a Pool can call it.
+    """
+    stage_dir = '%s/%s/%s' % (out_dir, STAGING_DIR, segment)
+    shutil.rmtree(stage_dir, ignore_errors=True)
+    os.makedirs(stage_dir)
+    script_dir = os.path.dirname(script)
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+    saved_argv = sys.argv
+    sys.argv = [script, '-c', ngdac_config_dir, merged_dba, '-o', stage_dir]
+    status = 0
+    try:
+        runpy.run_path(script, run_name='__main__')
+    except SystemExit as exit_code:
+        status = exit_code.code or 0
+    except Exception as error:  # pylint: disable=broad-except
+        logging.warning('write_segment_profiles(%s): %s', segment, error)
+        status = 1
+    finally:
+        sys.argv = saved_argv
+    if status:
+        logging.warning('write_segment_profiles(%s): exit %s', segment,
+                        status)
+        shutil.rmtree(stage_dir, ignore_errors=True)
+        return segment, None
+    nc_files = []
+    for entry in sorted(os.scandir(stage_dir), key=lambda e: e.name):
+        if entry.name.endswith('.nc'):
+            os.replace(entry.path, '%s/%s' % (out_dir, entry.name))
+            nc_files.append(entry.name)
+    shutil.rmtree(stage_dir, ignore_errors=True)
+    return segment, nc_files
+
+
+def record_profiles(conn, pending, results, out_dir):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Segment -> profile mapping into the manifest. A segment
+                that failed is left out so we try it again next tick.
+                2026-10-19: Profiles a rewritten segment wrote last time
+                but not this time are deleted from out_dir. Returns how
+                many.
+    """
+    stamps = dict((row[0], (row[2], row[3])) for row in pending)
+    now = time.time()
+    written = set()
+    for _, nc_files in results:
+        written.update(nc_files or [])
+    removed = 0
+    for segment, nc_files in results:
+        if nc_files is None:
+            continue
+        for (nc_file,) in conn.execute('SELECT nc_file FROM ngdac_profiles '
+                                       'WHERE segment = ?',
+                                       (segment,)).fetchall():
+            if nc_file in written:
+                continue
+            try:
+                os.unlink('%s/%s' % (out_dir, nc_file))
+                removed += 1
+            except FileNotFoundError:
+                pass
+        size, mtime = stamps[segment]
+        conn.execute('INSERT OR REPLACE INTO ngdac_segments (segment, size, '
+                     'mtime, written) VALUES (?, ?, ?, ?)',
+                     (segment, size, mtime, now))
+        conn.execute('DELETE FROM ngdac_profiles WHERE segment = ?',
+                     (segment,))
+        conn.executemany('INSERT OR REPLACE INTO ngdac_profiles (nc_file, '
+                         'segment) VALUES (?, ?)',
+                         [(nc_file, segment) for nc_file in nc_files])
+    conn.commit()
+    if removed:
+        logging.warning('record_profiles(): removed %d stale profiles',
+                        removed)
+    return removed
+
+
+def build_ngdac_profiles(vehicle, rewrite=False, processes=None):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Writes profiles for the vehicle's new segments. Returns the
+                number of NetCDF files written.
+    """
+    logging.info('build_ngdac_profiles(%s)', vehicle)
+    config = load_vehicle_config(vehicle)
+    status = get_vehicle_status(vehicle)
+    out_dir = '%s/processed_data/ngdac_files' % get_data_root(config, status)
+    ngdac_config_dir = '%s/%s/ngdac' % (VEHICLE_CONFIG_ROOT, vehicle)
+    script = config['gandalf'].get('ngdac_script', NGDAC_SCRIPT)
+    if processes is None:
+        processes = config['gandalf'].get('ngdac_processes')
+    conn, flight_type, _ = get_manifest(config, vehicle)
+    pending = get_pending_segments(conn, flight_type, rewrite)
+    if len(pending) == 0:
+        logging.info('build_ngdac_profiles(%s): Nothing new', vehicle)
+        conn.close()
+        return 0
+    logging.warning('build_ngdac_profiles(%s): %d segments', vehicle,
+                    len(pending))
+    args = [(ngdac_config_dir, segment, merged_dba, out_dir, script) for
+            segment, merged_dba, _, _ in pending]
+    if processes == 1 or len(args) == 1:
+        results = [write_segment_profiles(*arg) for arg in args]
+    else:
+        with mp.Pool(processes=processes) as pool:
+            results = pool.starmap(write_segment_profiles, args)
+    record_profiles(conn, pending, results, out_dir)
+    conn.close()
+    written = sum(len(nc_files) for _, nc_files in results if nc_files)
+    logging.warning('build_ngdac_profiles(%s): %d profiles written', vehicle,
+                    written)
+    return written
+
+
+if __name__ == '__main__':
+    """
+    For command line use
+    """
+    logging.basicConfig(level=logging.WARNING)
+    args = get_cli_args()
+    with stage('netcdf', args['vehicle']) as netcdf_stage:
+        netcdf_stage['rows'] = build_ngdac_profiles(args['vehicle'],
+                                                    args['all'],
+                                                    args['processes'])
+    write_run_report('ngdac_%s' % args['vehicle'])
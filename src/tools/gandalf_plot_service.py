@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Name:       gandalf_plot_service.py
+Created:    2026-10-19
+Modified:   2026-10-19
+Notes:      Renders Slocum sensor plots when someone asks for them, for the
+            web app's /plots/<vehicle>/<sensor>.png?start=&end=&max_depth=.
+            Runs as the 'plots' service in docker-compose (gandalf_tools
+            image) and listens on a unix socket under /data/gandalf, which
+            gandalf_web mounts too.
+
+            A render is plot_sensor from gandalf_slocum_plots_v2 with the
+            window passed in, written to
+
+                <PLOT_CACHE_DIR>/<vehicle>/<sensor>_<key>.png
+
+            where key hashes the versions (mtime and size) of sensors.csv,
+            deployment.json and sensors.json with start, end and
+            max_depth. New data means new keys, and the old files age out.
+            Every hit touches its file and after each render we delete the
+            least recently used files until the cache is under
+            PLOT_CACHE_BYTES.
+
+            pyplot isn't thread safe, so renders take turns on RENDER_LOCK.
+            Cache hits don't wait for them.
+
+            The web app asks with "wait": false, so a cold render never
+            holds a mod_wsgi thread: a miss starts the render on a thread
+            of ours and answers "pending" at once, and the browser asks
+            again. A render that found nothing to plot is remembered
+            (MISSING_KEPT of them) so the retry gets "missing", not
+            another render.
+
+            We do the plain (whole deployment) plots as well as the
+            windowed ones: the dashboard asks us for all of them, and the
+            MCP only prerenders depth_avg_curr and any
+            plots.prerender_sensors into deployed_plot_dir.
+
+            Protocol, as gandalf_mcp_daemon's: one JSON line per request
+                {"command": "render", "vehicle": .., "sensor": ..,
+                 "start": epoch|null, "end": epoch|null,
+                 "max_depth": m|null, "wait": bool (default true)}
+                    -> "ok {"file": .., "cached": bool}"
+                    -> "pending <plot file>" (wait false, rendering)
+                    -> "missing <why>" (no such vehicle, sensor or data)
+                    -> "error <why>"
+                {"command": "ping"} -> "ok {json}"
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import threading
+import socketserver
+from gandalf_mcp_daemon import send_command
+
+PLOT_SOCKET = os.environ.get('GANDALF_PLOT_SOCKET',
+                             '/data/gandalf/plots/render.sock')
+PLOT_CACHE_DIR = '/data/gandalf/plots/cache'
+PLOT_CACHE_BYTES = int(os.environ.get('GANDALF_PLOT_CACHE_MB', 512)) << 20
+RENDER_LOCK = threading.Lock()
+MISSING_KEPT = 1000
+# Plots used this recently are never pruned: the web app may be about to
+# send one we just answered "ok" for
+PRUNE_GRACE_SECONDS = 300
+_STATE = {'started': time.time(), 'renders': 0, 'hits': 0}
+# Plot files being rendered in the background, and why the ones that
+# turned out empty are missing
+_PENDING = set()
+_MISSING = {}
+
+
+def get_cli_args():
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Socket path, cache dir and size
+    """
+    logging.debug('get_cli_args()')
+    arg_p = argparse.ArgumentParser()
+    arg_p.add_argument("-s", "--socket", help="unix socket path",
+                       default=PLOT_SOCKET)
+    arg_p.add_argument("-c", "--cache-dir", help="plot cache directory",
+                       default=PLOT_CACHE_DIR)
+    arg_p.add_argument("-m", "--max-mb", help="plot cache size in MB",
+                       type=int, default=PLOT_CACHE_BYTES >> 20)
+    arg_p.add_argument("--ping", help="ask a running service for status",
+                       action="store_true")
+    args = vars(arg_p.parse_args())
+    return args
+
+
+def get_file_version(file_name):
+    """mtime and size, or None if it isn't there"""
+    try:
+        stat = os.stat(file_name)
+    except FileNotFoundError:
+        return None
+    return '%d_%d' % (stat.st_mtime_ns, stat.st_size)
+
+
+def get_plot_file(cache_dir, vehicle, sensor, versions, start, end,
+                  max_depth):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Cache path for one render
+    """
+    key = json.dumps([versions, start, end, max_depth])
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    return '%s/%s/%s_%s.png' % (cache_dir, vehicle, sensor, digest)
+
+
+def prune_cache(cache_dir, max_bytes, grace=PRUNE_GRACE_SECONDS):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Deletes least recently used plots (oldest mtime; hits touch
+                it) until the cache is under max_bytes. Returns how many.
+                2026-10-19: Plots touched in the last grace seconds are
+                kept even if that leaves us over max_bytes for a while.
+    """
+    cutoff = time.time() - grace
+    plots = []
+    total = 0
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            # Skip renders in progress; savefig wants the .png on the end
+            if not name.endswith('.png') or name.endswith('.tmp.png'):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            plots.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+    removed = 0
+    plots.sort()
+    for mtime, size, path in plots:
+        if total <= max_bytes or mtime > cutoff:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    if removed:
+        logging.info('prune_cache(): removed %d plots, %d bytes left',
+                     removed, total)
+    return removed
+
+
+def render_file(config, vehicle, sensor, data_file, plot_file, start, end,
+                max_depth, cache_dir, max_bytes):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Renders one plot into the cache on RENDER_LOCK. Returns
+                True, or False if the window has no data.
+    """
+    from gandalf_slocum_plots_v2 import plot_sensor
+    with RENDER_LOCK:
+        # Someone else may have rendered it while we waited
+        if os.path.exists(plot_file):
+            return True
+        os.makedirs(os.path.dirname(plot_file), exist_ok=True)
+        tmp_file = '%s.%d.tmp.png' % (plot_file[:-4], os.getpid())
+        start_time = time.time()
+        try:
+            written = plot_sensor(config, vehicle, sensor,
+                                  data_file=data_file, plot_file=tmp_file,
+                                  start=start, end=end, max_depth=max_depth)
+            if written is None:
+                return False
+            os.replace(tmp_file, plot_file)
+        finally:
+            if os.path.exists(tmp_file):
+                os.unlink(tmp_file)
+        _STATE['renders'] += 1
+        logging.info('render_file(%s, %s): %0.2fs', vehicle, sensor,
+                     time.time() - start_time)
+        prune_cache(cache_dir, max_bytes)
+    return True
+
+
+def render_background(plot_file, *args):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      render_file on its own thread, for requests that don't
+                wait. Empty windows go in _MISSING.
+    """
+    vehicle, sensor = args[0], args[1]
+    try:
+        if not render_file(*args):
+            if len(_MISSING) >= MISSING_KEPT:
+                _MISSING.clear()
+            _MISSING[plot_file] = ('no %s data for %s in that window' %
+                                   (sensor, vehicle))
+    except Exception as error:  # pylint: disable=broad-except
+        logging.exception('render_background(%s, %s): %s', vehicle, sensor,
+                          error)
+    finally:
+        _PENDING.discard(plot_file)
+
+
+def render_plot(vehicle, sensor, start=None, end=None, max_depth=None,
+                cache_dir=PLOT_CACHE_DIR, max_bytes=PLOT_CACHE_BYTES,
+                wait=True):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      (plot file, cached) for one request, rendering it if it
+                isn't in the cache. (None, why) if the vehicle isn't a
+                Slocum we have, the sensor isn't one of its plot sensors
+                or the window has no data.
+                2026-10-19: Without wait a miss starts a background
+                render and returns (plot file, None)
+    """
+    from gandalf_utils import get_vehicle_config, get_sensor_lookup
+    from gandalf_config_registry import (vehicle_config_file,
+                                         sensor_config_file)
+    try:
+        config = get_vehicle_config(vehicle)
+    except (OSError, ValueError) as error:
+        return None, 'no vehicle %s: %s' % (vehicle, error)
+    if not config['gandalf']['vehicle_type'].lower().startswith('slocum'):
+        return None, '%s is not a Slocum' % vehicle
+    if sensor not in get_sensor_lookup(vehicle):
+        return None, 'no sensor %s for %s' % (sensor, vehicle)
+    if config['gandalf']['status'] == 'deployed':
+        data_dir = config['gandalf']['deployed_data_dir']
+    else:
+        data_dir = config['gandalf']['post_data_dir_root']
+    data_file = "%s/processed_data/sensors.csv" % data_dir
+    versions = [get_file_version(data_file),
+                get_file_version(vehicle_config_file(vehicle)),
+                get_file_version(sensor_config_file(vehicle))]
+    if versions[0] is None:
+        return None, 'no sensors.csv for %s' % vehicle
+
+    plot_file = get_plot_file(cache_dir, vehicle, sensor, versions, start,
+                              end, max_depth)
+    if os.path.exists(plot_file):
+        os.utime(plot_file)
+        _STATE['hits'] += 1
+        return plot_file, True
+    if plot_file in _MISSING:
+        return None, _MISSING[plot_file]
+    args = (config, vehicle, sensor, data_file, plot_file, start, end,
+            max_depth, cache_dir, max_bytes)
+    if not wait:
+        if plot_file not in _PENDING:
+            _PENDING.add(plot_file)
+            threading.Thread(target=render_background, args=(plot_file,) +
+                             args, daemon=True).start()
+        return plot_file, None
+    if not render_file(*args):
+        return None, 'no %s data for %s in that window' % (sensor, vehicle)
+    return plot_file, False
+
+
+def get_number(request, name):
+    """A float request field, None if absent. ValueError if it isn't one."""
+    value = request.get(name)
+    return None if value is None else float(value)
+
+
+class PlotRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      One JSON request line per connection
+    """
+    def reply(self, line):
+        try:
+            self.wfile.write(('%s\n' % line).encode())
+            self.wfile.flush()
+        except OSError:
+            pass
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline().decode() or '{}')
+        except ValueError:
+            self.reply('error bad request')
+            return
+        command = request.get('command')
+        if command == 'ping':
+            self.reply('ok %s' % json.dumps(dict(_STATE, pid=os.getpid())))
+            return
+        if command != 'render':
+            self.reply('error unknown command %s' % command)
+            return
+        vehicle = str(request.get('vehicle', ''))
+        sensor = str(request.get('sensor', ''))
+        if not vehicle or vehicle != os.path.basename(vehicle) or not sensor:
+            self.reply('error bad vehicle or sensor')
+            return
+        try:
+            window = [get_number(request, name)
+                      for name in ('start', 'end', 'max_depth')]
+        except (TypeError, ValueError):
+            self.reply('error start, end and max_depth must be numbers')
+            return
+        try:
+            plot_file, cached = render_plot(
+                vehicle, sensor, *window,
+                cache_dir=self.server.cache_dir,
+                max_bytes=self.server.max_bytes,
+                wait=bool(request.get('wait', True)))
+        except Exception as error:  # pylint: disable=broad-except
+            logging.exception('render_plot(%s, %s): %s', vehicle, sensor,
+                              error)
+            self.reply('error %s: %s' % (type(error).__name__, error))
+            return
+        if plot_file is None:
+            self.reply('missing %s' % cached)
+            return
+        if cached is None:
+            self.reply('pending %s' % plot_file)
+            return
+        self.reply('ok %s' % json.dumps({'file': plot_file,
+                                         'cached': cached}))
+
+
+def serve(socket_path=PLOT_SOCKET, cache_dir=PLOT_CACHE_DIR,
+          max_bytes=PLOT_CACHE_BYTES):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Serve until killed. The socket is world writable so
+                Apache's user in gandalf_web can connect.
+    """
+    from gandalf_slocum_plots_v2 import register_cmocean
+    register_cmocean()
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = socketserver.ThreadingUnixStreamServer(socket_path,
+                                                    PlotRequestHandler)
+    server.daemon_threads = True
+    server.cache_dir = cache_dir
+    server.max_bytes = max_bytes
+    os.chmod(socket_path, 0o666)
+    logging.warning('serve(): listening on %s, cache %s (%d MB)',
+                    socket_path, cache_dir, max_bytes >> 20)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+if __name__ == '__main__':
+    """
+    For command line use
+    """
+    logging.basicConfig(level=logging.INFO)
+    args = get_cli_args()
+    if args['ping']:
+        try:
+            for reply in send_command('ping', args['socket'], 10):
+                print(reply)
+        except OSError as error:
+            logging.warning('gandalf_plot_service: not running: %s', error)
+            sys.exit(1)
+        sys.exit()
+    serve(args['socket'], args['cache_dir'], args['max_mb'] << 20)
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Name:       gandalf_positions.py
+Created:    2026-10-19
+Modified:   2026-10-19
+Notes:      Per-vehicle position index behind the web app's /api/positions.
+            The publish tasks in gandalf_MP_mcp hand us each vehicle's
+            features after writing the map's GeoJSON, and we append to
+
+                <POSITIONS_DIR>/<vehicle>.jsonl
+
+            one JSON object per line, each stamped with t, the epoch we
+            wrote it:
+
+                {"t": ..., "reset": true, "points": [[lon, lat], ...]}
+                {"t": ..., "points": [[lon, lat], ...]}
+                {"t": ..., "last_pos": {Feature}}
+
+            A reset line carries the whole track and starts the file over.
+            We write one when there is no index yet, or when the new track
+            doesn't start with the points we already have (new deployment,
+            or the builder re-deduped). Otherwise we only append the new
+            points, and a last_pos line when that feature changed.
+
+            Lines are only ever appended or the file is replaced whole, so
+            the app can remember its offset and just read the new lines.
+
+            Each publish that changed anything also appends one event to
+            <POSITIONS_DIR>/events.ndjson (not .jsonl, which would make it
+            a vehicle):
+
+                {"id": 42, "t": ..., "vehicles": {"unit_1234":
+                    {"points": 3, "reset": false, "last_pos": true}}}
+
+            The web app tails it and pushes the event to the browsers on
+            /api/events, which then fetch /api/positions for the changes.
+            Every EVENTS_KEEP events the file is cut back to the last
+            EVENTS_KEEP.
+"""
+import os
+import sys
+import json
+import time
+import logging
+from gandalf_publish import (round_coords, compact_geojson, iter_features,
+                             write_atomic)
+
+POSITIONS_DIR = '/data/gandalf/deployments/positions'
+EVENTS_FILE = 'events.ndjson'
+EVENTS_KEEP = 500
+
+
+def get_index_file(vehicle, positions_dir=POSITIONS_DIR):
+    """Path of a vehicle's position index"""
+    return '%s/%s.jsonl' % (positions_dir, vehicle)
+
+
+def read_index(vehicle, positions_dir=POSITIONS_DIR):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      What the index holds now: the track we last indexed, the
+                last_pos we last wrote and the newest t. None if there's
+                no index yet.
+    """
+    index_file = get_index_file(vehicle, positions_dir)
+    if not os.path.exists(index_file):
+        return None
+    state = {'points': [], 'last_pos': None, 't': 0}
+    with open(index_file) as index:
+        for line in index:
+            if not line.endswith('\n'):
+                break
+            entry = json.loads(line)
+            if entry.get('reset'):
+                state['points'] = []
+            state['points'].extend(entry.get('points', []))
+            if 'last_pos' in entry:
+                state['last_pos'] = entry['last_pos']
+            state['t'] = entry['t']
+    return state
+
+
+def get_vehicle_features(features):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      (track coordinates, last_pos) from a vehicle's features,
+                rounded as gandalf_publish rounds them for the map
+                2026-10-19: Looks inside FeatureCollections. Slocums hand
+                us [FeatureCollection], so they were never indexed.
+    """
+    coords = []
+    last_pos = None
+    for feature in iter_features(features):
+        if feature.get('id') == 'track':
+            coords = round_coords(feature['geometry']['coordinates'])
+        elif feature.get('id') == 'last_pos':
+            last_pos = compact_geojson(dict(feature))
+    return coords, last_pos
+
+
+def update_positions(vehicle, features, positions_dir=POSITIONS_DIR):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Appends whatever is new in features to the vehicle's index.
+                Returns {'points', 'reset', 'last_pos'} saying what changed,
+                or None if nothing did.
+    """
+    coords, last_pos = get_vehicle_features(features)
+    if not coords and last_pos is None:
+        return None
+    state = read_index(vehicle, positions_dir)
+    # t only moves forward so the app's since= cursor never misses a line.
+    # Not rounded: the cursor is the max over all vehicles, and two
+    # vehicles written in the same millisecond would round to a tie.
+    now = time.time()
+    if state is not None:
+        now = max(now, state['t'] + 1e-6)
+
+    indexed = [] if state is None else state['points']
+    entries = []
+    if (state is None or len(coords) < len(indexed) or
+            coords[:len(indexed)] != indexed):
+        entries.append({'t': now, 'reset': True, 'points': coords})
+        if last_pos is not None:
+            entries.append({'t': now, 'last_pos': last_pos})
+        payload = ''.join(json.dumps(entry, separators=(',', ':')) + '\n'
+                          for entry in entries)
+        write_atomic(get_index_file(vehicle, positions_dir),
+                     payload.encode('utf-8'))
+        logging.info('update_positions(%s): reset with %d points', vehicle,
+                     len(coords))
+        return {'points': len(coords), 'reset': True,
+                'last_pos': last_pos is not None}
+
+    if len(coords) > len(indexed):
+        entries.append({'t': now, 'points': coords[len(indexed):]})
+    if last_pos is not None and last_pos != state['last_pos']:
+        entries.append({'t': now, 'last_pos': last_pos})
+    if entries:
+        payload = ''.join(json.dumps(entry, separators=(',', ':')) + '\n'
+                          for entry in entries)
+        # One write, so a reader sees whole lines or none of them
+        with open(get_index_file(vehicle, positions_dir), 'a') as index:
+            index.write(payload)
+        logging.info('update_positions(%s): %d new points', vehicle,
+                     len(coords) - len(indexed))
+    if not entries:
+        return None
+    return {'points': len(coords) - len(indexed), 'reset': False,
+            'last_pos': 'last_pos' in entries[-1]}
+
+
+def get_last_event_id(events_file):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      id of the newest event, from the file's tail. 0 if none.
+    """
+    try:
+        with open(events_file, 'rb') as events:
+            events.seek(0, os.SEEK_END)
+            events.seek(max(0, events.tell() - 65536))
+            lines = events.read().split(b'\n')
+    except FileNotFoundError:
+        return 0
+    for line in reversed(lines):
+        try:
+            return json.loads(line)['id']
+        except (ValueError, KeyError):
+            continue
+    return 0
+
+
+def notify_changes(changes, positions_dir=POSITIONS_DIR):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Appends one event for this publish's changed vehicles.
+                Publish tasks run one at a time in the MCP, so reading
+                the last id and appending needs no lock.
+    """
+    events_file = '%s/%s' % (positions_dir, EVENTS_FILE)
+    event_id = get_last_event_id(events_file) + 1
+    event = {'id': event_id, 't': time.time(), 'vehicles': changes}
+    line = json.dumps(event, separators=(',', ':')) + '\n'
+    if event_id % EVENTS_KEEP == 0:
+        with open(events_file) as events:
+            kept = events.readlines()[-(EVENTS_KEEP - 1):]
+        write_atomic(events_file, (''.join(kept) + line).encode('utf-8'))
+    else:
+        with open(events_file, 'a') as events:
+            events.write(line)
+    logging.info('notify_changes(): event %d, %d vehicles', event_id,
+                 len(changes))
+    return event_id
+
+
+def index_results(results, positions_dir=POSITIONS_DIR):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      update_positions for each (vehicle, features) of a
+                gandalf_jobs get_results() list, then one event for the
+                vehicles that changed. A bad index only costs that vehicle
+                its updates, not the publish.
+    """
+    os.makedirs(positions_dir, exist_ok=True)
+    changes = {}
+    for vehicle, features in results:
+        if not features:
+            continue
+        try:
+            change = update_positions(vehicle, features, positions_dir)
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            logging.warning('index_results(%s): %s', vehicle, error)
+            continue
+        if change is not None:
+            changes[vehicle] = change
+    if changes:
+        try:
+            notify_changes(changes, positions_dir)
+        except OSError as error:
+            logging.warning('index_results(): no event: %s', error)
+    return changes
+
+
+if __name__ == '__main__':
+    """
+    For command line use: show a vehicle's index
+    """
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) != 2:
+        logging.warning("Usage: gandalf_positions vehicle")
+        sys.exit()
+    state = read_index(sys.argv[1])
+    if state is None:
+        logging.warning('gandalf_positions: no index for %s', sys.argv[1])
+        sys.exit()
+    print('%s: %d points, last write %s' % (
+        sys.argv[1], len(state['points']),
+        time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime(state['t']))))
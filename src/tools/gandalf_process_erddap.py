@@ -13,17 +13,16 @@ import json
 
 from datetime import datetime
 from datetime import date
-from matplotlib import dates as mpd
 import time
-from calendar import timegm
-import requests
-import itertools
 import logging
 import argparse
 import pandas as pd
 import numpy as np
 from geojson import LineString, FeatureCollection, Feature, Point
 from gandalf_utils import get_vehicle_config
+from gandalf_erddap_decoder import DEFAULT_FORMAT, erddap_table_file
+from gandalf_erddap_decoder import fetch_erddap_table, read_erddap_table
+from gandalf_metrics import add_rows
 import warnings
 warnings.filterwarnings("ignore")
 
@@ -87,6 +86,8 @@ def gandalf_erddap_track(vehicle, df):
     track = LineString(coords)
     track = Feature(geometry=track, id='track')
     track.properties['style'] = (config['gandalf']['style'])
+    # 2026-10-19 So positions.js can find the track to extend
+    track.properties['vehicle'] = config['gandalf']['vehicle']
 
     features.append(track)
     last_pos = gen_last_pos(vehicle, df)
@@ -99,37 +100,34 @@ def get_erddap_json(vehicle):
     Name:       get_erddap_json
     Author:     robertdcurrier@gmail.com
     Created:    2022-06-13
-    Modified:   2022-06-13
+    Modified:   2026-10-19
     Notes:      Changed from using geoJSON to straight JSON. This allows us
                 to read the JSON with pandas and create a df with sensor names
                 used as column headers. The downloaded JSON file is the
                 equivalent of Slocum SBD/TBD files as we use it to create
                 sensors.csv for all other operations.
+
+                2026-10-19: Now streams gdac_format (default csv) straight
+                to disk instead of holding the whole response as text.
     """
     logging.info('get_erddap_json(%s)' % vehicle)
-    features = []
     logging.info("fetch_erddap(%s)" % vehicle)
     start_time = time.time()
     # get config info for each vehicle
     config = get_vehicle_config(vehicle)
     erddap_url = config["gandalf"]["gdac_url"]
     json_dir = config["gandalf"]["gdac_json_dir"]
-    json_data = requests.get(erddap_url, verify=False).text
-
+    erddap_format = config["gandalf"].get("gdac_format", DEFAULT_FORMAT)
+    # We need to write the table out so we don't have to refetch for plots
+    fname = erddap_table_file(json_dir, vehicle, 'erddap', erddap_format)
+    logging.info('get_erddap_json(%s): Writing %s' % (vehicle, fname))
+    if not fetch_erddap_table(erddap_url, fname, erddap_format,
+                              verify=False):
+        logging.info('get_erddap_json(%s): Failed to write table' % vehicle)
+        return
     end_time = time.time()
     fetch_time = end_time - start_time
     logging.info('get_erddap_json(): Fetch took %0.2f seconds' % fetch_time)
-    # We need to write json_data out so we don't have to refetch for plots
-    fname = '%s/%s_erddap.json' % (json_dir, vehicle)
-    json_file = open(fname, 'w+')
-    logging.info('get_erddap_json(%s): Writing %s' % (vehicle, fname))
-    try:
-        json_file.write(json_data)
-    except:
-        logging.info('get_erddap_json(%s): Failed to write JSON');
-        return
-    else:
-        json_file.close()
 
 
 def erddap_to_df(vehicle):
@@ -137,32 +135,26 @@ def erddap_to_df(vehicle):
     Name:       erddap_to_df
     Author:     robertdcurrier@gmail.com
     Created:    2022-06-13
-    Modified:   2022-06-13
+    Modified:   2026-10-19
     Notes:      Reads downloaded JSON file from erddap and creates a panda DF
                 using columnNames as headers
+
+                2026-10-19: Chunked, typed decode via gandalf_erddap_decoder.
+                epoch is computed in bulk rather than row by row.
     """
     logging.info('erddap_to_df(%s)'% (vehicle))
     config = get_vehicle_config(vehicle)
     json_dir = config["gandalf"]["gdac_json_dir"]
-    json_file = "%s/%s_erddap.json" % (json_dir, vehicle)
+    erddap_format = config["gandalf"].get("gdac_format", DEFAULT_FORMAT)
+    json_file = erddap_table_file(json_dir, vehicle, 'erddap', erddap_format)
     logging.info('erddap_to_df(%s) using %s'% (vehicle, json_file))
     try:
-        df = pd.read_json(json_file)
-    except Exception:
-        logging.warning('erddap_to_df(): Could not read json file')
-        sys.exit()
-    try:
-        df1 = (pd.DataFrame(df['table']['rows'],
-               columns=df['table']['columnNames']))
+        df1 = read_erddap_table(json_file)
         df1 = df1.dropna(subset=['latitude', 'longitude'])
     except Exception:
-        logging.warning('erddap_to_df(): Failed to create DF1')
+        logging.warning('erddap_to_df(): Could not read %s' % json_file)
         sys.exit()
-    logging.info('erddap_to_df(): Adding epoch')
-    for index, row in df1.iterrows():
-        utc_time = time.strptime(row['time'], "%Y-%m-%dT%H:%M:%SZ")
-        epoch = timegm(utc_time)
-        df1.at[index,'epoch'] = epoch
+    add_rows(len(df1))
     return df1
 
 
@@ -171,9 +163,10 @@ def gen_last_pos(vehicle, df):
     Name:       gen_last_pos
     Author:     robertdcurrier@gmail.com
     Created:    2022-06-06
-    Modified:   2022-06-13
+    Modified:   2026-10-19
     Notes:      Makes last pos html and icon.
                 2022-06-13: Changed date format to follow Slocum convention
+                2026-10-19: Infobox properties instead of html
     """
     logging.debug('gen_last_pos(): making last_pos')
     config = get_vehicle_config(vehicle)
@@ -213,52 +206,13 @@ def gen_last_pos(vehicle, df):
     last_pos.properties['style'] = (config['gandalf']['style'])
     last_pos.properties['currPosIcon'] = (config['gandalf']['currPosIcon'])
     last_pos.properties['iconSize'] = (config['gandalf']['iconSize'])
-    # HTML for InfoBox
-
-    last_pos.properties['html'] = """
-    <div class='infoBoxTitle'><span class='infoBoxTitle'>%s</span></div>
-    <center><img src=%s></img></center>
-    <hr>
-    <div class='infoBoxHeading'><span class='infoBoxHeading'>Status</span></div>
-    <table class='infoBoxTable'>
-    <tr>
-        <td class='td_infoBoxSensor'>Last Report:</td>
-        <td class='td_infoBoxData'>%s</td>
-    </tr>
-    <tr>
-        <td class='td_infoBoxSensor'>Operator:</td>
-        <td class='td_infoBoxData'>%s</td>
-    </tr>
-
-    <tr>
-        <td class='td_infoBoxSensor'>Vehicle Type:</td>
-        <td class='td_infoBoxData'>%s</td>
-    </tr>
-
-    <tr>
-        <td class='td_infoBoxSensor'>Project:</td>
-        <td class='td_infoBoxData'>%s</td>
-    </tr>
-    <tr>
-        <td class='td_infoBoxSensor'>Last Position:</td>
-        <td class='td_infoBoxData'>%sW %sN</td>
-    </tr>
-    <tr>
-        <td class='td_infoBoxSensor'>Data Source:</td>
-        <td class='td_infoBoxData'>%s</a>
-        </td>
-    </tr>
-    </table>
-    <div class = 'infoBoxBreakBar'>Science Plots</div>
-    <div class = 'infoBoxPlotDiv'>
-        <img class = 'infoBoxPlotImage'
-            src = '/static/images/infoBox2DPlot.png'
-            onclick="deployPlots('%s')">
-        </img>
-    </div>
-    """ % (public_name, infobox_image, last_surfaced,
-           operator, vehicle_model, project, last_lon, last_lat,
-           data_source, vehicle)
+    # 2026-10-19 InfoBox is rendered in the browser from these. See
+    # static/js/infobox.js
+    last_pos.properties['infobox'] = 'vehicle'
+    last_pos.properties['infobox_image'] = infobox_image
+    last_pos.properties['operator'] = operator
+    last_pos.properties['vehicle_model'] = vehicle_model
+    last_pos.properties['project'] = project
     return(last_pos)
 
 
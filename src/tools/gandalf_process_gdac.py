@@ -11,13 +11,9 @@ Notes:      Harvests non-GANDALF gliders from GDAC ERRDAP server. Data returned
 import sys
 import json
 import time
-from calendar import timegm
 from datetime import datetime
 from datetime import date
 from datetime import timedelta
-from matplotlib import dates as mpd
-import requests
-import itertools
 import logging
 import argparse
 import pandas as pd
@@ -25,6 +21,9 @@ import numpy as np
 from geojson import LineString, FeatureCollection, Feature, Point
 from gandalf_utils import get_vehicle_config
 from gandalf_utils_2 import get_modcomp_path
+from gandalf_erddap_decoder import DEFAULT_FORMAT, erddap_table_file
+from gandalf_erddap_decoder import fetch_erddap_table, read_erddap_table
+from gandalf_metrics import add_rows
 logging.basicConfig(level=logging.WARNING)
 
 
@@ -86,6 +85,8 @@ def gandalf_gdac_track(vehicle):
     track = LineString(coords)
     track = Feature(geometry=track, id='track')
     track.properties['style'] = (config['gandalf']['style'])
+    # 2026-10-19 So positions.js can find the track to extend
+    track.properties['vehicle'] = config['gandalf']['vehicle']
 
     features.append(track)
     last_pos = gen_last_pos(vehicle, slim_df)
@@ -97,31 +98,31 @@ def get_gdac_json(vehicle):
     Name:       get_gdac_json
     Author:     robertdcurrier@gmail.com
     Created:    2022-06-13
-    Modified:   2022-06-13
+    Modified:   2026-10-19
     Notes:      Changed from using geoJSON to straight JSON. This allows us
                 to read the JSON with pandas and create a df with sensor names
                 used as column headers. The downloaded JSON file is the
                 equivalent of Slocum SBD/TBD files as we use it to create
                 sensors.csv for all other operations.
+
+                2026-10-19: Now streams gdac_format (default csv) straight
+                to disk instead of holding the whole response as text.
     """
     logging.warning('get_gdac_json(%s)' % vehicle)
-    features = []
     logging.info("fetch_erddap(%s)" % vehicle)
     start_time = time.time()
     # get config info for each vehicle
     config = get_vehicle_config(vehicle)
     gdac_url = config["gandalf"]["gdac_url"]
     json_dir = config["gandalf"]["gdac_json_dir"]
-    json_data = requests.get(gdac_url).text
+    gdac_format = config["gandalf"].get("gdac_format", DEFAULT_FORMAT)
+    # We need to write the table out so we don't have to refetch for plots
+    fname = erddap_table_file(json_dir, vehicle, 'gdac', gdac_format)
+    logging.info('get_gdac_json(%s): Writing %s' % (vehicle, fname))
+    fetch_erddap_table(gdac_url, fname, gdac_format)
     end_time = time.time()
     fetch_time = end_time - start_time
     logging.info('get_gdac_json(): Fetch took %0.2f seconds' % fetch_time)
-    # We need to write json_data out so we don't have to refetch for plots
-    fname = '%s/%s_gdac.json' % (json_dir, vehicle)
-    json_file = open(fname, 'w+')
-    logging.info('get_gdac_json(%s): Writing %s' % (vehicle, fname))
-    json_file.write(json_data)
-    json_file.close()
 
 
 def gdac_to_df(vehicle):
@@ -129,34 +130,27 @@ def gdac_to_df(vehicle):
     Name:       gdac_to_df
     Author:     robertdcurrier@gmail.com
     Created:    2022-06-13
-    Modified:   2022-06-13
+    Modified:   2026-10-19
     Notes:      Reads downloaded JSON file from GDAC and creates a panda DF
                 using columnNames as headers
+
+                2026-10-19: Chunked, typed decode via gandalf_erddap_decoder.
+                epoch is computed in bulk rather than row by row.
     """
     logging.warning('gdac_to_df(%s)'% (vehicle))
     config = get_vehicle_config(vehicle)
     json_dir = config["gandalf"]["gdac_json_dir"]
-    json_file = "%s/%s_gdac.json" % (json_dir, vehicle)
+    gdac_format = config["gandalf"].get("gdac_format", DEFAULT_FORMAT)
+    json_file = erddap_table_file(json_dir, vehicle, 'gdac', gdac_format)
     logging.info('gdac_to_df(%s) using %s'% (vehicle, json_file))
     try:
-        df = pd.read_json(json_file)
-
-    except Exception:
-        logging.warning('gdac_to_df(): Could not read json file')
-        return []
-    try:
-        df1 = (pd.DataFrame(df['table']['rows'],
-               columns=df['table']['columnNames']))
+        df1 = read_erddap_table(json_file)
     except Exception:
-        logging.warning('gdac_to_df(): Failed to create DF1')
+        logging.warning('gdac_to_df(): Could not read %s' % json_file)
         return []
 
+    add_rows(len(df1))
     slim_df = slim_gdac_df(vehicle, df1)
-    logging.info('gdac_to_df(%s): Adding epoch column' % vehicle)
-    for index, row in slim_df.iterrows():
-        utc_time = time.strptime(row['time'], "%Y-%m-%dT%H:%M:%SZ")
-        epoch = timegm(utc_time)
-        slim_df.at[index,'epoch'] = epoch
     return slim_df
 
 
@@ -165,9 +159,10 @@ def gen_last_pos(vehicle, df):
     Name:       gen_last_pos
     Author:     robertdcurrier@gmail.com
     Created:    2022-06-06
-    Modified:   2022-06-13
+    Modified:   2026-10-19
     Notes:      Makes last pos html and icon.
                 2022-06-13: Changed date format to follow Slocum convention
+                2026-10-19: Infobox properties instead of html
     """
     logging.warning('gen_last_pos(%s): making last_pos', vehicle)
     config = get_vehicle_config(vehicle)
@@ -210,59 +205,14 @@ def gen_last_pos(vehicle, df):
     last_pos.properties['style'] = (config['gandalf']['style'])
     last_pos.properties['currPosIcon'] = (config['gandalf']['currPosIcon'])
     last_pos.properties['iconSize'] = (config['gandalf']['iconSize'])
-    # HTML for InfoBox
-
-    last_pos.properties['html'] = """
-    <div class='infoBoxTitle'><span class='infoBoxTitle'>%s</span></div>
-    <center><img src=%s></img></center>
-    <hr>
-    <div class='infoBoxHeading'><span class='infoBoxHeading'>Status</span></div>
-    <table class='infoBoxTable'>
-    <tr>
-        <td class='td_infoBoxSensor'>Last Report:</td>
-        <td class='td_infoBoxData'>%s</td>
-    </tr>
-    <tr>
-        <td class='td_infoBoxSensor'>Operator:</td>
-        <td class='td_infoBoxData'>%s</td>
-    </tr>
-
-    <tr>
-        <td class='td_infoBoxSensor'>Vehicle Type:</td>
-        <td class='td_infoBoxData'>%s</td>
-    </tr>
-
-    <tr>
-        <td class='td_infoBoxSensor'>Project:</td>
-        <td class='td_infoBoxData'>%s</td>
-    </tr>
-    <tr>
-        <td class='td_infoBoxSensor'>Last Position:</td>
-        <td class='td_infoBoxData'>%sW %sN</td>
-    </tr>
-    <tr>
-        <td class='td_infoBoxSensor'>Data Source:</td>
-        <td class='td_infoBoxData'>%s</a>
-        </td>
-    </tr>
-    </table>
-    <div class = 'infoBoxBreakBar'>Science Plots</div>
-    <div class = 'infoBoxPlotDiv'>
-        <img class = 'infoBoxPlotImage'
-            src = '/static/images/infoBox2DPlot.png'
-            onclick="deployPlots('%s')">
-        </img>
-    </div>
-    <div class = 'infoBoxBreakBar'>Model Comparisons</div>
-    <div class = 'infoBoxPlotDiv'>
-        <img class = 'infoBoxPlotImage'
-            src = "%s"
-            onclick="modComps('%s')">
-        </img>
-    </div>
-    """ % (public_name, infobox_image, last_surfaced,
-           operator, vehicle_model, project, last_lon, last_lat,
-           data_source, vehicle, mod_comp_path, mod_comp_path)
+    # 2026-10-19 InfoBox is rendered in the browser from these. See
+    # static/js/infobox.js
+    last_pos.properties['infobox'] = 'vehicle'
+    last_pos.properties['infobox_image'] = infobox_image
+    last_pos.properties['operator'] = operator
+    last_pos.properties['vehicle_model'] = vehicle_model
+    last_pos.properties['project'] = project
+    last_pos.properties['mod_comp_path'] = mod_comp_path
     return(last_pos)
 
 
@@ -23,12 +23,14 @@ import logging
 import cmocean
 import matplotlib
 import calendar
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from  geojson import Feature, FeatureCollection, Point, LineString
 from dateutil.parser import parse
 from itertools import chain
 from dateutil.parser import parse as date_parse
+from gandalf_config_registry import VEHICLE_CONFIG_ROOT
 
 
 
@@ -83,9 +85,11 @@ def fetch_wg_data(vehicle):
 
 
 def get_wg_config(vehicle):
-    """ Get WaveGlider configuration data. """
+    """ Get WaveGlider configuration data.
+    2026-10-19: Config root from gandalf_config_registry
+    """
     logging.debug('get_wg_config()')
-    wg_cfile = '/data/gandalf/gandalf_configs/vehicles/%s/%s.cfg' % (vehicle, vehicle)
+    wg_cfile = '%s/%s/%s.cfg' % (VEHICLE_CONFIG_ROOT, vehicle, vehicle)
     try:
         with open(wg_cfile) as cfile:
             vehicle_config = json.loads(cfile.read())
@@ -116,30 +120,45 @@ def write_json(vehicle, json_data):
         json_data.close()
         return
 
-def get_nearest_n(epoch, df):
-    """ Get Nearest Neighbor for use in getting closest epoch row to current
-    CTD row when generating markers. CTD -> nn(WG), CTD -> nn(WX) etc. Returns
-    the rows that matches so we can add heading, bearing and WX to marker.
+def get_nearest_indices(ctd_times, df, tolerance=None):
     """
-    logging.debug('get_nearest_n(): Finding %d' % epoch)
-    for index, row in df.iterrows():
-        if epoch < row['time']:
-            continue
-        else:
-            return row
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Vectorized replacement for get_nearest_n. For every CTD epoch
+                we want the most recent row in df at or before it, same as
+                the old iterrows scan over the descending frame. Uses a stable
+                ascending sort plus searchsorted so it is O((n + m) log m)
+                instead of O(n * m). Returns (positions into the sorted df,
+                the sorted df, mask of CTD rows that found a match). If
+                tolerance is set, matches older than tolerance are dropped.
+    """
+    df = df.sort_values(by=['time'], kind='mergesort')
+    times = df['time'].to_numpy()
+    positions = np.searchsorted(times, ctd_times, side='right') - 1
+    valid = positions >= 0
+    positions = np.clip(positions, 0, None)
+    if tolerance is not None and len(times):
+        valid &= (ctd_times - times[positions]) <= tolerance
+    return (positions, df, valid)
 
 
 def gen_mashed_df(vehicle, df_list):
     """
     Created: 2021-08-27
+    Modified: 2026-10-19
     Takes multiple data frames, drops conflicting columns and combines to
     build a mash up that we can use to feed new_surf_markers
+    2026-10-19: One pass as-of join on sorted time arrays vs calling
+    get_nearest_n three times per CTD row. Set system.join_tolerance_secs
+    in the WG config to reject stale WX/WG/Waves matches.
+    2026-10-19: A column name in more than one stream used to blow up the
+    DataFrame build (duplicate labels). Now the earliest stream in
+    CTD, WX, WG, Waves order keeps it, e.g. latitude in CTD and WG is
+    the CTD's, and we log what was dropped.
     """
     # We need these when building the data frames but not when concatenating
     # as they are dupliated across all three data frames
-    mashed_rows = []
-    # We will be dropping kind in make_wg_df and we can remove lat/lon from cfg
-    drop_columns = ['kind', 'latitude', 'longitude']
+    drop_columns = ['time', 'index', 'kind']
     ctd_df = df_list[0]
     # This rename should pull columns from config file and not manually
     ctd_df.rename(columns={'temperature':'water_temperature'}, inplace=True)
@@ -154,39 +173,37 @@ def gen_mashed_df(vehicle, df_list):
 
     logging.info('gen_mashed_df(%s)' % vehicle)
     config = get_wg_config(vehicle)
-    ctd_sensors = config["ctd_sensors"]
+    # WG time is epoch milliseconds
+    tolerance = config["system"].get("join_tolerance_secs")
+    if tolerance is not None:
+        tolerance = tolerance * 1000
     # Here is where it all happens... CTD is the One Ring To Rule Them All
     start_time = time.time()
 
-    for index, ctd_row in ctd_df.iterrows():
-        # WX Sensors nearest row
-        wx_row = get_nearest_n(ctd_row['time'], wx_df)
-        # WG Sensors nearest row
-        wg_row = get_nearest_n(ctd_row['time'], wg_df)
-        # Waves Sensor nearest row
-        waves_row = get_nearest_n(ctd_row['time'], waves_df)
-        # Drop the conflicting time and index columns -- can't do this
-        # prior as we need time to feed get_nearest_n Need to make this
-        # iterable as we will be growing the list of data frames...
-        # Do a for df in dfs:
-        if wg_row is not None:
-            wg_row.drop('time', inplace=True)
-            wg_row.drop('index', inplace=True)
-            wg_row.drop('kind', inplace=True)
-        if wx_row is not None:
-            wx_row.drop('time', inplace=True)
-            wx_row.drop('index', inplace=True)
-            wx_row.drop('kind', inplace=True)
-        if waves_row is not None:
-            waves_row.drop('time', inplace=True)
-            waves_row.drop('index', inplace=True)
-            waves_row.drop('kind', inplace=True)
-        ctd_row.drop('index', inplace=True)
-        if wg_row is not None and wx_row is not None and waves_row is not None:
-            row_list = [ctd_row, wx_row, wg_row, waves_row]
-            mash_row = pd.concat(row_list,axis=0, sort=False).fillna(0)
-            mashed_rows.append(mash_row)
-    mashed_df = pd.DataFrame(mashed_rows)
+    ctd_df = ctd_df.drop(columns=['index'], errors='ignore')
+    ctd_times = ctd_df['time'].to_numpy()
+    keep = np.ones(len(ctd_df), dtype=bool)
+    frames = [ctd_df]
+    columns = set(ctd_df.columns)
+    # Same order as the old row concat: CTD, WX, WG, Waves
+    for df in [wx_df, wg_df, waves_df]:
+        (positions, df, valid) = get_nearest_indices(ctd_times, df,
+                                                     tolerance)
+        keep &= valid
+        df = df.drop(columns=drop_columns, errors='ignore')
+        # First stream wins on any shared column name
+        shared = [column for column in df.columns if column in columns]
+        if shared:
+            logging.warning('gen_mashed_df(%s): %s already set by an '
+                            'earlier stream, dropping' % (vehicle, shared))
+        df = df[[column for column in df.columns if column not in columns]]
+        columns.update(df.columns)
+        if len(df) == 0:
+            continue
+        df = df.iloc[positions]
+        df.index = ctd_df.index
+        frames.append(df)
+    mashed_df = pd.concat(frames, axis=1, sort=False)[keep].fillna(0)
     end_time = time.time()
     seconds = (end_time - start_time)
     logging.info('gen_mashed_df(): runtime of %0.2f seconds' % seconds)
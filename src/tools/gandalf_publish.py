@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Name:       gandalf_publish.py
+Created:    2026-10-19
+Modified:   2026-10-19
+Notes:      Publishes the GeoJSON the map loads. Every write_geojson_file
+            in tools comes through publish_geojson():
+
+            - Compact JSON: orjson when installed, json with no whitespace
+              when not. Either way numpy scalars and arrays are handled.
+            - Coordinates rounded to COORD_PRECISION places. Six is ~0.1 m,
+              far finer than any fix we get, and it roughly halves the
+              size of a long track.
+            - A temp file in the same directory is renamed over the old one,
+              so the browser never reads half a local.json.
+            - <name>.json.gz and, when the brotli package is installed,
+              <name>.json.br are written next to it. Apache serves them
+              directly to clients that accept them (see
+              gandalf_precompressed.conf). A .br left over from before
+              brotli went away is removed so it can't go stale.
+"""
+import os
+import sys
+import gzip
+import json
+import logging
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GEOJSON_DIR = '/data/gandalf/deployments/geojson'
+COORD_PRECISION = 6
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def round_coords(coords, precision=COORD_PRECISION):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Rounds a coordinates array of any nesting depth. Always
+                returns plain floats so numpy values serialize too.
+    """
+    if hasattr(coords, 'tolist'):
+        coords = coords.tolist()
+    if isinstance(coords, (list, tuple)):
+        return [round_coords(coord, precision) for coord in coords]
+    if coords is None:
+        return None
+    return round(float(coords), precision)
+
+
+def compact_geojson(data, precision=COORD_PRECISION):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Copy of data with every geometry's coordinates rounded.
+                Works on a FeatureCollection, a Feature, a geometry or lists
+                of them. The input isn't touched, as job results may be
+                shared.
+    """
+    if isinstance(data, dict):
+        compact = {}
+        for key, value in data.items():
+            if key == 'coordinates':
+                compact[key] = round_coords(value, precision)
+            elif key in ('geometry', 'geometries', 'features'):
+                compact[key] = compact_geojson(value, precision)
+            else:
+                compact[key] = value
+        return compact
+    if isinstance(data, (list, tuple)):
+        return [compact_geojson(item, precision) for item in data]
+    return data
+
+
+def iter_features(data):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      The Features in a FeatureCollection, a Feature or lists of
+                them, however deep. Vehicle builders return all three:
+                Slocums a list holding one FeatureCollection, cw_DIM a
+                collection with a collection of surface markers in it.
+    """
+    if isinstance(data, (list, tuple)):
+        for item in data:
+            yield from iter_features(item)
+    elif isinstance(data, dict):
+        if data.get('type') == 'FeatureCollection' or 'features' in data:
+            yield from iter_features(data.get('features', []))
+        elif data.get('geometry') is not None:
+            yield data
+
+
+def _default(obj):
+    """Types neither encoder knows: numpy scalars/arrays, timestamps"""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    raise TypeError('%s is not JSON serializable' % type(obj).__name__)
+
+
+def dumps_geojson(data, precision=COORD_PRECISION):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Compact UTF-8 JSON bytes for data
+    """
+    if precision is not None:
+        data = compact_geojson(data, precision)
+    if orjson is not None:
+        return orjson.dumps(data, default=_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(data, separators=(',', ':'),
+                      default=_default).encode('utf-8')
+
+
+def write_atomic(fname, payload):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Temp file in the same directory, then rename over fname
+    """
+    tmp_file = '%s/.%s.%d.tmp' % (os.path.dirname(fname) or '.',
+                                  os.path.basename(fname), os.getpid())
+    with open(tmp_file, 'wb') as outf:
+        outf.write(payload)
+    os.replace(tmp_file, fname)
+
+
+def publish_geojson(data_source, data, geojson_dir=GEOJSON_DIR,
+                    precision=COORD_PRECISION):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Writes <geojson_dir>/<data_source>.json plus its .gz and
+                .br siblings. The compressed files go first, so by the
+                time a client sees the new .json its siblings match.
+                Returns the uncompressed size.
+    """
+    fname = '%s/%s.json' % (geojson_dir, data_source)
+    payload = dumps_geojson(data, precision)
+    write_atomic(fname + '.gz', gzip.compress(payload, GZIP_LEVEL, mtime=0))
+    if brotli is not None:
+        write_atomic(fname + '.br', brotli.compress(payload,
+                                                    quality=BROTLI_QUALITY))
+    elif os.path.exists(fname + '.br'):
+        os.remove(fname + '.br')
+    write_atomic(fname, payload)
+    logging.info('publish_geojson(%s): %d bytes', data_source, len(payload))
+    return len(payload)
+
+
+if __name__ == '__main__':
+    """
+    For command line use: republish an existing file compactly
+    """
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) != 2:
+        logging.warning("Usage: gandalf_publish data_source")
+        sys.exit()
+    with open('%s/%s.json' % (GEOJSON_DIR, sys.argv[1])) as geojson_file:
+        publish_geojson(sys.argv[1], json.load(geojson_file))
@@ -32,6 +32,7 @@ from geojson import LineString, FeatureCollection, Feature, Point
 from pandas.plotting import register_matplotlib_converters
 from netCDF4 import Dataset, stringtochar
 from gandalf_utils import get_vehicle_config, get_sensor_config, flight_status
+from gandalf_publish import publish_geojson
 #GLOBALS
 seatrec_root_url = "http://35.247.25.81/SEATREC"
 
@@ -369,12 +370,13 @@ def seatrec_surface_marker(platform, platform_df):
     """Name: seatrec_surface_marker.
 
     Created: 2020-06-05
-    Modified: 2023-02-20
+    Modified: 2026-10-19
     Author: robertdcurrier@gmail.com
     Notes: Uses last date/time reported position to generate geoJSON
     feature. Feature is returned and added to features[]. When complete,
     features[] is made into a feature collection.
     TO DO: create seatrec.cfg and use instead of hardwiring...
+    2026-10-19: Infobox properties instead of html
     """
     logging.info('seatrec_surface_marker(%s): creating surface marker' % platform)
     coords = []
@@ -406,34 +408,13 @@ def seatrec_surface_marker(platform, platform_df):
     s_last = '/data/gandalf/seatrec/plots/%s_salinity(PSU)_last.png' % platform
 
     surf_marker.properties['platform'] = platform
-    surf_marker.properties['html'] = """
-        <h5><center><span class='infoBoxHeading'>Seatrec Float Status</span></center></h5>
-        <table class='infoBoxTable'>
-            <tr><td class='td_infoBoxSensor'>Platform:</td><td>%s</td></tr>
-            <tr><td class='td_infoBoxSensor'>PI:</td><td>%s</td></tr>
-            <tr><td class='td_infoBoxSensor'>Date/Time:</td><td>%s</td></tr>
-            <tr><td class='td_infoBoxSensor'>Position:</td><td>%0.4fW/%0.4fN</td></tr>
-        </table>
-        <div class = 'infoBoxBreakBar'>Most Recent Cycle</div>
-        <div class = 'infoBoxLastPlotDiv'>
-            <a href='%s' target="_blank">
-                <img class = 'infoBoxLastPlotImage' src = '%s'></img>
-            </a>
-            <a href='%s' target="_blank">
-                <img class = 'infoBoxLastPlotImage' src = '%s'></img>
-            </a>
-        </div>
-        <div class = 'infoBoxBreakBar'>2D Time Series Plots</div>
-        <div class = 'infoBoxPlotDiv'>
-            <a href='%s' target="_blank">
-                <img class = 'infoBoxPlotImage' src = '%s'></img>
-            </a>
-            <a href='%s' target="_blank">
-                <img class = 'infoBoxPlotImage' src = '%s'></img>
-            </a>
-        </div>
-        """ % (platform, pi, max_date, lon, lat, t_last, t_last,
-               s_last, s_last, t_plot, t_plot, s_plot, s_plot)
+    # 2026-10-19 Infobox properties, infobox.js renders
+    surf_marker.properties['infobox'] = 'float'
+    surf_marker.properties['float_type'] = 'Seatrec'
+    surf_marker.properties['pi'] = pi
+    surf_marker.properties['last_date'] = str(max_date)
+    surf_marker.properties['last_plots'] = [t_last, s_last]
+    surf_marker.properties['series_plots'] = [t_plot, s_plot]
     return surf_marker
 
 
@@ -441,15 +422,13 @@ def write_geojson_file(data):
     """Name: write_geojson.
 
     Created: 2020-06-05
-    Modified: 2020-10-26
+    Modified: 2026-10-19
     Author: robertdcurrier@gmail.com
     Notes: writes out feature collection
+    2026-10-19: Via gandalf_publish (compact, atomic, .gz/.br)
     """
-    fname = ("/data/gandalf/deployments/geojson/seatrec.json")
-    logging.info("write_geojson(): Writing %s" % fname)
-    outf = open(fname,'w')
-    outf.write(str(data))
-    outf.close()
+    logging.info("write_geojson(): Writing seatrec.json")
+    publish_geojson('seatrec', data)
 
 
 def profiles_to_df(profiles):
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Name:       gandalf_segment_manifest.py
+Created:    2026-10-19
+Modified:   2026-10-19
+Notes:      Per-vehicle SQLite manifest of Slocum binary segments. One row
+            per sbd/tbd/dbd/ebd file with its size, mtime, decode status and
+            where its data ended up (DBA file and row range in sensors.csv).
+
+            Harvest and process_binaries refresh it with a single scandir of
+            each binary_files directory. Every other stage asks the manifest
+            instead of globbing: old files for wipe_old_bd, flight/science
+            pairs for parsing, orphans for reporting. Pairing is a join, so
+            a tbd that hasn't arrived yet no longer gets its sbd deleted.
+
+            The manifest lives in processed_data/segments.db under the
+            vehicle's data root. gandalf_ngdac_writer keeps its record of
+            which segments have been turned into which profile NetCDFs in
+            the same file. Only the standard library, natsort and the config
+            registry are imported, so the gncutils container can use it too.
+"""
+import os
+import sys
+import sqlite3
+import logging
+from natsort import natsorted
+from gandalf_config_registry import load_vehicle_config, get_vehicle_status
+
+MANIFEST_NAME = 'segments.db'
+# Flight/science file types by flight status
+BINARY_TYPES = {'deployed': ('sbd', 'tbd'), 'recovered': ('dbd', 'ebd')}
+MANIFEST_SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    segment TEXT NOT NULL,
+    file_type TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    status TEXT NOT NULL DEFAULT 'new',
+    dba_file TEXT,
+    row_start INTEGER,
+    row_count INTEGER,
+    PRIMARY KEY (segment, file_type)
+);
+CREATE TABLE IF NOT EXISTS ngdac_segments (
+    segment TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    written REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ngdac_profiles (
+    nc_file TEXT PRIMARY KEY,
+    segment TEXT NOT NULL
+);
+"""
+
+
+def get_data_root(config, status):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      deployed_data_dir or post_data_dir_root
+    """
+    if status == 'deployed':
+        return config['gandalf']['deployed_data_dir']
+    return config['gandalf']['post_data_dir_root']
+
+
+def segment_name(data_file):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Lower case file name without extension, same as the DBAs
+    """
+    return os.path.splitext(os.path.basename(data_file))[0].lower()
+
+
+def open_manifest(root_dir):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Connection to root_dir/processed_data/segments.db
+    """
+    db_file = '%s/processed_data/%s' % (root_dir, MANIFEST_NAME)
+    conn = sqlite3.connect(db_file, timeout=30)
+    conn.executescript(MANIFEST_SCHEMA)
+    return conn
+
+
+def update_manifest(conn, root_dir, file_types):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      One scandir per binary_files/<type> directory. New or
+                changed files go (back) to status 'new'. Rows for files
+                that have gone away are dropped. Returns the number of
+                new or changed segments.
+    """
+    changed = 0
+    for file_type in file_types:
+        data_dir = '%s/binary_files/%s' % (root_dir, file_type)
+        known = dict(((row[0], (row[1], row[2])) for row in conn.execute(
+            'SELECT path, size, mtime FROM segments WHERE file_type = ?',
+            (file_type,))))
+        seen = set()
+        try:
+            entries = list(os.scandir(data_dir))
+        except FileNotFoundError:
+            logging.warning('update_manifest(): No %s', data_dir)
+            entries = []
+        suffix = '.' + file_type
+        for entry in entries:
+            if not entry.name.lower().endswith(suffix) or not entry.is_file():
+                continue
+            stat = entry.stat()
+            seen.add(entry.path)
+            if known.get(entry.path) == (stat.st_size, stat.st_mtime):
+                continue
+            conn.execute(
+                'INSERT OR REPLACE INTO segments (segment, file_type, path, '
+                'size, mtime) VALUES (?, ?, ?, ?, ?)',
+                (segment_name(entry.path), file_type, entry.path,
+                 stat.st_size, stat.st_mtime))
+            changed += 1
+        gone = [(path,) for path in known if path not in seen]
+        conn.executemany('DELETE FROM segments WHERE path = ?', gone)
+    conn.commit()
+    logging.info('update_manifest(%s): %d new or changed', root_dir, changed)
+    return changed
+
+
+def refresh_manifest(config, vehicle):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Opens and updates the vehicle's manifest. Returns
+                (conn, flight_type, science_type).
+    """
+    status = get_vehicle_status(vehicle)
+    flight_type, science_type = BINARY_TYPES[status]
+    conn = open_manifest(get_data_root(config, status))
+    update_manifest(conn, get_data_root(config, status),
+                    (flight_type, science_type))
+    return conn, flight_type, science_type
+
+
+def get_manifest(config, vehicle):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Same as refresh_manifest without the directory scan, for
+                stages that run after harvest or process_binaries has
+                already refreshed it
+    """
+    status = get_vehicle_status(vehicle)
+    flight_type, science_type = BINARY_TYPES[status]
+    conn = open_manifest(get_data_root(config, status))
+    return conn, flight_type, science_type
+
+
+def get_pairs(conn, flight_type, science_type, status=None):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      [(segment, flight_path, science_path)] in natural order.
+                status limits to flight segments in that decode status.
+    """
+    query = ('SELECT f.segment, f.path, s.path FROM segments f '
+             'JOIN segments s ON s.segment = f.segment AND s.file_type = ? '
+             'WHERE f.file_type = ?')
+    params = [science_type, flight_type]
+    if status is not None:
+        query += ' AND f.status = ?'
+        params.append(status)
+    return natsorted(conn.execute(query, params).fetchall())
+
+
+def get_orphans(conn, flight_type, science_type):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Paths of flight or science files without a partner yet
+    """
+    query = ('SELECT a.path FROM segments a LEFT JOIN segments b '
+             'ON b.segment = a.segment AND b.file_type = ? '
+             'WHERE a.file_type = ? AND b.segment IS NULL')
+    orphans = [row[0] for row in conn.execute(query, (science_type,
+                                                      flight_type))]
+    orphans += [row[0] for row in conn.execute(query, (flight_type,
+                                                       science_type))]
+    return natsorted(orphans)
+
+
+def get_older_than(conn, epoch):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Paths of binaries with mtime before epoch
+    """
+    return [row[0] for row in conn.execute(
+        'SELECT path FROM segments WHERE mtime < ?', (epoch,))]
+
+
+def forget_paths(conn, paths):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Drop rows for files we've removed
+    """
+    conn.executemany('DELETE FROM segments WHERE path = ?',
+                     [(path,) for path in paths])
+    conn.commit()
+
+
+def mark_segment(conn, segment, status, dba_file=None, row_start=None,
+                 row_count=None):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Records decode status and output location for both files
+                of a segment
+    """
+    conn.execute('UPDATE segments SET status = ?, dba_file = ?, '
+                 'row_start = ?, row_count = ? WHERE segment = ?',
+                 (status, dba_file, row_start, row_count, segment))
+
+
+def reset_segments(conn):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Everything back to 'new', e.g. after the DBAs are wiped
+    """
+    conn.execute("UPDATE segments SET status = 'new', dba_file = NULL, "
+                 "row_start = NULL, row_count = NULL")
+    conn.commit()
+
+
+if __name__ == '__main__':
+    """
+    For command line use
+    """
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) != 2:
+        logging.warning("Usage: gandalf_segment_manifest vehicle")
+        sys.exit()
+    vehicle = sys.argv[1]
+    conn, flight_type, science_type = refresh_manifest(
+        load_vehicle_config(vehicle), vehicle)
+    for row in conn.execute('SELECT file_type, status, COUNT(*) FROM segments '
+                            'GROUP BY file_type, status'):
+        logging.info('%s %s: %d', row[0], row[1], row[2])
+    for orphan in get_orphans(conn, flight_type, science_type):
+        logging.info('orphan: %s', orphan)
+    conn.close()
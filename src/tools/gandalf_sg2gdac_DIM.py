@@ -61,6 +61,7 @@ import numpy as np
 from netCDF4 import Dataset, stringtochar
 from natsort import natsorted
 from gandalf_mongo import connect_mongo, insert_record
+from gandalf_config_registry import load_vehicle_config, load_sg_config
 
 
 def flight_status(vehicle):
@@ -85,15 +86,16 @@ def get_vehicle_config(vehicle):
     Modified:   2022-07-27
     Notes:      Now we just use get_vehicle_config -- need to account for
                 -c arg so user can point at another config file
+                2026-10-19: Cached via gandalf_config_registry
+                2026-10-19: Raises rather than sys.exit() so only this
+                vehicle's job fails
     """
     logging.debug("get_vehicle_config(%s)", vehicle)
-    data_file = ("/data/gandalf/gandalf_configs/vehicles/%s/ngdac/deployment.json"
-                 % vehicle)
     try:
-        config = open(data_file, 'r').read()
+        config = load_vehicle_config(vehicle)
     except FileNotFoundError as error:
         logging.warning('get_vehicle_config(%s): %s', vehicle, error)
-    config = json.loads(config)
+        raise
     return config
 
 
@@ -118,22 +120,18 @@ def get_sg_config(vehicle):
     """
     Author:     robertdcurrier@gmail.com
     Created:    2022-06-22
-    Modified:   2022-08-01
+    Modified:   2026-10-19
     Notes:      Gets all SG config info for creating nc files. Vars, etc.
                 Added --config option for loading alternate config files
+                2026-10-19: Called per cast, so now cached via
+                gandalf_config_registry and only re-parsed on change.
     """
     logging.debug('get_sg_config(%s)', vehicle)
-    data_file = ("/data/gandalf/gandalf_configs/vehicles/%s/ngdac/sg_gdac.json"
-                 % vehicle)
     try:
-        config = open(data_file, 'r').read()
+        config = load_sg_config(vehicle)
     except FileNotFoundError as error:
         logging.warning('get_sg_config(%s): %s', vehicle, error)
-        sys.exit()
-    config = json.loads(config)
-    gkeys = config['global_attributes'].keys()
-    for gkey in gkeys:
-        logging.debug("get_sg_config(%s): Global %s", vehicle, gkey)
+        raise
     return config
 
 
@@ -379,17 +377,19 @@ def create_local_vars(dataset, sg_config):
 def read_sg_nc(vehicle, sgfile):
     """
     Created:    2022-07-26
-    Modified:   2023-02-23
+    Modified:   2026-10-19
     Author:     bob.currier@gcoos.org
     Notes:      Uses xarray to load vehicle-generated NetCDF files
+                2026-10-19: Returns None for a bad file instead of
+                sys.exit() so we skip just that dive
     """
     logging.debug('read_sg_nc(%s)', sgfile)
     try:
         sg_ds = xarray.open_dataset(sgfile, decode_cf=True, mask_and_scale=False,
                                     decode_times=False)
-    except:
+    except Exception:
         logging.warning('read_sg_nc(): Failed to read %s', sgfile)
-        sys.exit()
+        return None
 
     return sg_ds
 
@@ -771,6 +771,9 @@ def gandalf_sg2gdac_DIM(vehicle):
 
     for sgfile in sg_files:
         sg_ds = read_sg_nc(vehicle, sgfile)
+        if sg_ds is None:
+            # Not recorded in <vehicle>_files, so we try it again next run
+            continue
         validate = validate_ds(sgfile, vehicle, sg_ds)
 
         if validate == True:
@@ -796,7 +799,7 @@ def gandalf_sg2gdac_DIM(vehicle):
         collection = '%s_files' % vehicle
         fjson = '{"filename" : "%s"}' % sgfile
         db[collection].insert_one(json.loads(fjson))
-    client.close()
+    # 2026-10-19 Shared per-process client from connect_mongo(), so no close
 
 
 if __name__ == '__main__':
@@ -179,7 +179,7 @@ def sg_parse_files(vehicle, sg_files):
                 logging.warning('sg_parse_files(%s): MongoDB insert failed', vehicle)
             continue
     # Add close statement 2023-02-14
-    client.close()
+    # 2026-10-19 Not any more: connect_mongo() hands out a shared client
 
 
 def get_sg_files(vehicle):
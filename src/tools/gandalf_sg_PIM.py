@@ -32,7 +32,7 @@ from matplotlib import pyplot as plt
 from matplotlib import colors as colors
 from matplotlib import cm as cm
 from gandalf_utils import get_vehicle_config, get_sensor_config, flight_status
-from gandalf_slocum_local import dinkum_convert
+from gandalf_utils import get_sensor_lookup
 from geojson import Feature, Point, FeatureCollection, LineString
 from gandalf_mongo import connect_mongo, insert_record
 import warnings
@@ -43,12 +43,12 @@ def get_sensor_plot_range(vehicle, sensor):
     """
     Gets plot range for each sensor so we don't overshoot."""
     logging.info("get_sensor_plot_range(%s, %s)" % (vehicle, sensor))
-    sensors = get_sensor_config(vehicle)
-    for record in sensors:
-        if record['sensor'] == sensor:
-            sensor_plot_min = float(record['sensor_plot_min'])
-            sensor_plot_max = float(record['sensor_plot_max'])
-            return (sensor_plot_min, sensor_plot_max)
+    record = get_sensor_lookup(vehicle).get(sensor)
+    if record is None:
+        return None
+    sensor_plot_min = float(record['sensor_plot_min'])
+    sensor_plot_max = float(record['sensor_plot_max'])
+    return (sensor_plot_min, sensor_plot_max)
 
 
 def register_cmocean():
@@ -185,22 +185,17 @@ def plot_sensor(config, vehicle, sensor, df):
     fig = config_date_axis(config, vehicle)
     status = flight_status(vehicle)
 
-    # Get config settings
-    sensors = get_sensor_config(vehicle)
+    # Get config settings -- 2026-10-19 single lookup vs walking sensors
+    record = get_sensor_lookup(vehicle)[sensor]
     alt_colormap = config['gandalf']['plots']['alt_colormap']
     if alt_colormap:
-        for index, value in enumerate(sensors):
-            if value["sensor"] == sensor:
-                cmap = value["alt_colormap"]
+        cmap = record["alt_colormap"]
     else:
         cmap = 'jet'
 
     logging.info("plot_sensor(): using %s colormap for %s" % (cmap, sensor))
-    for index, value in enumerate(sensors):
-            if value["sensor"] == sensor:
-                log_scale = bool(value["log_scale"])
-                logging.debug("plot_sensor(%s): Log scale is %s" %
-                              (sensor, log_scale))
+    log_scale = bool(record["log_scale"])
+    logging.debug("plot_sensor(%s): Log scale is %s" % (sensor, log_scale))
 
     # Start and End date/time
     start_date = (time.strftime("%Y-%m-%d",
@@ -214,11 +209,8 @@ def plot_sensor(config, vehicle, sensor, df):
     logging.info("plot_sensor(): start_date %s" % start_date)
     logging.info("plot_sensor(): end_date %s" % end_date)
     # Title and subtitle
-    for record in sensors:
-        if (record['sensor'] == sensor):
-            subtitle_string = "%s %s" % (record['sensor_name'],
-                                         record['unit_string'])
-            break
+    subtitle_string = "%s %s" % (record['sensor_name'],
+                                 record['unit_string'])
 
     title_string = "%s %s to %s\n %s" % (config['gandalf']['public_name'],
                                          start_date, end_date, subtitle_string)
@@ -301,7 +293,8 @@ def chunk_it(vehicle):
         client = connect_mongo()
     except:
         logging.warning('chunk_it(): Failed to connect to MongoDB')
-        sys.exit()
+        # 2026-10-19: raise, not sys.exit(), so only this vehicle fails
+        raise
 
     db = client.gandalf
     numdocs = db[vehicle].count_documents({})
@@ -331,7 +324,7 @@ def gandalf_sg_plots(vehicle):
         client = connect_mongo()
     except:
         logging.warning('plot_sensor(): Failed to connect to MongoDB')
-        sys.exit()
+        raise
 
     db = client.gandalf
     logging.info('gandalf_sg_plots(%s): Creating DF from MongoDB collection', vehicle)
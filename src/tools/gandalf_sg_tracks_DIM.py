@@ -27,10 +27,10 @@ from matplotlib import pyplot as plt
 from matplotlib import colors as colors
 from matplotlib import cm as cm
 from gandalf_utils import get_vehicle_config, get_sensor_config, flight_status
-from gandalf_slocum_local import dinkum_convert
 from geojson import Feature, Point, FeatureCollection, LineString
 from gandalf_mongo import connect_mongo, insert_record
 from gandalf_utils_2 import get_modcomp_path
+from gandalf_publish import publish_geojson
 logging.basicConfig(level=logging.INFO)
 
 def slim_df(vehicle, data_frame):
@@ -58,15 +58,12 @@ def write_geojson_file(data_source, data):
     """
     Name:       write_geojson_file
     Author:     robertdcurrier@gmail.com
-    Modified:   2020-05-26
+    Modified:   2026-10-19
     Notes:      Writes out geojson file for Jquery AJAX loading
+                2026-10-19: Via gandalf_publish (compact, atomic, .gz/.br)
     """
     logging.info("write_geojson_file(%s)" % data_source)
-    fname = '/data/gandalf/deployments/geojson/%s.json' % data_source
-    outf = open(fname, 'w')
-    print(data, file=outf)
-    outf.flush()
-    outf.close()
+    publish_geojson(data_source, data)
 
 
 def gen_last_pos(vehicle, df):
@@ -74,11 +71,12 @@ def gen_last_pos(vehicle, df):
     Name:       gen_last_pos
     Author:     robertdcurrier@gmail.com
     Created:    2022-06-06
-    Modified:   2022-06-15
+    Modified:   2026-10-19
     Notes:      Makes last pos html and icon
                 2022-06-15: Added KeyError as USM SG not report eng_head
                 2022-06-20: Added latitude and longitude to properties so we
                 can use in new 'teleport' function on dashboard
+                2026-10-19: Infobox properties instead of html
     """
     logging.info('gen_last_pos(%s): max ctd_time %d',vehicle,
                  np.nanmax(df['ctd_time']))
@@ -131,63 +129,15 @@ def gen_last_pos(vehicle, df):
     last_pos.properties['style'] = (config['gandalf']['style'])
     last_pos.properties['currPosIcon'] = (config['gandalf']['currPosIcon'])
     last_pos.properties['iconSize'] = (config['gandalf']['iconSize'])
-    # HTML for InfoBox
-    last_pos.properties['html'] = """
-    <div class='infoBoxTitle'><span class='infoBoxTitle'>%s</span></div>
-    <center><img src=%s></img></center>
-    <hr>
-    <div class='infoBoxHeading'><span class='infoBoxHeading'>Status</span></div>
-    <table class='infoBoxTable'>
-    <tr>
-        <td class='td_infoBoxSensor'>Last Report:</td>
-        <td class='td_infoBoxData'>%s</td>
-    </tr>
-    <tr>
-        <td class='td_infoBoxSensor'>Operator:</td>
-        <td class='td_infoBoxData'>%s</td>
-    </tr>
-
-    <tr>
-        <td class='td_infoBoxSensor'>Vehicle Type:</td>
-        <td class='td_infoBoxData'>%s</td>
-    </tr>
-
-    <tr>
-        <td class='td_infoBoxSensor'>Project:</td>
-        <td class='td_infoBoxData'>%s</td>
-    </tr>
-    <tr>
-        <td class='td_infoBoxSensor'>Last Position:</td>
-        <td class='td_infoBoxData'>%sW %sN</td>
-    </tr>
-    <tr>
-        <td class='td_infoBoxSensor'>Bearing:</td>
-        <td class='td_infoBoxData'>%s degrees</td>
-    </tr>
-    <tr>
-        <td class='td_infoBoxSensor'>Data Source:</td>
-        <td class='td_infoBoxData'>%s</a>
-        </td>
-    </tr>
-    </table>
-    <div class = 'infoBoxBreakBar'>Science Plots</div>
-    <div class = 'infoBoxPlotDiv'>
-        <img class = 'infoBoxPlotImage'
-            src = '/static/images/infoBox2DPlot.png'
-            onclick="deployPlots('%s')">
-        </img>
-    </div>
-    <div class = 'infoBoxBreakBar'>Model Comparisons</div>
-    <div class = 'infoBoxPlotDiv'>
-        <img class = 'infoBoxPlotImage'
-            src = "%s"
-            onclick="modComps('%s')">
-        </img>
-    </div>
-
-    """ % (public_name, infobox_image, last_surfaced,
-           operator, vehicle_model, project, last_lon, last_lat, bearing,
-           data_source, vehicle,mod_comp_path, mod_comp_path)
+    # 2026-10-19 InfoBox is rendered in the browser from these. See
+    # static/js/infobox.js
+    last_pos.properties['infobox'] = 'vehicle'
+    last_pos.properties['infobox_image'] = infobox_image
+    last_pos.properties['operator'] = operator
+    last_pos.properties['vehicle_model'] = vehicle_model
+    last_pos.properties['project'] = project
+    last_pos.properties['heading'] = bearing
+    last_pos.properties['mod_comp_path'] = mod_comp_path
     return(last_pos)
 
 
@@ -209,7 +159,8 @@ def chunk_it(vehicle):
         client = connect_mongo()
     except:
         logging.warning('chunk_it(): Failed to connect to MongoDB')
-        sys.exit()
+        # 2026-10-19: raise, not sys.exit(), so only this vehicle fails
+        raise
 
     db = client.gandalf
     numdocs = db[vehicle].count_documents({})
@@ -282,6 +233,8 @@ def gandalf_sg_track(vehicle):
     track = LineString(coords)
     track = Feature(geometry=track, id='track')
     track.properties['style'] = (config['gandalf']['style'])
+    # 2026-10-19 So positions.js can find the track to extend
+    track.properties['vehicle'] = config['gandalf']['vehicle']
 
     last_pos = gen_last_pos(vehicle, df)
     features.append(last_pos)
@@ -48,8 +48,9 @@ def prune_orphans(config, wayward_files, file_type):
         try:
             os.remove(file_name)
         except:
-            logging.debug("Failed to remove %s" % file_name)
-            sys.exit()
+            # 2026-10-19: One stubborn orphan isn't worth the whole run
+            logging.warning("Failed to remove %s" % file_name)
+            continue
 
 
 def find_orphans(config, flight_names, science_names):
@@ -17,117 +17,42 @@ import pandas as pd
 from subprocess import Popen, PIPE
 from natsort import natsorted
 from gandalf_utils import get_vehicle_config, flight_status
+from gandalf_dinkum_decoder import CACHE_DIR, decode_segments, verify_decoder
+from gandalf_dba_reader import read_dba_frames
+from gandalf_segment_manifest import refresh_manifest, get_manifest
+from gandalf_segment_manifest import get_pairs, get_orphans, get_older_than
+from gandalf_segment_manifest import forget_paths, mark_segment
+from gandalf_segment_manifest import reset_segments
+from gandalf_metrics import add_rows, add_subprocesses
 logging.basicConfig(level=logging.WARNING)
 
 
-def prune_orphans(config, wayward_files, file_type):
-    """
-    Created:    2019-02-25
-    Author:     bob.currier@gcoos.org
-    Notes:      Removes mis-matched dbd/ebd or sbd/tbd files
-                to allow for one-to-one merging
-    """
-    vehicle = config['gandalf']['vehicle']
-    status = flight_status(vehicle)
-    logging.info('prune_orphans()...')
-
-    if status == 'deployed':
-        root_dir = config['gandalf']['deployed_data_dir']
-        data_dir = '%s/binary_files/%s/' % (root_dir, file_type)
-    if status == 'recovered':
-        root_dir = config['gandalf']['post_data_dir_root']
-        data_dir = '%s/binary_files/%s' % (root_dir, file_type)
-        logging.debug("prune_orphans(): Using %s" % data_dir)
-
-    for the_file in wayward_files:
-        file_name = "%s/%s.%s" % (data_dir, the_file, file_type)
-        logging.debug("prune_orphans(): Pruning %s" % file_name)
-        try:
-            os.remove(file_name)
-        except:
-            logging.debug("Failed to remove %s" % file_name)
-            sys.exit()
-
-
-def find_orphans(config, flight_names, science_names):
-    """
-    Created:    2019-02-25
-    Author:     bob.currier@gcoos.org
-    Notes:      Finds mis-matched dbd/ebd or sbd/tbd files
-                Returns flight names and science names
-    """
-    flight = []
-    science = []
-    vehicle = config['gandalf']['vehicle']
-    status = flight_status(vehicle)
-    logging.info('find_orphans()...')
-    if status == 'deployed':
-        flight_file_type = 'sbd'
-        science_file_type = 'tbd'
-    if status == 'recovered':
-        flight_file_type = 'dbd'
-        science_file_type = 'ebd'
-
-    for the_file in flight_names:
-        the_file = ((os.path.basename(the_file)))
-        the_file = ((os.path.splitext(the_file)[0]))
-        flight.append(the_file)
-
-    for the_file in science_names:
-        the_file = ((os.path.basename(the_file)))
-        the_file = ((os.path.splitext(the_file)[0]))
-        science.append(the_file)
-
-    logging.debug("find_orphans(%s): %d flight, %d science" %
-          (vehicle, len(flight_names), len(science_names)))
-
-    # Flight file w/no corresponding science
-    bad_flight = (set(flight) - set(science))
-    if len(bad_flight) != 0:
-        prune_orphans(config, bad_flight, flight_file_type)
-
-    # Science file w/no corresponding flight
-    bad_science = (set(science) - set(flight))
-    if len(bad_science) != 0:
-        prune_orphans(config, bad_science, science_file_type)
-    else:
-        logging.debug("find_orphans(%s): Flight and Science Match!" % vehicle)
-
-
 def check_bd_mismatch(config, vehicle):
     """
     Created:    2019-02-25
+    Modified:   2026-10-19
     Author:     bob.currier@gcoos.org
     Notes:      Gets all *bd file names. File extension depends
                 on deployment status.  Checks for mismatched
                 lengths of flight and science. If mismatch sends
                 file names to find_orphans()
+                2026-10-19: Orphans now come from the segment manifest and
+                are only reported. The parse functions only take paired
+                segments, so there's no need to delete files whose partner
+                simply hasn't arrived yet.
     """
-    status = flight_status(vehicle)
     logging.info("check_bd_mismatch(%s)" % vehicle)
-
-    if status == 'deployed':
-        root_dir = config['gandalf']['deployed_data_dir']
-        flight_file_glob = root_dir + '/binary_files/sbd/*.sbd'
-        science_file_glob = root_dir + '/binary_files/tbd/*.tbd'
-    if status == 'recovered':
-        root_dir = config['gandalf']['post_data_dir_root']
-        flight_file_glob = root_dir + '/binary_files/dbd/*.dbd'
-        science_file_glob = root_dir + '/binary_files/ebd/*.ebd'
-
-    flight_bd_names = natsorted(glob.glob(flight_file_glob))
-    science_bd_names = natsorted(glob.glob(science_file_glob))
-    # We need to do this with file names, not length as we've run
-    # into a bug wherein there are equal file numbers but still
-    # mismatches in the names
-    # 2023-09-23 Same bug showing with sedna. 133 sbd/tbd but name mismatch
-
-    if (len(flight_bd_names) != len(science_bd_names)):
-        # Find orphans, yo
-        logging.warning("check_bd_mismatch(%s): Mismatch. Culling orphans." % vehicle)
-        find_orphans(config, flight_bd_names, science_bd_names)
+    conn, flight_type, science_type = get_manifest(config, vehicle)
+    orphans = get_orphans(conn, flight_type, science_type)
+    conn.close()
+    if len(orphans) != 0:
+        logging.warning("check_bd_mismatch(%s): %d unpaired files" %
+                        (vehicle, len(orphans)))
+        for orphan in orphans:
+            logging.debug("check_bd_mismatch(%s): %s" % (vehicle, orphan))
     else:
         logging.debug("check_bd_mismatch(%s): No orphans" % vehicle)
+    return orphans
 
 
 def parse_flight(config, vehicle):
@@ -149,8 +74,6 @@ def parse_flight(config, vehicle):
         dba_sensor_filter = config['gandalf']['dba_sensor_filter']
         root_dir = config['gandalf']['deployed_data_dir']
         data_dir = '%s/binary_files/sbd/' % root_dir
-        file_glob = data_dir + '*.sbd'
-        file_names = natsorted(glob.glob(file_glob))
         flight_sensor_list = " ".join(config['gandalf']['flight_sensor_list'])
     # Post-Process
     if status == 'recovered':
@@ -158,14 +81,16 @@ def parse_flight(config, vehicle):
         dba_sensor_filter = config['gandalf']['dba_sensor_filter']
         root_dir = config['gandalf']['post_data_dir_root']
         data_dir = '%s/binary_files/dbd/' % root_dir
-        file_glob = data_dir + '*.dbd'
-        file_names = natsorted(glob.glob(file_glob))
         flight_sensor_list = " ".join(config['gandalf']
                                       ['postprocess_flight_sensor_list'])
     logging.debug( "parse_flight(): root_dir = %s" % root_dir)
     logging.debug( "parse_flight(): data_dir = %s" % data_dir)
-    logging.debug( "parse_flight(): file_glob = %s" % file_glob)
     logging.debug( "parse_flight(): flight_sensor_list = %s" % flight_sensor_list)
+    # Paired segments only, straight from the manifest
+    conn, flight_type, science_type = get_manifest(config, vehicle)
+    file_names = [pair[1] for pair in get_pairs(conn, flight_type,
+                                                science_type)]
+    conn.close()
 
     for data_file in file_names:
         the_file  = str.lower(os.path.split(data_file)[1])
@@ -183,6 +108,7 @@ def parse_flight(config, vehicle):
         logging.info(("parse_flight(%s): running dbd2asc on %s") % (vehicle,
                                                                     data_file))
 
+        add_subprocesses()
         the_pipe = Popen(the_command, shell=True, stdin=PIPE,
                              stdout=dba_file, stderr=PIPE)
         Popen.wait(the_pipe)
@@ -206,9 +132,6 @@ def parse_science(config, vehicle):
         dba_sensor_filter = config['gandalf']['dba_sensor_filter']
         root_dir = config['gandalf']['deployed_data_dir']
         data_dir = '%s/binary_files/tbd/' % root_dir
-        file_glob = data_dir + '*.tbd'
-        # Move to using TCL sort as getmtime sometimes fails
-        file_names = natsorted(glob.glob(file_glob))
         science_sensor_list = " ".join(config['gandalf']['science_sensor_list'])
 
     # Post-Process
@@ -217,17 +140,19 @@ def parse_science(config, vehicle):
         dba_sensor_filter = config['gandalf']['dba_sensor_filter']
         root_dir = config['gandalf']['post_data_dir_root']
         data_dir = '%s/binary_files/ebd/' % root_dir
-        file_glob = data_dir + '*.ebd'
-        file_names = natsorted(glob.glob(file_glob))
         science_dba = '%s/processed_data/science.dba' % (root_dir)
         science_sensor_list = " ".join(config['gandalf']
                                       ['postprocess_science_sensor_list'])
 
     logging.debug("parse_science(): root_dir = %s" % root_dir)
     logging.debug("parse_science(): data_dir = %s" % data_dir)
-    logging.debug("parse_science(): file_glob = %s" % file_glob)
     logging.debug("parse_science(): science_sensor_list = %s" %
                  science_sensor_list)
+    # Paired segments only, straight from the manifest
+    conn, flight_type, science_type = get_manifest(config, vehicle)
+    file_names = [pair[2] for pair in get_pairs(conn, flight_type,
+                                                science_type)]
+    conn.close()
 
     index = 0
     for data_file in file_names:
@@ -247,6 +172,7 @@ def parse_science(config, vehicle):
                                                                      data_file))
         logging.debug(("parse_science(): the_command = %s") % the_command)
 
+        add_subprocesses()
         the_pipe = Popen(the_command, shell=True, stdin=PIPE,
                          stdout=dba_file, stderr=PIPE)
         Popen.wait(the_pipe)
@@ -256,6 +182,10 @@ def parse_science(config, vehicle):
 def merge_flight_science(config, vehicle):
     """
     Merges flight.dbas and science.dbas into merged.dba files
+    2026-10-19: Pairs come from the segment manifest, which also records
+    which merged DBA each segment went into.
+    2026-10-19: No pairs means nothing new to merge, so return rather than
+    sys.exit() and let pandas_gen_csv carry on with what's there.
     """
     logging.warning("merge_flight_science(%s)" % vehicle)
     status = flight_status(vehicle)
@@ -263,81 +193,88 @@ def merge_flight_science(config, vehicle):
 
     if status == 'deployed':
         root_dir = config['gandalf']['deployed_data_dir']
-        flight_file_glob = root_dir + '/processed_data/dba/flight/*.dba'
-        science_file_glob = root_dir + '/processed_data/dba/science/*.dba'
     if status == 'recovered':
         root_dir = config['gandalf']['post_data_dir_root']
-        flight_file_glob = root_dir + '/processed_data/dba/flight/*.dba'
-        science_file_glob = root_dir + '/processed_data/dba/science/*.dba'
-
-
-    # Use natsort so we don't get a lexigraphical sort
-    flight_dba_names =  natsorted(glob.glob(flight_file_glob))
-    science_dba_names = natsorted(glob.glob(science_file_glob))
-    if(len(flight_dba_names) == 0 or len(science_dba_names) == 0):
-        logging.warning('merge_flight_science(): No files found. Aborting...')
-        sys.exit()
-        logging.debug("%d flight and %d science dba files" % (len(flight_dba_names),
-            len(science_dba_names)))
 
+    conn, flight_type, science_type = get_manifest(config, vehicle)
+    pairs = get_pairs(conn, flight_type, science_type)
+    if len(pairs) == 0:
+        logging.warning('merge_flight_science(): No files found. Skipping...')
+        conn.close()
+        return
 
     # Merge matching pairs of flight.dba and science.dba
     index = 0
-    for flight_dba, science_dba in zip(flight_dba_names, science_dba_names):
-        if os.path.basename(flight_dba) != os.path.basename(science_dba):
-            logging.warning("merge_flight_science(): Mismatched DBA files. Skipping...")
-            print(flight_dba, science_dba)
+    for segment, _, _ in pairs:
+        flight_dba = '%s/processed_data/dba/flight/%s.dba' % (root_dir, segment)
+        science_dba = ('%s/processed_data/dba/science/%s.dba' %
+                       (root_dir, segment))
+        if not (os.path.exists(flight_dba) and os.path.exists(science_dba)):
+            logging.warning("merge_flight_science(): Missing DBA for %s. Skipping..."
+                            % segment)
+            mark_segment(conn, segment, 'failed')
             continue
-        the_file  = str.lower(os.path.split(flight_dba)[1])
-        the_file  = str.lower(os.path.splitext(the_file)[0])
-        dba_file = (('%s/processed_data/dba/merged/%07d.dba') %
-                    (root_dir, index))
-        dba_file = open(dba_file, 'wb', 0)
+        merged_dba = (('%s/processed_data/dba/merged/%07d.dba') %
+                      (root_dir, index))
+        dba_file = open(merged_dba, 'wb', 0)
 
         the_command = '%s %s %s' % (dba_merge, flight_dba, science_dba)
         logging.debug("merge_flight_science(): running dba_merge on %s, %s" %
                      (os.path.basename(flight_dba), os.path.basename(science_dba)))
         logging.debug(("the_command: %s") % the_command)
 
+        add_subprocesses()
         the_pipe = Popen(the_command, shell=True, stdin=PIPE,
         stdout=dba_file, stderr=PIPE)
         Popen.wait(the_pipe)
         dba_file.close()
+        mark_segment(conn, segment, 'merged', merged_dba)
         index += 1
+    conn.commit()
+    conn.close()
 
 
 def pandas_gen_csv(config, vehicle):
     """
     Use Pandas to deal with DBA mess
+    2026-10-19: Now via gandalf_dba_reader so dtypes come from the DBA
+    bytes row instead of being guessed. Merged DBAs come from the segment
+    manifest, and each segment's row range in sensors.csv goes back into it.
     """
     status = flight_status(vehicle)
     logging.warning("pandas_gen_csv(%s)" % vehicle)
 
     if status == 'deployed':
         root_dir = config['gandalf']['deployed_data_dir']
-        merged_file_glob = root_dir + '/processed_data/dba/merged/*.dba'
-        merged_dba_names =  natsorted(glob.glob(merged_file_glob))
 
      # Post-Process
     if status == 'recovered':
         root_dir = config['gandalf']['post_data_dir_root']
-        merged_file_glob = root_dir + '/processed_data/dba/merged/*.dba'
-        merged_dba_names =  natsorted(glob.glob(merged_file_glob))
-
-    for the_file in merged_dba_names:
-        # Check for zero-length files
-        if (os.path.getsize(the_file)) == 0:
-            logging.debug("pandas_gen_csv(%s): Dropping zero length file %s" %
-                  (vehicle, the_file))
-            os.remove(the_file)
-            merged_dba_names =  natsorted(glob.glob(merged_file_glob))
-            #merged_dba_names.remove(the_file)
-    try:
-        df = pd.concat([pd.read_csv(f, sep=' ', header=14, skiprows=[15,16])
-                        for f in merged_dba_names], sort=True)
-    except:
+
+    conn, flight_type, science_type = get_manifest(config, vehicle)
+    # The numpy decoder's 'decoded' rows have no DBA
+    segments = dict((row[1], row[0]) for row in conn.execute(
+        "SELECT segment, dba_file FROM segments WHERE file_type = ? "
+        "AND status IN ('merged', 'decoded') AND dba_file IS NOT NULL",
+        (flight_type,)))
+    # Typed, header-driven load. sensors_csv_list in deployment.json
+    # limits sensors.csv to the sensors we actually use.
+    columns = config['gandalf'].get('sensors_csv_list')
+    frames = read_dba_frames(list(segments), columns)
+    if len(frames) == 0:
         logging.warning(f'pandas_gen_csv({vehicle}): Failed to concat')
+        conn.close()
         return
+    row_start = 0
+    for merged_dba, frame in frames:
+        mark_segment(conn, segments[merged_dba], 'decoded', merged_dba,
+                     row_start, len(frame))
+        row_start += len(frame)
+    conn.commit()
+    conn.close()
+    df = pd.concat([frame for _, frame in frames], sort=True,
+                   ignore_index=True)
+    add_rows(len(df))
     # Write it out
     csv_file = root_dir + '/processed_data/sensors.csv'
     logging.info("pandas_gen_csv(): Writing to sensors.csv")
@@ -381,6 +318,10 @@ def clean_dba_files(config, vehicle):
     dfiles = glob.glob(dpath)
     for dba_file in dfiles:
         os.remove(dba_file)
+    # Nothing is decoded any more as far as the manifest is concerned
+    conn, _, _ = get_manifest(config, vehicle)
+    reset_segments(conn)
+    conn.close()
 
 
 def wipe_old_bd(config, vehicle):
@@ -390,56 +331,105 @@ def wipe_old_bd(config, vehicle):
     operators are slobs and don't clean up
     their from-glider folders after each
     deployment.
+    2026-10-19: mtimes come from the segment manifest, no glob/getmtime.
     """
     logging.info("wipe_old_bd(%s)" % vehicle)
-    status = flight_status(vehicle)
     # Only use files > mission_start_time
     plot_start_date = int(time.mktime(time.strptime(config['gandalf']
                                                     ['data_start_date'],
                                                     '%Y%m%dT%H%M')))
-    files_removed = 0
+    conn, _, _ = get_manifest(config, vehicle)
+    removed = []
+    for bd_file in get_older_than(conn, plot_start_date):
+        logging.debug("wipe_old_bd(%s): Removing %s" % (vehicle, bd_file))
+        try:
+            os.remove(bd_file)
+        except FileNotFoundError:
+            pass
+        removed.append(bd_file)
+    forget_paths(conn, removed)
+    conn.close()
+    logging.debug("wipe_old_bd(%s): Removed %d files" % (vehicle, len(removed)))
+
+
+def decode_binaries(config, vehicle):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      In-process alternative to parse_flight, parse_science,
+                merge_flight_science and pandas_gen_csv. Decodes every
+                flight/science pair straight to numpy with
+                gandalf_dinkum_decoder, spread across a process pool, and
+                writes sensors.csv. No DBA files, no dbd2asc. Pairs and
+                row ranges go through the segment manifest.
+                2026-10-19: Every sensor list has to pass verify_decoder
+                (one dbd2asc run per list) first. Returns False without
+                writing anything if one doesn't, so the caller can use
+                the dbd2asc pipeline instead.
+    """
+    status = flight_status(vehicle)
+    logging.warning("decode_binaries(%s)" % vehicle)
     if status == 'deployed':
         root_dir = config['gandalf']['deployed_data_dir']
-        flight_data_dir = '%s/binary_files/sbd/' % root_dir
-        flight_file_glob = flight_data_dir + '*.sbd'
-        flight_file_names = natsorted(glob.glob(flight_file_glob))
-        science_data_dir = '%s/binary_files/tbd/' % root_dir
-        science_file_glob = science_data_dir + '*.tbd'
-        science_file_names = natsorted(glob.glob(science_file_glob))
-
+        flight_sensors = config['gandalf']['flight_sensor_list']
+        science_sensors = config['gandalf']['science_sensor_list']
     if status == 'recovered':
         root_dir = config['gandalf']['post_data_dir_root']
-        flight_data_dir = '%s/binary_files/dbd/' % root_dir
-        flight_file_glob = flight_data_dir + '*.dbd'
-        flight_file_names = natsorted(glob.glob(flight_file_glob))
-        science_data_dir = '%s/binary_files/ebd/' % root_dir
-        science_file_glob = science_data_dir + '*.ebd'
-        science_file_names = natsorted(glob.glob(science_file_glob))
-
-    # sbd/dbd
-    for bd_file in flight_file_names:
-        file_time = os.path.getmtime(bd_file)
-        # have to compare like to like here...
-        if file_time < plot_start_date:
-            logging.debug("wipe_old_bd(%s): Removing %s" % (vehicle, bd_file))
-            os.remove(bd_file)
-            files_removed += 1
-    # tbd/ebd
-    for bd_file in science_file_names:
-        file_time = os.path.getmtime(bd_file)
-        if file_time < plot_start_date:
-            logging.debug("wipe_old_bd(%s): Removing %s" % (vehicle, bd_file))
-            os.remove(bd_file)
-            files_removed += 1
-    logging.debug("wipe_old_bd(%s): Removed %d files" % (vehicle, files_removed))
+        flight_sensors = config['gandalf']['postprocess_flight_sensor_list']
+        science_sensors = config['gandalf']['postprocess_science_sensor_list']
+    cache_dir = config['gandalf'].get('dinkum_cache_dir', CACHE_DIR)
+    processes = config['gandalf'].get('decode_processes')
+    conn, flight_type, science_type = get_manifest(config, vehicle)
+    pairs = get_pairs(conn, flight_type, science_type)
+    dbd2asc = config['gandalf']['dbd2asc']
+    for _, flight_file, science_file in pairs:
+        if not (verify_decoder(flight_file, dbd2asc, cache_dir) and
+                verify_decoder(science_file, dbd2asc, cache_dir)):
+            logging.error(f'decode_binaries({vehicle}): numpy decoder does '
+                          f'not match dbd2asc on {flight_file}, using dbd2asc')
+            conn.close()
+            return False
+    frames = decode_segments([pair[1:] for pair in pairs], flight_sensors,
+                             science_sensors, cache_dir, processes)
+    row_start = 0
+    for (segment, _, _), frame in zip(pairs, frames):
+        if frame is None:
+            mark_segment(conn, segment, 'failed')
+            continue
+        mark_segment(conn, segment, 'decoded', None, row_start, len(frame))
+        row_start += len(frame)
+    conn.commit()
+    conn.close()
+    frames = [frame for frame in frames if frame is not None]
+    if len(frames) == 0:
+        logging.warning(f'decode_binaries({vehicle}): No segments decoded')
+        return True
+    df = pd.concat(frames, sort=True, ignore_index=True)
+    add_rows(len(df))
+    # Write it out
+    csv_file = root_dir + '/processed_data/sensors.csv'
+    logging.info("decode_binaries(): Writing to sensors.csv")
+    df.to_csv(csv_file, na_rep='NaN',index=False)
+    return True
 
 
 def process_binaries(config, vehicle):
     """
     Main function.
+    Set gandalf.binary_decoder to 'numpy' in deployment.json to decode
+    in-process instead of via dbd2asc/dba_merge. We fall back to dbd2asc
+    if the decoder doesn't match it on the vehicle's sensor lists.
     """
     logging.info("process_binaries(%s)" % vehicle)
     status = flight_status(vehicle)
+    # One directory scan per run, every stage after this asks the manifest
+    conn, _, _ = refresh_manifest(config, vehicle)
+    conn.close()
+    if config['gandalf'].get('binary_decoder') == 'numpy':
+        if status == 'deployed':
+            wipe_old_bd(config, vehicle)
+        if decode_binaries(config, vehicle):
+            return
     if status == 'deployed':
         clean_dba_files(config, vehicle)
         wipe_old_bd(config, vehicle)
@@ -17,6 +17,8 @@ from subprocess import Popen, PIPE
 from gandalf_utils import get_vehicle_config
 from gandalf_utils import get_deployed_slocum
 from gandalf_utils import get_deployment_status_all
+from gandalf_segment_manifest import refresh_manifest
+from gandalf_metrics import stage, write_run_report
 
 
 def use_wget(vehicle, v_config):
@@ -121,6 +123,9 @@ def harvest_slocum(vehicle):
         use_rsync(vehicle, v_config)
     if v_config['gandalf']['harvest_method'] == 'wget':
         use_wget(vehicle, v_config)
+    # Record what arrived so later stages don't have to glob for it
+    conn, _, _ = refresh_manifest(v_config, vehicle)
+    conn.close()
 
 
 def harvest():
@@ -130,9 +135,11 @@ def harvest():
     deployed = get_deployment_status_all()
     slocum_gliders = get_deployed_slocum(deployed)
     for vehicle in slocum_gliders:
-        harvest_slocum(vehicle)
+        with stage('harvest', vehicle):
+            harvest_slocum(vehicle)
 
 
 if __name__ == '__main__':
     harvest()
+    write_run_report('slocum_harvest')
 
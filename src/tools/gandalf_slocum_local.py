@@ -27,17 +27,23 @@ from gandalf_calc_sensors import calc_density
 from gandalf_calc_sensors import calc_soundvel
 from gandalf_utils import get_vehicle_config, flight_status
 from gandalf_utils import dinkum_convert
-from gandalf_utils_2 import get_modcomp_path, eez_early_warning
+from gandalf_utils_2 import get_modcomp_path
+from gandalf_eez import eez_distances, get_eez_threshold
+from gandalf_metrics import stage
 from gandalf_slocum_to_kml import parse_log_files, get_log_files, slocum_kmz
 
+# No binary processing for these. Module level so the MCP job tasks see it.
+SKIP_LIST = ['ng655', 'ng427']
+
 
 def make_slocum_surf_marker(row, config):
     """
     Name:       make_surf_marker
     Author:     robertdcurrier@gmail.com
     Created:    2019-01-04
-    Modified:   2019-01-04
+    Modified:   2026-10-19
     Notes:      Makes marker with infobox html for each report
+                2026-10-19: Infobox properties only, infobox.js renders
     """
     point = Point([float(row['longitude']), float(row['latitude'])])
     surf_marker = Feature(geometry=point, id='surf_marker')
@@ -47,24 +53,15 @@ def make_slocum_surf_marker(row, config):
     else:
         last_surfaced = 'NaN'
 
-    infobox_image = config["gandalf"]["infoBoxImage"]
-    surf_marker.properties['html'] = """
-        <center><img src='%s'></img></center>
-        <hr>
-        <h5><center><span class='infoBoxHeading'>Status</span></center></h5>
-        <table class='infoBoxTable'>
-        <tr><td class='td_infoBoxSensor'>Vehicle:</td><td>%s</td></tr>
-        <tr><td class='td_infoBoxSensor'>Date/Time:</td><td>%s</td></tr>
-        <tr><td class='td_infoBoxSensor'>Because Why:</td><td>%s</td></tr>
-        <tr><td class='td_infoBoxSensor'>Mission:</td><td>%s</td></tr>
-        <tr><td class='td_infoBoxSensor'>Position:</td><td>%0.4fW/%0.4fN</td></tr>
-        <tr><td class='td_infoBoxSensor'>WP Range:</td><td>%0.2f meters</td></tr>
-        <tr><td class='td_infoBoxSensor'>WP Bearing:</td><td>%d degrees</td></tr>
-        </table>
-        """ % (infobox_image, config['gandalf']['public_name'], last_surfaced,
-               row['because_why'], row['mission_name'], row['longitude'],
-               row['latitude'], float(row['waypoint_range']),
-               int(row['waypoint_bearing']))
+    # 2026-10-19 Rendered client side by the surf_report template
+    surf_marker.properties['infobox'] = 'surf_report'
+    surf_marker.properties['infobox_image'] = config["gandalf"]["infoBoxImage"]
+    surf_marker.properties['public_name'] = config['gandalf']['public_name']
+    surf_marker.properties['surf_time'] = last_surfaced
+    surf_marker.properties['because_why'] = row['because_why']
+    surf_marker.properties['mission_name'] = row['mission_name']
+    surf_marker.properties['waypoint_range'] = float(row['waypoint_range'])
+    surf_marker.properties['waypoint_bearing'] = int(row['waypoint_bearing'])
     return surf_marker
 
 
@@ -73,7 +70,7 @@ def make_local_feature(data_frame, config):
     Name:       make_local_feature()
     Author:     bob.currier@gcoos.org
     Created:    2018-07-01
-    Modified:   2022-06-21
+    Modified:   2026-10-19
     Notes:      Changed this to match the new version from NavOcean work.
                 We have separate features for track, lastPos and surface reports.
                 This allows a clean way to handle all features in gandalf.js by
@@ -81,6 +78,8 @@ def make_local_feature(data_frame, config):
                 to 'track', 'last_pos' and 'surf_marker.'
                 2022-06-21: Added latitude, longitude and teleport_zoom to
                 features for use with new dashboard 'Teleport' function.
+                2026-10-19: No more html/waypoint_html, the infobox is
+                built client side from the properties.
     """
 
     coords = []
@@ -136,6 +135,8 @@ def make_local_feature(data_frame, config):
     track = LineString(coords)
     track = Feature(geometry=track, id='track')
     track.properties['style'] = (config['gandalf']['style'])
+    # 2026-10-19 So positions.js can find the track to extend
+    track.properties['vehicle'] = config['gandalf']['vehicle']
     features.append(track)
     """
     # Surface markers
@@ -156,11 +157,19 @@ def make_local_feature(data_frame, config):
     last_pos = Feature(geometry=last_pos, id='last_pos')
 
     # 2023-09-20-2023 Implemeted EEZ warning
-    eez = eez_early_warning(vehicle, [last_lat, last_lon])
-    if eez:
+    # 2026-10-19 Distances for every surfacing in one call. Last row is
+    # last_pos, the track minimum tells us if we've been close before.
+    eez_dist = eez_distances(data_frame['latitude'].astype(float),
+                             data_frame['longitude'].astype(float))
+    eez_threshold = get_eez_threshold(vehicle)
+    if eez_dist[-1] < eez_threshold:
+        logging.warning("make_local_feature(%s): EEZ WARNING %d", vehicle,
+                        eez_dist[-1])
         last_pos.properties['eez_early_warning'] = True
     else:
         last_pos.properties['eez_early_warning'] = False
+    last_pos.properties['eez_distance'] = round(float(eez_dist[-1]), 1)
+    last_pos.properties['eez_min_distance'] = round(float(eez_dist.min()), 1)
 
     deployment_date = (time.strftime("%Y-%m-%d",
                        time.strptime(config["trajectory_datetime"],
@@ -183,7 +192,8 @@ def make_local_feature(data_frame, config):
     last_pos.properties['deployment_date'] = deployment_date
     last_pos.properties['last_surfaced'] = last_surfaced
     last_pos.properties['days_wet'] = days_wet
-    last_pos.properties['plot_url'] = config['gandalf']['plots']['deployed_plot_dir']
+    # 2026-10-19 Plots are rendered on demand; add /<sensor>.png
+    last_pos.properties['plot_url'] = '/plots/%s' % config['gandalf']['vehicle']
     last_pos.properties['kmz_url'] = (config['gandalf']['kmz_url'])
     last_pos.properties['latitude'] = last_lat
     last_pos.properties['longitude'] = last_lon
@@ -191,63 +201,14 @@ def make_local_feature(data_frame, config):
     last_pos.properties['waypoint_point'] = waypoint_point
     last_pos.properties['waypoint_range'] = waypoint_range
     last_pos.properties['waypoint_bearing'] = waypoint_bearing
-    last_pos.properties['waypoint_html'] = """
-	<table class='infoBoxTable'>
-        <h5><center><span class='infoBoxHeading'>%s waypoint</span></center></h5>
-        <tr><td class='td_infoBoxSensor'>Position:</td><td>%0.4fW/%0.4fN</td></tr>
-        </table>
-    """ % (last_pos.properties['public_name'], waypoint_lon, waypoint_lat)
-    last_pos.properties['html'] = """
-    <div class='infoBoxTitle'><span class='infoBoxTitle'>%s</span></div>
-    <center><img src=%s></img></center>
-    <hr>
-    <div class='infoBoxHeading'><span class='infoBoxHeading'>Status</span></div>
-    <table class='infoBoxTable'>
-    <tr>
-        <td class='td_infoBoxSensor'>Last Report:</td>
-        <td class='td_infoBoxData'>%s</td>
-    </tr>
-    <tr>
-        <td class='td_infoBoxSensor'>Because Why:</td>
-        <td class='td_infoBoxData'>%s</td>
-    </tr>
-    <tr>
-        <td class='td_infoBoxSensor'>Mission:</td>
-        <td class='td_infoBoxData'>%s</td>
-    </tr>
-    <tr>
-        <td class='td_infoBoxSensor'>Last Position:</td>
-        <td class='td_infoBoxData'>%sW %sN</td>
-    </tr>
-    <tr>
-        <td class='td_infoBoxSensor'>Waypoint:</td>
-        <td class='td_infoBoxData'>%skm at %s degrees</td>
-    </tr>
-
-    <tr>
-        <td class='td_infoBoxSensor'>Data Source:</td>
-        <td class='td_infoBoxData'><a href="https://gliders.ioos.us/map">%s</a>
-        </td>
-    </tr>
-    </table>
-    <div class = 'infoBoxBreakBar'>Science Plots</div>
-    <div class = 'infoBoxPlotDiv'>
-        <img class = 'infoBoxPlotImage'
-            src = '/static/images/infoBox2DPlot.png'
-            onclick="deployPlots('%s')">
-        </img>
-    </div>
-    <div class = 'infoBoxBreakBar'>Model Comparisons</div>
-    <div class = 'infoBoxPlotDiv'>
-        <img class = 'infoBoxPlotImage'
-            src = '%s'
-            onclick="modComps('%s')">
-        </img>
-    </div>
-
-    """ % (public_name, infobox_image, last_surfaced, because_why, mission_name,
-           last_lon, last_lat, waypoint_range, waypoint_bearing, data_source,
-           vehicle,mod_comp_path,mod_comp_path)
+    # 2026-10-19 InfoBox is rendered in the browser from these. See
+    # static/js/infobox.js
+    last_pos.properties['infobox'] = 'vehicle'
+    last_pos.properties['infobox_image'] = infobox_image
+    last_pos.properties['because_why'] = because_why
+    last_pos.properties['mission_name'] = mission_name
+    last_pos.properties['data_source_url'] = 'https://gliders.ioos.us/map'
+    last_pos.properties['mod_comp_path'] = mod_comp_path
     features.append(last_pos)
     fC = FeatureCollection(features)
     return fC
@@ -283,18 +244,20 @@ def slocum_process_local(vehicle_list):
     reports and geoJSON generation are done in
     get_slocum_surfreps
     """
-    skip_list = ['ng655', 'ng427']
     for vehicle in vehicle_list:
         logging.info("slocum_process_local(%s)" % vehicle)
         config = get_vehicle_config(vehicle)
         mod_comp_path = get_modcomp_path(config)
         #
-        if vehicle not in skip_list:
-            process_binaries(config, vehicle)
-            calc_salinity(config, vehicle)
-            calc_density(config, vehicle)
-            calc_soundvel(config, vehicle)
-            slocum_kmz(vehicle)
+        if vehicle not in SKIP_LIST:
+            with stage('decode', vehicle):
+                process_binaries(config, vehicle)
+            with stage('calc', vehicle):
+                calc_salinity(config, vehicle)
+                calc_density(config, vehicle)
+                calc_soundvel(config, vehicle)
+            with stage('kmz', vehicle):
+                slocum_kmz(vehicle)
 
 def write_local_geojson(vehicle, data):
     """
@@ -6,10 +6,13 @@ PostGreSQL table
 Name:       gandalf_slocum_plots_v2
 Author:     bob.currier@gcoos.org
 Created:    2018-10-10
-Modified:   2022-10-17
+Modified:   2026-10-19
             Changed logging.debug() to logging.debug/info and dropped
             all print() statements
             Went with argparse
+            2026-10-19: plot_sensor takes the data file, plot file and
+            time/depth window as arguments for gandalf_plot_service;
+            the command line sensor/file override moved to argparse
 """
 import sys
 import time
@@ -24,18 +27,16 @@ import pandas as pd
 import matplotlib
 matplotlib.use('Agg')
 import cmocean
-import plotly.figure_factory as ff
-import plotly.graph_objects as go
 from datetime import datetime
 from matplotlib import dates as mpd
 from matplotlib import pyplot as plt
 from matplotlib import colors as colors
 from matplotlib import cm as cm
 from gandalf_utils import get_vehicle_config, get_sensor_config
+from gandalf_utils import get_sensor_lookup
 from gandalf_utils import flight_status
-from gandalf_slocum_local import dinkum_convert
+from gandalf_metrics import stage
 from geojson import Feature, Point, FeatureCollection, LineString
-import statsmodels.api as sm_api
 import warnings
 warnings.filterwarnings("ignore")
 logging.basicConfig(level=logging.WARNING)
@@ -51,6 +52,10 @@ def get_cli_args():
     arg_p = argparse.ArgumentParser()
     arg_p.add_argument("-v", "--vehicle", help="vehicle name",
                        nargs="?", required='True')
+    # 2026-10-19 Was sys.argv[2] inside plot_sensor
+    arg_p.add_argument("-s", "--sensor", help="plot just this sensor")
+    arg_p.add_argument("-f", "--file", help="sensors csv to plot from, "
+                       "writes /data/gandalf/tmp/<sensor>.png")
     args = vars(arg_p.parse_args())
     return args
 
@@ -72,25 +77,27 @@ def get_sensor_plot_range(vehicle, sensor):
     """
     Gets plot range for each sensor so we don't overshoot."""
     logging.info("get_sensor_plot_range(%s, %s)" % (vehicle, sensor))
-    sensors = get_sensor_config(vehicle)
-    for record in sensors:
-        if record['sensor'] == sensor:
-            sensor_plot_min = float(record['sensor_plot_min'])
-            sensor_plot_max = float(record['sensor_plot_max'])
-            return (sensor_plot_min, sensor_plot_max)
+    record = get_sensor_lookup(vehicle).get(sensor)
+    if record is None:
+        return None
+    sensor_plot_min = float(record['sensor_plot_min'])
+    sensor_plot_max = float(record['sensor_plot_max'])
+    return (sensor_plot_min, sensor_plot_max)
 
 
 def register_cmocean():
-    """Does what it says."""
-    matplotlib.colormaps.register(name='thermal', cmap=cmocean.cm.thermal)
-    matplotlib.colormaps.register(name='haline', cmap=cmocean.cm.haline)
-    matplotlib.colormaps.register(name='algae', cmap=cmocean.cm.algae)
-    matplotlib.colormaps.register(name='matter', cmap=cmocean.cm.matter)
-    matplotlib.colormaps.register(name='dense', cmap=cmocean.cm.dense)
-    matplotlib.colormaps.register(name='oxygen', cmap=cmocean.cm.oxy)
-    matplotlib.colormaps.register(name='speed', cmap=cmocean.cm.speed)
-    matplotlib.colormaps.register(name='turbid', cmap=cmocean.cm.turbid)
-    matplotlib.colormaps.register(name='tempo', cmap=cmocean.cm.turbid)
+    """Does what it says.
+    2026-10-19: Safe to call more than once, as the MCP daemon does for
+    every run in the same process.
+    """
+    cmaps = [('thermal', cmocean.cm.thermal), ('haline', cmocean.cm.haline),
+             ('algae', cmocean.cm.algae), ('matter', cmocean.cm.matter),
+             ('dense', cmocean.cm.dense), ('oxygen', cmocean.cm.oxy),
+             ('speed', cmocean.cm.speed), ('turbid', cmocean.cm.turbid),
+             ('tempo', cmocean.cm.turbid)]
+    for name, cmap in cmaps:
+        if name not in matplotlib.colormaps:
+            matplotlib.colormaps.register(name=name, cmap=cmap)
 
 
 def config_date_axis(config, vehicle):
@@ -222,6 +229,8 @@ def plot_26C_line(df):
 
     # frac specifies the fraction of the data used when estimating each y-value
     # Smaller value: less smoothing; Larger value: more smoothing
+    # 2026-10-19 statsmodels is only needed here, so only loaded here
+    import statsmodels.api as sm_api
     lowess = sm_api.nonparametric.lowess
     y_smooth = lowess(depths, times, frac=0.05)
 
@@ -229,76 +238,49 @@ def plot_26C_line(df):
     plt.plot(y_smooth[:, 0], y_smooth[:, 1], color='black')
 
 
-def plot_sensor(config, vehicle, sensor):
+def load_plot_frame(config, vehicle, data_file=None, start=None, end=None):
     """
-    Gets jiggy wit it
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Was the top half of plot_sensor. Reads sensors.csv, cuts it
+                to [start, end] and cleans it up for plotting.
+                Returns (data_frame, start_date, end_date), or None if
+                there's nothing to plot.
     """
-    logging.info('plot_sensor(%s): %s' % (vehicle, sensor))
-    fig = config_date_axis(config, vehicle)
     status = flight_status(vehicle)
-
-    # Get config settings
-    sensors = get_sensor_config(vehicle)
-    alt_colormap = config['gandalf']['plots']['alt_colormap']
-    if alt_colormap:
-        for index, value in enumerate(sensors):
-            if value["sensor"] == sensor:
-                cmap = value["alt_colormap"]
-    else:
-        cmap = 'jet'
-    logging.info('plot_sensor(): Processing %s' % sensor)
-    logging.info("plot_sensor(): using %s colormap for %s" % (cmap, sensor))
-    for index, value in enumerate(sensors):
-            if value["sensor"] == sensor:
-                log_scale = bool(value["log_scale"])
-                logging.debug("plot_sensor(%s): Log scale is %s" % (sensor, log_scale))
-
     if status == 'deployed':
         data_dir = config['gandalf']['deployed_data_dir']
     if status == 'recovered':
         data_dir = config['gandalf']['post_data_dir_root']
 
-    # read CSV -- UPDATE NOW USING COMMAND LINE OPTION
-    if len(sys.argv) == 4:
-        file_name = sys.argv[2]
-        logging.debug('make_plots(): Command line file %s' % file_name)
-    else:
-        file_name = "%s/processed_data/sensors.csv" % (data_dir)
-        logging.debug('make_plots(): Config file %s' % file_name)
-    data_frame = pd.read_csv(file_name)
+    if data_file is None:
+        data_file = "%s/processed_data/sensors.csv" % (data_dir)
+    logging.debug('load_plot_frame(): using %s' % data_file)
+    data_frame = pd.read_csv(data_file)
+    # 2026-10-19 Time window for on-demand plots
+    if start is not None:
+        data_frame = data_frame[data_frame['m_present_time'] >= start]
+    if end is not None:
+        data_frame = data_frame[data_frame['m_present_time'] <= end]
 
     df_len = (len(data_frame))
     if df_len == 0:
         logging.debug('gandalf_slocum_plots(): Empty Data Frame')
-        return
+        return None
 
     # Start and End date/time
-    start_date = (time.strftime("%Y-%m-%d",
-                  time.strptime(config["trajectory_datetime"],
-                                "%Y%m%dT%H%M")))
+    if start is not None:
+        start_date = datetime.fromtimestamp(
+            np.nanmin(data_frame['m_present_time'])).strftime("%Y-%m-%d")
+    else:
+        start_date = (time.strftime("%Y-%m-%d",
+                      time.strptime(config["trajectory_datetime"],
+                                    "%Y%m%dT%H%M")))
     end_date = datetime.fromtimestamp(
         np.nanmax(data_frame['m_present_time']))
     end_date = end_date.strftime("%Y-%m-%d")
-
-    logging.info("plot_sensor(): plotting %s" % sensor)
-    logging.info("plot_sensor(): start_date %s" % start_date)
-    logging.info("plot_sensor(): end_date %s" % end_date)
-    # Title and subtitle
-    for record in sensors:
-        if (record['sensor'] == sensor):
-            log_scale = bool(record['log_scale'])
-            if log_scale:
-                subtitle_string = "%s %s Log Scale" % (record['sensor_name'],
-                                                       record['unit_string'])
-                break
-            else:
-                subtitle_string = "%s %s" % (record['sensor_name'],
-                                             record['unit_string'])
-                break
-
-    title_string = "%s %s to %s\n %s" % (config['gandalf']['public_name'],
-                                         start_date, end_date, subtitle_string)
-    plt.title(title_string, fontsize=12, horizontalalignment='center')
+    logging.info("load_plot_frame(): start_date %s" % start_date)
+    logging.info("load_plot_frame(): end_date %s" % end_date)
 
     # Interpolate the NaNs of sci_water_pressure so we can get depths for all
     data_frame['sci_water_pressure'] = (
@@ -309,17 +291,34 @@ def plot_sensor(config, vehicle, sensor):
     data_frame = data_frame[data_frame['sci_water_temp'] != 0]
     data_frame = data_frame[data_frame['m_depth'] > 0]
     data_frame = data_frame[data_frame['sci_water_cond'] != 0]
+    return data_frame, start_date, end_date
 
-    # Set plot ranges to account for over/under spikes
-    (sensor_min, sensor_max) = normalize_sensor_range(sensor, vehicle,
-                                                      data_frame)
 
-    use_bottom = (config['gandalf']['plots']['use_bottom'])
+def make_figure_template(config, vehicle, data_frame, start_date, end_date,
+                         max_depth=None):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Everything in a sensor plot that's the same for every
+                sensor: date axis, depth range, bottom trace, logo and,
+                with alt_colormap, the scatter and its colorbar. Built once
+                per vehicle; render_sensor only swaps the scatter's colours,
+                colormap, limits and the title. NaN readings take the
+                colormap's 'bad' colour, which is transparent, so they
+                vanish as they did when scatter dropped them.
+    """
+    fig = config_date_axis(config, vehicle)
+    axes = plt.gca()
+    template = {'fig': fig, 'axes': axes, 'data_frame': data_frame,
+                'start_date': start_date, 'end_date': end_date,
+                'scatter': None, 'colorbar': None}
 
-    plt.gca().invert_yaxis()
+    axes.invert_yaxis()
     # 2019-08-20 added this as mote-genie was ripping out way
     # out-of-band m_depth numbers
-    if config['gandalf']['plots']['use_max_plot_depth']:
+    if max_depth is not None:
+        max_plot_depth = max_depth
+    elif config['gandalf']['plots']['use_max_plot_depth']:
         logging.debug("gandalf_slocum_plots(): Using max_plot_depth")
         max_plot_depth = config['gandalf']['plots']['max_plot_depth']
     else:
@@ -334,19 +333,14 @@ def plot_sensor(config, vehicle, sensor):
     # check for alt_colormaps
     if config['gandalf']['plots']['alt_colormap']:
         logging.debug('Using alt_colormap...')
-
-        plt.scatter(mpd.epoch2num(data_frame.sci_m_present_time),
-                    data_frame['sci_water_pressure'] * 10, s=15,
-                    c=data_frame[sensor],
-                    lw=0, marker='8', cmap=cmap)
-
-        plt.colorbar().set_label(config.get(
-                                 sensor, record['unit_string']),
-                                 fontsize=10)
-        plt.clim(sensor_min, sensor_max)
+        template['scatter'] = plt.scatter(
+            mpd.epoch2num(data_frame.sci_m_present_time),
+            data_frame['sci_water_pressure'] * 10, s=15,
+            c=np.zeros(len(data_frame)), lw=0, marker='8')
+        template['colorbar'] = plt.colorbar(template['scatter'])
 
     # bottoms up
-    if use_bottom:
+    if config['gandalf']['plots']['use_bottom']:
         logging.debug("Using bottom...")
         logging.debug("Interpolating m_water_depth...")
 
@@ -357,45 +351,150 @@ def plot_sensor(config, vehicle, sensor):
                     data_frame.m_water_depth, marker='.', c='k', s=1, lw=0)
 
     add_logo(vehicle, fig)
-    # 26C line
+    return template
+
+
+def get_figure_template(config, vehicle, data_file=None, start=None,
+                        end=None, max_depth=None):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      load_plot_frame then make_figure_template. None if there's
+                nothing to plot.
+    """
+    loaded = load_plot_frame(config, vehicle, data_file, start, end)
+    if loaded is None:
+        return None
+    return make_figure_template(config, vehicle, *loaded, max_depth=max_depth)
+
+
+def close_figure_template(template):
+    """Done with a vehicle's template"""
+    plt.close(template['fig'])
+    logging.debug("close_figure_template(): Collecting garbage...")
+    gc.collect()
+
+
+def render_sensor(template, config, vehicle, sensor, plot_file=None):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Was the per-sensor half of plot_sensor. Draws sensor on
+                the vehicle's template and saves it. Returns the plot file.
+    """
+    logging.info('render_sensor(%s): %s' % (vehicle, sensor))
+    data_frame = template['data_frame']
+    axes = template['axes']
+
+    # Get config settings -- 2026-10-19 single lookup vs walking sensors
+    record = get_sensor_lookup(vehicle)[sensor]
+    alt_colormap = config['gandalf']['plots']['alt_colormap']
+    if alt_colormap:
+        cmap = record["alt_colormap"]
+    else:
+        cmap = 'jet'
+    logging.info("render_sensor(): using %s colormap for %s" % (cmap, sensor))
+    log_scale = bool(record["log_scale"])
+    logging.debug("render_sensor(%s): Log scale is %s" % (sensor, log_scale))
+
+    # Title and subtitle
+    if log_scale:
+        subtitle_string = "%s %s Log Scale" % (record['sensor_name'],
+                                               record['unit_string'])
+    else:
+        subtitle_string = "%s %s" % (record['sensor_name'],
+                                     record['unit_string'])
+
+    title_string = "%s %s to %s\n %s" % (config['gandalf']['public_name'],
+                                         template['start_date'],
+                                         template['end_date'],
+                                         subtitle_string)
+    axes.set_title(title_string, fontsize=12, horizontalalignment='center')
+
+    # Set plot ranges to account for over/under spikes
+    (sensor_min, sensor_max) = normalize_sensor_range(sensor, vehicle,
+                                                      data_frame)
+    if template['scatter'] is not None:
+        template['scatter'].set_array(data_frame[sensor].to_numpy(dtype=float))
+        template['scatter'].set_cmap(cmap)
+        template['scatter'].set_clim(sensor_min, sensor_max)
+        template['colorbar'].set_label(config.get(
+                                       sensor, record['unit_string']),
+                                       fontsize=10)
+
+    # 26C line, taken off again after saving
+    lines = len(axes.lines)
     if sensor == 'sci_water_temp' and config['gandalf']['plots']['use_26d']:
         logging.info("Start plotting the 26C degree line")
+        plt.sca(axes)
         plot_26C_line(data_frame)
 
     # save it
-    if status == 'deployed':
-        plot_dir = config['gandalf']['plots']['deployed_plot_dir']
-    else:
-        plot_dir = config['gandalf']['plots']['postprocess_plot_dir']
-
-    # UPDATE CHECK for sensor_file command line arg and if true write local
-    if len(sys.argv) == 4:
-            plot_file = "/data/gandalf/tmp/%s.png" % (sensor)
-    else:
-        # Use config file settings
+    if plot_file is None:
+        if flight_status(vehicle) == 'deployed':
+            plot_dir = config['gandalf']['plots']['deployed_plot_dir']
+        else:
+            plot_dir = config['gandalf']['plots']['postprocess_plot_dir']
         plot_file = "%s/%s.png" % (plot_dir, sensor)
-    logging.info("plot_sensor(): Writing %s" % (plot_file))
-    plt.savefig(plot_file, dpi=100)
-    # close figure
-    plt.close(fig)
-    logging.debug("plot_sensor(): Collecting garbage...")
-    gc.collect()
+    logging.info("render_sensor(): Writing %s" % (plot_file))
+    template['fig'].savefig(plot_file, dpi=100)
+    for line in axes.lines[lines:]:
+        line.remove()
     logging.debug("-----------------------------------------------------")
+    return plot_file
 
 
-def make_plots(vehicle):
+def plot_sensor(config, vehicle, sensor, data_file=None, plot_file=None,
+                start=None, end=None, max_depth=None):
+    """
+    Gets jiggy wit it
+    Modified:   2026-10-19
+    Notes:      2026-10-19: data_file and plot_file default to the config's
+                sensors.csv and plot dir; the command line override that
+                read sys.argv here is now the caller's job. start and end
+                (epoch seconds) cut the data to a time window and
+                max_depth overrides the config's plot depth. Returns the
+                plot file, or None if there was nothing to plot.
+                2026-10-19: One sensor on a template of its own. make_plots
+                shares one template across all of a vehicle's sensors.
+    """
+    logging.info('plot_sensor(%s): %s' % (vehicle, sensor))
+    template = get_figure_template(config, vehicle, data_file, start, end,
+                                   max_depth)
+    if template is None:
+        return None
+    try:
+        return render_sensor(template, config, vehicle, sensor, plot_file)
+    finally:
+        close_figure_template(template)
+
+
+def make_plots(vehicle, plot_sensor_list=None):
     """
     The boss
+    2026-10-19: One figure template for all the sensors, built at the
+    first one, instead of a new figure each
+    2026-10-19: plot_sensor_list, if given, instead of the config's
     """
     config = get_vehicle_config(vehicle)
-    plot_sensor_list = config['gandalf']['plots']['plot_sensor_list']
-    # Okay here we go with multiprocessing
-    for sensor in plot_sensor_list:
-        if sensor == 'depth_avg_curr':
-            plot_dac(vehicle)
-            continue
-        else:
-            (plot_sensor(config, vehicle, sensor))
+    if plot_sensor_list is None:
+        plot_sensor_list = config['gandalf']['plots']['plot_sensor_list']
+    template = None
+    loaded = False
+    try:
+        for sensor in plot_sensor_list:
+            with stage('plot:%s' % sensor, vehicle):
+                if sensor == 'depth_avg_curr':
+                    plot_dac(vehicle)
+                    continue
+                if not loaded:
+                    template = get_figure_template(config, vehicle)
+                    loaded = True
+                if template is not None:
+                    render_sensor(template, config, vehicle, sensor)
+    finally:
+        if template is not None:
+            close_figure_template(template)
 
 
 def plot_dac(vehicle):
@@ -462,4 +561,11 @@ if __name__ == '__main__':
     register_cmocean()
     args = get_cli_args()
     vehicle = args['vehicle']
-    make_plots(vehicle)
+    if args['sensor']:
+        plot_file = None
+        if args['file']:
+            plot_file = "/data/gandalf/tmp/%s.png" % args['sensor']
+        plot_sensor(get_vehicle_config(vehicle), vehicle, args['sensor'],
+                    data_file=args['file'], plot_file=plot_file)
+    else:
+        make_plots(vehicle)
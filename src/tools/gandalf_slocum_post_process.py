@@ -6,7 +6,6 @@ import datetime
 import time
 import json
 import geojson
-import simplekml
 import argparse
 import logging
 from gandalf_calc_sensors import calc_salinity, calc_density, calc_soundvel
@@ -17,6 +16,7 @@ from gandalf_slocum_local import slocum_process_local, get_slocum_surfreps
 from gandalf_slocum_binaries_v2 import process_binaries
 import gandalf_slocum_plots_v2 as gsp
 from gandalf_utils import dinkum_convert
+from gandalf_kmz import update_kmz
 
 """
 post-process.py: Simple script to post-process vehicle data.
@@ -120,14 +120,10 @@ def slocum_postprocess_track(vehicle):
     last_pos.properties['wpIcon'] = (config['gandalf']['wpIcon'])
     last_pos.properties['iconSize'] = (config['gandalf']['iconSize'])
     last_pos.properties['last_surfaced'] = last_surfaced
-    last_pos.properties['html'] = """
-        <table class='infoBoxTable'>
-        <tr><td class='td_infoBoxSensor'>Vehicle:</td><td>%s</td></tr>
-        <tr><td class='td_infoBoxSensor'>Date/Time:</td><td>%s</td></tr>
-        <tr><td class='td_infoBoxSensor'>Position:</td><td>%0.4fW/%0.4fN</td></tr>
-        </table>
-        """ % (config['gandalf']['public_name'], last_surfaced,
-               last_lon, last_lat)
+    # 2026-10-19 Infobox properties, infobox.js renders
+    last_pos.properties['infobox'] = 'surf_report'
+    last_pos.properties['public_name'] = config['gandalf']['public_name']
+    last_pos.properties['surf_time'] = last_surfaced
     features.append(track)
     features.append(last_pos)
     fC = FeatureCollection(features)
@@ -139,12 +135,14 @@ def slocum_post_kmz(vehicle):
     """
     For post-processing we use sensor.csv NOT logs as we don't always
     have access to older log files
+
+    2026-10-19: Streamed by gandalf_kmz.update_kmz instead of simplekml.
+    Re-running on the same sensors.csv leaves the file alone.
     """
     logging.info('slocum_post_kmz(): using sensors.csv to generate KML')
     config = get_vehicle_config(vehicle)
     args = get_args()
     status = flight_status(vehicle)
-    kml = simplekml.Kml()
     trackFc = slocum_postprocess_track(vehicle)
     for feature in trackFc['features']:
         if feature['id'] == 'track':
@@ -153,45 +151,14 @@ def slocum_post_kmz(vehicle):
             last_lat = feature['geometry']['coordinates'][1]
             last_lon = feature['geometry']['coordinates'][0]
             last_surfaced = feature['properties']['last_surfaced']
-            balloon_text = """
-            <![CDATA[
-        	    <h2><b><center>%s Deployment End</center></b></h2><hr>
-                    <table width=300>
-                  	<tr>
-                            <td><b>Coordinates:</td></b>
-                            <td>%0.4fW %0.4fN</td>
-                        </tr>
-                        <tr>
-        		    <td><b>Surfaced At:</td></b>
-        		    <td>%s</td>
-        		</tr>
-        	    </table>
-                ]]>""" % (vehicle, last_lon, last_lat, last_surfaced)
-
-    the_track = kml.newlinestring(name=vehicle)
-    the_track.coords = coords
-    the_track.style.linestyle.width = 1
-    the_track.style.linestyle.color = simplekml.Color.yellow
-
-    # start pos
-    start_pos = coords[0]
-    logging.info("slocum_kmz(%s): Start Pos is %s" % (vehicle, start_pos))
-    pnt = kml.newpoint()
-    pnt.coords = [start_pos]
-    pnt.style.iconstyle.scale = .5
-    pnt.style.iconstyle.icon.href = 'https://gandalf.gcoos.org/static/images/green-icon.png'
+            balloon_text = """<h2><b><center>%s Deployment End</center></b></h2><hr>
+<table width=300>
+<tr><td><b>Coordinates:</b></td><td>%0.4fW %0.4fN</td></tr>
+<tr><td><b>Surfaced At:</b></td><td>%s</td></tr>
+</table>""" % (vehicle, last_lon, last_lat, last_surfaced)
 
-    # end pos
-    end_pos = (coords[-1])
-    logging.info("slocum_kmz(%s): End Pos is %s" % (vehicle, end_pos))
-    pnt = kml.newpoint()
-    pnt.style.iconstyle.scale = 1
-    pnt.coords = [end_pos]
-    pnt.style.iconstyle.icon.href = 'https://gandalf.gcoos.org/static/images/slocum_stop.png'
-    pnt.style.balloonstyle.text = balloon_text
-    # write file
-    config = get_vehicle_config(vehicle)
-    status = flight_status(vehicle)
+    logging.info("slocum_kmz(%s): Start Pos is %s" % (vehicle, coords[0]))
+    logging.info("slocum_kmz(%s): End Pos is %s" % (vehicle, coords[-1]))
     # Deployed
     if status == 'deployed':
         kml_file = config['gandalf']['kml_file']
@@ -206,8 +173,9 @@ def slocum_post_kmz(vehicle):
         else:
             kml_file = args["output"]
 
-    logging.info("slocum_kmz(%s): writing %s" % (vehicle, kml_file))
-    kml.save(kml_file)
+    logging.info("slocum_kmz(%s): updating %s" % (vehicle, kml_file))
+    update_kmz(kml_file, vehicle, [], track=coords,
+               end_description=balloon_text)
 
 
 def init_app():
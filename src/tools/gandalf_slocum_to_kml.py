@@ -18,7 +18,6 @@ import time
 import re
 import datetime
 import argparse
-import simplekml
 import math
 import logging
 from decimal import getcontext, Decimal
@@ -26,6 +25,7 @@ import pandas as pd
 from gandalf_utils import get_vehicle_config, flight_status
 from gandalf_utils import dinkum_convert
 from natsort import natsorted
+from gandalf_kmz import update_kmz
 
 
 def get_log_files(config):
@@ -184,120 +184,72 @@ def parse_log_files(config, log_files):
     return df
 
 
-def slocum_kmz(vehicle):
+def surfacing_description(vehicle, coords, last_surfaced, row):
     """
-    DOCSTRING
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      HTML for a surfacing's InfoBox, shown through the style's
+                balloon text to avoid the annoying 'To From' direction links
+    """
+    return """<h2><b><center>%s</center></b></h2><hr>
+<table width=300>
+<tr><td><b>Coordinates:</b></td><td>%0.4fW %0.4fN</td></tr>
+<tr><td><b>Surfaced At:</b></td><td>%s</td></tr>
+<tr><td><b>Because Why:</b></td><td>%s</td></tr>
+<tr><td><b>Mission Name:</b></td><td>%s</td></tr>
+<tr><td><b>Waypoint:</b></td><td>%s Degrees at %s meters</td></tr>
+</table>""" % (vehicle, coords[0], coords[1], last_surfaced,
+               row['because_why'], row['mission_name'],
+               row['waypoint_bearing'], row['waypoint_range'])
+
+
+def slocum_kmz(vehicle, kml_file=None):
+    """
+    2026-10-19: No more simplekml. The surfacings become placemarks for
+    gandalf_kmz.update_kmz, which appends new ones to its store and
+    only rewrites the file when the set has changed. kml_file overrides
+    the config's; a .kmz name gets a real KMZ.
     """
     config = get_vehicle_config(vehicle)
     status = flight_status(vehicle)
     log_files = get_log_files(config)
     data_frame = parse_log_files(config, log_files)
-    surfacings = []
-    kml = simplekml.Kml()
     logging.debug('slocum_kmz(%s)' % vehicle)
     # Drop duplicate coords
     logging.debug("slocum_kmz(%s): Dropping dupe coords" % vehicle)
     data_frame = data_frame.drop_duplicates(subset=('longitude', 'latitude'))
 
     logging.debug("slocum_kmz(%s): building surfacing locations" % (vehicle))
-    # Iterate over data frame
-    if (len(data_frame) == 0):
-        logging.warning('slocum_kmz(%s): No surfacings...', vehicle)
-        return
+    placemarks = []
     for _, row in data_frame.iterrows():
+        # We don't want any zero entries
+        if not (row['longitude'] and row['latitude']):
+            continue
         isnan = math.isnan(float(row['curr_time']))
         if isnan:
             last_surfaced = 'NaN'
         else:
             last_surfaced = (datetime.datetime.fromtimestamp(row['curr_time']).
                          strftime("%Y-%m-%d %H:%M UTC"))
-            logging.debug('slocum_kmz(): last_surfaced at %s' % last_surfaced)
-        # We don't want any zero entries
-        if(row['longitude'] and row['latitude'] != 0.0):
-            coords = (float(row['longitude']), float(row['latitude']))
-            pnt = kml.newpoint(name=last_surfaced)
-            pnt.style.labelstyle.scale = 0  # no text
-            surfacings.append(coords)
-            pnt.coords = ([coords])
-
-        # HTML for Surfacing InfoBoxes  -- we use balloonstyle.text to avoid
-        # the annoying 'To From' direction links
-        balloon_text = """
-	<![CDATA[
-	    <h2><b><center>%s</center></b></h2><hr>
-            <table width=300>
-          	<tr>
-                    <td><b>Coordinates:</td></b>
-                    <td>%0.4fW %0.4fN</td>
-                </tr>
-                <tr>
-		    <td><b>Surfaced At:</td></b>
-		    <td>%s</td>
-		</tr>
-		<tr>
-                    <td><b>Because Why:</td></b>
-                    <td>%s</td>
-                </tr>
-		<tr>
-                    <td><b>Mission Name:</td></b>
-                    <td>%s</td>
-                </tr>
-              	<tr>
-                    <td><b>Waypoint:</b></td>
-                    <td>%s Degrees at %s meters</td>
-		<tr>
-                </tr>
-	    </table>
-        ]]>
-        """ % (vehicle, coords[0], coords[1], last_surfaced,
-	              row['because_why'], row['mission_name'],
-               row['waypoint_bearing'], row['waypoint_range'])
-
-        pnt.style.balloonstyle.text = balloon_text
-        pnt.style.labelstyle.color = simplekml.Color.red  # Make the text red
-        # Use our small yellow circle here
-        pnt.style.iconstyle.scale = .25
-        pnt.style.iconstyle.icon.href = 'https://gandalf.gcoos.org/static/images/circle-yellow.png'
-
-    # track
-    the_track = kml.newlinestring(name=vehicle)
-    the_track.coords = surfacings
-    the_track.style.linestyle.width = 1
-    the_track.style.linestyle.color = simplekml.Color.yellow
-
-    # start pos
-    start_pos = surfacings[0]
-    logging.debug("slocum_kmz(%s): Start Pos is %s" % (vehicle, start_pos))
-    pnt = kml.newpoint()
-    pnt.coords = [start_pos]
-    pnt.style.iconstyle.scale = .5
-    pnt.style.iconstyle.icon.href = 'https://gandalf.gcoos.org/static/images/green-icon.png'
-
-    # end pos
-    end_pos = (surfacings[-1])
-    logging.debug("slocum_kmz(%s): End Pos is %s" % (vehicle, end_pos))
-    pnt = kml.newpoint()
-    pnt.style.iconstyle.scale = 1
-    pnt.coords = [end_pos]
-    pnt.style.iconstyle.icon.href = 'https://gandalf.gcoos.org/static/images/slocum_stop.png'
-    pnt.style.balloonstyle.text = balloon_text
-
-    # write file
-    config = get_vehicle_config(vehicle)
-    status = flight_status(vehicle)
-    # Deployed
-    if status == 'deployed':
-        kml_file = config['gandalf']['kml_file']
-    # Post-Process
-    if status == 'recovered':
-        kml_file = config['gandalf']['post_kml_file']
-    # Command line
-    if len(sys.argv) == 3:
-        kml_file = "%s/%s.kml" % (sys.argv[2], vehicle)
+        coords = [float(row['longitude']), float(row['latitude'])]
+        placemarks.append({'name': last_surfaced, 'coords': coords,
+                           'description': surfacing_description(
+                               vehicle, coords, last_surfaced, row)})
+    if not placemarks:
+        logging.warning('slocum_kmz(%s): No surfacings...', vehicle)
+        return
 
-    logging.debug("slocum_kmz(%s): writing %s" % (vehicle, kml_file))
-    kml.save(kml_file)
+    if kml_file is None:
+        # Deployed
+        if status == 'deployed':
+            kml_file = config['gandalf']['kml_file']
+        # Post-Process
+        if status == 'recovered':
+            kml_file = config['gandalf']['post_kml_file']
 
+    logging.debug("slocum_kmz(%s): updating %s" % (vehicle, kml_file))
+    update_kmz(kml_file, vehicle, placemarks,
+               end_description=placemarks[-1]['description'])
 
 
 def init_app(vehicle, path):
@@ -317,4 +269,4 @@ if __name__ == '__main__':
     else:
         logging.debug("gandalf_slocum_to_kml(): Manual mode...")
         vehicle = sys.argv[1]
-    slocum_kmz(vehicle)
+    slocum_kmz(vehicle, "%s/%s.kml" % (sys.argv[2], vehicle))
@@ -0,0 +1,785 @@
+#!/usr/bin/env python3
+"""
+Name:       gandalf_synth_mission.py
+Created:    2026-10-19
+Modified:   2026-10-19
+Notes:      Synthetic glider missions for gandalf_benchmark and for poking at
+            the pipeline without a vehicle in the water. Writes everything
+            GANDALF consumes, in the same layout the real tools expect:
+
+              - merged Slocum DBAs, one per surfacing, registered in the
+                segment manifest as 'merged'
+              - Slocum surfacing dialog .log files
+              - Seaglider per-dive .nc files plus a matching sg_gdac.json
+              - an ERDDAP .json table for the Slocum track
+              - Waveglider CTD/WX/WG/Waves streams and the wg .cfg
+              - seagliders/local/gdac/erddap.json fleet files with track
+                and last_pos features for the dashboard
+
+            Mission length (days), sensor count and sample interval are
+            configurable. Data comes from a seeded RNG so runs with the same
+            settings write the same files.
+
+            Configs go to <root>/configs, never the real vehicles tree. Point
+            GANDALF_VEHICLE_CONFIGS at it before running anything that reads
+            them (gandalf_benchmark does that for you).
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+from gandalf_segment_manifest import open_manifest, BINARY_TYPES
+
+BENCH_ROOT = '/data/gandalf/benchmarks'
+SAMPLE_SECONDS = 30
+SURFACE_HOURS = 4
+YO_SECONDS = 1800
+MAX_DEPTH = 200.0
+SG_SAMPLE_SECONDS = 10
+SG_MAX_DEPTH = 1000.0
+WG_SAMPLE_SECONDS = 600
+FLEET_SIZE = 20
+# Somewhere in the middle of the Gulf
+START_LAT = 27.0
+START_LON = -86.0
+# (sensor, units, bytes) always written to the merged DBAs
+DBA_SENSORS = [
+    ('m_present_time', 'timestamp', 8),
+    ('sci_m_present_time', 'timestamp', 8),
+    ('m_depth', 'm', 4),
+    ('m_water_depth', 'm', 4),
+    ('m_lat', 'lat', 8),
+    ('m_lon', 'lon', 8),
+    ('m_gps_lat', 'lat', 8),
+    ('m_gps_lon', 'lon', 8),
+    ('m_pitch', 'rad', 4),
+    ('m_battery', 'volts', 4),
+    ('sci_water_pressure', 'bar', 4),
+    ('sci_water_temp', 'degc', 4),
+    ('sci_water_cond', 's/m', 4),
+    ('sci_flbbcd_chlor_units', 'ug/l', 4),
+    ('sci_flbbcd_cdom_units', 'ppb', 4),
+    ('sci_oxy4_oxygen', 'um', 4),
+]
+# sensors.json records for the science sensors we plot
+PLOT_SENSORS = {
+    'sci_water_temp': ('Temperature', '(C)', 5, 32),
+    'sci_water_cond': ('Conductivity', '(S/m)', 3, 7),
+    'sci_flbbcd_chlor_units': ('Chlorophyll', '(ug/l)', 0, 2),
+    'sci_flbbcd_cdom_units': ('CDOM', '(ppb)', 0, 5),
+    'sci_oxy4_oxygen': ('Oxygen', '(uM)', 100, 300),
+}
+DBA_TIME_FORMAT = '%a_%b_%d_%H:%M:%S_%Y'
+LOG_TIME_FORMAT = '%a %b %d %H:%M:%S %Y'
+ERDDAP_TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+def get_cli_args():
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      days, sensors, sample interval, root
+    """
+    logging.debug('get_cli_args()')
+    arg_p = argparse.ArgumentParser()
+    arg_p.add_argument("-d", "--days", help="mission length in days",
+                       type=int, default=1)
+    arg_p.add_argument("-s", "--sensors", help="sensors per DBA",
+                       type=int, default=len(DBA_SENSORS))
+    arg_p.add_argument("-i", "--interval", help="DBA sample seconds",
+                       type=int, default=SAMPLE_SECONDS)
+    arg_p.add_argument("-r", "--root", help="output root", default=BENCH_ROOT)
+    arg_p.add_argument("--seed", help="RNG seed", type=int, default=0)
+    args = vars(arg_p.parse_args())
+    return args
+
+
+def to_dinkum(degrees):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Decimal degrees to Dinkum ddmm.mmm, the inverse of
+                dinkum_convert
+    """
+    degrees = np.asarray(degrees, dtype=np.float64)
+    whole = np.trunc(degrees)
+    return whole * 100 + (degrees - whole) * 60
+
+
+def from_dinkum(dinkum):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Dinkum ddmm.mmm back to decimal degrees, sign and all
+    """
+    dinkum = np.asarray(dinkum, dtype=np.float64)
+    return np.trunc(dinkum / 100) + np.fmod(dinkum, 100) / 60
+
+
+def drift_track(times, rng, start=(START_LAT, START_LON), speed=0.3):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      (lat, lon) arrays for a vehicle wandering at speed m/s
+                with a slowly turning heading
+    """
+    steps = np.diff(times, prepend=times[0])
+    heading = np.cumsum(rng.normal(0, 0.05, len(times))) + rng.uniform(0, 6.28)
+    north = np.cumsum(speed * steps * np.cos(heading))
+    east = np.cumsum(speed * steps * np.sin(heading))
+    lat = start[0] + north / 111000.0
+    lon = start[1] + east / (111000.0 * np.cos(np.radians(start[0])))
+    return lat, lon
+
+
+def yo_depths(times, max_depth, yo_seconds, rng):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Sawtooth dive/climb profile between the surface and
+                max_depth, with a little noise
+    """
+    phase = ((times - times[0]) % yo_seconds) / yo_seconds
+    depth = max_depth * (1 - np.abs(2 * phase - 1))
+    depth += rng.normal(0, 0.5, len(times))
+    return np.clip(depth, 0.1, None)
+
+
+def ocean_state(depth, times, rng):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Temperature (C), salinity and conductivity (S/m) with a
+                warm mixed layer over a thermocline, close enough to the
+                Gulf that calc_sensors and the 26C line have work to do
+    """
+    days = (times - times[0]) / 86400.0
+    temp = 8 + 20.5 * np.exp(-depth / 120.0) + 0.5 * np.sin(days / 5.0)
+    temp += rng.normal(0, 0.05, len(depth))
+    salinity = 35.0 + 1.2 * np.exp(-depth / 200.0) + rng.normal(0, 0.01,
+                                                                len(depth))
+    cond = 2.55 + 0.1225 * temp + 0.09 * (salinity - 35.0)
+    return temp, salinity, cond
+
+
+def synth_sensors(sensor_count):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      DBA_SENSORS padded out with sci_synth_NN to sensor_count
+    """
+    sensors = list(DBA_SENSORS)
+    for index in range(max(0, sensor_count - len(DBA_SENSORS))):
+        sensors.append(('sci_synth_%02d' % index, 'nodim', 4))
+    return sensors
+
+
+def slocum_frame(days, sensors, sample_seconds, start_epoch, rng):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      The whole mission as a merged-DBA style DataFrame. Science
+                sensors are NaN on one cycle in four and m_water_depth only
+                updates every tenth cycle, like the real thing.
+    """
+    times = np.arange(start_epoch, start_epoch + days * 86400,
+                      sample_seconds, dtype=np.float64)
+    rows = len(times)
+    depth = yo_depths(times, MAX_DEPTH, YO_SECONDS, rng)
+    temp, _, cond = ocean_state(depth, times, rng)
+    lat, lon = drift_track(times, rng)
+    water_depth = MAX_DEPTH + 50 + 20 * np.sin((times - start_epoch) /
+                                               86400.0)
+    water_depth[np.arange(rows) % 10 != 0] = np.nan
+    columns = {
+        'm_present_time': times,
+        'sci_m_present_time': times + 0.5,
+        'm_depth': depth,
+        'm_water_depth': water_depth,
+        'm_lat': to_dinkum(lat),
+        'm_lon': to_dinkum(lon),
+        'm_gps_lat': to_dinkum(lat),
+        'm_gps_lon': to_dinkum(lon),
+        'm_pitch': np.where(np.gradient(depth) > 0, -0.45, 0.45),
+        'm_battery': np.linspace(15.5, 15.5 - 0.01 * days, rows),
+        'sci_water_pressure': depth / 10.0,
+        'sci_water_temp': temp,
+        'sci_water_cond': cond,
+        'sci_flbbcd_chlor_units': np.clip(
+            0.8 * np.exp(-((depth - 60) / 25.0) ** 2) +
+            rng.normal(0, 0.02, rows), 0, None),
+        'sci_flbbcd_cdom_units': 1.5 + depth / 200.0 + rng.normal(0, 0.05,
+                                                                  rows),
+        'sci_oxy4_oxygen': 210 - 0.3 * depth + rng.normal(0, 2, rows),
+    }
+    for sensor, _, _ in sensors:
+        if sensor not in columns:
+            columns[sensor] = np.cumsum(rng.normal(0, 0.1, rows))
+    data_frame = pd.DataFrame(dict((sensor, columns[sensor]) for
+                                   sensor, _, _ in sensors))
+    science = [sensor for sensor, _, _ in sensors if sensor.startswith('sci')]
+    data_frame.loc[np.arange(rows) % 4 == 3, science] = np.nan
+    return data_frame
+
+
+def write_dba(dba_file, data_frame, sensors, segment, opened):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      dbd2asc/dba_merge style output: 14 ASCII tags, the
+                sensor/units/bytes label lines, then space separated rows
+                with the trailing space dbd2asc leaves on every line
+    """
+    tags = [
+        ('dbd_label', 'DBD_ASC(dinkum_binary_data_ascii)file'),
+        ('encoding_ver', '2'),
+        ('num_ascii_tags', '14'),
+        ('all_sensors', '0'),
+        ('filename', segment),
+        ('the8x3_filename', '00000000'),
+        ('filename_extension', 'sbd'),
+        ('filename_label', '%s-sbd(00000000)' % segment),
+        ('mission_name', 'BENCH.MI'),
+        ('fileopen_time', time.strftime(DBA_TIME_FORMAT,
+                                        time.gmtime(opened))),
+        ('sensors_per_cycle', str(len(sensors))),
+        ('num_label_lines', '3'),
+        ('num_segments', '1'),
+        ('segment_filename_0', segment),
+    ]
+    with open(dba_file, 'w') as dfile:
+        for key, value in tags:
+            dfile.write('%s: %s\n' % (key, value))
+        dfile.write(' '.join(sensor for sensor, _, _ in sensors) + ' \n')
+        dfile.write(' '.join(units for _, units, _ in sensors) + ' \n')
+        dfile.write(' '.join(str(width) for _, _, width in sensors) + ' \n')
+        data_frame.assign(_trailing='').to_csv(
+            dfile, sep=' ', header=False, index=False, na_rep='NaN',
+            float_format='%.6f')
+
+
+def write_slocum_logs(log_dir, vehicle, surfacings, waypoint):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      One surfacing dialog per .log file, laid out the way
+                parse_log_files indexes it. Returns the file names.
+    """
+    log_files = []
+    reasons = ['Hit a waypoint [behavior surface_2 start_when = 7]',
+               'Surface Dialog [behavior surface_1 start_when = 12]',
+               'Mission time limit [behavior surface_3 start_when = 9]']
+    wp_lat, wp_lon = to_dinkum(waypoint[0]), to_dinkum(waypoint[1])
+    for index, (when, lat, lon) in enumerate(surfacings):
+        stamp = time.gmtime(when)
+        log_file = '%s/%s_network_%s_%d.log' % (
+            log_dir, vehicle, time.strftime('%Y%m%dT%H%M%S', stamp), index)
+        gps = '%.4f N %.4f E' % (to_dinkum(lat), to_dinkum(lon))
+        lines = [
+            'Vehicle Name: %s' % vehicle,
+            'Glider %s at surface.' % vehicle,
+            'Because:%s' % reasons[index % len(reasons)],
+            'MissionName:BENCH.MI MissionNum:%s-%04d (0000.0000)' %
+            (vehicle, index),
+            'Vehicle Name: %s' % vehicle,
+            'Curr Time: %s MT: %8d' % (time.strftime(LOG_TIME_FORMAT, stamp),
+                                        index * SURFACE_HOURS * 3600),
+            'DR  Location:  %s measured      0.0 secs ago' % gps,
+            'GPS TooFar:  69696969.000 N 69696969.000 E measured  1e+308 '
+            'secs ago',
+            'GPS Invalid : %s measured    110.0 secs ago' % gps,
+            'GPS Location:  %s measured     43.1 secs ago' % gps,
+            'Waypoint: (%.4f,%.4f) Range: %dm, Bearing: %ddeg, Age: '
+            '0:10h:min' % (wp_lat, wp_lon, 1000 + index % 5000,
+                           (index * 37) % 360),
+            'sensor:m_battery(volts)=15.1 43.2 secs ago',
+        ]
+        with open(log_file, 'w') as lfile:
+            lfile.write('\n'.join(lines) + '\n')
+        os.utime(log_file, (when, when))
+        log_files.append(log_file)
+    return log_files
+
+
+def register_segments(root_dir, segments):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Puts [(segment, merged_dba, size, mtime)] in the manifest as
+                merged pairs, as if process_binaries had just run. The sbd/
+                tbd paths don't exist, so don't refresh_manifest this root.
+    """
+    flight_type, science_type = BINARY_TYPES['deployed']
+    conn = open_manifest(root_dir)
+    conn.execute('DELETE FROM segments')
+    for file_type in (flight_type, science_type):
+        conn.executemany(
+            'INSERT INTO segments (segment, file_type, path, size, mtime, '
+            "status, dba_file) VALUES (?, ?, ?, ?, ?, 'merged', ?)",
+            [(segment, file_type, '%s/binary_files/%s/%s.%s' %
+              (root_dir, file_type, segment, file_type), size, mtime,
+              merged_dba) for segment, merged_dba, size, mtime in segments])
+    conn.commit()
+    conn.close()
+
+
+def slocum_config(vehicle, root, start_epoch):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      deployment.json with every key the Slocum tools read
+    """
+    data_dir = '%s/deployments/%s' % (root, vehicle)
+    plot_dir = '%s/plots/%s' % (root, vehicle)
+    return {
+        'trajectory_datetime': time.strftime('%Y%m%dT%H%M',
+                                             time.localtime(start_epoch)),
+        'gandalf': {
+            'vehicle': vehicle,
+            'public_name': vehicle.upper(),
+            'vehicle_type': 'slocum',
+            'vehicle_data': 'local',
+            'data_source': 'local',
+            'status': 'deployed',
+            'dash_status': 'active',
+            'operator': 'GANDALF',
+            'PI': 'Benchmark',
+            'project': 'benchmark',
+            'deployment_date': time.strftime('%Y-%m-%d',
+                                             time.localtime(start_epoch)),
+            'deployed_data_dir': data_dir,
+            'post_data_dir_root': data_dir,
+            'gdac_json_dir': '%s/json' % data_dir,
+            'gdac_format': 'json',
+            'ftp_send': False,
+            'style': {'color': 'yellow', 'weight': 2},
+            'currPosIcon': '/static/images/gandalf_slocum.png',
+            'wpIcon': '/static/images/waypoint.png',
+            'iconSize': [32, 32],
+            'teleport_zoom': 8,
+            'infoBoxImage': '/static/images/slocum.png',
+            'kmz_url': '/data/gandalf/deployments/kmz/%s.kmz' % vehicle,
+            'kml_file': '%s/%s.kmz' % (data_dir, vehicle),
+            'post_kml_file': '%s/%s.kmz' % (data_dir, vehicle),
+            'plots': {
+                'deployed_plot_dir': plot_dir,
+                'postprocess_plot_dir': plot_dir,
+                'alt_colormap': True,
+                'use_bottom': True,
+                'use_26d': True,
+                'use_max_plot_depth': False,
+                'max_plot_depth': MAX_DEPTH,
+                'plot_depth_padding': 10,
+                'logo_file': '%s/logo.png' % root,
+                'logo_loc': [60, 500],
+                'plot_sensor_list': list(PLOT_SENSORS),
+            },
+        },
+    }
+
+
+def sensor_records():
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      sensors.json for PLOT_SENSORS
+    """
+    records = []
+    for sensor, (name, units, plot_min, plot_max) in PLOT_SENSORS.items():
+        records.append({'sensor': sensor, 'sensor_name': name,
+                        'unit_string': units, 'log_scale': False,
+                        'alt_colormap': 'viridis',
+                        'sensor_plot_min': plot_min,
+                        'sensor_plot_max': plot_max})
+    return records
+
+
+def write_json(json_file, data):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Makes the directory too
+    """
+    os.makedirs(os.path.dirname(json_file), exist_ok=True)
+    with open(json_file, 'w') as jfile:
+        json.dump(data, jfile, indent=1)
+
+
+def write_vehicle_config(config_root, vehicle, config, sensors=None):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      <config_root>/<vehicle>/ngdac/deployment.json and, if
+                given, sensors.json
+    """
+    write_json('%s/%s/ngdac/deployment.json' % (config_root, vehicle), config)
+    if sensors is not None:
+        write_json('%s/%s/sensors.json' % (config_root, vehicle), sensors)
+
+
+def write_logo(logo_file):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Small PNG for add_logo. matplotlib is only needed here.
+    """
+    from matplotlib import pyplot as plt
+    logo = np.zeros((40, 120, 4), dtype=np.float32)
+    logo[..., 2] = 0.6
+    logo[..., 3] = 1.0
+    plt.imsave(logo_file, logo)
+
+
+def write_erddap_table(table_file, vehicle, data_frame):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      ERDDAP legacy .json table, the format read_json_table and
+                gdac_to_df take
+    """
+    science = data_frame.dropna(subset=['sci_water_temp'])
+    times = [time.strftime(ERDDAP_TIME_FORMAT, time.gmtime(epoch)) for
+             epoch in science['m_present_time']]
+    columns = {
+        'trajectory': [vehicle] * len(science),
+        'time': times,
+        'latitude': from_dinkum(science['m_lat']).round(6),
+        'longitude': from_dinkum(science['m_lon']).round(6),
+        'depth': science['m_depth'].round(2),
+        'pressure': science['sci_water_pressure'].round(3),
+        'temperature': science['sci_water_temp'].round(4),
+        'salinity': (35 + (science['sci_water_cond'] - 2.55 -
+                           0.1225 * science['sci_water_temp']) / 0.09).round(4),
+        'density': (1025 + 0.2 * science['m_depth'] / 10).round(4),
+    }
+    names = list(columns)
+    rows = pd.DataFrame(columns).to_numpy().tolist()
+    types = ['String', 'String'] + ['double'] * (len(names) - 2)
+    units = ['', 'UTC', 'degrees_north', 'degrees_east', 'm', 'dbar',
+             'Celsius', '1', 'kg m-3']
+    write_json(table_file, {'table': {'columnNames': names,
+                                      'columnTypes': types,
+                                      'columnUnits': units, 'rows': rows}})
+
+
+def build_slocum_mission(root, vehicle, days, sensor_count=len(DBA_SENSORS),
+                         sample_seconds=SAMPLE_SECONDS, seed=0):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Merged DBAs (one per surfacing), surfacing logs, manifest,
+                ERDDAP table, deployment.json and sensors.json for a
+                days-long Slocum mission ending now. Returns a dict of
+                what was written.
+    """
+    logging.info('build_slocum_mission(%s): %d days', vehicle, days)
+    rng = np.random.default_rng(seed)
+    start_epoch = int(time.time()) - days * 86400
+    sensors = synth_sensors(sensor_count)
+    config = slocum_config(vehicle, root, start_epoch)
+    data_dir = config['gandalf']['deployed_data_dir']
+    merged_dir = '%s/processed_data/dba/merged' % data_dir
+    log_dir = '%s/ascii_files/logs' % data_dir
+    for path in (merged_dir, log_dir, config['gandalf']['gdac_json_dir'],
+                 config['gandalf']['plots']['deployed_plot_dir']):
+        os.makedirs(path, exist_ok=True)
+    data_frame = slocum_frame(days, sensors, sample_seconds, start_epoch, rng)
+    segment_seconds = SURFACE_HOURS * 3600
+    segment_index = ((data_frame['m_present_time'] - start_epoch) //
+                     segment_seconds).astype(int)
+    segments = []
+    surfacings = []
+    for index, frame in data_frame.groupby(segment_index, sort=True):
+        segment = '%s-%s-%d-%d' % (vehicle, time.strftime(
+            '%Y-%j', time.gmtime(start_epoch)), 0, index)
+        merged_dba = '%s/%07d.dba' % (merged_dir, index)
+        opened = frame['m_present_time'].iloc[0]
+        write_dba(merged_dba, frame, sensors, segment, opened)
+        segments.append((segment, merged_dba, os.path.getsize(merged_dba),
+                         float(opened)))
+        last = frame.iloc[-1]
+        surfacings.append((float(last['m_present_time']),
+                           float(from_dinkum(last['m_lat'])),
+                           float(from_dinkum(last['m_lon']))))
+    register_segments(data_dir, segments)
+    waypoint = (surfacings[-1][1] + 0.1, surfacings[-1][2] + 0.1)
+    log_files = write_slocum_logs(log_dir, vehicle, surfacings, waypoint)
+    write_erddap_table('%s/%s_gdac.json' % (config['gandalf']['gdac_json_dir'],
+                                            vehicle), vehicle, data_frame)
+    write_vehicle_config('%s/configs' % root, vehicle, config,
+                         sensor_records())
+    return {'vehicle': vehicle, 'rows': len(data_frame),
+            'segments': len(segments), 'log_files': log_files,
+            'surfacings': surfacings, 'data_dir': data_dir}
+
+
+def sg_gdac_config(vehicle, nc_dir):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Minimal sg_gdac.json that create_downcast_nc and friends
+                can work from
+    """
+    float_def = {'var_type': 'f8', 'var_fill': 'nan'}
+    sg_vars = {}
+    for sg_var, units in [('ctd_time', 'seconds since 1970-01-01T00:00:00Z'),
+                          ('latitude', 'degrees_north'),
+                          ('longitude', 'degrees_east'), ('ctd_depth', 'm'),
+                          ('ctd_pressure', 'dbar'),
+                          ('temperature', 'Celsius'),
+                          ('conductivity', 'S m-1'), ('salinity', '1'),
+                          ('density', 'kg m-3')]:
+        sg_vars[sg_var] = {'var_def': float_def,
+                           'var_keys': {'units': units, 'long_name': sg_var}}
+    gdac_vars = {}
+    for gdac_var in ['profile_time', 'profile_lat', 'profile_lon', 'u', 'v',
+                     'time_uv', 'lat_uv', 'lon_uv']:
+        gdac_vars[gdac_var] = {'var_def': {'var_type': 'f8',
+                                           'var_fill': -999.0},
+                               'var_keys': {'long_name': gdac_var}}
+    gdac_vars['profile_id'] = {'var_def': {'var_type': 'i4',
+                                           'var_fill': -999},
+                               'var_keys': {'long_name': 'profile_id'}}
+    for gdac_var in ['profile_time_qc', 'profile_lat_qc', 'profile_lon_qc',
+                     'time_uv_qc', 'lat_uv_qc', 'lon_uv_qc', 'lat_qc',
+                     'lon_qc', 'pressure_qc', 'depth_qc', 'density_qc',
+                     'u_qc', 'v_qc', 'temperature_qc', 'conductivity_qc',
+                     'salinity_qc', 'time_qc']:
+        gdac_vars[gdac_var] = {'var_def': {'var_type': 'b',
+                                           'var_fill': -127},
+                               'var_keys': {'long_name': gdac_var,
+                                            'flag_values': 0}}
+    return {
+        'config_settings': {'status': 'deployed',
+                            'trajectory_name': vehicle[:16],
+                            'deployed_gdac_nc_files_out': nc_dir,
+                            'recovered_gdac_nc_files_out': nc_dir},
+        'ctd': {'instrument_ctd': 'SBE41', 'ctd_serial_number': '0000',
+                'ctd_calib_date': '2026-01-01'},
+        'global_attributes': {'format_version':
+                              'IOOS_Glider_NetCDF_v2.0.nc',
+                              'Conventions': 'CF-1.6',
+                              'institution': 'GANDALF benchmark'},
+        'sg_to_gdac_names': {'ctd_time': 'time', 'latitude': 'lat',
+                             'longitude': 'lon', 'ctd_depth': 'depth',
+                             'ctd_pressure': 'pressure'},
+        'sg_variables': sg_vars,
+        'gdac_variables': gdac_vars,
+    }
+
+
+def write_sg_dive_nc(nc_file, start_epoch, dive_seconds, lat, lon, rng):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      One Seaglider dive: V shaped to SG_MAX_DEPTH and back with
+                the variables gandalf_sg2gdac_DIM reads
+    """
+    from netCDF4 import Dataset
+    times = np.arange(start_epoch, start_epoch + dive_seconds,
+                      SG_SAMPLE_SECONDS, dtype=np.float64)
+    depth = yo_depths(times, SG_MAX_DEPTH, dive_seconds, rng)
+    temp, salinity, cond = ocean_state(depth, times, rng)
+    lats, lons = drift_track(times, rng, start=(lat, lon), speed=0.25)
+    dataset = Dataset(nc_file, 'w', format='NETCDF4_CLASSIC')
+    dataset.createDimension('ctd_data_point', len(times))
+    dataset.date_created = time.strftime(ERDDAP_TIME_FORMAT,
+                                         time.gmtime(times[-1]))
+    columns = {'ctd_time': times, 'ctd_depth': depth,
+               'ctd_pressure': depth * 1.01, 'latitude': lats,
+               'longitude': lons, 'temperature': temp,
+               'conductivity': cond, 'salinity': salinity,
+               'density': 1025 + 0.005 * depth}
+    for name, values in columns.items():
+        dataset.createVariable(name, 'f8', ('ctd_data_point',))[:] = values
+    for name in ('temperature_qc', 'conductivity_qc', 'salinity_qc'):
+        dataset.createVariable(name, 'i1', ('ctd_data_point',))[:] = 1
+    for name in ('depth_avg_curr_east', 'depth_avg_curr_north'):
+        dataset.createVariable(name, 'f8')[:] = rng.normal(0, 0.1)
+    dataset.close()
+    return float(lats[-1]), float(lons[-1])
+
+
+def build_seaglider_mission(root, vehicle, days, seed=0, dive_hours=5):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      p<vehicle><dive>.nc files and sg_gdac.json. Returns the dive
+                file list.
+    """
+    logging.info('build_seaglider_mission(%s): %d days', vehicle, days)
+    rng = np.random.default_rng(seed)
+    dive_dir = '%s/deployments/%s/nc_files' % (root, vehicle)
+    nc_dir = '%s/deployments/%s/gdac_nc_files' % (root, vehicle)
+    os.makedirs(dive_dir, exist_ok=True)
+    os.makedirs(nc_dir, exist_ok=True)
+    dive_seconds = dive_hours * 3600
+    start_epoch = int(time.time()) - days * 86400
+    lat, lon = START_LAT, START_LON
+    dive_files = []
+    for dive in range(max(1, days * 24 // dive_hours)):
+        nc_file = '%s/p%s%04d.nc' % (dive_dir, vehicle[-3:], dive + 1)
+        lat, lon = write_sg_dive_nc(nc_file, start_epoch + dive * dive_seconds,
+                                    dive_seconds, lat, lon, rng)
+        dive_files.append(nc_file)
+    write_json('%s/configs/%s/ngdac/sg_gdac.json' % (root, vehicle),
+               sg_gdac_config(vehicle, nc_dir))
+    return dive_files
+
+
+def waveglider_frames(days, seed=0, sample_seconds=WG_SAMPLE_SECONDS):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      [CTD, WX, WG, Waves] DataFrames as gen_mashed_df gets them.
+                Times are epoch milliseconds and each stream reports on its
+                own clock.
+    """
+    rng = np.random.default_rng(seed)
+    start_ms = (int(time.time()) - days * 86400) * 1000
+    end_ms = int(time.time()) * 1000
+
+    def stream(period_ms, offset_ms):
+        times = np.arange(start_ms + offset_ms, end_ms, period_ms,
+                          dtype=np.int64)
+        return pd.DataFrame({'time': times, 'index': np.arange(len(times)),
+                             'kind': 'synthetic'})
+    ctd = stream(sample_seconds * 1000, 0)
+    ctd['temperature'] = 28 + rng.normal(0, 0.2, len(ctd))
+    ctd['salinity'] = 36 + rng.normal(0, 0.05, len(ctd))
+    ctd['conductivity'] = 5.9 + rng.normal(0, 0.02, len(ctd))
+    wx = stream(sample_seconds * 1000, 37000)
+    wx['temperature'] = 29 + rng.normal(0, 1, len(wx))
+    wx['avgWindSpeed'] = np.abs(rng.normal(6, 2, len(wx)))
+    wx['pressure'] = 1013 + rng.normal(0, 3, len(wx))
+    wg = stream(sample_seconds * 500, 11000)
+    wg['latitude'], wg['longitude'] = drift_track(wg['time'].to_numpy() /
+                                                  1000.0, rng, speed=0.8)
+    wg['speed'] = np.abs(rng.normal(0.8, 0.1, len(wg)))
+    waves = stream(sample_seconds * 3000, 53000)
+    waves['Hs'] = np.abs(rng.normal(1.2, 0.3, len(waves)))
+    waves['Dirp'] = rng.uniform(0, 360, len(waves))
+    waves['Fs'] = np.abs(rng.normal(0.12, 0.02, len(waves)))
+    return [ctd, wx, wg, waves]
+
+
+def build_waveglider_config(root, vehicle):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      <vehicle>.cfg for get_wg_config
+    """
+    write_json('%s/configs/%s/%s.cfg' % (root, vehicle, vehicle),
+               {'system': {'join_tolerance_secs': 3600}, 'cmaps': {}})
+
+
+def fleet_feature_collection(vehicle, surfacings, days_wet):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      track + last_pos, the parts of a vehicle's GeoJSON the
+                dashboard reads
+    """
+    coords = [[round(lon, 6), round(lat, 6)] for _, lat, lon in surfacings]
+    last_time, last_lat, last_lon = surfacings[-1]
+    return {'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'id': 'track',
+         'geometry': {'type': 'LineString', 'coordinates': coords},
+         'properties': {}},
+        {'type': 'Feature', 'id': 'last_pos',
+         'geometry': {'type': 'Point', 'coordinates': coords[-1]},
+         'properties': {'vehicle': vehicle, 'latitude': last_lat,
+                        'longitude': last_lon, 'days_wet': days_wet,
+                        'last_surfaced': time.strftime(
+                            '%Y-%m-%d %H:%M UTC', time.gmtime(last_time))}}]}
+
+
+def build_fleet_geojson(root, days, fleet_size=FLEET_SIZE, seed=0):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      seagliders/local/gdac/erddap.json with fleet_size vehicles
+                spread across them, each with a days-long track, and a
+                deployment.json per vehicle. Returns the geojson dir.
+    """
+    logging.info('build_fleet_geojson(): %d vehicles, %d days', fleet_size,
+                 days)
+    rng = np.random.default_rng(seed)
+    geojson_dir = '%s/geojson/%03dd' % (root, days)
+    start_epoch = int(time.time()) - days * 86400
+    times = np.arange(start_epoch, start_epoch + days * 86400,
+                      SURFACE_HOURS * 3600, dtype=np.float64)
+    groups = {'seagliders': [], 'local': [], 'gdac': [], 'erddap': []}
+    for index in range(fleet_size):
+        vehicle = 'bench_fleet_%02d' % index
+        start = (START_LAT + rng.uniform(-2, 2), START_LON + rng.uniform(-3, 3))
+        lat, lon = drift_track(times, rng, start=start)
+        surfacings = list(zip(times, lat, lon))
+        data_type = list(groups)[index % len(groups)]
+        groups[data_type].append(fleet_feature_collection(vehicle, surfacings,
+                                                          days))
+        config = slocum_config(vehicle, root, start_epoch)
+        config['gandalf']['data_source'] = data_type
+        write_vehicle_config('%s/configs' % root, vehicle, config)
+    for data_type, collections in groups.items():
+        write_json('%s/%s.json' % (geojson_dir, data_type), collections)
+    return geojson_dir
+
+
+def build_mission(root, days, sensor_count=len(DBA_SENSORS),
+                  sample_seconds=SAMPLE_SECONDS, fleet_size=FLEET_SIZE,
+                  seed=0, reuse=False):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Everything for one scale. Vehicle names carry the day count
+                so scales can sit side by side under one root. The summary
+                goes to <root>/mission_<days>d.json; with reuse, a summary
+                written with the same settings is returned instead of
+                generating again.
+    """
+    os.makedirs(root, exist_ok=True)
+    mission_file = '%s/mission_%03dd.json' % (root, days)
+    settings = {'days': days, 'sensor_count': sensor_count,
+                'sample_seconds': sample_seconds, 'fleet_size': fleet_size,
+                'seed': seed}
+    if reuse and os.path.exists(mission_file):
+        with open(mission_file) as mfile:
+            mission = json.load(mfile)
+        if mission.get('settings') == settings:
+            logging.info('build_mission(): Reusing %s', mission_file)
+            return mission
+    logo_file = '%s/logo.png' % root
+    if not os.path.exists(logo_file):
+        write_logo(logo_file)
+    mission = build_slocum_mission(root, 'bench_%03dd' % days, days,
+                                   sensor_count, sample_seconds, seed)
+    mission['days'] = days
+    mission['settings'] = settings
+    mission['seaglider'] = 'bench_sg_%03dd' % days
+    mission['dive_files'] = build_seaglider_mission(root, mission['seaglider'],
+                                                    days, seed)
+    mission['waveglider'] = 'bench_wg_%03dd' % days
+    build_waveglider_config(root, mission['waveglider'])
+    mission['geojson_dir'] = build_fleet_geojson(root, days, fleet_size, seed)
+    write_json(mission_file, mission)
+    return mission
+
+
+if __name__ == '__main__':
+    """
+    For command line use
+    """
+    logging.basicConfig(level=logging.INFO)
+    args = get_cli_args()
+    mission = build_mission(args['root'], args['days'], args['sensors'],
+                            args['interval'], seed=args['seed'])
+    logging.info('%s: %d rows in %d segments, %d dives', mission['vehicle'],
+                 mission['rows'], mission['segments'],
+                 len(mission['dive_files']))
+    logging.info('export GANDALF_VEHICLE_CONFIGS=%s/configs', args['root'])
+    sys.exit()
@@ -37,6 +37,7 @@ from geojson import LineString, FeatureCollection, Feature, Point
 from pandas.plotting import register_matplotlib_converters
 from pymongo import MongoClient
 from pymongo import errors
+from gandalf_publish import publish_geojson, GEOJSON_DIR
 
 # THESE SETTINGS NEED TO COME FROM CONFIG FILE EVENTUALLY
 ROOT_DIR = ''
@@ -107,10 +108,11 @@ def combine_dfs(dfs):
 def get_platform_profiles(platform):
     """
     Created: 2024-01-23
-    Modified: 2024-02-03
+    Modified: 2026-10-19
     Author: robertdcurrier@gmail.com
     Notes: Retrieves platform profiles via ugos API
     Returns a merged dataframe
+    2026-10-19: None rather than sys.exit() when the platform has no rows
     """
     ugos_dfs = []
     # TO DO  config file file names and other parameters
@@ -134,7 +136,7 @@ def get_platform_profiles(platform):
 
     if df.empty:
         logging.warning('get_platform_profiles(): Unexpected Empty Dataframe')
-        sys.exit()
+        return None
     return df
 
 
@@ -371,12 +373,13 @@ def ugos_plot_last_profile(platform, last_profile, sensor):
 def ugos_surface_marker(platform):
     """
     Created: 2020-06-05
-    Modified: 2024-01-25
+    Modified: 2026-10-19
     Author: robertdcurrier@gmail.com
     Notes: Uses last date/time reported position to generate geoJSON
     feature. Feature is returned and added to features[]. When complete,
     features[] is made into a feature collection.
     TO DO: create ugos.cfg and use instead of hardwiring...
+    2026-10-19: Infobox properties instead of html
     """
     client = connect_mongo()
     db = client.gandalf
@@ -424,15 +427,11 @@ def ugos_surface_marker(platform):
     s_last = ROOT_DIR + '/data/gandalf/ugos/plots/%s_psal_last.png' % platform
 
     surf_marker.properties['platform'] = platform
-    surf_marker.properties['html'] = """
-        <h5><center><span class='infoBoxHeading'>UGOS Float Status</span></center></h5>
-        <table class='infoBoxTable'>
-            <tr><td class='td_infoBoxSensor'>Platform:</td><td>%s</td></tr>
-            <tr><td class='td_infoBoxSensor'>PI:</td><td>%s</td></tr>
-            <tr><td class='td_infoBoxSensor'>Date/Time:</td><td>%s</td></tr>
-            <tr><td class='td_infoBoxSensor'>Position:</td><td>%0.4fW/%0.4fN</td></tr>
-        </table>
-        """ % (platform, pi, last_date, lon, lat)
+    # 2026-10-19 Infobox properties, infobox.js renders
+    surf_marker.properties['infobox'] = 'float'
+    surf_marker.properties['float_type'] = 'UGOS'
+    surf_marker.properties['pi'] = pi
+    surf_marker.properties['last_date'] = str(last_date)
     features.append(surf_marker)
     logging.info('ugos_surface_marker(%s): Most Recent Date is %s',
                     platform, last_date)
@@ -442,15 +441,13 @@ def ugos_surface_marker(platform):
 def write_geojson_file(data):
     """
     Created: 2020-06-05
-    Modified: 2020-10-26
+    Modified: 2026-10-19
     Author: robertdcurrier@gmail.com
     Notes: writes out feature collection
+    2026-10-19: Via gandalf_publish (compact, atomic, .gz/.br)
     """
-    fname = (ROOT_DIR + "/data/gandalf/deployments/geojson/ugos.json")
-    logging.warning("write_geojson(): Writing %s" % fname)
-    outf = open(fname,'w')
-    outf.write(str(data))
-    outf.close()
+    logging.warning("write_geojson(): Writing ugos.json")
+    publish_geojson('ugos', data, ROOT_DIR + GEOJSON_DIR)
 
 
 def build_ugos_plots(platform):
@@ -543,6 +540,9 @@ def ugos_process():
     register_matplotlib_converters()
 
     df = get_platform_profiles(platform)
+    if df is None:
+        logging.warning('ugos_process(%d): No profiles, skipping', platform)
+        return
     df_to_mongo(platform, df)
 
     ugos_features = ugos_surface_marker(platform)
@@ -18,6 +18,9 @@ from natsort import natsorted
 from datetime import date, time, timedelta
 from decimal import getcontext, Decimal
 from subprocess import Popen, PIPE
+from gandalf_config_registry import load_vehicle_config, load_sensor_config
+from gandalf_config_registry import get_sensor_lookup
+from gandalf_fleet_registry import get_fleet
 logging.basicConfig(level=logging.INFO)
 
 
@@ -45,28 +48,20 @@ def get_deployment_status_all():
     Name:       get_deployment_status_all
     Author:     bob.currier@gcoos.org
     Created:    2022-06-01
-    Modified:   2022-06-01
+    Modified:   2026-10-19
     Notes:      New version uses deployment.json files vs single gandalf.cfg
                 We now iterate over all deployment.json files looking for
                 vehicles with status of "deployed".  This allows us to not
                 have multiple config files for each vehicle as well as
                 providing better support for multiple vehicle types.
+                2026-10-19: Now queries the fleet registry index instead of
+                parsing every deployment.json ever configured. Same
+                [vehicle, vtype, vdata, vsource] lists as before.
     """
-    # This we have to hardwire.  All other settings come from config files
-    gandalf_config_dir = '/data/gandalf/gandalf_configs/vehicles'
     deployed = []
-    vehicles = [ f.path for f in os.scandir(gandalf_config_dir) if f.is_dir() ]
-    for vehicle in vehicles:
-        config_file = '%s/ngdac/deployment.json' % vehicle
-        with open(config_file) as cfile:
-            gandalf_config = json.loads(cfile.read())
-            vehicle = gandalf_config['gandalf']['vehicle']
-            status = gandalf_config['gandalf']['status']
-            vtype = gandalf_config['gandalf']['vehicle_type']
-            vdata = gandalf_config['gandalf']['vehicle_data']
-            vsource = gandalf_config['gandalf']['data_source']
-            if status == 'deployed':
-                deployed.append([vehicle, vtype, vdata, vsource])
+    for record in get_fleet('deployed'):
+        deployed.append([record['vehicle'], record['vehicle_type'],
+                         record['vehicle_data'], record['data_source']])
     return deployed
 
 
@@ -164,32 +159,30 @@ def get_vehicle_config(vehicle):
     Sorta evident...
     Update: 2023-05023  Added soft landing if vehicle path not found. Prior to this we
     just brain farted and died a screaming death...
+    Update: 2026-10-19  Now served from gandalf_config_registry so we only
+    parse deployment.json when it changes. Returned dict is shared: read-only!
+    Update: 2026-10-19  Raises instead of sys.exit() so one missing config
+    fails that vehicle's job, not the whole MCP run.
 
     """
     logging.debug("get_vehicle_config(%s)" % vehicle)
-    # get config debug for each vehicle
-    data_file = ("/data/gandalf/gandalf_configs/vehicles/%s/ngdac/deployment.json"
-                 % vehicle)
     try:
-        config = open(data_file,'r').read();
+        config = load_vehicle_config(vehicle)
     except FileNotFoundError as e:
         logging.warning('get_vehicle_config(%s): %s' % (vehicle, e))
-        logging.warning('Aborting...')
-        sys.exit()
-    config = json.loads(config)
+        raise
     return config
 
 
 def get_sensor_config(vehicle):
     """
     Sorta evident...
+    Update: 2026-10-19  Cached via gandalf_config_registry. Use
+    get_sensor_lookup() when you want a single sensor's record.
     """
     # get config debug for sensors
     logging.debug('get_sensor_config(%s)' % vehicle)
-    data_file = ("/data/gandalf/gandalf_configs/vehicles/%s/sensors.json") % vehicle
-    with open(data_file, 'r') as f:
-        sensors = json.load(f)
-    return sensors
+    return load_sensor_config(vehicle)
 
 
 if __name__ == '__main__':
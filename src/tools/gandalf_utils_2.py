@@ -18,7 +18,7 @@ from natsort import natsorted
 from datetime import date, time, timedelta
 from decimal import getcontext, Decimal
 from subprocess import Popen, PIPE
-from haversine import haversine, Unit
+from gandalf_eez import eez_fleet_check
 logging.basicConfig(level=logging.WARNING)
 
 
@@ -26,32 +26,18 @@ def eez_early_warning(vehicle, last_pos):
     """
     Author:     robertdcurrier@gmail.com
     Created:    2023-09-20
-    Modified:   2023-09-20
+    Modified:   2026-10-19
     Notes:      Checks latest coordinates for each vehicle and alerts
                 if distance to US EEZ border is < 50 miles. The distance
                 threshold should be a config file setting.
+                2026-10-19: Now uses gandalf_eez so the boundary is loaded
+                once and we measure to segments, not just vertices.
+                Threshold comes from gandalf.eez_threshold if set.
     """
-    eez_threshold = 50
-    eez_dist = []
-    eez = '/data/gandalf/deployments/geojson/gom-eez.json'
     logging.info('eez_early_warning(%s)', vehicle)
-    data = geojson.load(open(eez))
-    for feature in data['features']:
-        coords = (feature['geometry']['coordinates'])
-    for linestring in coords[0]:
-        for pos in linestring:
-            lat = pos[1]
-            lon = pos[0]
-            pos = [lat, lon]
-            distance = haversine(pos, last_pos, unit=Unit.NAUTICAL_MILES)
-            eez_dist.append(distance)
-    dist = min(eez_dist)
-
-    if (dist < eez_threshold):
-        logging.warning("eez_early_warning(%s): EEZ WARNING %d", vehicle, dist)
-        return True
-    else:
-        return False
+    results = eez_fleet_check({vehicle: last_pos})
+    (dist, warning) = results[vehicle]
+    return warning
 
 
 def get_modcomp_path(config):
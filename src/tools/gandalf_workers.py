@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+"""
+Name:       gandalf_workers.py
+Created:    2026-10-19
+Modified:   2026-10-19
+Notes:      Multi-node mode for the gandalf_jobs queue. When GANDALF_BROKER
+            is set, gandalf_mcp still builds and owns the tick, but acts as
+            coordinator: each vehicle stage whose dependencies are done is
+            published to the broker. Worker containers on any node that
+            mounts /data/gandalf pull the jobs and run them:
+
+                GANDALF_BROKER=redis://redis:6379/0 gandalf_workers.py
+
+            A worker holds a lease on its job and renews it from a
+            heartbeat thread. If a worker dies, its lease runs out and the
+            job goes to the next worker. After MAX_LEASES tries it is
+            failed, so a job that kills its worker can't take out the
+            whole pool. Results go back through the broker. The
+            coordinator records them in jobs.db, and the publish jobs
+            (LOCAL_TASKS in gandalf_MP_mcp) run on the coordinator only, so
+            the shared GeoJSON files still have one writer.
+
+            While it waits, the coordinator leases jobs itself. A tick
+            therefore finishes with no workers up, just slower.
+
+            Brokers:
+                redis://host:port/db    Redis 5+, needs the redis package
+                sqlite:///path/to.db    SQLite file on the shared volume.
+                                        Fine for testing and a node or two.
+                                        Don't put it on NFS.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import logging
+import argparse
+import threading
+from gandalf_jobs import start_tick, finish_tick, get_blockers, skip_job
+from gandalf_jobs import mark_running, get_job_message, execute_job
+from gandalf_jobs import record_outcome, run_job
+from gandalf_metrics import reset_run, write_run_report
+
+BROKER_URL = os.environ.get('GANDALF_BROKER') or None
+LEASE_SECONDS = 120
+POLL_SECONDS = 2
+# Leases handed out for one job before we call it failed
+MAX_LEASES = 3
+REDIS_PREFIX = 'gandalf:jobs:'
+BROKER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS broker (
+    job_id TEXT PRIMARY KEY,
+    tick INTEGER NOT NULL,
+    rank INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    worker TEXT,
+    lease_until REAL NOT NULL DEFAULT 0,
+    leases INTEGER NOT NULL DEFAULT 0,
+    checkpoint TEXT,
+    outcome TEXT
+);
+"""
+# Requeue expired leases, then lease the lowest ranked job.
+# KEYS: queue, deadlines, owners, leases, messages
+# ARGV: now, lease seconds, worker
+REDIS_LEASE = """
+local now = tonumber(ARGV[1])
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)) do
+    redis.call('ZREM', KEYS[2], id)
+    redis.call('HDEL', KEYS[3], id)
+    local msg = redis.call('HGET', KEYS[5], id)
+    if msg then
+        redis.call('ZADD', KEYS[1], cjson.decode(msg)['rank'], id)
+    end
+end
+local popped = redis.call('ZPOPMIN', KEYS[1])
+if #popped == 0 then
+    return false
+end
+local id = popped[1]
+redis.call('ZADD', KEYS[2], now + tonumber(ARGV[2]), id)
+redis.call('HSET', KEYS[3], id, ARGV[3])
+redis.call('HINCRBY', KEYS[4], id, 1)
+return id
+"""
+# KEYS: deadlines, owners  ARGV: job_id, worker, new deadline
+REDIS_HEARTBEAT = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('ZADD', KEYS[1], tonumber(ARGV[3]), ARGV[1])
+return 1
+"""
+# KEYS: deadlines, owners, outcomes  ARGV: job_id, worker, outcome
+REDIS_COMPLETE = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('HSET', KEYS[3], ARGV[1], ARGV[3])
+return 1
+"""
+
+
+def get_cli_args():
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Broker, lease length and how long to keep going
+    """
+    logging.debug('get_cli_args()')
+    arg_p = argparse.ArgumentParser()
+    arg_p.add_argument("-b", "--broker", help="redis:// or sqlite:/// URL",
+                       default=BROKER_URL)
+    arg_p.add_argument("-l", "--lease", help="lease seconds", type=int,
+                       default=LEASE_SECONDS)
+    arg_p.add_argument("-m", "--max-jobs", help="exit after this many jobs",
+                       type=int, default=0)
+    arg_p.add_argument("--status", help="show what the broker holds",
+                       action="store_true")
+    args = vars(arg_p.parse_args())
+    return args
+
+
+def get_worker_id():
+    """host:pid, unique across the pool"""
+    return '%s:%d' % (socket.gethostname(), os.getpid())
+
+
+class SQLiteBroker:
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Broker in a SQLite file. A connection per call keeps it
+                safe to use from the heartbeat thread.
+    """
+    def __init__(self, db_file):
+        self.db_file = db_file
+        os.makedirs(os.path.dirname(db_file), exist_ok=True)
+        conn = self.connect()
+        conn.executescript(BROKER_SCHEMA)
+        conn.close()
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_file, timeout=30,
+                               isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def submit(self, message):
+        conn = self.connect()
+        conn.execute('INSERT OR REPLACE INTO broker (job_id, tick, rank, '
+                     'message, checkpoint) VALUES (?, ?, ?, ?, ?)',
+                     (message['job_id'], message['tick'], message['rank'],
+                      json.dumps(message), json.dumps(message['checkpoint'])))
+        conn.close()
+
+    def lease(self, worker, seconds):
+        now = time.time()
+        conn = self.connect()
+        conn.execute('BEGIN IMMEDIATE')
+        row = conn.execute("SELECT * FROM broker WHERE state = 'queued' OR "
+                           "(state = 'leased' AND lease_until < ?) ORDER BY "
+                           "rank, job_id LIMIT 1", (now,)).fetchone()
+        if row is None:
+            conn.execute('COMMIT')
+            conn.close()
+            return None
+        conn.execute("UPDATE broker SET state = 'leased', worker = ?, "
+                     "lease_until = ?, leases = leases + 1 WHERE job_id = ?",
+                     (worker, now + seconds, row['job_id']))
+        conn.execute('COMMIT')
+        conn.close()
+        message = json.loads(row['message'])
+        message['checkpoint'] = json.loads(row['checkpoint'])
+        message['leases'] = row['leases'] + 1
+        return message
+
+    def _update_lease(self, query, params):
+        conn = self.connect()
+        count = conn.execute(query + " WHERE job_id = ? AND worker = ? AND "
+                             "state = 'leased'", params).rowcount
+        conn.close()
+        return count == 1
+
+    def heartbeat(self, job_id, worker, seconds):
+        return self._update_lease('UPDATE broker SET lease_until = ?',
+                                  (time.time() + seconds, job_id, worker))
+
+    def checkpoint(self, job_id, worker, value):
+        return self._update_lease('UPDATE broker SET checkpoint = ?',
+                                  (json.dumps(value), job_id, worker))
+
+    def complete(self, job_id, worker, outcome):
+        return self._update_lease("UPDATE broker SET state = 'finished', "
+                                  "outcome = ?",
+                                  (json.dumps(outcome), job_id, worker))
+
+    def collect(self):
+        conn = self.connect()
+        conn.execute('BEGIN IMMEDIATE')
+        rows = conn.execute("SELECT tick, outcome FROM broker WHERE "
+                            "state = 'finished'").fetchall()
+        conn.execute("DELETE FROM broker WHERE state = 'finished'")
+        conn.execute('COMMIT')
+        conn.close()
+        outcomes = []
+        for row in rows:
+            outcome = json.loads(row['outcome'])
+            outcome['tick'] = row['tick']
+            outcomes.append(outcome)
+        return outcomes
+
+    def purge(self, tick):
+        conn = self.connect()
+        conn.execute('DELETE FROM broker WHERE tick != ?', (tick,))
+        conn.close()
+
+    def status(self):
+        conn = self.connect()
+        counts = dict((row[0], row[1]) for row in conn.execute(
+            'SELECT state, COUNT(*) FROM broker GROUP BY state'))
+        conn.close()
+        return counts
+
+
+class RedisBroker:
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Broker in Redis. Leasing, heartbeats and completion are Lua
+                scripts, so a lease can't be handed out twice or completed
+                by a worker that lost it.
+    """
+    def __init__(self, url, prefix=REDIS_PREFIX):
+        import redis
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.keys = dict((name, prefix + name) for name in
+                         ('queue', 'deadlines', 'owners', 'leases',
+                          'messages', 'checkpoints', 'outcomes'))
+        self.lease_script = self.redis.register_script(REDIS_LEASE)
+        self.heartbeat_script = self.redis.register_script(REDIS_HEARTBEAT)
+        self.complete_script = self.redis.register_script(REDIS_COMPLETE)
+
+    def _forget(self, pipe, job_id):
+        keys = self.keys
+        pipe.zrem(keys['queue'], job_id)
+        pipe.zrem(keys['deadlines'], job_id)
+        for name in ('owners', 'leases', 'checkpoints', 'outcomes',
+                     'messages'):
+            pipe.hdel(keys[name], job_id)
+
+    def submit(self, message):
+        job_id = message['job_id']
+        pipe = self.redis.pipeline()
+        self._forget(pipe, job_id)
+        pipe.hset(self.keys['messages'], job_id, json.dumps(message))
+        pipe.hset(self.keys['checkpoints'], job_id,
+                  json.dumps(message['checkpoint']))
+        pipe.zadd(self.keys['queue'], {job_id: message['rank']})
+        pipe.execute()
+
+    def lease(self, worker, seconds):
+        keys = self.keys
+        job_id = self.lease_script(keys=[keys['queue'], keys['deadlines'],
+                                         keys['owners'], keys['leases'],
+                                         keys['messages']],
+                                   args=[time.time(), seconds, worker])
+        if not job_id:
+            return None
+        message = json.loads(self.redis.hget(keys['messages'], job_id))
+        message['checkpoint'] = json.loads(
+            self.redis.hget(keys['checkpoints'], job_id) or 'null')
+        message['leases'] = int(self.redis.hget(keys['leases'], job_id))
+        return message
+
+    def heartbeat(self, job_id, worker, seconds):
+        return bool(self.heartbeat_script(
+            keys=[self.keys['deadlines'], self.keys['owners']],
+            args=[job_id, worker, time.time() + seconds]))
+
+    def checkpoint(self, job_id, worker, value):
+        if self.redis.hget(self.keys['owners'], job_id) != worker:
+            return False
+        self.redis.hset(self.keys['checkpoints'], job_id, json.dumps(value))
+        return True
+
+    def complete(self, job_id, worker, outcome):
+        return bool(self.complete_script(
+            keys=[self.keys['deadlines'], self.keys['owners'],
+                  self.keys['outcomes']],
+            args=[job_id, worker, json.dumps(outcome)]))
+
+    def collect(self):
+        finished = self.redis.hgetall(self.keys['outcomes'])
+        outcomes = []
+        pipe = self.redis.pipeline()
+        for job_id, outcome in finished.items():
+            message = self.redis.hget(self.keys['messages'], job_id)
+            outcome = json.loads(outcome)
+            outcome['tick'] = json.loads(message)['tick'] if message else None
+            outcomes.append(outcome)
+            self._forget(pipe, job_id)
+        pipe.execute()
+        return outcomes
+
+    def purge(self, tick):
+        pipe = self.redis.pipeline()
+        for job_id, message in self.redis.hgetall(
+                self.keys['messages']).items():
+            if json.loads(message)['tick'] != tick:
+                self._forget(pipe, job_id)
+        pipe.execute()
+
+    def status(self):
+        return {'queued': self.redis.zcard(self.keys['queue']),
+                'leased': self.redis.zcard(self.keys['deadlines']),
+                'finished': self.redis.hlen(self.keys['outcomes'])}
+
+
+def get_broker(url=BROKER_URL):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Broker for a redis:// or sqlite:/// URL (or a bare path)
+    """
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBroker(url)
+    if url.startswith('sqlite://'):
+        url = url[len('sqlite://'):]
+    return SQLiteBroker(url)
+
+
+def keep_leased(broker, job_id, worker, seconds, done):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Heartbeat thread body. Renews at a third of the lease so
+                one missed beat doesn't cost us the job.
+    """
+    while not done.wait(seconds / 3.0):
+        if not broker.heartbeat(job_id, worker, seconds):
+            logging.warning('keep_leased(%s): Lease lost', job_id)
+            return
+
+
+def work_one(broker, tasks, worker, seconds=LEASE_SECONDS):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Leases one job, runs it under a heartbeat and hands back the
+                outcome. Returns False if there was nothing to do.
+    """
+    message = broker.lease(worker, seconds)
+    if message is None:
+        return False
+    job_id = message['job_id']
+    if message['leases'] > MAX_LEASES:
+        logging.warning('work_one(%s): Leased %d times, failing it', job_id,
+                        message['leases'] - 1)
+        broker.complete(job_id, worker, {
+            'job_id': job_id, 'status': 'failed', 'result': None,
+            'checkpoint': message['checkpoint'],
+            'error': 'lease expired %d times' % (message['leases'] - 1)})
+        return True
+    logging.warning('work_one(%s): %s', worker, job_id)
+    message['on_checkpoint'] = lambda value: broker.checkpoint(job_id, worker,
+                                                               value)
+    done = threading.Event()
+    heartbeat = threading.Thread(target=keep_leased,
+                                 args=(broker, job_id, worker, seconds, done))
+    heartbeat.daemon = True
+    heartbeat.start()
+    try:
+        outcome = execute_job(message, tasks)
+    finally:
+        done.set()
+        heartbeat.join()
+    if not broker.complete(job_id, worker, outcome):
+        logging.warning('work_one(%s): Lease lost, result dropped', job_id)
+    return True
+
+
+def deps_done(conn, row):
+    """True when every dependency of the job is done"""
+    deps = json.loads(row['deps'])
+    if not deps:
+        return True
+    waiting = conn.execute("SELECT COUNT(*) FROM jobs WHERE status != 'done' "
+                           "AND job_id IN (%s)" % ','.join('?' * len(deps)),
+                           deps).fetchone()[0]
+    return waiting == 0
+
+
+def lower_ranks_busy(conn, rank):
+    """True while any job ranked before this one is still to run"""
+    return conn.execute("SELECT COUNT(*) FROM jobs WHERE rank < ? AND status "
+                        "IN ('pending', 'running')", (rank,)).fetchone()[0] > 0
+
+
+def run_tick_distributed(conn, jobs, tasks, broker, local_tasks=(),
+                         seconds=LEASE_SECONDS, poll=POLL_SECONDS):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      gandalf_jobs.run_tick with the work farmed out. Jobs go to
+                the broker as soon as their dependencies are done, so one
+                vehicle's plots can run while another is still decoding.
+                local_tasks run here once every lower-ranked job is
+                finished. Returns {status: count}.
+    """
+    tick = start_tick(conn, jobs)
+    broker.purge(tick)
+    worker = 'coordinator@%s' % get_worker_id()
+    summary = {}
+    dispatched = set()
+    while True:
+        for outcome in broker.collect():
+            if outcome['tick'] != tick or outcome['job_id'] not in dispatched:
+                continue
+            dispatched.discard(outcome['job_id'])
+            status = record_outcome(conn, tick, outcome['job_id'], outcome)
+            summary[status] = summary.get(status, 0) + 1
+        pending = conn.execute("SELECT * FROM jobs WHERE status = 'pending' "
+                               "ORDER BY rank, job_id").fetchall()
+        if not pending and not dispatched:
+            break
+        progressed = False
+        for row in pending:
+            blockers = get_blockers(conn, row)
+            if blockers:
+                skip_job(conn, tick, row['job_id'], blockers)
+                summary['skipped'] = summary.get('skipped', 0) + 1
+                progressed = True
+            elif not deps_done(conn, row):
+                continue
+            elif row['task'] in local_tasks:
+                if lower_ranks_busy(conn, row['rank']):
+                    continue
+                status = run_job(conn, tick, row, tasks)
+                summary[status] = summary.get(status, 0) + 1
+                progressed = True
+            else:
+                mark_running(conn, row['job_id'])
+                message = get_job_message(row)
+                message['tick'] = tick
+                broker.submit(message)
+                dispatched.add(row['job_id'])
+                progressed = True
+        if progressed:
+            continue
+        # Lend a hand rather than sit idle
+        if not work_one(broker, tasks, worker, seconds):
+            time.sleep(poll)
+    finish_tick(conn, tick, summary)
+    return summary
+
+
+def run_worker(broker, tasks, seconds=LEASE_SECONDS, max_jobs=0,
+               poll=POLL_SECONDS):
+    """
+    Created:    2026-10-19
+    Modified:   2026-10-19
+    Notes:      Worker loop. Each job gets its own metrics run, written as
+                gandalf_worker_<host>.
+    """
+    worker = get_worker_id()
+    run_name = 'gandalf_worker_%s' % socket.gethostname()
+    logging.warning('run_worker(%s): Waiting for jobs', worker)
+    jobs_done = 0
+    while not max_jobs or jobs_done < max_jobs:
+        reset_run()
+        try:
+            worked = work_one(broker, tasks, worker, seconds)
+        except Exception as error:  # pylint: disable=broad-except
+            # Broker down: wait it out, the leases will sort themselves out
+            logging.warning('run_worker(%s): %s', worker, error)
+            worked = False
+        if not worked:
+            time.sleep(poll)
+            continue
+        write_run_report(run_name)
+        jobs_done += 1
+
+
+if __name__ == '__main__':
+    """
+    For command line use
+    """
+    logging.basicConfig(level=logging.WARNING)
+    args = get_cli_args()
+    if not args['broker']:
+        logging.warning('gandalf_workers: No broker, set GANDALF_BROKER or -b')
+        sys.exit(1)
+    the_broker = get_broker(args['broker'])
+    if args['status']:
+        logging.warning('gandalf_workers: %s', the_broker.status())
+        sys.exit()
+    from gandalf_MP_mcp import TASKS, warm_up
+    warm_up()
+    run_worker(the_broker, TASKS, args['lease'], args['max_jobs'])
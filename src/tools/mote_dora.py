@@ -28,6 +28,7 @@ from geojson import LineString, FeatureCollection, Feature, Point
 from pandas.plotting import register_matplotlib_converters
 from pymongo import MongoClient
 from pymongo import errors
+from gandalf_publish import publish_geojson
 
 # THESE SETTINGS NEED TO COME FROM CONFIG FILE EVENTUALLY
 # END GLOBALS
@@ -61,15 +62,13 @@ def dora_surface_marker(df):
 def write_geojson_file(data):
     """
     Created: 2020-06-05
-    Modified: 2020-10-26
+    Modified: 2026-10-19
     Author: robertdcurrier@gmail.com
     Notes: writes out feature collection
+    2026-10-19: Via gandalf_publish (compact, atomic, .gz/.br)
     """
-    fname = ("/data/gandalf/deployments/geojson/dora.json")
-    logging.warning("write_geojson(): Writing %s" % fname)
-    outf = open(fname,'w')
-    outf.write(str(data))
-    outf.close()
+    logging.warning("write_geojson(): Writing dora.json")
+    publish_geojson('dora', data)
 
 
 def dora_process():